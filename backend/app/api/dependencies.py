@@ -1,9 +1,10 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+import hmac
+import os
 import uuid
 import logging
-from jose import JWTError
 
 logger = logging.getLogger(__name__)
 
@@ -16,14 +17,19 @@ from app.crud.crud_admin import get_admin_by_id as get_admin # Corrected import
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
+# 現場報到機台的共用金鑰（逗號分隔，可同時保留新舊金鑰以便輪替）
+KIOSK_API_KEYS = [key.strip() for key in os.getenv("KIOSK_API_KEYS", "").split(",") if key.strip()]
+
 async def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+    db: Session = Depends(get_db, scope="function"), token: str = Depends(oauth2_scheme)
 ) -> dict:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    from jose import JWTError  # loaded with the first token verification (see app/core/security.py)
+
     try:
         payload = verify_token(token)
         user_id: str = payload.get("sub")
@@ -64,3 +70,8 @@ async def get_current_active_admin(current_user: dict = Depends(get_current_user
     if current_user["role"] != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
     return current_user["user_obj"]
+
+async def verify_kiosk_key(x_kiosk_key: str | None = Header(None)) -> str:
+    if not x_kiosk_key or not any(hmac.compare_digest(x_kiosk_key, key) for key in KIOSK_API_KEYS):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="無效的報到機台金鑰。")
+    return x_kiosk_key
@@ -0,0 +1,111 @@
+import os
+import re
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.dependencies import get_current_active_admin
+from app.core.profiler import PROFILER_DEFAULT_INTERVAL, PROFILER_MAX_SECONDS, Profile, ProfilerBusy, profiler
+from app.core.responses import FastJSONResponse
+from app.db.query_log import query_log
+from app.models.admin import Admin
+
+router = APIRouter()
+
+
+def get_current_system_admin(current_admin: Admin = Depends(get_current_active_admin)) -> Admin:
+    if not current_admin.is_system_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="權限不足：僅系統管理員可查看系統診斷資訊")
+    return current_admin
+
+
+@router.get("/admin/diagnostics/slow-queries", response_model=dict)
+def get_slow_queries(
+    current_admin: Admin = Depends(get_current_system_admin),
+):
+    """
+    慢查詢統計（本 worker）：依總耗時排序的查詢樣式、來源路由與函式、最近一次的執行計畫。
+    """
+    return {
+        "threshold_ms": query_log.threshold_ms,
+        "capacity": query_log.capacity,
+        "explain": query_log.explain,
+        "queries": query_log.snapshot(),
+    }
+
+
+@router.delete("/admin/diagnostics/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def reset_slow_queries(
+    current_admin: Admin = Depends(get_current_system_admin),
+):
+    """
+    清空慢查詢統計。
+    """
+    query_log.reset()
+
+
+# Each worker process has its own profiler: only traffic served by the worker
+# that received the admin call is seen, so responses name the worker.
+REQUEST_CAPTURE_SCOPE = (
+    "only requests served by this worker are captured; with several workers, "
+    "send the reproduction traffic to this pid or run a single worker"
+)
+
+
+def _profile_response(profile: Profile, output: str, name: str, note: Optional[str] = None):
+    if output == "speedscope":
+        document = {**profile.render(output, name), "worker_pid": os.getpid()}
+        if profile.requests is not None:
+            document["requests"] = profile.requests
+        if note:
+            document["note"] = note
+        return document
+    header = (f"# {name}: {profile.samples} samples every {profile.interval * 1000:g} ms "
+              f"over {profile.duration:.1f} s on worker pid {os.getpid()}\n")
+    if note:
+        header += f"# {note}\n"
+    return PlainTextResponse(header + profile.render(output, name))
+
+
+@router.post("/admin/diagnostics/profile", response_class=FastJSONResponse)
+async def profile_worker(
+    seconds: float = Query(10, gt=0, le=PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(PROFILER_DEFAULT_INTERVAL * 1000, ge=1, le=1000),
+    output: Literal["collapsed", "speedscope"] = Query("collapsed", alias="format"),
+    current_admin: Admin = Depends(get_current_system_admin),
+):
+    """
+    對處理此請求的 worker 取樣 N 秒（所有執行緒的呼叫堆疊），回傳 collapsed stacks 或 speedscope JSON。
+    """
+    try:
+        profile = await profiler.sample(seconds, interval_ms / 1000)
+    except ProfilerBusy:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="此 worker 已有剖析正在進行，請稍後再試")
+    return _profile_response(profile, output, f"worker sample {seconds:g}s")
+
+
+@router.post("/admin/diagnostics/profile/requests", response_class=FastJSONResponse)
+async def profile_requests(
+    path: str = Query(..., description="請求路徑的正規表示式，例如 ^/api/v1/patient/appointments$"),
+    method: Optional[str] = Query(None),
+    count: int = Query(5, ge=1, le=1000),
+    timeout: float = Query(60, gt=0, le=PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(1, ge=0.5, le=1000),
+    output: Literal["collapsed", "speedscope"] = Query("collapsed", alias="format"),
+    current_admin: Admin = Depends(get_current_system_admin),
+):
+    """
+    剖析此 worker 接下來 count 個路徑符合的請求，收滿或逾時後回傳結果（同時進行的其他請求也會被取樣）。
+    只看得到由處理此請求的 worker 接收的請求，多個 worker 時回應會標示 worker pid。
+    """
+    try:
+        pattern = re.compile(path).pattern
+    except re.error:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="path 不是有效的正規表示式")
+    try:
+        profile = await profiler.capture_requests(pattern, count, timeout, method=method, interval=interval_ms / 1000)
+    except ProfilerBusy:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="此 worker 已有剖析正在進行，請稍後再試")
+    name = f"{len(profile.requests)} request(s) matching {path}"
+    return _profile_response(profile, output, name, note=REQUEST_CAPTURE_SCOPE)
@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import Any
 from uuid import UUID
-from datetime import date, timedelta
+from datetime import timedelta
 
 from app.db.session import get_db
+from app.core.clock import Clock, get_clock
 from app.crud.crud_user import update_patient_suspended_until, get_patient
 from app.api.dependencies import get_current_active_admin # Corrected dependency import
 
@@ -13,7 +14,8 @@ router = APIRouter()
 @router.post("/patients/{patient_id}/suspend", response_model=dict, status_code=status.HTTP_200_OK)
 async def suspend_patient(
     patient_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_admin_user: Any = Depends(get_current_active_admin), # RBAC protection
 ) -> Any:
     """
@@ -25,7 +27,7 @@ async def suspend_patient(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found.")
 
     # Suspend for a fixed period (e.g., 180 days) or indefinitely
-    suspended_until = date.today() + timedelta(days=180)
+    suspended_until = clock.today() + timedelta(days=180)
     updated_patient = update_patient_suspended_until(db, patient_id=patient_id, suspended_until=suspended_until)
 
     if not updated_patient:
@@ -36,7 +38,7 @@ async def suspend_patient(
 @router.post("/patients/{patient_id}/unsuspend", response_model=dict, status_code=status.HTTP_200_OK)
 async def unsuspend_patient(
     patient_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin_user: Any = Depends(get_current_active_admin), # RBAC protection
 ) -> Any:
     """
@@ -12,7 +12,7 @@ router = APIRouter()
 
 @router.get("/leave-requests", response_model=List[AdminLeaveRequestPublic])
 def get_pending_leave_requests(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Session = Depends(get_current_active_admin),
 ):
     """
@@ -23,7 +23,7 @@ def get_pending_leave_requests(
 @router.put("/leave-requests/{schedule_id}/approve", response_model=ScheduleDoctorPublic)
 def approve_leave_request(
     schedule_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Session = Depends(get_current_active_admin),
 ):
     """
@@ -46,7 +46,7 @@ def approve_leave_request(
 @router.put("/leave-requests/{schedule_id}/reject", response_model=ScheduleDoctorPublic)
 def reject_leave_request(
     schedule_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Session = Depends(get_current_active_admin),
 ):
     """
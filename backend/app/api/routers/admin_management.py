@@ -5,7 +5,10 @@ from typing import List, Optional
 import uuid
 
 from app.db.session import get_db
+from app.db.replicas import get_read_db
+from app.core.clock import Clock, get_clock
 from app.core.security import verify_token
+from app.core.responses import FastJSONResponse
 from app.models.admin import Admin
 from app.models.doctor import Doctor
 from app.models.patient import Patient # Import Patient model
@@ -25,7 +28,7 @@ router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
 
-async def get_current_active_admin(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> Admin:
+async def get_current_active_admin(db: Session = Depends(get_db, scope="function"), token: str = Depends(oauth2_scheme)) -> Admin:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -52,7 +55,8 @@ async def get_current_active_admin(db: Session = Depends(get_db), token: str = D
 # Admin Dashboard Endpoints
 @router.get("/admin/dashboard-stats", response_model=DashboardStats)
 def get_dashboard_stats_endpoint(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     """
@@ -64,7 +68,7 @@ def get_dashboard_stats_endpoint(
     if not current_admin.is_system_admin:
         department = current_admin.department
 
-    stats = get_admin_dashboard_stats(db=db, department=department)
+    stats = get_admin_dashboard_stats(db=db, department=department, clock=clock)
     return stats
 
 
@@ -90,7 +94,7 @@ def _get_and_verify_admin_access(db: Session, target_admin_id: uuid.UUID, curren
 @router.post("/admins/", response_model=AdminPublic, status_code=status.HTTP_201_CREATED)
 def create_admin_endpoint(
     admin_in: AdminCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     if not current_admin.is_system_admin:
@@ -109,7 +113,7 @@ def create_admin_endpoint(
 def list_admins_endpoint(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     if current_admin.is_system_admin:
@@ -130,7 +134,7 @@ def list_admins_endpoint(
 @router.get("/admins/{admin_id}", response_model=AdminPublic)
 def get_admin_endpoint(
     admin_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     target_admin = _get_and_verify_admin_access(db, admin_id, current_admin)
@@ -141,7 +145,7 @@ def get_admin_endpoint(
 def update_admin_endpoint(
     admin_id: uuid.UUID,
     admin_in: AdminUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     target_admin = _get_and_verify_admin_access(db, admin_id, current_admin)
@@ -159,7 +163,7 @@ def update_admin_endpoint(
 @router.delete("/admins/{admin_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_admin_endpoint(
     admin_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     admin_to_delete = _get_and_verify_admin_access(db, admin_id, current_admin)
@@ -192,7 +196,7 @@ def _get_and_verify_doctor_access(db: Session, doctor_id: uuid.UUID, current_adm
 @router.post("/doctors/", response_model=DoctorPublic, status_code=status.HTTP_201_CREATED)
 def create_doctor_endpoint(
     doctor_in: DoctorCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     if not current_admin.is_system_admin and doctor_in.specialty != current_admin.department:
@@ -208,7 +212,7 @@ def create_doctor_endpoint(
 def list_doctors_endpoint(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     department = None
@@ -222,7 +226,7 @@ def list_doctors_endpoint(
 @router.get("/doctors/{doctor_id}", response_model=DoctorPublic)
 def get_doctor_endpoint(
     doctor_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     doctor = _get_and_verify_doctor_access(db, doctor_id, current_admin)
@@ -233,7 +237,7 @@ def get_doctor_endpoint(
 def update_doctor_endpoint(
     doctor_id: uuid.UUID,
     doctor_in: DoctorUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     doctor = _get_and_verify_doctor_access(db, doctor_id, current_admin)
@@ -254,7 +258,7 @@ def update_doctor_endpoint(
 @router.delete("/doctors/{doctor_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_doctor_endpoint(
     doctor_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     _get_and_verify_doctor_access(db, doctor_id, current_admin)
@@ -268,7 +272,7 @@ def delete_doctor_endpoint(
 @router.post("/patients/", response_model=PatientPublic, status_code=status.HTTP_201_CREATED)
 def create_patient_endpoint(
     patient_in: PatientCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     db_patient = crud_user.create_patient(db=db, patient_in=patient_in)
@@ -279,7 +283,7 @@ def create_patient_endpoint(
 def list_patients_endpoint(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     patients = crud_user.list_patients(db=db, skip=skip, limit=limit)
@@ -289,7 +293,7 @@ def list_patients_endpoint(
 @router.get("/patients/{patient_id}", response_model=PatientPublic)
 def get_patient_endpoint(
     patient_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     patient = crud_user.get_patient(db=db, patient_id=patient_id)
@@ -302,7 +306,7 @@ def get_patient_endpoint(
 def update_patient_endpoint(
     patient_id: uuid.UUID,
     patient_in: PatientUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     patient = crud_user.update_patient(db=db, patient_id=patient_id, patient_in=patient_in)
@@ -314,7 +318,7 @@ def update_patient_endpoint(
 @router.delete("/patients/{patient_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_patient_endpoint(
     patient_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     patient = crud_user.delete_patient(db=db, patient_id=patient_id)
@@ -325,7 +329,7 @@ def delete_patient_endpoint(
 
 @router.get("/leave-requests", response_model=List[dict])
 def list_leave_requests_endpoint(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     """
@@ -356,10 +360,10 @@ def _verify_leave_request_department(db: Session, schedule_id: uuid.UUID, admin:
             detail="權限不足：您只能管理您所在科別的請假申請"
         )
 
-@router.put("/leave-requests/{schedule_id}/approve", status_code=status.HTTP_200_OK)
+@router.put("/leave-requests/{schedule_id}/approve", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 def approve_leave_request_endpoint(
     schedule_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     """
@@ -370,10 +374,10 @@ def approve_leave_request_endpoint(
     return {"message": "停診申請已核准。"}
 
 
-@router.put("/leave-requests/{schedule_id}/reject", status_code=status.HTTP_200_OK)
+@router.put("/leave-requests/{schedule_id}/reject", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 def reject_leave_request_endpoint(
     schedule_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     """
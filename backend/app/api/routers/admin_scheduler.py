@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api.dependencies import get_current_active_admin
+from app.models.admin import Admin
+from app.services.scheduled_jobs import scheduler
+
+router = APIRouter()
+
+
+@router.get("/admin/scheduler", response_model=dict)
+def get_scheduler_status(
+    current_admin: Admin = Depends(get_current_active_admin),
+):
+    """
+    查看排程器狀態（是否為 leader）與各排程工作的延遲 / 執行時間統計。
+    """
+    return scheduler.snapshot()
+
+
+@router.post("/admin/scheduler/jobs/{job_name}/run", response_model=dict)
+async def run_scheduler_job(
+    job_name: str,
+    current_admin: Admin = Depends(get_current_active_admin),
+):
+    """
+    立即執行指定的排程工作（例如 clinic_auto_open）。
+    """
+    if job_name not in scheduler.jobs:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"排程工作 {job_name} 不存在。")
+    result = await scheduler.run_job(job_name)
+    return {"job": job_name, "result": result, "metrics": scheduler.jobs[job_name].metrics.as_dict()}
@@ -12,6 +12,7 @@ from app.schemas.patient import PatientCreate, PatientPublic
 from app.schemas.token import Token
 from app.crud import crud_user
 from app.core import security
+from app.core.responses import FastJSONResponse
 from app.utils.email_sender import email_sender # Import the email sender
 from app.models.patient import Patient # Import Patient model
 from app.schemas.auth import EmailRequest, VerifyEmailRequest, ResetPasswordRequest # Import new auth schemas
@@ -26,7 +27,7 @@ router = APIRouter()
 def register_patient(
     payload: PatientCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     logger.info("register_patient: start")
 
@@ -56,7 +57,7 @@ def register_patient(
 
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db, scope="function")):
     logger.info("login_for_access_token: start")
     auth = crud_user.authenticate_user(db, form_data.username, form_data.password)
     if not auth:
@@ -91,11 +92,11 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     return {"access_token": token, "token_type": "bearer"}
 
 
-@router.post("/resend-verification-email", status_code=status.HTTP_200_OK)
+@router.post("/resend-verification-email", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 def resend_verification_email(
     payload: EmailRequest, # Use EmailRequest schema
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     patient = crud_user.get_patient_by_email(db, payload.email) # Use payload.email
     if not patient:
@@ -109,17 +110,17 @@ def resend_verification_email(
     patient.verification_code = otp
     patient.code_expires_at = otp_expires_at
     db.add(patient)
-    db.commit()
+    db.flush()
     db.refresh(patient)
 
     background_tasks.add_task(email_sender.send_verification_email, patient.email, otp)
     return {"message": "Verification email resent successfully."}
 
 
-@router.post("/verify-email", status_code=status.HTTP_200_OK)
+@router.post("/verify-email", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 def verify_email(
     payload: VerifyEmailRequest, # Use VerifyEmailRequest schema
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     patient = crud_user.get_patient_by_email(db, payload.email) # Use payload.email
     if not patient:
@@ -135,17 +136,17 @@ def verify_email(
     patient.verification_code = None
     patient.code_expires_at = None
     db.add(patient)
-    db.commit()
+    db.flush()
     db.refresh(patient)
 
     return {"message": "Email verified successfully."}
 
 
-@router.post("/forgot-password", status_code=status.HTTP_200_OK)
+@router.post("/forgot-password", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 def forgot_password(
     payload: EmailRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     patient = crud_user.get_patient_by_email(db, payload.email)
     if not patient:
@@ -161,7 +162,7 @@ def forgot_password(
     patient.reset_password_token = token
     patient.reset_token_expires_at = now + timedelta(hours=1) # Token valid for 1 hour
     db.add(patient)
-    db.commit()
+    db.flush()
 
     # Send password reset email in the background
     background_tasks.add_task(email_sender.send_password_reset_email, patient.email, token)
@@ -169,10 +170,10 @@ def forgot_password(
     return {"message": "If an account with this email exists, a password reset link has been sent."}
 
 
-@router.post("/reset-password", status_code=status.HTTP_200_OK)
+@router.post("/reset-password", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 def reset_password(
     payload: ResetPasswordRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     patient = crud_user.get_patient_by_reset_token(db, payload.token)
     
@@ -198,6 +199,6 @@ def reset_password(
     patient.reset_token_expires_at = None
     
     db.add(patient)
-    db.commit()
+    db.flush()
 
     return {"message": "Password has been reset successfully."}
\ No newline at end of file
@@ -1,10 +1,11 @@
 from typing import List, Optional
 import uuid
-from datetime import date, datetime
+from datetime import date
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-import pytz # Import pytz
 
+from app.core.clock import Clock, get_clock
+from app.core.responses import FastJSONResponse
 from app.db.session import get_db
 from app.api.dependencies import get_current_active_doctor # 導入正確的 get_current_active_doctor
 from app.models.doctor import Doctor
@@ -16,17 +17,16 @@ from app.schemas.room_day import RoomDayCreate
 from app.schemas.schedule import SchedulePublic # 假設 SchedulePublic 存在
 from app.schemas.leave_request import LeaveRequestCreate, LeaveRequestRangeCreate # 導入請假申請 schema
 from app.services.queue_service import QueueService # Import QueueService
+from app.services.wait_time_service import WaitTimeService
+from app.services.doctor_console_service import DoctorConsoleService
+from app.crud.visit_call_crud import VisitCallCRUD
+from app.crud.crud_queue_event import checkin_event, queue_event
 
 router = APIRouter()
 
-def _get_taiwan_current_date():
-    """Helper to get the current date in Taiwan time zone."""
-    taiwan_tz = pytz.timezone('Asia/Taipei')
-    return datetime.now(taiwan_tz).date()
-
 @router.get("/doctor/schedules", response_model=List[SchedulePublic])
 async def get_doctor_today_schedules(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_doctor: Doctor = Depends(get_current_active_doctor),
     date_str: Optional[str] = Query(None), # Add date_str parameter
     month: Optional[int] = None, # 允許篩選月份
@@ -36,33 +36,14 @@ async def get_doctor_today_schedules(
     """
     獲取醫生指定月份和年份的班表。
     """
-    schedules = crud_schedule.get_doctor_schedules(db, doctor_id=current_doctor.doctor_id, date_str=date_str, month=month, year=year)
-    
-    # 將 Schedule 轉換為 SchedulePublic 格式
-    result = []
-    for s in schedules:
-        # crud_schedule.get_doctor_schedules 返回的是包含 doctor_name 和 specialty 的字典
-        # SchedulePublic 需要這些額外字段
-        result.append(SchedulePublic(
-            schedule_id=s["schedule_id"],
-            doctor_id=s["doctor_id"],
-            date=s["date"],
-            time_period=s["time_period"],
-            status=s["status"],
-            max_patients=s["max_patients"],
-            booked_patients=s["booked_patients"],
-            recurring_group_id=s["recurring_group_id"],
-            created_at=s["created_at"],
-            doctor_name=s["doctor_name"],
-            specialty=s["specialty"]
-        ))
-    return result
-
-
-@router.post("/doctor/me/leave-requests", status_code=status.HTTP_201_CREATED)
+    # get_doctor_schedules 已回傳驗證過的 ScheduleDoctorPublic，直接交給 response_model 輸出
+    return crud_schedule.get_doctor_schedules(db, doctor_id=current_doctor.doctor_id, date_str=date_str, month=month, year=year)
+
+
+@router.post("/doctor/me/leave-requests", status_code=status.HTTP_201_CREATED, response_class=FastJSONResponse)
 async def request_single_day_leave(
     leave_request_in: LeaveRequestCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_doctor: Doctor = Depends(get_current_active_doctor)
 ):
     """
@@ -83,10 +64,10 @@ async def request_single_day_leave(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"單日停診申請失敗: {e}")
 
 
-@router.post("/doctor/me/leave-requests/range", status_code=status.HTTP_201_CREATED)
+@router.post("/doctor/me/leave-requests/range", status_code=status.HTTP_201_CREATED, response_class=FastJSONResponse)
 async def request_range_leave(
     leave_request_in: LeaveRequestRangeCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_doctor: Doctor = Depends(get_current_active_doctor)
 ):
     """
@@ -108,10 +89,11 @@ async def request_range_leave(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"連續停診申請失敗: {e}")
 
 
-@router.post("/doctor/schedules/{schedule_id}/open-clinic", status_code=status.HTTP_200_OK)
+@router.post("/doctor/schedules/{schedule_id}/open-clinic", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 async def open_clinic(
     schedule_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_doctor: Doctor = Depends(get_current_active_doctor)
 ):
     """
@@ -123,8 +105,8 @@ async def open_clinic(
         print(f"DEBUG: Schedule not found or does not belong to doctor. schedule={schedule}, current_doctor.doctor_id={current_doctor.doctor_id}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found or does not belong to this doctor.")
     
-    if schedule.date != _get_taiwan_current_date():
-        print(f"DEBUG: Schedule date is not today. schedule.date={schedule.date}, today={_get_taiwan_current_date()}")
+    if schedule.date != clock.today():
+        print(f"DEBUG: Schedule date is not today. schedule.date={schedule.date}, today={clock.today()}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="只能開診今日的班表。")
 
     try:
@@ -143,10 +125,10 @@ async def open_clinic(
         else:
             print(f"DEBUG: RoomDay found. Updating existing RoomDay.")
             room_day.current_called_sequence = 0 # 重新開診時重置叫號
+            room_day.current_called_position = 0
             room_day.next_sequence = max(room_day.next_sequence, 1) # 確保至少從1開始
             db.add(room_day)
-            db.commit()
-            db.refresh(room_day)
+            db.flush()
             print(f"DEBUG: Existing RoomDay updated.")
 
         # 更新 Schedule 狀態為 'in_progress' 或 'open'
@@ -158,10 +140,11 @@ async def open_clinic(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"開診失敗: {e}")
 
 
-@router.post("/doctor/schedules/{schedule_id}/close-clinic", status_code=status.HTTP_200_OK)
+@router.post("/doctor/schedules/{schedule_id}/close-clinic", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 async def close_clinic(
     schedule_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_doctor: Doctor = Depends(get_current_active_doctor)
 ):
     """
@@ -171,7 +154,7 @@ async def close_clinic(
     if not schedule or schedule.doctor_id != current_doctor.doctor_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found or does not belong to this doctor.")
     
-    if schedule.date != _get_taiwan_current_date():
+    if schedule.date != clock.today():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="只能關診今日的班表。")
 
     try:
@@ -179,7 +162,7 @@ async def close_clinic(
         
         if room_day:
             db.delete(room_day)
-            db.commit()
+            db.flush()
         
         crud_schedule.update_schedule_status(db, schedule_id=schedule_id, new_status="closed")
 
@@ -188,10 +171,28 @@ async def close_clinic(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"關診失敗: {e}")
 
 
+@router.get("/doctor/console/{schedule_id}", response_model=dict)
+def get_doctor_console(
+    schedule_id: uuid.UUID,
+    since_version: Optional[int] = Query(None, description="上次回應的 version，只回傳之後有變動的病患"),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
+    current_doctor: Doctor = Depends(get_current_active_doctor)
+):
+    """
+    醫師看診主控台：一次取得班表、診間狀態、人數統計與候診名單（同一快照）。
+    帶入 since_version 時只回傳之後有變動的病患資料。
+    """
+    return DoctorConsoleService(db, clock=clock).snapshot(
+        doctor_id=current_doctor.doctor_id, schedule_id=schedule_id, since_version=since_version
+    )
+
+
 @router.get("/doctor/schedules/{schedule_id}/queue-status", response_model=dict)
 async def get_doctor_schedule_queue_status(
     schedule_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_doctor: Doctor = Depends(get_current_active_doctor)
 ):
     """
@@ -201,7 +202,7 @@ async def get_doctor_schedule_queue_status(
     if not schedule or schedule.doctor_id != current_doctor.doctor_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found or does not belong to this doctor.")
     
-    if schedule.date != _get_taiwan_current_date():
+    if schedule.date != clock.today():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="只能查詢今日班表的候診資訊。")
 
     room_day = crud_room_day.room_day.get_by_schedule_id(db, schedule_id=schedule_id)
@@ -222,24 +223,26 @@ async def get_doctor_schedule_queue_status(
     # 計算前方等待人數
     waiting_count = 0
     for checkin in checked_in_patients:
-        if checkin.ticket_sequence > room_day.current_called_sequence:
+        if checkin.queue_position is not None and checkin.queue_position > room_day.current_called_position:
             waiting_count += 1
     
-    estimated_wait_time = waiting_count * 10 # 假設每位病患看診10分鐘
+    # 依該醫師該時段的看診時間統計估算（尚無足夠資料時每位病患以 10 分鐘計）
+    estimate = WaitTimeService(db).estimate_minutes(schedule, room_day, waiting_count, clock.now())
 
     return {
         "current_number": f"A{room_day.current_called_sequence:03d}",
         "waiting_count": waiting_count,
-        "estimated_wait_time": estimated_wait_time,
+        **estimate,
         "clinic_status": "開診中",
         "message": "候診資訊已更新。"
     }
 
 
-@router.post("/doctor/schedules/{schedule_id}/call-next-patient", status_code=status.HTTP_200_OK)
+@router.post("/doctor/schedules/{schedule_id}/call-next-patient", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 async def call_next_patient(
     schedule_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_doctor: Doctor = Depends(get_current_active_doctor)
 ):
     """
@@ -249,38 +252,56 @@ async def call_next_patient(
     if not schedule or schedule.doctor_id != current_doctor.doctor_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found or does not belong to this doctor.")
     
-    if schedule.date != _get_taiwan_current_date():
+    if schedule.date != clock.today():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="只能叫號今日班表的病患。")
 
-    room_day = crud_room_day.room_day.get_by_schedule_id(db, schedule_id=schedule_id)
+    # 鎖住 ROOM_DAY 再挑下一位：同時送出的叫號 (重複點擊、沒帶 Idempotency-Key 的重試) 依序執行，不會叫到同一位
+    room_day = crud_room_day.room_day.get_room_day_for_update(db, schedule_id=schedule_id)
 
     if not room_day:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="診間尚未開診，無法叫號。")
     
-    # 增加叫號
-    room_day.current_called_sequence += 1
-    db.add(room_day)
-    db.commit()
-    db.refresh(room_day)
-
-    # 找到被叫號的病患並更新其狀態為 'seen'
-    called_patient_checkin = crud_checkin.checkin.get_checkin_by_schedule_id_and_sequence(
+    # 依候診順序叫下一位已報到的病患 (補報到插隊的病患保留原號碼，所以不能只把號碼加一)
+    waiting = crud_checkin.checkin.get_waiting(db, schedule_id=schedule_id, after_position=room_day.current_called_position, limit=1)
+    if not waiting:
+        return {"message": "目前沒有候診中的病患。"}
+    called_patient_checkin = waiting[0]
+
+    called_at = clock.now()
+    room_day.current_called_sequence = called_patient_checkin.ticket_sequence
+    room_day.current_called_position = called_patient_checkin.queue_position
+    # 與上一次叫號的間隔即為上一位病患的看診時間，併入統計
+    WaitTimeService(db).record_call(room_day, schedule, called_at)
+    db.flush()
+    events = [checkin_event("called", called_patient_checkin)]
+
+    # 被叫號的病患狀態更新為 'seen'
+    called_patient_checkin.status = "seen"
+    db.add(called_patient_checkin)
+    events.append(checkin_event("seen", called_patient_checkin))
+
+    # 保留叫號紀錄：看診時間統計以叫號間隔為樣本，VISIT_CALL 是 backtest_wait_time 回測的歷史資料來源。
+    # 此流程叫號即視為看診 (checkin 直接改為 seen)，所以紀錄直接是 attended，不會被當成待判定的未到。
+    VisitCallCRUD(db).create_visit_call(
         db,
-        schedule_id=schedule_id,
-        ticket_sequence=room_day.current_called_sequence
+        appointment_id=called_patient_checkin.appointment_id,
+        ticket_sequence=called_patient_checkin.ticket_sequence,
+        ticket_number=called_patient_checkin.ticket_number,
+        called_by=None,
+        call_type="call",
+        call_status="attended",
+        called_at=called_at,
     )
-    if called_patient_checkin:
-        called_patient_checkin.status = "seen"
-        db.add(called_patient_checkin)
-        db.commit()
-        db.refresh(called_patient_checkin)
-
-        # Update the corresponding Appointment status to "seen"
-        crud_appointment.appointment_crud.update_status(
-            db,
-            appointment_id=called_patient_checkin.appointment_id,
-            new_status="seen"
-        )
+
+    # Update the corresponding Appointment status to "seen"
+    crud_appointment.appointment_crud.update_status(
+        db,
+        appointment_id=called_patient_checkin.appointment_id,
+        new_status="seen"
+    )
+
+    # 候診事件與叫號同一交易寫入，顯示看板可依 offset 增量讀取
+    queue_event.append_many(db, schedule_id=schedule_id, events=events, occurred_at=called_at)
 
     # TODO: 發送通知給被叫號的病患
 
@@ -290,7 +311,8 @@ async def call_next_patient(
 @router.get("/doctor/schedules/{schedule_id}/waiting-patients", response_model=List[dict])
 async def get_waiting_patients(
     schedule_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_doctor: Doctor = Depends(get_current_active_doctor)
 ):
     """
@@ -300,7 +322,7 @@ async def get_waiting_patients(
     if not schedule or schedule.doctor_id != current_doctor.doctor_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found or does not belong to this doctor.")
     
-    if schedule.date != _get_taiwan_current_date():
+    if schedule.date != clock.today():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="只能查詢今日班表的候診病患。")
 
     room_day = crud_room_day.room_day.get_by_schedule_id(db, schedule_id=schedule_id)
@@ -312,6 +334,7 @@ async def get_waiting_patients(
     appointments = crud_appointment.appointment_crud.get_multi_by_schedule_id(db, schedule_id=schedule_id)
     
     waiting_list = []
+    positions = {} # checkin_id -> queue_position (候診順序，補報到的病患號碼不一定連續)
     for appointment_obj in appointments:
         checkin = crud_checkin.checkin.get_by_appointment_id(db, appointment_id=appointment_obj.appointment_id)
         patient = crud_user.get_patient(db, patient_id=appointment_obj.patient_id)
@@ -336,18 +359,21 @@ async def get_waiting_patients(
                     "checkin_time": checkin.checkin_time,
                     "checkin_id": checkin.checkin_id,
                 })
+                if checkin.queue_position is not None:
+                    positions[checkin.checkin_id] = checkin.queue_position
             
             waiting_list.append(patient_info)
     
-    # Sort by ticket_sequence, so checked-in patients appear first, then pending
-    waiting_list.sort(key=lambda x: x["ticket_sequence"])
+    # Sort by queue order, so checked-in patients appear first, then pending
+    waiting_list.sort(key=lambda x: positions.get(x["checkin_id"], float('inf')))
     return waiting_list
 
-@router.post("/doctor/schedules/{schedule_id}/checkins/{checkin_id}/mark-no-show", status_code=status.HTTP_200_OK)
+@router.post("/doctor/schedules/{schedule_id}/checkins/{checkin_id}/mark-no-show", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 async def mark_patient_no_show(
     schedule_id: uuid.UUID,
     checkin_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_doctor: Doctor = Depends(get_current_active_doctor)
 ):
     """
@@ -357,11 +383,11 @@ async def mark_patient_no_show(
     if not schedule or schedule.doctor_id != current_doctor.doctor_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found or does not belong to this doctor.")
     
-    if schedule.date != _get_taiwan_current_date():
+    if schedule.date != clock.today():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="只能操作今日班表的報到記錄。")
 
     try:
-        queue_service = QueueService(db)
+        queue_service = QueueService(db, clock=clock)
         result = await queue_service.mark_no_show(checkin_id=checkin_id)
         return result
     except HTTPException as e:
@@ -369,11 +395,12 @@ async def mark_patient_no_show(
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"標記未到失敗: {e}")
 
-@router.post("/doctor/schedules/{schedule_id}/checkins/{checkin_id}/re-check-in", status_code=status.HTTP_200_OK)
+@router.post("/doctor/schedules/{schedule_id}/checkins/{checkin_id}/re-check-in", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 async def re_check_in_patient(
     schedule_id: uuid.UUID,
     checkin_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_doctor: Doctor = Depends(get_current_active_doctor)
 ):
     """
@@ -383,11 +410,11 @@ async def re_check_in_patient(
     if not schedule or schedule.doctor_id != current_doctor.doctor_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found or does not belong to this doctor.")
     
-    if schedule.date != _get_taiwan_current_date():
+    if schedule.date != clock.today():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="只能操作今日班表的報到記錄。")
 
     try:
-        queue_service = QueueService(db)
+        queue_service = QueueService(db, clock=clock)
         result = await queue_service.re_check_in(checkin_id=checkin_id)
         return result
     except HTTPException as e:
@@ -397,11 +424,12 @@ async def re_check_in_patient(
         traceback.print_exc() # Print the full traceback to the console
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"補報到失敗: {e}")
 
-@router.post("/doctor/schedules/{schedule_id}/appointments/{appointment_id}/check-in", status_code=status.HTTP_200_OK)
+@router.post("/doctor/schedules/{schedule_id}/appointments/{appointment_id}/check-in", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 async def doctor_manual_check_in(
     schedule_id: uuid.UUID,
     appointment_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_doctor: Doctor = Depends(get_current_active_doctor)
 ):
     """
@@ -411,11 +439,11 @@ async def doctor_manual_check_in(
     if not schedule or schedule.doctor_id != current_doctor.doctor_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found or does not belong to this doctor.")
     
-    if schedule.date != _get_taiwan_current_date():
+    if schedule.date != clock.today():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="只能操作今日班表的報到記錄。")
 
     try:
-        queue_service = QueueService(db)
+        queue_service = QueueService(db, clock=clock)
         result = await queue_service.manual_check_in(schedule_id=schedule_id, appointment_id=appointment_id)
         return result
     except HTTPException as e:
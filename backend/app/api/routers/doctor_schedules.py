@@ -17,7 +17,7 @@ schedule_service = ScheduleService()
 
 @router.get("/me/patients", response_model=List[PatientPublic])
 def list_my_patients(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_doctor: Doctor = Depends(get_current_active_doctor),
 ):
     """
@@ -30,7 +30,7 @@ def list_my_schedules(
     month: Optional[int] = Query(None, description="Filter schedules by month (1-12)"),
     year: Optional[int] = Query(None, description="Filter schedules by year"),
     time_period: Optional[str] = Query(None, description="Filter schedules by time period (e.g., morning, afternoon, night)"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_doctor: Doctor = Depends(get_current_active_doctor),
 ):
     """
@@ -47,7 +47,7 @@ def list_my_schedules(
 @router.post("/me/leave-requests", response_model=SchedulePublic, status_code=status.HTTP_201_CREATED)
 def submit_leave_request(
     leave_request_in: DoctorLeaveRequestInput,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_doctor: Doctor = Depends(get_current_active_doctor),
 ):
     """
@@ -72,7 +72,7 @@ def submit_leave_request(
 @router.get("/me/patients/{patient_id}", response_model=PatientPublic)
 def get_my_patient_details(
     patient_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_doctor: Doctor = Depends(get_current_active_doctor),
 ):
     """
@@ -104,7 +104,7 @@ def get_my_patient_details(
 @router.post("/me/leave-requests/range", response_model=List[SchedulePublic], status_code=status.HTTP_201_CREATED)
 def submit_leave_request_range(
     leave_request_in: LeaveRequestRangeCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_doctor: Doctor = Depends(get_current_active_doctor),
 ):
     """
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+
+router = APIRouter()
+
+
+@router.get("/live", response_model=dict)
+def liveness():
+    """
+    程序存活檢查（不碰資料庫）。
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready", response_model=dict)
+def readiness(request: Request):
+    """
+    就緒檢查：啟動預熱（連線池、常用查詢）完成前回傳 503，負載平衡器不會導入流量。
+    """
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "warming_up"})
+    return {"status": "ready", "warmup": request.app.state.warmup}
@@ -0,0 +1,136 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+import hmac
+import logging
+import os
+import time
+
+from app.db.session import get_db
+from app.api.dependencies import verify_kiosk_key
+from app.core import kiosk_signing
+from app.core.clinic_hours import CLINIC_OPEN_TIMES
+from app.core.clock import Clock, get_clock
+from app.crud.crud_appointment import appointment_crud
+from app.schemas.checkin import (
+    KioskAppointmentOption, KioskBatchRequest, KioskBatchResponse, KioskCheckinRequest, KioskCheckinResponse,
+)
+from app.services.checkin_service import CHECKIN_ALLOWED_STATUSES, CheckinService
+from app.services.kiosk_sync_service import KioskSyncService
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+PERIOD_ORDER = {period: index for index, period in enumerate(CLINIC_OPEN_TIMES)}
+KIOSK_BATCH_MAX_ITEMS = int(os.getenv("KIOSK_BATCH_MAX_ITEMS", "200"))
+
+
+def _signature_error(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+async def verified_kiosk_batch(request: Request, kiosk_key: str = Depends(verify_kiosk_key)) -> KioskBatchRequest:
+    """
+    Checks the batch signature (per-kiosk secret over timestamp, nonce and body, see
+    app/core/kiosk_signing.py), rejects stale or replayed uploads, then parses the body.
+    """
+    body = await request.body()
+    kiosk_id = request.headers.get("X-Kiosk-Id", "")
+    timestamp = request.headers.get("X-Kiosk-Timestamp", "")
+    nonce = request.headers.get("X-Kiosk-Nonce", "")
+    signature = request.headers.get("X-Kiosk-Signature", "")
+    secrets = kiosk_signing.KIOSK_SIGNING_SECRETS.get(kiosk_id, [])
+    if not nonce or not any(
+        hmac.compare_digest(signature, kiosk_signing.sign_kiosk_batch(secret, kiosk_id, timestamp, nonce, body))
+        for secret in secrets
+    ):
+        raise _signature_error("批次報到簽章驗證失敗。")
+    max_age = kiosk_signing.KIOSK_SIGNATURE_MAX_AGE_SECONDS
+    try:
+        stale = abs(time.time() - int(timestamp)) > max_age
+    except ValueError:
+        stale = True
+    if stale:
+        raise _signature_error("批次報到簽章已過期，請重新簽章後送出。")
+    if not kiosk_signing.kiosk_nonces.use(f"{kiosk_id}:{nonce}", 2 * max_age):
+        raise _signature_error("此批次報到已送出過，請重新簽章後送出。")
+    try:
+        batch = KioskBatchRequest.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    if batch.kiosk_id != kiosk_id:
+        raise _signature_error("批次報到的機台代號與簽章不符。")
+    if len(batch.items) > KIOSK_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"單次批次報到最多 {KIOSK_BATCH_MAX_ITEMS} 筆。"
+        )
+    return batch
+
+
+@router.post("/checkin", response_model=KioskCheckinResponse, status_code=status.HTTP_200_OK)
+def kiosk_checkin(
+    checkin_in: KioskCheckinRequest,
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
+    kiosk_key: str = Depends(verify_kiosk_key),
+):
+    """
+    現場機台刷卡報到：以健保卡號查詢今日可報到的預約並直接報到，一次請求完成。
+    今日只有一筆預約時直接報到；有多筆時，未指定 appointment_id 會回傳 409 與可選擇的門診清單。
+    """
+    candidates = sorted(
+        appointment_crud.get_by_card_number_and_date(
+            db, card_number=checkin_in.card_number, on_date=clock.today(), statuses=CHECKIN_ALLOWED_STATUSES
+        ),
+        key=lambda row: PERIOD_ORDER.get(row.time_period, len(PERIOD_ORDER)),
+    )
+    if checkin_in.appointment_id is not None:
+        candidates = [row for row in candidates if row.appointment_id == checkin_in.appointment_id]
+    if not candidates:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="查無今日可報到的預約。")
+    if len(candidates) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "今日有多筆預約，請選擇要報到的門診。",
+                "appointments": [
+                    KioskAppointmentOption.model_validate(row, from_attributes=True).model_dump(mode="json")
+                    for row in candidates
+                ],
+            },
+        )
+
+    appointment = candidates[0]
+    ticket_number = CheckinService(db, clock=clock).issue_ticket(
+        db,
+        appointment_id=appointment.appointment_id,
+        patient_id=appointment.patient_id,
+        schedule_id=appointment.schedule_id,
+        checkin_method="onsite",
+    ).ticket_number
+    logger.info(f"機台報到成功: appointment_id={appointment.appointment_id}, 號碼牌 {ticket_number}。")
+    return KioskCheckinResponse(
+        message="報到成功",
+        appointment_id=appointment.appointment_id,
+        ticket_number=ticket_number,
+        time_period=appointment.time_period,
+        doctor_name=appointment.doctor_name,
+    )
+
+
+@router.post("/checkin/batch", response_model=KioskBatchResponse, status_code=status.HTTP_200_OK)
+def kiosk_batch_checkin(
+    batch: KioskBatchRequest = Depends(verified_kiosk_batch),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
+):
+    """
+    機台離線補傳：網路中斷期間暫存的報到紀錄於恢復連線後一次送出。
+    請求須以該機台專屬的簽章金鑰簽章（含時間戳記與 nonce，見 app/core/kiosk_signing.py），號碼依原始刷卡時間分配；
+    每筆回傳個別結果，重送同一批次時已報到的項目會回傳原本的號碼。
+    """
+    results = KioskSyncService(db, clock=clock).sync(batch.items)
+    logger.info(f"機台 {batch.kiosk_id} 補傳 {len(batch.items)} 筆報到紀錄。")
+    return KioskBatchResponse(results=results)
@@ -1,13 +1,15 @@
 # backend/app/api/routers/medical_records.py
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
 
 from ...db.session import get_db
-from ...schemas.medical_record import MedicalRecordCreate, MedicalRecordUpdate, MedicalRecord as MedicalRecordSchema
+from ...db.replicas import get_read_db
+from ...schemas.medical_record import MedicalRecordCreate, MedicalRecordListItem, MedicalRecordSearchHit, MedicalRecordUpdate, MedicalRecord as MedicalRecordSchema
 from ...crud import medical_record as crud_medical_record
+from ...crud import medical_record_search
 from ..dependencies import get_current_user
 from ...models.medical_record import MedicalRecord as MedicalRecordModel
 
@@ -18,7 +20,7 @@ router = APIRouter()
 @router.post("/", response_model=MedicalRecordSchema, status_code=status.HTTP_201_CREATED)
 def create_medical_record(
     medical_record: MedicalRecordCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user: dict = Depends(get_current_user)
 ):
     if current_user["role"] != "doctor":
@@ -36,10 +38,10 @@ def create_medical_record(
     db_medical_record = crud_medical_record.create_medical_record(db=db, medical_record=medical_record_data)
     return db_medical_record
 
-@router.get("/doctor/medical-records", response_model=List[MedicalRecordSchema])
+@router.get("/doctor/medical-records", response_model=List[MedicalRecordListItem])
 def read_doctor_medical_records(
     patient_id: Optional[uuid.UUID] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
     current_user: dict = Depends(get_current_user)
 ):
     if current_user["role"] != "doctor":
@@ -48,26 +50,14 @@ def read_doctor_medical_records(
             detail="Only doctors can view their own medical records."
         )
     
-    medical_records_from_db = crud_medical_record.get_medical_records_by_doctor(
+    return crud_medical_record.get_medical_records_by_doctor(
         db=db, doctor_id=current_user["user_obj"].doctor_id, patient_id=patient_id
     )
 
-    # Manually construct the response to include names from relationships
-    response_records = []
-    for record in medical_records_from_db:
-        record_data = MedicalRecordSchema.model_validate(record)
-        if record.doctor:
-            record_data.doctor_name = record.doctor.name
-        if record.patient:
-            record_data.patient_name = record.patient.name
-        response_records.append(record_data)
-        
-    return response_records
-
-@router.get("/patient/me", response_model=List[MedicalRecordSchema])
+@router.get("/patient/me", response_model=List[MedicalRecordListItem])
 def read_patient_medical_records(
     department: Optional[str] = None, # New optional department query parameter
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
     current_user: dict = Depends(get_current_user)
 ):
     if current_user["role"] != "patient":
@@ -76,26 +66,38 @@ def read_patient_medical_records(
             detail="Only patients can view their own medical records."
         )
     
-    medical_records_from_db = crud_medical_record.get_medical_records_by_patient(
+    return crud_medical_record.get_medical_records_by_patient(
         db=db, patient_id=current_user["user_obj"].patient_id, department=department
     )
 
-    # Manually construct the response to include names from relationships
-    response_records = []
-    for record in medical_records_from_db:
-        record_data = MedicalRecordSchema.model_validate(record)
-        if record.doctor:
-            record_data.doctor_name = record.doctor.name
-        if record.patient:
-            record_data.patient_name = record.patient.name
-        response_records.append(record_data)
-        
-    return response_records
+# Declared before /{record_id} so "search" is not parsed as a record id
+@router.get("/search", response_model=List[MedicalRecordSearchHit])
+def search_medical_records(
+    q: str = Query(..., min_length=1, max_length=200),
+    patient_id: Optional[uuid.UUID] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db, scope="function"),
+    current_user: dict = Depends(get_current_user)
+):
+    # Same scope as the list endpoints: doctors search their own records (optionally one patient), patients their own
+    if current_user["role"] == "doctor":
+        doctor_id = current_user["user_obj"].doctor_id
+    elif current_user["role"] == "patient":
+        doctor_id, patient_id = None, current_user["user_obj"].patient_id
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors and patients can search medical records."
+        )
+
+    return medical_record_search.search_medical_records(
+        db, q=q, doctor_id=doctor_id, patient_id=patient_id, limit=limit
+    )
 
 @router.get("/{record_id}", response_model=MedicalRecordSchema)
 def read_medical_record(
     record_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
     current_user: dict = Depends(get_current_user)
 ):
     db_medical_record = crud_medical_record.get_medical_record(db=db, record_id=record_id)
@@ -120,7 +122,7 @@ def read_medical_record(
 def update_medical_record(
     record_id: uuid.UUID,
     medical_record: MedicalRecordUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user: dict = Depends(get_current_user)
 ):
     db_medical_record = crud_medical_record.get_medical_record(db=db, record_id=record_id)
@@ -139,7 +141,7 @@ def update_medical_record(
 @router.delete("/{record_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_medical_record(
     record_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user: dict = Depends(get_current_user)
 ):
     db_medical_record = crud_medical_record.get_medical_record(db=db, record_id=record_id)
@@ -5,9 +5,14 @@ import uuid
 from pydantic import BaseModel # Import BaseModel
 
 from app.db.session import get_db
+from app.db.replicas import get_read_db
 from app.schemas.appointment import AppointmentCreate, AppointmentPublic, AppointmentInDB
 from app.services.appointment_service import appointment_service
 from app.api.dependencies import get_current_patient # Assuming get_current_patient exists
+from app.core.admission import booking_admission
+from app.core.clock import Clock, get_clock
+from app.core.responses import FastJSONResponse
+from app.services.checkin_service import CheckinService
 from app.crud import crud_doctor # Import crud_doctor module
 from app.crud.crud_user import get_patient
 from app.crud import crud_schedule # Import crud_schedule
@@ -19,11 +24,16 @@ router = APIRouter()
 class CheckinRequest(BaseModel):
     checkin_method: str # "online" or "onsite"
 
-@router.post("/appointments", response_model=AppointmentPublic, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/appointments",
+    response_model=AppointmentPublic,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(booking_admission)], # 開放預約尖峰時經由等候室依序放行
+)
 def create_patient_appointment(
     appointment_in: AppointmentCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_patient: dict = Depends(get_current_patient) # Patient must be logged in
 ):
     """
@@ -68,11 +78,12 @@ def create_patient_appointment(
             detail=f"Failed to create appointment: {e}"
         )
 
-@router.post("/appointments/{appointment_id}/check-in", status_code=status.HTTP_200_OK)
+@router.post("/appointments/{appointment_id}/check-in", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 def patient_check_in(
     appointment_id: uuid.UUID,
     checkin_request: CheckinRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_patient: dict = Depends(get_current_patient)
 ):
     """
@@ -80,7 +91,7 @@ def patient_check_in(
     """
     patient_id = current_patient["patient_id"]
     try:
-        checkin_service = CheckinService(db) # Instantiate CheckinService here
+        checkin_service = CheckinService(db, clock=clock) # Instantiate CheckinService here
         result = checkin_service.create_checkin(
             db,
             patient_id=patient_id,
@@ -98,7 +109,8 @@ def patient_check_in(
 
 @router.get("/appointments", response_model=List[AppointmentPublic])
 def list_patient_appointments(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_patient: dict = Depends(get_current_patient),
     start_date: Optional[str] = Query(None), # Optional start date for filtering
     end_date: Optional[str] = Query(None),   # Optional end date for filtering
@@ -114,14 +126,15 @@ def list_patient_appointments(
         patient_id=patient_id,
         start_date=start_date,
         end_date=end_date,
-        statuses=statuses
+        statuses=statuses,
+        clock=clock
     )
     return appointments_with_details
 
-@router.delete("/appointments/{appointment_id}", status_code=status.HTTP_200_OK)
+@router.delete("/appointments/{appointment_id}", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 def cancel_patient_appointment(
     appointment_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_patient: dict = Depends(get_current_patient)
 ):
     """
@@ -133,7 +146,7 @@ def cancel_patient_appointment(
 
 @router.get("/schedules", response_model=List[ScheduleDoctorPublic])
 def list_schedules_for_patient(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
     specialty: Optional[str] = Query(None),
     doctor_id: Optional[uuid.UUID] = Query(None),
     month: Optional[int] = Query(None),
@@ -155,7 +168,7 @@ def list_schedules_for_patient(
 
 @router.get("/doctors", response_model=List[DoctorPublic])
 def list_doctors_for_patient(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
     specialty: Optional[str] = Query(None),
 ):
     """
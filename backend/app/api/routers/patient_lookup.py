@@ -15,7 +15,7 @@ router = APIRouter()
 @router.get("/{patient_id}", response_model=PatientPublic)
 def read_patient(
     patient_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_doctor: Doctor = Depends(get_current_active_doctor)
 ):
     """
@@ -36,7 +36,7 @@ def read_patient(
 async def lookup_patient(
     patient_name: str,
     patient_email: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_doctor: Doctor = Depends(get_current_active_doctor)
 ):
     """
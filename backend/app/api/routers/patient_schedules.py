@@ -5,6 +5,7 @@ import uuid
 from datetime import date
 
 from app.db.session import get_db
+from app.db.replicas import get_read_db
 from app.crud import crud_schedule, crud_doctor # Import crud_doctor
 from app.schemas.schedule import ScheduleDoctorPublic
 from app.schemas.doctor import DoctorPublic # Import DoctorPublic
@@ -18,7 +19,7 @@ def list_available_schedules_for_patients(
     month: Optional[int] = Query(None, description="Filter schedules by month (1-12)"),
     year: Optional[int] = Query(None, description="Filter schedules by year"),
     time_period: Optional[str] = Query(None, description="Filter schedules by time period (e.g., morning, afternoon, night)"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
 ):
     """
     Retrieve available schedules for patients, with optional filters for specialty, doctor, month, year, and time period.
@@ -36,7 +37,7 @@ def list_available_schedules_for_patients(
 @router.get("/doctors", response_model=List[DoctorPublic])
 def list_public_doctors(
     specialty: Optional[str] = Query(None, description="Filter doctors by specialty"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
 ):
     """
     Retrieve a list of doctors, optionally filtered by specialty.
@@ -24,7 +24,7 @@ router = APIRouter()
 @router.get("/me", response_model=Union[AdminProfileResponse, DoctorProfileResponse, PatientProfileResponse])
 def read_current_user_profile(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
 ):
     user = current_user["user_obj"]
     role = current_user["role"]
@@ -43,7 +43,7 @@ def read_current_user_profile(
 def update_current_user_profile(
     profile_in: Union[PatientProfileUpdate, DoctorProfileUpdate, AdminProfileUpdate],
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
 ):
     user = current_user["user_obj"]
     role = current_user["role"]
@@ -1,21 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import Any
 from datetime import date
 from uuid import UUID # Import UUID
 
-from ...schemas.queue import CallNextRequest
+from ...schemas.queue import CallNextRequest, QueueEventPage
+from ...core.clock import Clock, get_clock
 from ...db.session import get_db
+from ...db.replicas import get_read_db
+from ...crud.crud_queue_event import queue_event
 from ...services.queue_service import QueueService
 from ...services.checkin_service import CheckinService # Import CheckinService
-from ...api.dependencies import get_current_patient # Import get_current_patient
+from ...api.dependencies import get_current_patient, verify_kiosk_key # Import get_current_patient
 
 router = APIRouter()
 
 @router.get("/checkin/queue/{appointment_id}", response_model=dict, status_code=status.HTTP_200_OK)
 async def get_patient_queue_status(
     appointment_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_patient: dict = Depends(get_current_patient)
 ) -> Any:
     """
@@ -23,7 +27,7 @@ async def get_patient_queue_status(
     """
     patient_id = current_patient["patient_id"]
     try:
-        queue_service = QueueService(db)
+        queue_service = QueueService(db, clock=clock)
         status_info = await queue_service.get_patient_queue_status(
             appointment_id=appointment_id,
             patient_id=patient_id
@@ -39,7 +43,8 @@ async def get_patient_queue_status(
 @router.post("/checkin/{appointment_id}", response_model=dict, status_code=status.HTTP_200_OK)
 async def patient_online_checkin(
     appointment_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
     current_patient: dict = Depends(get_current_patient)
 ) -> Any:
     """
@@ -47,7 +52,7 @@ async def patient_online_checkin(
     """
     patient_id = current_patient["patient_id"]
     try:
-        checkin_service = CheckinService(db) # Instantiate CheckinService here
+        checkin_service = CheckinService(db, clock=clock) # Instantiate CheckinService here
         result = checkin_service.create_checkin(
             db=db,
             patient_id=patient_id,
@@ -67,14 +72,15 @@ async def patient_online_checkin(
 async def call_next_ticket(
     schedule_id: UUID,
     request: CallNextRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
+    clock: Clock = Depends(get_clock),
 ) -> Any:
     """
     Endpoint for clinic staff to signal that a ticket number has been called.
     Triggers real-time queue reminders for patients whose turn is approaching.
     """
     try:
-        queue_service = QueueService(db)
+        queue_service = QueueService(db, clock=clock)
         await queue_service.call_next(
             schedule_id=schedule_id,
             called_ticket_sequence=request.called_ticket_sequence
@@ -86,3 +92,23 @@ async def call_next_ticket(
         import traceback
         traceback.print_exc() # Print the full traceback
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.get("/queue/{schedule_id}/events", response_model=QueueEventPage, status_code=status.HTTP_200_OK)
+def list_queue_events(
+    schedule_id: UUID,
+    after: int = Query(0, ge=0, description="上次讀到的 offset，只回傳之後的事件"),
+    limit: int = Query(500, ge=1, le=1000),
+    db: Session = Depends(get_read_db, scope="function"),
+    kiosk_key: str = Depends(verify_kiosk_key),
+) -> Any:
+    """
+    診間候診事件（報到、叫號、看診、未到、補報到、順序調整），依 offset 由舊到新。
+    顯示看板等以 after=上次的 last_offset 增量讀取，不需重新查詢整個候診狀態。
+    """
+    events = queue_event.list_after(db, schedule_id=schedule_id, after=after, limit=limit)
+    return QueueEventPage(
+        schedule_id=schedule_id,
+        events=events,
+        last_offset=events[-1].offset if events else after,
+    )
@@ -7,6 +7,8 @@ from datetime import date
 import logging
 
 from app.db.session import get_db
+from app.db.replicas import get_read_db
+from app.core.responses import FastJSONResponse
 from app.models.admin import Admin
 from app.models.doctor import Doctor
 from app.crud import crud_schedule, crud_doctor
@@ -49,7 +51,7 @@ def _verify_schedule_department(db: Session, schedule_id: uuid.UUID, admin: Admi
 @router.post("/", response_model=SchedulePublic, status_code=status.HTTP_201_CREATED)
 def create_schedule_endpoint(
     schedule_in: ScheduleCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     _verify_doctor_department(db, schedule_in.doctor_id, current_admin)
@@ -63,7 +65,7 @@ def create_schedule_endpoint(
 @router.post("/recurring", response_model=List[SchedulePublic], status_code=status.HTTP_201_CREATED)
 def create_recurring_schedules_endpoint(
     schedule_in: ScheduleRecurringCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     _verify_doctor_department(db, schedule_in.doctor_id, current_admin)
@@ -82,7 +84,7 @@ def list_schedules_endpoint(
     time_period: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     allowed_doctor_ids = doctor_ids
@@ -103,7 +105,7 @@ def list_schedules_endpoint(
 @router.get("/{schedule_id}", response_model=SchedulePublic)
 def get_schedule_endpoint(
     schedule_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     db_schedule = _verify_schedule_department(db, schedule_id, current_admin)
@@ -114,7 +116,7 @@ def get_schedule_endpoint(
 def update_schedule_endpoint(
     schedule_id: uuid.UUID,
     schedule_in: ScheduleUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     _verify_schedule_department(db, schedule_id, current_admin)
@@ -140,7 +142,7 @@ from sqlalchemy import func
 def update_recurring_schedules_endpoint(
     recurring_group_id: uuid.UUID,
     schedule_in: ScheduleRecurringUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     """
@@ -193,7 +195,7 @@ def update_recurring_schedules_endpoint(
 @router.delete("/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_schedule_endpoint(
     schedule_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     _verify_schedule_department(db, schedule_id, current_admin)
@@ -203,11 +205,11 @@ def delete_schedule_endpoint(
     return
 
 
-@router.delete("/recurring/{recurring_group_id}", status_code=status.HTTP_200_OK)
+@router.delete("/recurring/{recurring_group_id}", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 def delete_recurring_schedules_endpoint(
     recurring_group_id: uuid.UUID,
     start_date: date,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_admin: Admin = Depends(get_current_active_admin),
 ):
     # We need to find one schedule in the group to verify department
@@ -15,7 +15,7 @@ router = APIRouter()
 @router.get("/me", response_model=Union[PatientPublic, DoctorPublic, AdminPublic])
 async def read_users_me(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     獲取當前登錄用戶的個人資料。
@@ -36,7 +36,7 @@ async def read_users_me(
 async def update_users_me(
     payload: dict, # 接收原始字典，然後手動解析
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     更新當前登錄用戶的個人資料。
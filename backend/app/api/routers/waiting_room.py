@@ -0,0 +1,33 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, status
+
+from app.core.admission import booking_waiting_room
+from app.core.security import token_principal
+
+router = APIRouter()
+
+
+@router.get("/position", response_model=dict)
+def get_waiting_room_position(
+    x_waiting_room_token: str = Header(..., alias="X-Waiting-Room-Token"),
+    authorization: Optional[str] = Header(None),
+):
+    """
+    查詢預約等候室的排隊位置（不會重新排隊）。等候號碼只對取得它的帳號有效。
+    """
+    principal = token_principal(authorization)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    result = booking_waiting_room.status(x_waiting_room_token, principal)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="等候號碼無效或已過期，請重新送出預約。")
+    return {
+        "admitted": result.admitted,
+        "position": result.position,
+        "estimated_wait_seconds": result.retry_after,
+    }
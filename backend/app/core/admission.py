@@ -0,0 +1,266 @@
+"""
+Virtual waiting room (admission control) for booking routes.
+
+When a new month's slots open, every patient hits the booking endpoint at the
+same moment and they all contend on the same Schedule row locks. Instead of
+letting them all in, each caller takes a ticket from a FIFO queue and tickets
+are admitted at a fixed rate (``WAITING_ROOM_RATE`` per second, with a small
+``WAITING_ROOM_BURST`` so normal traffic never notices the waiting room):
+
+    frontier = min(frontier + elapsed * rate, tail + burst)
+    ticket n is admitted  <=>  n <= frontier
+
+The ticket number travels in a signed token (``X-Waiting-Room-Token``), so
+the store only needs two counters. Clients that are not admitted yet get
+429 with their queue position and a ``Retry-After``; when the queue already
+holds ``WAITING_ROOM_MAX_QUEUE`` callers new arrivals are shed with 503.
+
+The token is signed together with the caller's identity (role and user id
+from the access token), so it cannot be handed to another account, and it
+is single-use: the store records each admitted ticket, and presenting it
+again queues the caller afresh. Requests without a valid access token never
+take a ticket; the route's own auth dependency rejects them.
+
+The counters live in Redis so that every worker admits from the same queue
+(per-worker counters would multiply the admission rate by the worker count
+and restart at ticket 0 whenever a worker is recycled).
+``WAITING_ROOM_BACKEND=memory`` is for tests only.
+"""
+import hashlib
+import hmac
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.core.config import settings
+from app.core.security import token_principal
+
+WAITING_ROOM_ENABLED = os.getenv("WAITING_ROOM_ENABLED", "true").lower() == "true"
+WAITING_ROOM_RATE = float(os.getenv("WAITING_ROOM_RATE", "20"))  # admissions per second
+WAITING_ROOM_BURST = int(os.getenv("WAITING_ROOM_BURST", "20"))
+WAITING_ROOM_MAX_QUEUE = int(os.getenv("WAITING_ROOM_MAX_QUEUE", "5000"))
+WAITING_ROOM_TOKEN_TTL_SECONDS = int(os.getenv("WAITING_ROOM_TOKEN_TTL_SECONDS", "1800"))
+
+TOKEN_HEADER = "X-Waiting-Room-Token"
+
+
+@dataclass
+class AdmissionResult:
+    admitted: bool
+    token: Optional[str] = None
+    position: int = 0
+    retry_after: int = 0
+    shed: bool = False
+
+
+class InMemoryWaitingRoomStore:
+    """Process-local counters for tests."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._tail = 0
+        self._frontier: Optional[float] = None
+        self._updated_at = 0.0
+        self._claimed: Dict[int, float] = {}
+
+    def _advance(self, rate: float, burst: int) -> float:
+        now = self.clock()
+        if self._frontier is None:
+            self._frontier = float(burst)
+        else:
+            self._frontier += (now - self._updated_at) * rate
+        self._frontier = min(self._frontier, float(self._tail + burst))
+        self._updated_at = now
+        return self._frontier
+
+    def enqueue(self, rate: float, burst: int, max_queue: int) -> Tuple[Optional[int], float]:
+        """Take the next ticket; returns (ticket or None if shed, frontier)."""
+        with self._lock:
+            frontier = self._advance(rate, burst)
+            if self._tail - math.floor(frontier) >= max_queue:
+                return None, frontier
+            self._tail += 1
+            return self._tail, frontier
+
+    def frontier(self, rate: float, burst: int) -> float:
+        with self._lock:
+            return self._advance(rate, burst)
+
+    def claim(self, ticket: int, ttl: int) -> bool:
+        """Marks an admitted ticket as used; False if it was used already."""
+        now = self.clock()
+        with self._lock:
+            for expired in [t for t, expires_at in self._claimed.items() if expires_at <= now]:
+                del self._claimed[expired]
+            if ticket in self._claimed:
+                return False
+            self._claimed[ticket] = now + ttl
+            return True
+
+
+# KEYS[1] = state hash; ARGV = now, rate, burst, max_queue, enqueue(0/1)
+_REDIS_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'tail', 'frontier', 'updated_at')
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local tail = tonumber(state[1]) or 0
+local frontier = tonumber(state[2])
+if frontier == nil then
+  frontier = burst
+else
+  frontier = frontier + (now - tonumber(state[3])) * rate
+end
+frontier = math.min(frontier, tail + burst)
+local ticket = -1
+if ARGV[5] == '1' then
+  if tail - math.floor(frontier) < tonumber(ARGV[4]) then
+    tail = tail + 1
+    ticket = tail
+  end
+end
+redis.call('HSET', KEYS[1], 'tail', tail, 'frontier', tostring(frontier), 'updated_at', tostring(now))
+return {ticket, tostring(frontier)}
+"""
+
+
+class RedisWaitingRoomStore:
+    """Counters shared by all workers (REDIS_URL), updated atomically by a Lua script."""
+
+    def __init__(self, url: str, key: str = "waiting_room:booking"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.redis = redis.Redis.from_url(url)
+        self.key = key
+        self.script = self.redis.register_script(_REDIS_SCRIPT)
+
+    def _call(self, rate: float, burst: int, max_queue: int, enqueue: bool) -> Tuple[Optional[int], float]:
+        ticket, frontier = self.script(keys=[self.key], args=[time.time(), rate, burst, max_queue, "1" if enqueue else "0"])
+        ticket = int(ticket)
+        return (ticket if ticket > 0 else None), float(frontier)
+
+    def enqueue(self, rate: float, burst: int, max_queue: int) -> Tuple[Optional[int], float]:
+        return self._call(rate, burst, max_queue, enqueue=True)
+
+    def frontier(self, rate: float, burst: int) -> float:
+        return self._call(rate, burst, 0, enqueue=False)[1]
+
+    def claim(self, ticket: int, ttl: int) -> bool:
+        return bool(self.redis.set(f"{self.key}:claimed:{ticket}", 1, nx=True, ex=ttl))
+
+
+class WaitingRoom:
+    def __init__(self, store, rate: float = WAITING_ROOM_RATE, burst: int = WAITING_ROOM_BURST,
+                 max_queue: int = WAITING_ROOM_MAX_QUEUE, token_ttl: int = WAITING_ROOM_TOKEN_TTL_SECONDS,
+                 secret: str = settings.SECRET_KEY, wall_clock: Callable[[], float] = time.time):
+        self.store = store
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.token_ttl = token_ttl
+        self.secret = secret.encode()
+        self.wall_clock = wall_clock
+
+    def _sign(self, payload: str) -> str:
+        return hmac.new(self.secret, payload.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def issue_token(self, ticket: int, principal: str) -> str:
+        payload = f"{ticket}.{int(self.wall_clock())}"
+        return f"{payload}.{self._sign(f'{payload}.{principal}')}"
+
+    def parse_token(self, token: str, principal: str) -> Optional[int]:
+        """Returns the ticket number of a valid, unexpired token issued to principal."""
+        try:
+            ticket, issued_at, signature = token.split(".")
+            payload = f"{ticket}.{issued_at}"
+            if not hmac.compare_digest(signature, self._sign(f"{payload}.{principal}")):
+                return None
+            if self.wall_clock() - int(issued_at) > self.token_ttl:
+                return None
+            return int(ticket)
+        except (ValueError, AttributeError):
+            return None
+
+    def _result(self, ticket: int, token: str, frontier: float) -> AdmissionResult:
+        position = max(0, ticket - math.floor(frontier))
+        if position == 0:
+            return AdmissionResult(admitted=True, token=token)
+        return AdmissionResult(
+            admitted=False, token=token, position=position,
+            retry_after=max(1, math.ceil(position / self.rate)),
+        )
+
+    def admit(self, token: Optional[str], principal: str) -> AdmissionResult:
+        """
+        Admits the ticket in token, or queues the caller with a new ticket.
+        An admitted ticket is used up: presenting it again queues the caller afresh.
+        """
+        ticket = self.parse_token(token, principal) if token else None
+        if ticket is not None:
+            result = self._result(ticket, token, self.store.frontier(self.rate, self.burst))
+            if not result.admitted or self.store.claim(ticket, self.token_ttl):
+                return result
+
+        ticket, frontier = self.store.enqueue(self.rate, self.burst, self.max_queue)
+        if ticket is None:
+            return AdmissionResult(
+                admitted=False, shed=True,
+                retry_after=max(1, math.ceil(self.max_queue / self.rate)),
+            )
+        result = self._result(ticket, self.issue_token(ticket, principal), frontier)
+        if result.admitted:
+            self.store.claim(ticket, self.token_ttl)
+        return result
+
+    def status(self, token: str, principal: str) -> Optional[AdmissionResult]:
+        ticket = self.parse_token(token, principal)
+        if ticket is None:
+            return None
+        return self._result(ticket, token, self.store.frontier(self.rate, self.burst))
+
+
+def create_store():
+    if os.getenv("WAITING_ROOM_BACKEND", "redis").lower() == "memory":
+        return InMemoryWaitingRoomStore()
+    return RedisWaitingRoomStore(os.getenv("REDIS_URL", "redis://redis:6379/0"))
+
+
+booking_waiting_room = WaitingRoom(create_store())
+
+
+def booking_admission(request: Request, response: Response) -> None:
+    """
+    Dependency for booking routes: lets the request through only once its
+    waiting-room ticket has been admitted.
+    """
+    if not WAITING_ROOM_ENABLED:
+        return
+    principal = token_principal(request.headers.get("authorization"))
+    if principal is None:
+        return
+
+    result = booking_waiting_room.admit(request.headers.get(TOKEN_HEADER), principal)
+    if result.shed:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="目前預約人數過多，請稍後再試。",
+            headers={"Retry-After": str(result.retry_after)},
+        )
+    if not result.admitted:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                "message": "排隊中，請稍候。",
+                "token": result.token,
+                "position": result.position,
+                "estimated_wait_seconds": result.retry_after,
+            },
+            headers={"Retry-After": str(result.retry_after), TOKEN_HEADER: result.token},
+        )
+    response.headers[TOKEN_HEADER] = result.token
@@ -0,0 +1,17 @@
+from datetime import time
+from typing import List
+
+# 定義診間開放報到時間的映射
+CLINIC_OPEN_TIMES = {
+    "morning": {"start_booking": time(8, 0), "end_booking": time(11, 30)},
+    "afternoon": {"start_booking": time(13, 0), "end_booking": time(16, 30)},
+    "night": {"start_booking": time(18, 0), "end_booking": time(20, 30)},
+}
+
+
+def open_sessions_at(now: time) -> List[str]:
+    """Time periods whose check-in window contains `now` (Taiwan local time)."""
+    return [
+        period for period, window in CLINIC_OPEN_TIMES.items()
+        if window["start_booking"] <= now <= window["end_booking"]
+    ]
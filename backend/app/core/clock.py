@@ -0,0 +1,66 @@
+"""
+Single source of "now" for the backend.
+
+Business dates (the day a clinic session or appointment belongs to, the
+no-show counting window, suspensions, ...) are local dates in ``APP_TIMEZONE``
+(Asia/Taipei). The zone is loaded once as a ``zoneinfo.ZoneInfo`` instead of
+building a pytz zone at every call site.
+
+Endpoints take ``clock: Clock = Depends(get_clock)``. FastAPI resolves a
+dependency once per request, so every "today"/"now" computed while handling a
+request (router checks, services, CRUD) comes from the same frozen instant,
+even when the request straddles midnight. Services default to
+``system_clock`` when called outside a request (scheduler jobs, scripts).
+Tests pin the time with ``FrozenClock`` (passed to a service, or through
+``app.dependency_overrides[get_clock]``).
+"""
+import os
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+APP_TIMEZONE = ZoneInfo(os.getenv("APP_TIMEZONE", "Asia/Taipei"))
+
+
+def local_datetime(day: date, at: time = time.min) -> datetime:
+    """`day` at wall-clock time `at` in APP_TIMEZONE."""
+    return datetime.combine(day, at, tzinfo=APP_TIMEZONE)
+
+
+class Clock:
+    """The wall clock in APP_TIMEZONE."""
+
+    def now(self) -> datetime:
+        return datetime.now(APP_TIMEZONE)
+
+    def today(self) -> date:
+        return self.now().date()
+
+
+class FrozenClock(Clock):
+    """A clock stopped at one instant: a request's clock, or a fake clock in tests."""
+
+    def __init__(self, now: datetime):
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=APP_TIMEZONE)
+        self._set(now)
+
+    def _set(self, now: datetime) -> None:
+        self._now = now.astimezone(APP_TIMEZONE)
+        self._today = self._now.date()
+
+    def now(self) -> datetime:
+        return self._now
+
+    def today(self) -> date:
+        return self._today
+
+    def advance(self, delta: timedelta) -> None:
+        self._set(self._now + delta)
+
+
+system_clock = Clock()
+
+
+def get_clock() -> Clock:
+    """FastAPI dependency: the current request's frozen clock."""
+    return FrozenClock(system_clock.now())
@@ -0,0 +1,335 @@
+"""
+Idempotency-Key support for retry-prone POST endpoints.
+
+Clients (kiosks, phones on flaky Wi-Fi) send an ``Idempotency-Key`` header.
+The first request with a given key runs normally and its response is stored;
+retries with the same key get the stored response replayed without running
+the endpoint again (so schedule / RoomDay locks are never taken twice).
+A retry arriving while the first request is still running waits for it.
+The in-progress marker only holds a short lease (``IDEMPOTENCY_LEASE_SECONDS``,
+the wait plus a request timeout); the 24 h TTL applies once the response is
+stored. If the worker running the original dies, a retry finds the lease
+expired and runs the request itself instead of being turned away all day.
+Reusing a key for a different request (other path/body) is rejected with 422.
+
+Keys are scoped per authenticated subject (role and user id from the access
+token), so two users can never see each other's stored responses, and a retry
+sent with a refreshed token still finds the original. Requests without a valid
+token pass straight through; the endpoint rejects them itself.
+
+Stored responses live in Redis so a retry that lands on another worker still
+finds them. ``IDEMPOTENCY_BACKEND=memory`` keeps them in-process and is only
+meant for tests.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.security import token_principal
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# How long a duplicate waits for the in-flight original before giving up
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+# How long an in-progress request holds its key: the wait above plus a request timeout
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", str(IDEMPOTENCY_WAIT_SECONDS + 60)))
+IDEMPOTENCY_POLL_SECONDS = 0.05
+MAX_KEY_LENGTH = 255
+
+# POST routes guarded by the middleware (paths as mounted under /api/v1)
+IDEMPOTENT_ROUTES: List[Pattern] = [
+    re.compile(r"^/api/v1/patient/appointments/?$"),
+    re.compile(r"^/api/v1/checkin/[^/]+/?$"),
+    re.compile(r"^/api/v1/doctor/schedules/[^/]+/call-next-patient/?$"),
+]
+
+STATE_NEW = "new"
+STATE_IN_PROGRESS = "in_progress"
+STATE_COMPLETED = "completed"
+STATE_MISMATCH = "mismatch"
+
+
+@dataclass
+class StoredResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "status": self.status,
+            "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in self.headers],
+            "body": self.body.decode("latin-1"),
+        })
+
+    @classmethod
+    def from_json(cls, raw: str) -> "StoredResponse":
+        data = json.loads(raw)
+        return cls(
+            status=data["status"],
+            headers=[(k.encode("latin-1"), v.encode("latin-1")) for k, v in data["headers"]],
+            body=data["body"].encode("latin-1"),
+        )
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    expires_at: float
+    response: Optional[StoredResponse] = None
+
+
+class InMemoryIdempotencyStore:
+    """Process-local store for tests. Thread-safe and event-loop agnostic."""
+
+    def __init__(self, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS, lease_seconds: float = IDEMPOTENCY_LEASE_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def _purge_expired(self, now: float) -> None:
+        expired = [k for k, e in self._entries.items() if e.expires_at <= now]
+        for k in expired:
+            del self._entries[k]
+
+    async def begin(self, key: str, fingerprint: str) -> Tuple[str, Optional[StoredResponse]]:
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = _Entry(fingerprint=fingerprint, expires_at=now + self.lease_seconds)
+                return STATE_NEW, None
+            if entry.fingerprint != fingerprint:
+                return STATE_MISMATCH, None
+            if entry.response is None:
+                return STATE_IN_PROGRESS, None
+            return STATE_COMPLETED, entry.response
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.response = response
+                entry.expires_at = time.monotonic() + self.ttl_seconds
+
+    async def release(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def get(self, key: str) -> Tuple[bool, Optional[StoredResponse]]:
+        """Returns (exists, response)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                return False, None
+            return True, entry.response
+
+
+class RedisIdempotencyStore:
+    """Store shared by all workers (REDIS_URL). The default."""
+
+    def __init__(self, url: str, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS,
+                 lease_seconds: float = IDEMPOTENCY_LEASE_SECONDS, prefix: str = "idem:"):
+        import redis.asyncio as redis  # optional dependency, only needed for this backend
+
+        self.redis = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def begin(self, key: str, fingerprint: str) -> Tuple[str, Optional[StoredResponse]]:
+        record = json.dumps({"fingerprint": fingerprint, "response": None})
+        created = await self.redis.set(self._key(key), record, nx=True, px=int(self.lease_seconds * 1000))
+        if created:
+            return STATE_NEW, None
+        raw = await self.redis.get(self._key(key))
+        if raw is None:  # expired between SET and GET, try once more
+            return await self.begin(key, fingerprint)
+        data = json.loads(raw)
+        if data["fingerprint"] != fingerprint:
+            return STATE_MISMATCH, None
+        if data["response"] is None:
+            return STATE_IN_PROGRESS, None
+        return STATE_COMPLETED, StoredResponse.from_json(data["response"])
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        raw = await self.redis.get(self._key(key))
+        if raw is None:
+            return
+        data = json.loads(raw)
+        data["response"] = response.to_json()
+        await self.redis.set(self._key(key), json.dumps(data), ex=self.ttl_seconds)
+
+    async def release(self, key: str) -> None:
+        await self.redis.delete(self._key(key))
+
+    async def get(self, key: str) -> Tuple[bool, Optional[StoredResponse]]:
+        raw = await self.redis.get(self._key(key))
+        if raw is None:
+            return False, None
+        data = json.loads(raw)
+        return True, StoredResponse.from_json(data["response"]) if data["response"] else None
+
+
+def create_store():
+    if os.getenv("IDEMPOTENCY_BACKEND", "redis").lower() == "memory":
+        return InMemoryIdempotencyStore()
+    return RedisIdempotencyStore(os.getenv("REDIS_URL", "redis://redis:6379/0"))
+
+
+def _json_response(status: int, detail: str) -> StoredResponse:
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+    return StoredResponse(
+        status=status,
+        headers=[(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        body=body,
+    )
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware applying Idempotency-Key semantics to IDEMPOTENT_ROUTES."""
+
+    def __init__(self, app: ASGIApp, store=None, routes: Optional[List[Pattern]] = None,
+                 wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS):
+        self.app = app
+        self.store = store if store is not None else create_store()
+        self.routes = routes if routes is not None else IDEMPOTENT_ROUTES
+        self.wait_seconds = wait_seconds
+
+    def _applies(self, scope: Scope) -> bool:
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and any(route.match(scope["path"]) for route in self.routes)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        principal = token_principal(headers.get("authorization")) if idempotency_key else None
+        if principal is None:
+            await self.app(scope, receive, send)
+            return
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            await self._send_stored(send, _json_response(400, "Idempotency-Key 過長。"))
+            return
+
+        body = await self._read_body(receive)
+        store_key = f"{principal}:{idempotency_key}"
+        fingerprint = hashlib.sha256(
+            b"\n".join([scope["method"].encode(), scope["path"].encode(), body])
+        ).hexdigest()
+
+        state, stored = await self.store.begin(store_key, fingerprint)
+        if state == STATE_IN_PROGRESS:
+            stored = await self._wait_for_original(store_key)
+            if stored is None:
+                # The original released the key (it failed) or its lease ran out (its worker died): take it over
+                state, stored = await self.store.begin(store_key, fingerprint)
+                if state == STATE_IN_PROGRESS:
+                    await self._send_stored(send, _json_response(409, "相同請求仍在處理中，請稍後再試。"))
+                    return
+        if state == STATE_MISMATCH:
+            await self._send_stored(send, _json_response(422, "此 Idempotency-Key 已用於不同的請求。"))
+            return
+        if stored is not None:
+            logger.info(f"Idempotency-Key {idempotency_key} 重送，回放已儲存的回應。")
+            await self._send_stored(send, stored, replayed=True)
+            return
+
+        await self._run_and_store(scope, body, send, store_key)
+
+    async def _read_body(self, receive: Receive) -> bytes:
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        return b"".join(chunks)
+
+    async def _wait_for_original(self, store_key: str) -> Optional[StoredResponse]:
+        deadline = time.monotonic() + self.wait_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(IDEMPOTENCY_POLL_SECONDS)
+            exists, stored = await self.store.get(store_key)
+            if stored is not None:
+                return stored
+            if not exists:  # original failed and released the key, or its lease expired
+                return None
+        return None
+
+    async def _run_and_store(self, scope: Scope, body: bytes, send: Send, store_key: str) -> None:
+        body_sent = False
+
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return {"type": "http.disconnect"}
+
+        status = 500
+        response_headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        finished = False
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status, response_headers, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False) and not finished:
+                    finished = True
+                    # Store before handing the last chunk to the client so that
+                    # retries racing with background tasks already see the result
+                    await self._finish(store_key, status, response_headers, b"".join(chunks))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except Exception:
+            if not finished:
+                await self.store.release(store_key)
+            raise
+        if not finished:
+            await self.store.release(store_key)
+
+    async def _finish(self, store_key: str, status: int, headers, body: bytes) -> None:
+        if status >= 500 or status == 429:
+            # Server errors and waiting-room rejections are not final: let the client retry with the same key
+            await self.store.release(store_key)
+            return
+        await self.store.complete(store_key, StoredResponse(status=status, headers=headers, body=body))
+
+    async def _send_stored(self, send: Send, stored: StoredResponse, replayed: bool = False) -> None:
+        headers = list(stored.headers)
+        if replayed:
+            headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": stored.status, "headers": headers})
+        await send({"type": "http.response.body", "body": stored.body, "more_body": False})
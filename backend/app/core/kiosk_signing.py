@@ -0,0 +1,86 @@
+"""
+Request signing for kiosk batch uploads.
+
+Each kiosk holds its own signing secret, configured server-side in
+``KIOSK_SIGNING_SECRETS`` (``kiosk_id:secret`` pairs, comma separated; list a
+kiosk twice to rotate its secret) and never sent over the wire. A batch carries:
+
+    X-Kiosk-Id         the kiosk_id, also repeated in the body
+    X-Kiosk-Timestamp  unix seconds when the batch was signed
+    X-Kiosk-Nonce      random value, unique per upload
+    X-Kiosk-Signature  hex HMAC-SHA256 over "kiosk_id\\ntimestamp\\nnonce\\n" + raw body
+
+Batches signed more than ``KIOSK_SIGNATURE_MAX_AGE_SECONDS`` away from the
+server time are rejected, and each nonce is accepted once: the nonce store
+remembers it for twice that window. A kiosk retrying an upload signs it again
+with a fresh timestamp and nonce (the batch itself is safe to replay, see
+KioskSyncService). Nonces live in Redis so all workers share them;
+``KIOSK_NONCE_BACKEND=memory`` is for tests only.
+"""
+import hashlib
+import hmac
+import os
+import threading
+import time
+from typing import Callable, Dict, List
+
+
+def _parse_secrets(raw: str) -> Dict[str, List[str]]:
+    secrets: Dict[str, List[str]] = {}
+    for entry in raw.split(","):
+        kiosk_id, _, secret = entry.strip().partition(":")
+        if kiosk_id and secret:
+            secrets.setdefault(kiosk_id, []).append(secret)
+    return secrets
+
+
+KIOSK_SIGNING_SECRETS = _parse_secrets(os.getenv("KIOSK_SIGNING_SECRETS", ""))
+KIOSK_SIGNATURE_MAX_AGE_SECONDS = int(os.getenv("KIOSK_SIGNATURE_MAX_AGE_SECONDS", "300"))
+
+
+def sign_kiosk_batch(secret: str, kiosk_id: str, timestamp: str, nonce: str, body: bytes) -> str:
+    """X-Kiosk-Signature value for a batch upload."""
+    message = f"{kiosk_id}\n{timestamp}\n{nonce}\n".encode() + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+class InMemoryNonceStore:
+    """Process-local nonce store for tests. Thread-safe."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._expires_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def use(self, nonce: str, ttl: int) -> bool:
+        """Remembers nonce for ttl seconds; False if it was seen already."""
+        now = self.clock()
+        with self._lock:
+            for expired in [n for n, expires_at in self._expires_at.items() if expires_at <= now]:
+                del self._expires_at[expired]
+            if nonce in self._expires_at:
+                return False
+            self._expires_at[nonce] = now + ttl
+            return True
+
+
+class RedisNonceStore:
+    """Nonces shared by all workers (REDIS_URL). The default."""
+
+    def __init__(self, url: str, prefix: str = "kiosk_nonce:"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def use(self, nonce: str, ttl: int) -> bool:
+        return bool(self.redis.set(f"{self.prefix}{nonce}", 1, nx=True, ex=ttl))
+
+
+def create_nonce_store():
+    if os.getenv("KIOSK_NONCE_BACKEND", "redis").lower() == "memory":
+        return InMemoryNonceStore()
+    return RedisNonceStore(os.getenv("REDIS_URL", "redis://redis:6379/0"))
+
+
+kiosk_nonces = create_nonce_store()
@@ -0,0 +1,251 @@
+"""
+On-demand statistical profiler for a running worker (pure Python, no external binaries).
+
+A sampler thread reads ``sys._current_frames()`` every ``interval`` seconds
+and counts each thread's stack, from the thread entry to the leaf frame.
+Threads that are blocked waiting are skipped, so idle pool workers and the
+event loop's select() do not drown the output. Frames are labelled
+``qualname (file)`` with file relative to site-packages or to the backend, so
+bcrypt, Pydantic, SQLAlchemy and app.services show up by name.
+
+Two modes, both admin-only (app/api/routers/admin_diagnostics.py) and one at a
+time per worker:
+
+* ``sample(seconds)``: everything the worker does for N seconds.
+* ``capture_requests(path, count)``: samples only while one of the next
+  ``count`` requests whose path matches the ``path`` regex is in flight
+  (ProfilingMiddleware). Other requests running at the same time are sampled
+  too. Profile with the reproduction traffic only. Only this worker's
+  requests are seen: under gunicorn, other workers serve the rest of the
+  traffic, so send the reproduction to the pid named in the response (or run
+  a single worker).
+
+Output is collapsed stacks ("a;b;c 42", for flamegraph.pl / speedscope) or a
+speedscope JSON document. When no profile runs, the sampler thread does not
+exist and the middleware checks one attribute per request.
+"""
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "120"))
+PROFILER_DEFAULT_INTERVAL = float(os.getenv("PROFILER_INTERVAL_SECONDS", "0.005"))
+
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Leaf frames of threads that are waiting, not working
+_IDLE_LEAVES = {
+    ("threading.py", "wait"), ("threading.py", "Condition.wait"), ("threading.py", "Event.wait"),
+    ("threading.py", "Thread._wait_for_tstate_lock"), ("selectors.py", "EpollSelector.select"),
+    ("selectors.py", "PollSelector.select"), ("selectors.py", "SelectSelector.select"),
+    ("selectors.py", "KqueueSelector.select"), ("queue.py", "Queue.get"),
+}
+
+Frame = Tuple[str, str]  # (qualname, file)
+
+
+class ProfilerBusy(Exception):
+    """Another profile is already running in this worker."""
+
+
+def _short_file(path: str) -> str:
+    marker = f"site-packages{os.sep}"
+    if marker in path:
+        return path.rsplit(marker, 1)[1]
+    if path.startswith(_BACKEND_ROOT):
+        return os.path.relpath(path, _BACKEND_ROOT)
+    return os.path.basename(path)
+
+
+class StackSampler:
+    """Counts the stacks of every other thread each `interval` seconds while `active()` is true."""
+
+    def __init__(self, interval: float = PROFILER_DEFAULT_INTERVAL, active: Optional[Callable[[], bool]] = None):
+        self.interval = interval
+        self.active = active
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict[object, Frame] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _label(self, code) -> Frame:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (code.co_qualname, _short_file(code.co_filename))
+        return label
+
+    def _stack(self, frame) -> Optional[Tuple[Frame, ...]]:
+        leaf = self._label(frame.f_code)
+        if (os.path.basename(leaf[1]), leaf[0]) in _IDLE_LEAVES:
+            return None
+        stack = []
+        while frame is not None:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def sample_once(self) -> None:
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = self._stack(frame)
+            if stack is not None:
+                self.stacks[stack] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self.active is None or self.active():
+                self.sample_once()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def to_collapsed(stacks: Counter) -> str:
+    return "\n".join(
+        ";".join(f"{name} ({file})" for name, file in stack) + f" {count}"
+        for stack, count in stacks.most_common()
+    )
+
+
+def to_speedscope(stacks: Counter, interval: float, name: str) -> dict:
+    frames: List[Frame] = []
+    index: Dict[Frame, int] = {}
+    samples, weights = [], []
+    for stack, count in stacks.most_common():
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append(frame)
+        samples.append([index[frame] for frame in stack])
+        weights.append(count * interval)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": [{"name": frame_name, "file": file} for frame_name, file in frames]},
+        "profiles": [{
+            "type": "sampled", "name": name, "unit": "seconds",
+            "startValue": 0, "endValue": sum(weights), "samples": samples, "weights": weights,
+        }],
+        "name": name,
+        "activeProfileIndex": 0,
+        "exporter": "hospital-backend profiler",
+    }
+
+
+@dataclass
+class RequestCapture:
+    path: re.Pattern
+    method: Optional[str]
+    count: int
+    claimed: int = 0
+    finished: int = 0
+    in_flight: int = 0
+    matched_paths: List[str] = field(default_factory=list)
+
+    def claim(self, scope: Scope) -> bool:
+        if self.claimed >= self.count or (self.method and scope["method"] != self.method):
+            return False
+        if not self.path.search(scope["path"]):
+            return False
+        self.claimed += 1
+        self.matched_paths.append(f"{scope['method']} {scope['path']}")
+        return True
+
+
+@dataclass
+class Profile:
+    stacks: Counter
+    samples: int
+    interval: float
+    duration: float
+    requests: Optional[List[str]] = None
+
+    def render(self, output: str, name: str):
+        if output == "speedscope":
+            return to_speedscope(self.stacks, self.interval, name)
+        return to_collapsed(self.stacks)
+
+
+class Profiler:
+    def __init__(self):
+        self.capture: Optional[RequestCapture] = None  # read by ProfilingMiddleware on every request
+        self._lock = threading.Lock()
+        self._busy = False
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._busy:
+                raise ProfilerBusy()
+            self._busy = True
+
+    def _release(self) -> None:
+        with self._lock:
+            self._busy = False
+
+    async def sample(self, seconds: float, interval: float = PROFILER_DEFAULT_INTERVAL) -> Profile:
+        self._acquire()
+        sampler = StackSampler(interval)
+        started = time.monotonic()
+        try:
+            sampler.start()
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+            self._release()
+        return Profile(sampler.stacks, sampler.samples, interval, time.monotonic() - started)
+
+    async def capture_requests(self, path: str, count: int, timeout: float, method: Optional[str] = None,
+                               interval: float = PROFILER_DEFAULT_INTERVAL) -> Profile:
+        self._acquire()
+        capture = RequestCapture(path=re.compile(path), method=method.upper() if method else None, count=count)
+        sampler = StackSampler(interval, active=lambda: capture.in_flight > 0)
+        started = time.monotonic()
+        try:
+            sampler.start()
+            self.capture = capture
+            while capture.finished < count and time.monotonic() - started < timeout:
+                await asyncio.sleep(0.05)
+        finally:
+            self.capture = None
+            sampler.stop()
+            self._release()
+        return Profile(sampler.stacks, sampler.samples, interval, time.monotonic() - started,
+                       requests=capture.matched_paths)
+
+
+profiler = Profiler()
+
+
+class ProfilingMiddleware:
+    """Marks the requests picked by Profiler.capture_requests as in flight (register it outermost)."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        capture = profiler.capture
+        if capture is None or scope["type"] != "http" or not capture.claim(scope):
+            await self.app(scope, receive, send)
+            return
+        capture.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            capture.in_flight -= 1
+            capture.finished += 1
@@ -0,0 +1,258 @@
+"""
+In-process asyncio job scheduler with leader election.
+
+Every gunicorn worker (and every node) starts a Scheduler, but only the one
+holding the PostgreSQL advisory lock ``SCHEDULER_LOCK_KEY`` actually runs
+jobs; the others keep retrying the lock so a new leader takes over when the
+current one dies (the session-level lock is released with its connection).
+On SQLite (tests / local dev) the single process is always the leader.
+
+Jobs are synchronous callables run in a worker thread so they never block
+the event loop. Each due job runs in its own task, so a slow job (partition
+maintenance) does not hold up the others; a job that is still running when
+it comes due again is skipped for that round. Per-job latency metrics
+(schedule lag, duration, failures, skipped rounds) are kept in memory and
+exposed through ``Scheduler.snapshot()``.
+"""
+import asyncio
+import logging
+import os
+import time as time_module
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.clock import APP_TIMEZONE, local_datetime, system_clock
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "false").lower() == "true"
+SCHEDULER_LOCK_KEY = int(os.getenv("SCHEDULER_LOCK_KEY", "734001"))
+SCHEDULER_TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", "1"))
+SCHEDULER_TIMEZONE = APP_TIMEZONE
+
+
+class LeaderElector:
+    """PostgreSQL advisory-lock based leader election (always leader elsewhere)."""
+
+    def __init__(self, engine: Engine, lock_key: int = SCHEDULER_LOCK_KEY):
+        self.engine = engine
+        self.lock_key = lock_key
+        self._connection = None
+
+    @property
+    def is_leader(self) -> bool:
+        if self.engine.dialect.name != "postgresql":
+            return True
+        return self._connection is not None
+
+    def try_acquire(self) -> bool:
+        if self.engine.dialect.name != "postgresql":
+            return True
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT 1"))
+                self._connection.commit()
+                return True
+            except Exception:
+                logger.warning("排程器 leader 連線中斷，放棄 leader 身分。", exc_info=True)
+                self._drop_connection()
+        connection = None
+        try:
+            connection = self.engine.connect()
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+            ).scalar()
+            if acquired:
+                connection.commit()
+                self._connection = connection
+                logger.info(f"取得排程器 advisory lock ({self.lock_key})，此程序成為 leader。")
+                return True
+            connection.close()
+        except Exception:
+            logger.warning("嘗試取得排程器 advisory lock 失敗。", exc_info=True)
+            if connection is not None:
+                connection.close()
+        return False
+
+    def release(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+            self._connection.commit()
+        except Exception:
+            logger.warning("釋放排程器 advisory lock 失敗。", exc_info=True)
+        self._drop_connection()
+
+    def _drop_connection(self) -> None:
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+
+@dataclass
+class JobMetrics:
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    last_scheduled_at: Optional[datetime] = None
+    last_started_at: Optional[datetime] = None
+    last_lag_ms: Optional[float] = None
+    last_duration_ms: Optional[float] = None
+    max_duration_ms: float = 0.0
+    total_duration_ms: float = 0.0
+    last_error: Optional[str] = None
+    last_result: Any = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_scheduled_at": self.last_scheduled_at,
+            "last_started_at": self.last_started_at,
+            "last_lag_ms": self.last_lag_ms,
+            "last_duration_ms": self.last_duration_ms,
+            "avg_duration_ms": (self.total_duration_ms / self.runs) if self.runs else None,
+            "max_duration_ms": self.max_duration_ms,
+            "last_error": self.last_error,
+            "last_result": self.last_result,
+        }
+
+
+@dataclass
+class Job:
+    """
+    A periodic job. Runs every `interval` if given, otherwise daily at each of `at_times`
+    (local time in SCHEDULER_TIMEZONE).
+    """
+    name: str
+    func: Callable[[], Any]
+    interval: Optional[timedelta] = None
+    at_times: List[time] = field(default_factory=list)
+    run_on_start: bool = False
+    next_run: Optional[datetime] = None
+    metrics: JobMetrics = field(default_factory=JobMetrics)
+
+    def compute_next_run(self, now: datetime) -> datetime:
+        if self.interval is not None:
+            return now + self.interval
+        candidates = []
+        for day_offset in (0, 1):
+            day = (now + timedelta(days=day_offset)).date()
+            for at in self.at_times:
+                candidate = local_datetime(day, at)
+                if candidate > now:
+                    candidates.append(candidate)
+        return min(candidates)
+
+
+class Scheduler:
+    def __init__(self, elector: LeaderElector, tick_seconds: float = SCHEDULER_TICK_SECONDS,
+                 now: Callable[[], datetime] = system_clock.now):
+        self.elector = elector
+        self.tick_seconds = tick_seconds
+        self.now = now
+        self.jobs: Dict[str, Job] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def add_job(self, job: Job) -> Job:
+        now = self.now()
+        job.next_run = now if job.run_on_start else job.compute_next_run(now)
+        self.jobs[job.name] = job
+        return job
+
+    async def run_job(self, name: str, scheduled_at: Optional[datetime] = None) -> Any:
+        """Runs one job now (in a worker thread) and records its metrics."""
+        job = self.jobs[name]
+        started_at = self.now()
+        metrics = job.metrics
+        metrics.last_scheduled_at = scheduled_at
+        metrics.last_started_at = started_at
+        metrics.last_lag_ms = (started_at - scheduled_at).total_seconds() * 1000 if scheduled_at else None
+        start = time_module.perf_counter()
+        try:
+            result = await asyncio.to_thread(job.func)
+            metrics.last_error = None
+            metrics.last_result = result
+            return result
+        except Exception as e:
+            metrics.failures += 1
+            metrics.last_error = repr(e)
+            logger.error(f"排程工作 {name} 執行失敗: {e}", exc_info=True)
+            return None
+        finally:
+            duration_ms = (time_module.perf_counter() - start) * 1000
+            metrics.runs += 1
+            metrics.last_duration_ms = duration_ms
+            metrics.total_duration_ms += duration_ms
+            metrics.max_duration_ms = max(metrics.max_duration_ms, duration_ms)
+
+    async def tick(self) -> List[asyncio.Task]:
+        """Starts every due job in its own task (without waiting for it) and returns the tasks."""
+        if not await asyncio.to_thread(self.elector.try_acquire):
+            return []
+        now = self.now()
+        started = []
+        for job in list(self.jobs.values()):
+            if job.next_run is None or job.next_run > now:
+                continue
+            scheduled_at = job.next_run
+            job.next_run = job.compute_next_run(now)
+            running = self._running.get(job.name)
+            if running is not None and not running.done():
+                job.metrics.skipped += 1
+                logger.warning(f"排程工作 {job.name} 上一次執行尚未結束，略過本次 ({scheduled_at})。")
+                continue
+            task = asyncio.create_task(self.run_job(job.name, scheduled_at=scheduled_at))
+            self._running[job.name] = task
+            started.append(task)
+        return started
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                logger.error("排程器 tick 發生錯誤。", exc_info=True)
+            await asyncio.sleep(self.tick_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"排程器已啟動，工作: {', '.join(self.jobs)}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Let jobs already running in worker threads finish before giving up the lock
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+        self._running.clear()
+        await asyncio.to_thread(self.elector.release)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "is_leader": self.elector.is_leader,
+            "jobs": {
+                name: {
+                    "next_run": job.next_run,
+                    "interval_seconds": job.interval.total_seconds() if job.interval else None,
+                    "at_times": [t.isoformat() for t in job.at_times],
+                    **job.metrics.as_dict(),
+                }
+                for name, job in self.jobs.items()
+            },
+        }
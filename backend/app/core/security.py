@@ -1,10 +1,11 @@
 import os
 import logging
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Dict, Any
 
-from passlib.context import CryptContext
-from jose import jwt, JWTError
+# passlib (bcrypt) and python-jose (cryptography) are imported on first use to keep them
+# off the cold-start path (see benchmarks/import_time_report.py).
 
 logger = logging.getLogger(__name__)
 
@@ -13,24 +14,31 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def get_password_hash(password: str) -> str:
     logger.info("get_password_hash: start")
-    hashed = pwd_context.hash(password[:72])
+    hashed = get_pwd_context().hash(password[:72])
     logger.info("get_password_hash: end")
     return hashed
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     logger.info("verify_password: start")
-    ok = pwd_context.verify(plain_password, hashed_password)
+    ok = get_pwd_context().verify(plain_password, hashed_password)
     logger.info("verify_password: end")
     return ok
 
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt
+
     logger.info("create_access_token: start")
     to_encode = data.copy()
     if expires_delta:
@@ -43,7 +51,28 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     return encoded_jwt
 
 
+def token_principal(authorization: Optional[str]) -> Optional[str]:
+    """
+    "role:sub" of the Bearer token in an Authorization header, or None when it is
+    missing or invalid. For middleware that runs before the auth dependencies.
+    """
+    from jose import jwt, JWTError
+
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if not payload.get("sub") or not payload.get("role"):
+        return None
+    return f"{payload['role']}:{payload['sub']}"
+
+
 def verify_token(token: str) -> Dict[str, Any]:
+    from jose import jwt, JWTError
+
     logger.info("verify_token: start")
     logger.info(f"verify_token: Using SECRET_KEY: {SECRET_KEY}")
     print(f"--- DEBUG: verify_token received token: {token} ---") # Aggressive print
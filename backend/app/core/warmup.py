@@ -0,0 +1,124 @@
+"""
+Worker warm-up run from the FastAPI lifespan before a worker takes traffic.
+
+* Opens ``DB_POOL_WARM_CONNECTIONS`` connections (default: the pool size) at
+  the same time, so the first requests after a deploy do not each pay a TCP +
+  auth round trip, and one connection to every read replica.
+* Runs the hot read paths once (public schedule listing, appointment
+  projection) so SQLAlchemy's compiled-statement cache and the database's
+  buffer cache are populated.
+* Builds the OpenAPI schema.
+
+``/health/ready`` reports 503 until the warm-up has succeeded. A failed warm-up
+(e.g. the database is still starting) is retried in the background.
+Only enabled when ``WARMUP_ENABLED`` is true (set by gunicorn_conf.py).
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Dict
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.clock import system_clock
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "20"))
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+
+
+def warmup_enabled() -> bool:
+    return os.getenv("WARMUP_ENABLED", "false").lower() == "true"
+
+
+def warm_pool(engine: Engine, connections: int) -> int:
+    """Checks out `connections` connections at once (so the pool opens them) and returns them."""
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+def warm_queries(session_factory) -> None:
+    from app.crud import crud_schedule
+    from app.services.appointment_service import appointment_service
+
+    today = system_clock.today()
+    db = session_factory()
+    try:
+        crud_schedule.list_public_schedules(db, month=today.month, year=today.year)
+        appointment_service.get_patient_appointments_with_details(db, patient_id=uuid.uuid4())
+    finally:
+        db.close()
+
+
+def run_warmup(app: FastAPI) -> Dict[str, float]:
+    from app.db.replicas import replica_router
+    from app.db.session import SessionLocal, engine
+
+    timings = {}
+    start = time.perf_counter()
+    pool_size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    warm_pool(engine, int(os.getenv("DB_POOL_WARM_CONNECTIONS", pool_size)))
+    for replica in replica_router.replicas:
+        warm_pool(replica.engine, 1)
+    timings["pool_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    warm_queries(SessionLocal)
+    timings["queries_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    app.openapi()
+    timings["openapi_ms"] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+async def _warmup_once(app: FastAPI) -> bool:
+    try:
+        timings = await asyncio.wait_for(asyncio.to_thread(run_warmup, app), WARMUP_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning(f"啟動預熱失敗，{WARMUP_RETRY_SECONDS:g} 秒後重試: {e!r}")
+        return False
+    app.state.ready = True
+    app.state.warmup = timings
+    logger.info(f"啟動預熱完成: {timings}")
+    return True
+
+
+async def _retry_until_warm(app: FastAPI) -> None:
+    while not await _warmup_once(app):
+        await asyncio.sleep(WARMUP_RETRY_SECONDS)
+
+
+async def start_warmup(app: FastAPI) -> None:
+    """Called from the lifespan before `yield`."""
+    app.state.ready = False
+    app.state.warmup = None
+    app.state.warmup_task = None
+    if not warmup_enabled():
+        app.state.ready = True
+        return
+    if not await _warmup_once(app):
+        app.state.warmup_task = asyncio.create_task(_retry_until_warm(app))
+
+
+async def stop_warmup(app: FastAPI) -> None:
+    task = getattr(app.state, "warmup_task", None)
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
@@ -29,7 +29,7 @@ def create_admin(
         department=admin_in.department, # Add department
     )
     db.add(db_obj)
-    db.commit()
+    db.flush()
     db.refresh(db_obj)
     logger.info("create_admin: end")
     return db_obj
@@ -55,7 +55,7 @@ def update_admin(db: Session, admin_id: uuid.UUID, admin_in: AdminUpdate) -> Opt
         setattr(db_admin, field, value)
 
     db.add(db_admin)
-    db.commit()
+    db.flush()
     db.refresh(db_admin)
     return db_admin
 
@@ -72,5 +72,5 @@ def delete_admin(db: Session, admin_id: uuid.UUID) -> Optional[Admin]:
     if not db_admin:
         return None
     db.delete(db_admin)
-    db.commit()
+    db.flush()
     return db_admin
\ No newline at end of file
@@ -1,10 +1,12 @@
 # backend/app/crud/crud_appointment.py
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Sequence
 import uuid
 from datetime import date
 
 from app.models.appointment import Appointment
+from app.models.doctor import Doctor
+from app.models.patient import Patient
 from app.schemas.appointment import AppointmentCreate, AppointmentUpdate
 
 class AppointmentCRUD:
@@ -18,7 +20,7 @@ class AppointmentCRUD:
             status="scheduled" # Default status
         )
         db.add(db_obj)
-        db.commit()
+        db.flush()
         db.refresh(db_obj)
         return db_obj
 
@@ -39,7 +41,7 @@ class AppointmentCRUD:
         for field, value in update_data.items():
             setattr(db_obj, field, value)
         db.add(db_obj)
-        db.commit()
+        db.flush()
         db.refresh(db_obj)
         return db_obj
 
@@ -48,18 +50,54 @@ class AppointmentCRUD:
         if db_obj:
             db_obj.status = new_status
             db.add(db_obj)
-            db.commit()
+            db.flush()
             db.refresh(db_obj)
         return db_obj
 
     def get_multi_by_schedule_id(self, db: Session, schedule_id: uuid.UUID, skip: int = 0, limit: int = 100) -> List[Appointment]:
         return db.query(Appointment).filter(Appointment.schedule_id == schedule_id).offset(skip).limit(limit).all()
 
+    def get_by_card_number_and_date(
+        self, db: Session, *, card_number: str, on_date: date, statuses: Sequence[str]
+    ) -> list:
+        """
+        A patient's appointments on `on_date` with one of `statuses`, looked up by health
+        card number in a single join (PATIENT.card_number unique index, then
+        ix_appointment_patient_id_date). Rows carry the doctor's name for kiosk display.
+        """
+        return self.get_by_card_numbers_and_date(db, card_numbers=[card_number], on_date=on_date, statuses=statuses)
+
+    def get_by_card_numbers_and_date(
+        self, db: Session, *, card_numbers: Sequence[str], on_date: date, statuses: Sequence[str]
+    ) -> list:
+        """Same as get_by_card_number_and_date for several cards at once (kiosk batch sync)."""
+        return (
+            db.query(
+                Appointment.appointment_id,
+                Appointment.patient_id,
+                Appointment.schedule_id,
+                Appointment.time_period,
+                Appointment.status,
+                Patient.card_number,
+                Doctor.name.label("doctor_name"),
+                Doctor.specialty,
+            )
+            .select_from(Patient)
+            .join(Appointment, Appointment.patient_id == Patient.patient_id)
+            .join(Doctor, Appointment.doctor_id == Doctor.doctor_id)
+            .filter(
+                Patient.card_number.in_(card_numbers),
+                Appointment.date == on_date,
+                Appointment.status.in_(statuses),
+            )
+            .all()
+        )
+
     def remove(self, db: Session, *, appointment_id: uuid.UUID) -> Optional[Appointment]:
         obj = db.query(Appointment).filter(Appointment.appointment_id == appointment_id).first()
         if obj:
             db.delete(obj)
-            db.commit()
+            db.flush()
         return obj
 
 appointment_crud = AppointmentCRUD()
@@ -1,8 +1,9 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 import uuid
-from datetime import datetime
 from typing import List, Optional
 
+from app.core.clock import system_clock
 from app.models.checkin import Checkin
 from app.models.appointment import Appointment # Import Appointment model
 from app.schemas.checkin import CheckinCreate
@@ -13,7 +14,7 @@ class CRUDCheckin:
             checkin_id=uuid.uuid4(),
             appointment_id=obj_in.appointment_id,
             patient_id=obj_in.patient_id,
-            checkin_time=obj_in.checkin_time if obj_in.checkin_time else datetime.now(),
+            checkin_time=obj_in.checkin_time if obj_in.checkin_time else system_clock.now(),
             checkin_method=obj_in.checkin_method,
             ticket_sequence=obj_in.ticket_sequence,
             ticket_number=obj_in.ticket_number,
@@ -29,18 +30,52 @@ class CRUDCheckin:
     def get_checked_in_patients_for_schedule(self, db: Session, schedule_id: uuid.UUID) -> List[Checkin]:
         # 查詢所有與該 schedule_id 相關的已報到病患
         # 需要聯結 Appointment 表來篩選 schedule_id
-        return db.query(Checkin).join(Appointment).filter(
+        return db.query(Checkin).join(Appointment, Checkin.appointment_id == Appointment.appointment_id).filter(
             Appointment.schedule_id == schedule_id
-        ).order_by(Checkin.ticket_sequence.asc()).all()
+        ).order_by(Checkin.queue_position.asc()).all()
+
+    def get_waiting(
+        self, db: Session, *, schedule_id: uuid.UUID, after_position: int, limit: Optional[int] = None
+    ) -> List[Checkin]:
+        """
+        已報到、候診順序排在 after_position (通常是 RoomDay.current_called_position) 之後的病患，
+        依 queue_position 由前到後。
+        """
+        return db.query(Checkin).join(Appointment, Checkin.appointment_id == Appointment.appointment_id).filter(
+            Appointment.schedule_id == schedule_id,
+            Checkin.status == "checked_in",
+            Checkin.queue_position > after_position,
+        ).order_by(Checkin.queue_position.asc()).limit(limit).all()
+
+    def rebalance_queue_positions(self, db: Session, *, schedule_id: uuid.UUID, lower: int, upper: int) -> List[Checkin]:
+        """
+        把 (lower, upper) 之間的候診病患平均重新分配 queue_position，順序與號碼不變。
+        只在兩位相鄰病患之間已沒有空位時使用 (每位候診病患各寫入一次)，由 get_db commit。
+        """
+        waiting = self.get_waiting(db, schedule_id=schedule_id, after_position=lower)
+        step = (upper - lower) // (len(waiting) + 1)
+        for index, row in enumerate(waiting, start=1):
+            row.queue_position = lower + index * step
+        db.flush()
+        return waiting
 
     def get_by_appointment_id(self, db: Session, appointment_id: uuid.UUID) -> Optional[Checkin]:
         return db.query(Checkin).filter(Checkin.appointment_id == appointment_id).first()
 
+    def count_waiting_ahead(self, db: Session, *, schedule_id: uuid.UUID, after_position: int, before_position: int) -> int:
+        """候診順序在 (after_position, before_position) 之間、已報到的人數。"""
+        return db.query(func.count(Checkin.checkin_id)).join(Appointment, Checkin.appointment_id == Appointment.appointment_id).filter(
+            Appointment.schedule_id == schedule_id,
+            Checkin.status == "checked_in",
+            Checkin.queue_position > after_position,
+            Checkin.queue_position < before_position,
+        ).scalar()
+
     def get_checkin_by_schedule_id_and_sequence(self, db: Session, schedule_id: uuid.UUID, ticket_sequence: int) -> Optional[Checkin]:
         """
         根據 schedule_id 和 ticket_sequence 獲取 Checkin 記錄。
         """
-        return db.query(Checkin).join(Appointment).filter(
+        return db.query(Checkin).join(Appointment, Checkin.appointment_id == Appointment.appointment_id).filter(
             Appointment.schedule_id == schedule_id,
             Checkin.ticket_sequence == ticket_sequence
         ).first()
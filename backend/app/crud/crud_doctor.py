@@ -44,7 +44,7 @@ def create_doctor(db: Session, doctor_in: DoctorCreate) -> Doctor:
         email=doctor_in.email,
     )
     db.add(db_doctor)
-    db.commit()
+    db.flush()
     db.refresh(db_doctor)
     return db_doctor
 
@@ -63,7 +63,7 @@ def update_doctor(db: Session, doctor_id: uuid.UUID, doctor_in: DoctorUpdate) ->
         setattr(db_doctor, field, value)
 
     db.add(db_doctor)
-    db.commit()
+    db.flush()
     db.refresh(db_doctor)
     return db_doctor
 
@@ -73,5 +73,5 @@ def delete_doctor(db: Session, doctor_id: uuid.UUID) -> Optional[Doctor]:
     if not db_doctor:
         return None
     db.delete(db_doctor)
-    db.commit()
+    db.flush()
     return db_doctor
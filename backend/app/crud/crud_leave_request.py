@@ -1,3 +1,4 @@
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 from datetime import date, timedelta
 from typing import List
@@ -43,53 +44,114 @@ def request_leave(db: Session, doctor_id: uuid.UUID, date: date, time_period: st
     # 更新班表狀態為 'leave_pending'
     schedule.status = "leave_pending"
     db.add(schedule)
-    db.commit()
+    db.flush()
     db.refresh(db_leave_request)
     db.refresh(schedule)
 
     return db_leave_request
 
-def request_range_leave(db: Session, doctor_id: uuid.UUID, start_date: date, end_date: date, time_periods: List[str], reason: str):
+def _range_slots(start_date: date, end_date: date, time_periods: List[str]) -> List[tuple]:
+    periods = list(dict.fromkeys(time_periods))
+    days = (end_date - start_date).days + 1
+    return [(start_date + timedelta(days=i), period) for i in range(days) for period in periods]
+
+
+def _booked_conflict_detail(first_date: date, conflicts: int) -> str:
+    return f"日期 {first_date} 起共有 {conflicts} 個時段已有病患預約，無法申請連續停診。"
+
+
+def apply_range_leave(
+    db: Session, *, doctor_id: uuid.UUID, start_date: date, end_date: date, time_periods: List[str], reason: str
+) -> List[uuid.UUID]:
     """
-    處理醫生連續多日的停診申請。
+    Set-based core of a range leave request, independent of the range length:
+      1. one aggregate query rejects the range if any slot already has bookings;
+      2. one SELECT ... FOR UPDATE ordered by schedule_id locks the existing slots
+         (a consistent lock order so overlapping requests cannot deadlock);
+      3. bulk UPDATE of the existing slots, bulk INSERT of placeholder schedules for
+         missing slots, bulk UPDATE/INSERT of the LeaveRequest rows.
+    Returns the affected schedule ids. Does not commit.
     """
     if start_date > end_date:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="開始日期不能晚於結束日期。")
+    slots = _range_slots(start_date, end_date, time_periods)
+    if not slots:
+        return []
 
-    current_date = start_date
-    while current_date <= end_date:
-        for time_period in time_periods:
-            # 檢查該時段的班表是否存在且屬於該醫生
-            schedule = db.query(Schedule).filter(
-                Schedule.doctor_id == doctor_id,
-                Schedule.date == current_date,
-                Schedule.time_period == time_period
-            ).first()
-
-            if schedule:
-                # 檢查是否已存在該班表的請假申請
-                existing_leave_request = db.query(LeaveRequest).filter(LeaveRequest.schedule_id == schedule.schedule_id).first()
-
-                if existing_leave_request:
-                    # 如果已存在，則更新其原因
-                    existing_leave_request.reason = reason
-                    db.add(existing_leave_request)
-                else:
-                    # 否則，創建新的請假申請記錄
-                    db_leave_request = LeaveRequest(
-                        schedule_id=schedule.schedule_id,
-                        doctor_id=doctor_id,
-                        reason=reason
-                    )
-                    db.add(db_leave_request)
-
-                # 更新班表狀態為 'leave_pending'
-                schedule.status = "leave_pending"
-                db.add(schedule)
-        
-        current_date += timedelta(days=1)
-    
-    db.commit()
+    range_filter = (
+        Schedule.doctor_id == doctor_id,
+        Schedule.date >= start_date,
+        Schedule.date <= end_date,
+        Schedule.time_period.in_(sorted({period for _, period in slots})),
+    )
+
+    conflicts, first_conflict = db.query(func.count(Schedule.schedule_id), func.min(Schedule.date)).filter(
+        *range_filter, Schedule.booked_patients > 0
+    ).one()
+    if conflicts:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=_booked_conflict_detail(first_conflict, conflicts))
+
+    locked = (
+        db.query(Schedule.schedule_id, Schedule.date, Schedule.time_period, Schedule.booked_patients)
+        .filter(*range_filter)
+        .order_by(Schedule.schedule_id)
+        .with_for_update()
+        .all()
+    )
+    # A booking may have landed between the aggregate check and the lock
+    booked = [row for row in locked if row.booked_patients > 0]
+    if booked:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=_booked_conflict_detail(min(row.date for row in booked), len(booked)),
+        )
+
+    existing_ids = [row.schedule_id for row in locked]
+    if existing_ids:
+        db.query(Schedule).filter(Schedule.schedule_id.in_(existing_ids)).update(
+            {Schedule.status: "leave_pending", Schedule.max_patients: 0}, synchronize_session=False
+        )
+
+    existing_slots = {(row.date, row.time_period) for row in locked}
+    placeholders = [
+        {
+            "schedule_id": uuid.uuid4(), "doctor_id": doctor_id, "date": slot_date, "time_period": period,
+            "status": "leave_pending", "max_patients": 0, "booked_patients": 0,
+        }
+        for slot_date, period in slots if (slot_date, period) not in existing_slots
+    ]
+    if placeholders:
+        db.execute(insert(Schedule), placeholders)
+
+    with_leave_request = set()
+    if existing_ids:
+        with_leave_request = {
+            row.schedule_id for row in
+            db.query(LeaveRequest.schedule_id).filter(LeaveRequest.schedule_id.in_(existing_ids)).all()
+        }
+    if with_leave_request:
+        db.query(LeaveRequest).filter(LeaveRequest.schedule_id.in_(with_leave_request)).update(
+            {LeaveRequest.reason: reason}, synchronize_session=False
+        )
+
+    schedule_ids = existing_ids + [row["schedule_id"] for row in placeholders]
+    new_leave_requests = [
+        {"leave_request_id": uuid.uuid4(), "schedule_id": schedule_id, "doctor_id": doctor_id, "reason": reason}
+        for schedule_id in schedule_ids if schedule_id not in with_leave_request
+    ]
+    if new_leave_requests:
+        db.execute(insert(LeaveRequest), new_leave_requests)
+    return schedule_ids
+
+
+def request_range_leave(db: Session, doctor_id: uuid.UUID, start_date: date, end_date: date, time_periods: List[str], reason: str):
+    """
+    處理醫生連續多日的停診申請。
+    """
+    apply_range_leave(
+        db, doctor_id=doctor_id, start_date=start_date, end_date=end_date, time_periods=time_periods, reason=reason
+    )
+    db.flush()
     return {"message": "連續停診申請已送出，等待管理員審核。"}
 
 def approve_leave_request(db: Session, schedule_id: uuid.UUID):
@@ -113,7 +175,7 @@ def approve_leave_request(db: Session, schedule_id: uuid.UUID):
     schedule.max_patients = 0
     db.add(schedule)
 
-    db.commit()
+    db.flush()
     db.refresh(leave_request)
     db.refresh(schedule)
     return {"message": "停診申請已核准。"}
@@ -139,7 +201,7 @@ def reject_leave_request(db: Session, schedule_id: uuid.UUID):
     schedule.max_patients = 10 # Revert to default max patients
     db.add(schedule)
 
-    db.commit()
+    db.flush()
     db.refresh(leave_request)
     db.refresh(schedule)
     return {"message": "停診申請已拒絕。"}
\ No newline at end of file
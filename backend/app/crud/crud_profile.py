@@ -50,7 +50,7 @@ def update_patient_profile(
         setattr(db_patient, field, value)
 
     db.add(db_patient)
-    db.commit()
+    db.flush()
     db.refresh(db_patient)
     return db_patient
 
@@ -80,7 +80,7 @@ def update_doctor_profile(
         setattr(db_doctor, field, value)
 
     db.add(db_doctor)
-    db.commit()
+    db.flush()
     db.refresh(db_doctor)
     return db_doctor
 
@@ -110,6 +110,6 @@ def update_admin_profile(
         setattr(db_admin, field, value)
 
     db.add(db_admin)
-    db.commit()
+    db.flush()
     db.refresh(db_admin)
     return db_admin
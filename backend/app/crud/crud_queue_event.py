@@ -0,0 +1,94 @@
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional
+import uuid
+
+from app.core.clock import system_clock
+from app.models.checkin import Checkin
+from app.models.queue_event import QueueEvent
+from app.models.room_day import RoomDay
+from app.models.schedule import Schedule
+
+
+def checkin_event(event_type: str, checkin: Checkin, data: Optional[dict] = None) -> dict:
+    """Event fields describing `checkin` as it is now (after the change)."""
+    return {
+        "event_type": event_type,
+        "checkin_id": checkin.checkin_id,
+        "appointment_id": checkin.appointment_id,
+        "ticket_sequence": checkin.ticket_sequence,
+        "ticket_number": checkin.ticket_number,
+        "data": data,
+    }
+
+
+class CRUDQueueEvent:
+    def last_offset(self, schedule_id: uuid.UUID):
+        """Scalar subquery: the highest offset written for the schedule (0 if none)."""
+        return (
+            select(func.coalesce(func.max(QueueEvent.offset), 0))
+            .where(QueueEvent.schedule_id == schedule_id)
+            .scalar_subquery()
+        )
+
+    def append(self, db: Session, *, schedule_id: uuid.UUID, occurred_at: Optional[datetime] = None,
+               first_offset: Optional[int] = None, **event) -> int:
+        """Appends one event (fields as in checkin_event) and returns its offset. Does not commit."""
+        offset = self._reserve(db, schedule_id, 1) if first_offset is None else first_offset
+        self._insert(db, schedule_id, offset, [event], occurred_at)
+        return offset
+
+    def append_many(
+        self, db: Session, *, schedule_id: uuid.UUID, events: List[dict], occurred_at: Optional[datetime] = None,
+        first_offset: Optional[int] = None,
+    ) -> List[int]:
+        """
+        Appends events to the schedule's log in order with one INSERT. The offsets come from
+        one ROOM_DAY update (the row stays locked until commit, so offsets are gap-free and in
+        commit order per room), or are `first_offset` onwards when the caller already reserved
+        them (crud_room_day.allocate_tickets). An event may carry its own occurred_at.
+        Returns the offsets. Does not commit.
+        """
+        if not events:
+            return []
+        first = self._reserve(db, schedule_id, len(events)) if first_offset is None else first_offset
+        self._insert(db, schedule_id, first, events, occurred_at)
+        return list(range(first, first + len(events)))
+
+    def _reserve(self, db: Session, schedule_id: uuid.UUID, count: int) -> int:
+        stmt = (
+            update(RoomDay)
+            .where(RoomDay.schedule_id == schedule_id)
+            .values(last_event_offset=RoomDay.last_event_offset + count)
+            .returning(RoomDay.last_event_offset)
+            .execution_options(synchronize_session=False)
+        )
+        last = db.execute(stmt).scalar()
+        if last is None:
+            # 診間已關診 (ROOM_DAY 已刪除)：鎖住 SCHEDULE 讓同一班表的寫入依序進行，再接在已寫入的最後一筆之後
+            db.execute(select(Schedule.schedule_id).where(Schedule.schedule_id == schedule_id).with_for_update())
+            last = db.execute(select(self.last_offset(schedule_id))).scalar() + count
+        return last - count + 1
+
+    def _insert(self, db: Session, schedule_id: uuid.UUID, first: int, events: List[dict],
+                occurred_at: Optional[datetime]) -> None:
+        occurred_at = occurred_at or system_clock.now()
+        db.execute(insert(QueueEvent), [
+            {"event_id": uuid.uuid4(), "schedule_id": schedule_id, "offset": first + index, "occurred_at": occurred_at,
+             "checkin_id": None, "appointment_id": None, "ticket_sequence": None, "ticket_number": None, "data": None,
+             **event}
+            for index, event in enumerate(events)
+        ])
+
+    def list_after(self, db: Session, *, schedule_id: uuid.UUID, after: int = 0, limit: int = 500) -> List[QueueEvent]:
+        """Events with offset > `after`, oldest first (index range scan on (schedule_id, event_offset))."""
+        return (
+            db.query(QueueEvent)
+            .filter(QueueEvent.schedule_id == schedule_id, QueueEvent.offset > after)
+            .order_by(QueueEvent.offset)
+            .limit(limit)
+            .all()
+        )
+
+queue_event = CRUDQueueEvent()
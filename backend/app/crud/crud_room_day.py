@@ -1,9 +1,19 @@
+from sqlalchemy import update
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import date
+from typing import List, Tuple
 import uuid
 
+from app.crud.crud_queue_event import queue_event
 from app.models.room_day import RoomDay
+from app.models.schedule import Schedule
 from app.schemas.room_day import RoomDayCreate
 
+# 自動開診只處理仍可看診的班表（請假 / 取消的不開）
+AUTO_OPEN_SCHEDULE_STATUSES = ("available",)
+
 class CRUDRoomDay:
     def get_by_schedule_id(self, db: Session, *, schedule_id: uuid.UUID) -> RoomDay | None:
         return db.query(RoomDay).filter(RoomDay.schedule_id == schedule_id).first()
@@ -13,7 +23,9 @@ class CRUDRoomDay:
             room_day_id=uuid.uuid4(),
             schedule_id=obj_in.schedule_id,
             next_sequence=obj_in.next_sequence if obj_in.next_sequence is not None else 1,
-            current_called_sequence=obj_in.current_called_sequence
+            current_called_sequence=obj_in.current_called_sequence,
+            # 關診後重新開診：候診事件的 offset 接續之前寫入的
+            last_event_offset=queue_event.last_offset(obj_in.schedule_id),
         )
         db.add(db_obj)
         db.flush()
@@ -33,4 +45,78 @@ class CRUDRoomDay:
         # Use SELECT ... FOR UPDATE to lock the row for atomic updates
         return db.query(RoomDay).filter(RoomDay.schedule_id == schedule_id).with_for_update().first()
 
+    def allocate_ticket(self, db: Session, *, schedule_id: uuid.UUID) -> Tuple[int, int]:
+        """
+        Takes the next ticket sequence of a session (and the queue event offset of its
+        checked_in event) with one UPDATE ... RETURNING (the row stays locked until commit),
+        opening the RoomDay first if the clinic has none yet. Does not commit.
+        """
+        return self.allocate_tickets(db, schedule_id=schedule_id, count=1)
+
+    def allocate_tickets(self, db: Session, *, schedule_id: uuid.UUID, count: int) -> Tuple[int, int]:
+        """
+        Reserves `count` consecutive ticket sequences, and one queue event offset per ticket
+        for its checked_in event, in one ROOM_DAY update. Returns (first sequence, first
+        offset); pass the offset to queue_event.append_many. Does not commit.
+        """
+        stmt = (
+            update(RoomDay)
+            .where(RoomDay.schedule_id == schedule_id)
+            .values(next_sequence=RoomDay.next_sequence + count,
+                    last_event_offset=RoomDay.last_event_offset + count)
+            .returning(RoomDay.next_sequence, RoomDay.last_event_offset)
+            .execution_options(synchronize_session=False)
+        )
+        row = db.execute(stmt).first()
+        if row is None:
+            insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+            db.execute(
+                insert(RoomDay)
+                .values(room_day_id=uuid.uuid4(), schedule_id=schedule_id, next_sequence=1,
+                        last_event_offset=queue_event.last_offset(schedule_id))
+                .on_conflict_do_nothing(index_elements=[RoomDay.schedule_id])
+            )
+            row = db.execute(stmt).first()
+        next_sequence, last_event_offset = row
+        return next_sequence - count, last_event_offset - count + 1
+
+    def open_for_session(self, db: Session, *, target_date: date, time_period: str) -> List[uuid.UUID]:
+        """
+        Bulk-opens every eligible schedule of a session: one INSERT ... ON CONFLICT DO NOTHING
+        for the RoomDays and one UPDATE for the schedule status. Returns the opened schedule ids.
+        Does not commit.
+        """
+        schedule_ids = [
+            row.schedule_id for row in
+            db.query(Schedule.schedule_id)
+            .outerjoin(RoomDay, RoomDay.schedule_id == Schedule.schedule_id)
+            .filter(
+                Schedule.date == target_date,
+                Schedule.time_period == time_period,
+                Schedule.status.in_(AUTO_OPEN_SCHEDULE_STATUSES),
+                RoomDay.room_day_id.is_(None),
+            )
+            .all()
+        ]
+        if not schedule_ids:
+            return []
+
+        insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        stmt = (
+            insert(RoomDay)
+            .values([
+                {"room_day_id": uuid.uuid4(), "schedule_id": schedule_id, "next_sequence": 1, "current_called_sequence": 0,
+                 "current_called_position": 0, "last_event_offset": queue_event.last_offset(schedule_id)}
+                for schedule_id in schedule_ids
+            ])
+            .on_conflict_do_nothing(index_elements=[RoomDay.schedule_id])
+            .returning(RoomDay.schedule_id)
+        )
+        opened = [row.schedule_id for row in db.execute(stmt)]
+        if opened:
+            db.query(Schedule).filter(Schedule.schedule_id.in_(opened)).update(
+                {Schedule.status: "open"}, synchronize_session=False
+            )
+        return opened
+
 room_day = CRUDRoomDay()
\ No newline at end of file
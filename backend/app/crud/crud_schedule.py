@@ -7,10 +7,13 @@ import calendar
 from fastapi import HTTPException, status
 import os # Import os
 
+from app.core.clock import system_clock
 from app.models.schedule import Schedule
 from app.models.doctor import Doctor
 from app.models.leave_request import LeaveRequest # Import LeaveRequest
+from app.crud.projections import SCHEDULE_DOCTOR_COLUMNS, to_schedule_doctor_public
 from app.schemas.schedule import (
+    ScheduleDoctorPublic,
     ScheduleCreate,
     ScheduleUpdate,
     ScheduleRecurringCreate,
@@ -57,7 +60,7 @@ def create_schedule(db: Session, schedule_in: ScheduleCreate) -> Schedule:
         booked_patients=0,
     )
     db.add(db_schedule)
-    db.commit()
+    db.flush()
     db.refresh(db_schedule)
     return db_schedule
 
@@ -96,7 +99,7 @@ def update_schedule(
         setattr(db_schedule, field, value)
     
     db.add(db_schedule)
-    db.commit()
+    db.flush()
     db.refresh(db_schedule)
     
     return db_schedule
@@ -107,7 +110,7 @@ def delete_schedule(db: Session, schedule_id: uuid.UUID) -> Optional[Schedule]:
     if not db_schedule:
         return None
     db.delete(db_schedule)
-    db.commit()
+    db.flush()
     return db_schedule
 
 
@@ -132,7 +135,7 @@ def list_schedules(db: Session, doctor_ids: Optional[List[uuid.UUID]] = None, da
             end_date = date(year, month + 1, 1) - timedelta(days=1)
         query = query.filter(Schedule.date >= start_date, Schedule.date <= end_date)
     elif month: # If only month is provided, filter for current year
-        current_year = date.today().year
+        current_year = system_clock.today().year
         start_date = date(current_year, month, 1)
         if month == 12:
             end_date = date(current_year + 1, 1, 1) - timedelta(days=1)
@@ -149,8 +152,8 @@ def list_schedules(db: Session, doctor_ids: Optional[List[uuid.UUID]] = None, da
     return query.offset(skip).limit(limit).all()
 
 
-def get_doctor_schedules(db: Session, doctor_id: uuid.UUID, date_str: Optional[str] = None, month: Optional[int] = None, year: Optional[int] = None, time_period: Optional[str] = None) -> List[dict]:
-    query = db.query(Schedule, Doctor).join(Doctor, Schedule.doctor_id == Doctor.doctor_id).filter(Schedule.doctor_id == doctor_id)
+def get_doctor_schedules(db: Session, doctor_id: uuid.UUID, date_str: Optional[str] = None, month: Optional[int] = None, year: Optional[int] = None, time_period: Optional[str] = None) -> List[ScheduleDoctorPublic]:
+    query = db.query(*SCHEDULE_DOCTOR_COLUMNS).select_from(Schedule).join(Doctor, Schedule.doctor_id == Doctor.doctor_id).filter(Schedule.doctor_id == doctor_id)
 
     if date_str:
         try:
@@ -166,7 +169,7 @@ def get_doctor_schedules(db: Session, doctor_id: uuid.UUID, date_str: Optional[s
             end_date = date(year, month + 1, 1) - timedelta(days=1)
         query = query.filter(Schedule.date >= start_date, Schedule.date <= end_date)
     elif month:
-        current_year = date.today().year
+        current_year = system_clock.today().year
         start_date = date(current_year, month, 1)
         if month == 12:
             end_date = date(current_year + 1, 1, 1) - timedelta(days=1)
@@ -191,28 +194,11 @@ def get_doctor_schedules(db: Session, doctor_id: uuid.UUID, date_str: Optional[s
         )
     )
 
-    results = []
-    for schedule_obj, doctor_obj in query.all():
-        # Construct a dictionary that contains all fields for ScheduleDoctorPublic
-        schedule_data = {
-            "schedule_id": schedule_obj.schedule_id,
-            "doctor_id": schedule_obj.doctor_id,
-            "date": schedule_obj.date,
-            "time_period": schedule_obj.time_period,
-            "status": schedule_obj.status,
-            "max_patients": schedule_obj.max_patients,
-            "booked_patients": schedule_obj.booked_patients,
-            "recurring_group_id": schedule_obj.recurring_group_id,
-            "created_at": schedule_obj.created_at,
-            "doctor_name": doctor_obj.name,
-            "specialty": doctor_obj.specialty,
-        }
-        results.append(schedule_data)
-    return results
+    return to_schedule_doctor_public(query.all())
 
 
-def list_public_schedules(db: Session, specialty: Optional[str] = None, doctor_id: Optional[uuid.UUID] = None, month: Optional[int] = None, year: Optional[int] = None, time_period: Optional[str] = None) -> List[dict]:
-    query = db.query(Schedule, Doctor).join(Doctor, Schedule.doctor_id == Doctor.doctor_id)
+def list_public_schedules(db: Session, specialty: Optional[str] = None, doctor_id: Optional[uuid.UUID] = None, month: Optional[int] = None, year: Optional[int] = None, time_period: Optional[str] = None) -> List[ScheduleDoctorPublic]:
+    query = db.query(*SCHEDULE_DOCTOR_COLUMNS).select_from(Schedule).join(Doctor, Schedule.doctor_id == Doctor.doctor_id)
 
     if specialty:
         query = query.filter(Doctor.specialty == specialty)
@@ -227,7 +213,7 @@ def list_public_schedules(db: Session, specialty: Optional[str] = None, doctor_i
             end_date = date(year, month + 1, 1) - timedelta(days=1)
         query = query.filter(Schedule.date >= start_date, Schedule.date <= end_date)
     elif month:
-        current_year = date.today().year
+        current_year = system_clock.today().year
         start_date = date(current_year, month, 1)
         if month == 12:
             end_date = date(current_year + 1, 1, 1) - timedelta(days=1)
@@ -242,23 +228,7 @@ def list_public_schedules(db: Session, specialty: Optional[str] = None, doctor_i
     if time_period:
         query = query.filter(Schedule.time_period == time_period)
     
-    results = []
-    for schedule_obj, doctor_obj in query.all():
-        schedule_data = {
-            "schedule_id": schedule_obj.schedule_id,
-            "doctor_id": schedule_obj.doctor_id,
-            "date": schedule_obj.date,
-            "time_period": schedule_obj.time_period,
-            "status": schedule_obj.status,
-            "max_patients": schedule_obj.max_patients,
-            "booked_patients": schedule_obj.booked_patients,
-            "recurring_group_id": schedule_obj.recurring_group_id,
-            "created_at": schedule_obj.created_at,
-            "doctor_name": doctor_obj.name,
-            "specialty": doctor_obj.specialty,
-        }
-        results.append(schedule_data)
-    return results
+    return to_schedule_doctor_public(query.all())
 
 
 def _add_months(source_date, months):
@@ -310,7 +280,7 @@ def create_recurring_schedules(db: Session, schedule_in: ScheduleRecurringCreate
         
         current_date += timedelta(days=1)
 
-    db.commit()
+    db.flush()
     for schedule in created_schedules:
         db.refresh(schedule)
     return created_schedules
@@ -323,7 +293,7 @@ def recreate_recurring_schedules(
     db.query(Schedule).filter(
         Schedule.recurring_group_id == recurring_group_id,
     ).delete(synchronize_session=False)
-    db.commit()
+    db.flush()
     
     # Re-use the creation logic but with the existing recurring_group_id
     created_schedules = []
@@ -361,7 +331,7 @@ def recreate_recurring_schedules(
             created_schedules.append(db_schedule)
         current_date += timedelta(days=1)
 
-    db.commit()
+    db.flush()
     for schedule in created_schedules:
         db.refresh(schedule)
     return created_schedules
@@ -385,7 +355,7 @@ def update_recurring_schedules(
         schedule.max_patients = schedule_in.max_patients
         db.add(schedule)
 
-    db.commit()
+    db.flush()
     for schedule in schedules_to_update:
         db.refresh(schedule)
         
@@ -404,7 +374,7 @@ def delete_recurring_schedules(
         )
         .delete(synchronize_session=False)
     )
-    db.commit()
+    db.flush()
     return deleted_count
 
 
@@ -460,7 +430,7 @@ def update_schedule_status(db: Session, schedule_id: uuid.UUID, new_status: str)
     elif new_status == 'leave_approved':
         schedule_obj.max_patients = 0
 
-    db.commit()
+    db.flush()
     db.refresh(schedule_obj)
 
     # Fetch doctor info to build the full response object
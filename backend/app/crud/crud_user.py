@@ -76,7 +76,7 @@ def create_patient(
         code_expires_at=code_expires_at,
     )
     db.add(db_obj)
-    db.commit()
+    db.flush()
     db.refresh(db_obj)
     logger.info("create_patient: end")
     return db_obj
@@ -128,7 +128,7 @@ def update_patient(db: Session, patient_id: uuid.UUID, patient_in: PatientUpdate
         setattr(db_patient, field, value)
 
     db.add(db_patient)
-    db.commit()
+    db.flush()
     db.refresh(db_patient)
     return db_patient
 
@@ -138,7 +138,7 @@ def delete_patient(db: Session, patient_id: uuid.UUID) -> Optional[Patient]:
     if not db_patient:
         return None
     db.delete(db_patient)
-    db.commit()
+    db.flush()
     return db_patient
 
 def update_patient_suspended_until(db: Session, patient_id: uuid.UUID, suspended_until: Optional[date]) -> Optional[Patient]:
@@ -146,6 +146,6 @@ def update_patient_suspended_until(db: Session, patient_id: uuid.UUID, suspended
     if db_patient:
         db_patient.suspended_until = suspended_until
         db.add(db_patient)
-        db.commit()
+        db.flush()
         db.refresh(db_patient)
     return db_patient
\ No newline at end of file
@@ -1,19 +1,19 @@
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
-from datetime import date, datetime, time
-import pytz # Import pytz
+from datetime import date, time
 
+from app.core.clock import Clock, local_datetime, system_clock
 from app.models.infraction import Infraction
 from app.schemas.infraction import InfractionCreate, InfractionUpdate # Assuming these schemas exist
 
 class InfractionCRUD:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, clock: Optional[Clock] = None):
         self.db = db
+        self.clock = clock or system_clock
 
     def create(self, obj_in: InfractionCreate) -> Infraction:
-        taiwan_tz = pytz.timezone('Asia/Taipei')
-        now_in_taiwan = datetime.now(taiwan_tz)
+        now_in_taiwan = self.clock.now()
         db_obj = Infraction(
             patient_id=obj_in.patient_id,
             appointment_id=obj_in.appointment_id,
@@ -24,7 +24,7 @@ class InfractionCRUD:
             notes=obj_in.notes
         )
         self.db.add(db_obj)
-        self.db.commit()
+        self.db.flush()
         self.db.refresh(db_obj)
         return db_obj
 
@@ -44,7 +44,7 @@ class InfractionCRUD:
             db_obj.penalty_applied = penalty_applied
             db_obj.penalty_until = penalty_until
             self.db.add(db_obj)
-            self.db.commit()
+            self.db.flush()
             self.db.refresh(db_obj)
         return db_obj
 
@@ -52,9 +52,8 @@ class InfractionCRUD:
         return self.db.query(Infraction).filter(Infraction.patient_id == patient_id).all()
 
     def count_infractions_in_period(self, patient_id: uuid.UUID, infraction_type: str, start_date: date, end_date: date) -> int:
-        taiwan_tz = pytz.timezone('Asia/Taipei')
-        start_datetime = taiwan_tz.localize(datetime.combine(start_date, time.min))
-        end_datetime = taiwan_tz.localize(datetime.combine(end_date, time.max)) # time.max for end of day
+        start_datetime = local_datetime(start_date, time.min)
+        end_datetime = local_datetime(end_date, time.max) # time.max for end of day
 
         return self.db.query(Infraction).filter(
             Infraction.patient_id == patient_id,
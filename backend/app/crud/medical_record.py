@@ -1,38 +1,55 @@
 import logging
-from sqlalchemy.orm import Session, joinedload
-from typing import Dict, Any, Optional
+from sqlalchemy.orm import Session, undefer_group
+from typing import Dict, Any, List, Optional
 import uuid
 
+from .medical_record_search import index_medical_record, unindex_medical_record
+from .projections import MEDICAL_RECORD_LIST_COLUMNS, to_medical_record_list_items
+from ..models.doctor import Doctor
 from ..models.medical_record import MedicalRecord
-from ..schemas.medical_record import MedicalRecordCreate, MedicalRecordUpdate
+from ..models.patient import Patient
+from ..schemas.medical_record import MedicalRecordCreate, MedicalRecordListItem, MedicalRecordUpdate
 
 logger = logging.getLogger(__name__)
 
 def get_medical_record(db: Session, record_id: uuid.UUID):
-    return db.query(MedicalRecord).filter(MedicalRecord.record_id == record_id).first()
+    # The only path that loads the full summary / prescription text
+    return (
+        db.query(MedicalRecord)
+        .options(undefer_group("record_text"))
+        .filter(MedicalRecord.record_id == record_id)
+        .first()
+    )
 
-def get_medical_records_by_doctor(db: Session, doctor_id: uuid.UUID, patient_id: Optional[uuid.UUID] = None, skip: int = 0, limit: int = 100):
-    query = db.query(MedicalRecord).filter(MedicalRecord.doctor_id == doctor_id)
+def _list_query(db: Session):
+    # Only the list columns plus the doctor / patient names; no full text, no other doctor / patient columns
+    return (
+        db.query(*MEDICAL_RECORD_LIST_COLUMNS)
+        .join(Doctor, MedicalRecord.doctor_id == Doctor.doctor_id)
+        .join(Patient, MedicalRecord.patient_id == Patient.patient_id)
+    )
+
+def get_medical_records_by_doctor(db: Session, doctor_id: uuid.UUID, patient_id: Optional[uuid.UUID] = None, skip: int = 0, limit: int = 100) -> List[MedicalRecordListItem]:
+    query = _list_query(db).filter(MedicalRecord.doctor_id == doctor_id)
     if patient_id:
         query = query.filter(MedicalRecord.patient_id == patient_id)
-    
-    # Eagerly load the doctor and patient relationships to avoid separate queries
-    query = query.options(joinedload(MedicalRecord.doctor), joinedload(MedicalRecord.patient))
-    
-    return query.order_by(MedicalRecord.created_at.desc()).offset(skip).limit(limit).all()
-
-def get_medical_records_by_patient(db: Session, patient_id: uuid.UUID, department: Optional[str] = None, skip: int = 0, limit: int = 100):
-    query = db.query(MedicalRecord).filter(MedicalRecord.patient_id == patient_id)
+    rows = query.order_by(MedicalRecord.created_at.desc()).offset(skip).limit(limit).all()
+    return to_medical_record_list_items(rows)
+
+def get_medical_records_by_patient(db: Session, patient_id: uuid.UUID, department: Optional[str] = None, skip: int = 0, limit: int = 100) -> List[MedicalRecordListItem]:
+    query = _list_query(db).filter(MedicalRecord.patient_id == patient_id)
     if department:
         query = query.filter(MedicalRecord.department == department)
-    query = query.options(joinedload(MedicalRecord.doctor), joinedload(MedicalRecord.patient))
-    return query.order_by(MedicalRecord.created_at.desc()).offset(skip).limit(limit).all()
+    rows = query.order_by(MedicalRecord.created_at.desc()).offset(skip).limit(limit).all()
+    return to_medical_record_list_items(rows)
 
 def create_medical_record(db: Session, medical_record: Dict[str, Any]):
     logger.info(f"CRUD: Received medical record data for creation: {medical_record}")
     db_medical_record = MedicalRecord(**medical_record)
     db.add(db_medical_record)
-    db.commit()
+    db.flush()
+    index_medical_record(db, db_medical_record)
+    db.flush()
     db.refresh(db_medical_record)
     logger.info(f"CRUD: Successfully created medical record with ID: {db_medical_record.record_id}")
     return db_medical_record
@@ -42,13 +59,15 @@ def update_medical_record(db: Session, db_medical_record: MedicalRecord, medical
     for key, value in update_data.items():
         setattr(db_medical_record, key, value)
     db.add(db_medical_record)
-    db.commit()
+    index_medical_record(db, db_medical_record)
+    db.flush()
     db.refresh(db_medical_record)
     return db_medical_record
 
 def delete_medical_record(db: Session, record_id: uuid.UUID):
     db_medical_record = db.query(MedicalRecord).filter(MedicalRecord.record_id == record_id).first()
     if db_medical_record:
+        unindex_medical_record(db, record_id)
         db.delete(db_medical_record)
-        db.commit()
+        db.flush()
     return db_medical_record
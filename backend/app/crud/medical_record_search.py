@@ -0,0 +1,152 @@
+"""
+Full-text search over medical record summary and prescription.
+
+PostgreSQL: MEDICAL_RECORD.search_vector is a generated tsvector column
+(``to_tsvector('simple', summary || ' ' || prescription)``, migration
+e7b3f0a5c218) with a GIN index, so it is maintained by the database on every
+write. Matches are ranked with ts_rank_cd; ts_headline only runs on the
+``limit`` rows that are returned.
+
+Other databases (SQLite in tests and local development): per-record term
+counts in MEDICAL_RECORD_TERM, maintained by the medical record CRUD functions
+through ``index_medical_record`` / ``unindex_medical_record``; a search reads
+the terms of the records in scope (doctor / patient index) rather than every
+posting of a common word. Tokens follow the
+'simple' configuration (lower-cased words, no stemming or stop words) so both
+back ends match the same records.
+
+Both back ends require every query word to be present (plainto_tsquery
+semantics) and are scoped by doctor and/or patient by the caller.
+"""
+import re
+from collections import Counter
+from typing import List, Optional
+import uuid
+
+from pydantic import TypeAdapter
+from sqlalchemy import cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import Session
+
+from app.crud.projections import MEDICAL_RECORD_LIST_COLUMNS
+from app.models.doctor import Doctor
+from app.models.medical_record import MedicalRecord
+from app.models.medical_record_term import MedicalRecordTerm
+from app.models.patient import Patient
+from app.schemas.medical_record import MedicalRecordSearchHit
+
+TS_CONFIG = "simple"
+HEADLINE_OPTIONS = "MaxFragments=2, MinWords=5, MaxWords=20, FragmentDelimiter=\" … \""
+HEADLINE_CONTEXT_CHARS = 40  # fallback snippet: characters kept on each side of the first hit
+
+SEARCH_VECTOR = literal_column('"MEDICAL_RECORD".search_vector')
+_TOKEN_RE = re.compile(r"\w+")
+_search_hits = TypeAdapter(List[MedicalRecordSearchHit])
+
+
+def tokenize(text: Optional[str]) -> Counter:
+    """Lower-cased word counts, the fallback equivalent of to_tsvector('simple', text)."""
+    return Counter(token.lower() for token in _TOKEN_RE.findall(text or ""))
+
+
+def _uses_tsvector(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def index_medical_record(db: Session, record: MedicalRecord) -> None:
+    """(Re)builds the fallback index rows of a flushed record; no-op on PostgreSQL."""
+    if _uses_tsvector(db):
+        return
+    unindex_medical_record(db, record.record_id)
+    terms = tokenize(record.summary) + tokenize(record.prescription)
+    db.add_all(
+        MedicalRecordTerm(term=term, record_id=record.record_id, frequency=frequency)
+        for term, frequency in terms.items()
+    )
+
+
+def unindex_medical_record(db: Session, record_id: uuid.UUID) -> None:
+    if _uses_tsvector(db):
+        return
+    db.query(MedicalRecordTerm).filter(MedicalRecordTerm.record_id == record_id).delete(synchronize_session=False)
+
+
+def _scoped(statement, doctor_id: Optional[uuid.UUID], patient_id: Optional[uuid.UUID]):
+    if doctor_id:
+        statement = statement.where(MedicalRecord.doctor_id == doctor_id)
+    if patient_id:
+        statement = statement.where(MedicalRecord.patient_id == patient_id)
+    return statement
+
+
+def _document():
+    return func.coalesce(MedicalRecord.summary, "") + " " + func.coalesce(MedicalRecord.prescription, "")
+
+
+def _search_tsvector(db, q, doctor_id, patient_id, limit):
+    tsquery = func.plainto_tsquery(cast(TS_CONFIG, REGCONFIG), q)
+    rank = func.ts_rank_cd(SEARCH_VECTOR, tsquery)
+    top = _scoped(
+        select(MedicalRecord.record_id, rank.label("rank")).where(SEARCH_VECTOR.op("@@")(tsquery)),
+        doctor_id, patient_id,
+    ).order_by(rank.desc(), MedicalRecord.created_at.desc()).limit(limit).subquery()
+    snippet = func.ts_headline(cast(TS_CONFIG, REGCONFIG), _document(), tsquery, HEADLINE_OPTIONS)
+    rows = (
+        db.query(*MEDICAL_RECORD_LIST_COLUMNS, top.c.rank, snippet.label("snippet"))
+        .select_from(top)
+        .join(MedicalRecord, MedicalRecord.record_id == top.c.record_id)
+        .join(Doctor, MedicalRecord.doctor_id == Doctor.doctor_id)
+        .join(Patient, MedicalRecord.patient_id == Patient.patient_id)
+        .order_by(top.c.rank.desc(), MedicalRecord.created_at.desc())
+        .all()
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+def _headline(document: str, terms: set) -> str:
+    document = document.strip()
+    first = next((m for m in _TOKEN_RE.finditer(document) if m.group().lower() in terms), None)
+    if first is None:
+        return document[:2 * HEADLINE_CONTEXT_CHARS]
+    fragment = document[max(0, first.start() - HEADLINE_CONTEXT_CHARS):first.end() + HEADLINE_CONTEXT_CHARS]
+    return _TOKEN_RE.sub(lambda m: f"<b>{m.group()}</b>" if m.group().lower() in terms else m.group(), fragment)
+
+
+def _search_terms(db, q, doctor_id, patient_id, limit):
+    terms = set(tokenize(q))
+    if not terms:
+        return []
+    # Scoped inside the aggregate so it starts from the doctor's / patient's records
+    matches = _scoped(
+        select(MedicalRecordTerm.record_id, func.sum(MedicalRecordTerm.frequency).label("rank"))
+        .join(MedicalRecord, MedicalRecord.record_id == MedicalRecordTerm.record_id)
+        .where(MedicalRecordTerm.term.in_(terms)),
+        doctor_id, patient_id,
+    ).group_by(MedicalRecordTerm.record_id).having(func.count() == len(terms)).subquery()
+    rows = (
+        db.query(*MEDICAL_RECORD_LIST_COLUMNS, matches.c.rank, _document().label("document"))
+        .select_from(matches)
+        .join(MedicalRecord, MedicalRecord.record_id == matches.c.record_id)
+        .join(Doctor, MedicalRecord.doctor_id == Doctor.doctor_id)
+        .join(Patient, MedicalRecord.patient_id == Patient.patient_id)
+        .order_by(matches.c.rank.desc(), MedicalRecord.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        dict(row._mapping, rank=float(row.rank), snippet=_headline(row.document, terms))
+        for row in rows
+    ]
+
+
+def search_medical_records(
+    db: Session,
+    *,
+    q: str,
+    doctor_id: Optional[uuid.UUID] = None,
+    patient_id: Optional[uuid.UUID] = None,
+    limit: int = 20,
+) -> List[MedicalRecordSearchHit]:
+    """Records matching every word of `q`, best match first, within the given doctor/patient scope."""
+    search = _search_tsvector if _uses_tsvector(db) else _search_terms
+    return _search_hits.validate_python(search(db, q, doctor_id, patient_id, limit))
@@ -0,0 +1,82 @@
+"""
+Single-pass projections for hot read paths.
+
+Queries select only the columns a response model needs (labelled with the
+model's field names) and the resulting rows are validated in one batch by a
+module-level TypeAdapter. The returned model instances are passed through by
+FastAPI's response validation without being re-validated.
+"""
+from typing import List, Sequence
+
+from pydantic import TypeAdapter
+from sqlalchemy import func
+
+from app.models.appointment import Appointment
+from app.models.doctor import Doctor
+from app.models.medical_record import MedicalRecord
+from app.models.patient import Patient
+from app.models.schedule import Schedule
+from app.schemas.appointment import AppointmentPublic
+from app.schemas.medical_record import MedicalRecordListItem
+from app.schemas.schedule import ScheduleDoctorPublic
+
+SCHEDULE_DOCTOR_COLUMNS = (
+    Schedule.schedule_id,
+    Schedule.doctor_id,
+    Schedule.date,
+    Schedule.time_period,
+    Schedule.status,
+    Schedule.max_patients,
+    Schedule.booked_patients,
+    Schedule.recurring_group_id,
+    Schedule.created_at,
+    Doctor.name.label("doctor_name"),
+    Doctor.specialty.label("specialty"),
+)
+
+APPOINTMENT_PUBLIC_COLUMNS = (
+    Appointment.appointment_id,
+    Appointment.patient_id,
+    Appointment.doctor_id,
+    Appointment.date,
+    Appointment.time_period,
+    Appointment.status,
+    Appointment.created_at,
+    Doctor.name.label("doctor_name"),
+    Doctor.specialty.label("specialty"),
+    Patient.name.label("patient_name"),
+)
+
+# Characters of the summary returned by list endpoints; truncated in SQL so the
+# full text never leaves the database for a list view.
+MEDICAL_RECORD_PREVIEW_CHARS = 80
+
+MEDICAL_RECORD_LIST_COLUMNS = (
+    MedicalRecord.record_id,
+    MedicalRecord.patient_id,
+    MedicalRecord.doctor_id,
+    MedicalRecord.created_at,
+    MedicalRecord.department,
+    Doctor.name.label("doctor_name"),
+    Patient.name.label("patient_name"),
+    func.substr(MedicalRecord.summary, 1, MEDICAL_RECORD_PREVIEW_CHARS).label("summary_preview"),
+)
+
+_schedule_doctor_list = TypeAdapter(List[ScheduleDoctorPublic])
+_appointment_public_list = TypeAdapter(List[AppointmentPublic])
+_medical_record_list = TypeAdapter(List[MedicalRecordListItem])
+
+
+def to_schedule_doctor_public(rows: Sequence) -> List[ScheduleDoctorPublic]:
+    """Rows selected with SCHEDULE_DOCTOR_COLUMNS -> ScheduleDoctorPublic."""
+    return _schedule_doctor_list.validate_python(rows, from_attributes=True)
+
+
+def to_appointment_public(rows: Sequence) -> List[AppointmentPublic]:
+    """Rows selected with APPOINTMENT_PUBLIC_COLUMNS -> AppointmentPublic."""
+    return _appointment_public_list.validate_python(rows, from_attributes=True)
+
+
+def to_medical_record_list_items(rows: Sequence) -> List[MedicalRecordListItem]:
+    """Rows selected with MEDICAL_RECORD_LIST_COLUMNS -> MedicalRecordListItem."""
+    return _medical_record_list.validate_python(rows, from_attributes=True)
@@ -3,8 +3,9 @@ from sqlalchemy import func
 from datetime import date
 from uuid import UUID
 
+from .crud_queue_event import queue_event
 from ..models.room_day import RoomDay
-from ..models.checkin import Checkin
+from ..models.checkin import QUEUE_POSITION_GAP, Checkin
 from ..models.appointment import Appointment # Assuming Appointment model is needed for joining
 
 class QueueCRUD:
@@ -13,24 +14,32 @@ class QueueCRUD:
 
     def update_current_called_sequence(self, schedule_id: UUID, called_ticket_sequence: int) -> RoomDay:
         """
-        Updates the current_called_sequence for a given schedule.
+        Updates the current_called_sequence (and the matching queue position) for a given schedule.
         If the RoomDay record does not exist, it creates one.
         """
         room_day = self.db.query(RoomDay).filter(
             RoomDay.schedule_id == schedule_id
         ).first()
+        called = self.get_checkin_by_ticket_sequence(schedule_id, called_ticket_sequence)
+        if called is not None and called.queue_position is not None:
+            called_position = called.queue_position
+        else:
+            called_position = called_ticket_sequence * QUEUE_POSITION_GAP
 
         if room_day:
             room_day.current_called_sequence = called_ticket_sequence
+            room_day.current_called_position = called_position
         else:
             # If RoomDay doesn't exist, create it.
             room_day = RoomDay(
                 schedule_id=schedule_id,
                 next_sequence=1, # Default to 1, will be updated by check-in logic
-                current_called_sequence=called_ticket_sequence
+                current_called_sequence=called_ticket_sequence,
+                current_called_position=called_position,
+                last_event_offset=queue_event.last_offset(schedule_id),
             )
             self.db.add(room_day)
-        self.db.commit()
+        self.db.flush()
         self.db.refresh(room_day)
         return room_day
 
@@ -38,7 +47,7 @@ class QueueCRUD:
         """
         Retrieves a Checkin record for a given schedule and ticket sequence.
         """
-        checkin = self.db.query(Checkin).join(Appointment).filter(
+        checkin = self.db.query(Checkin).join(Appointment, Checkin.appointment_id == Appointment.appointment_id).filter(
             Appointment.schedule_id == schedule_id,
             Checkin.ticket_sequence == ticket_sequence
         ).first()
@@ -1,29 +1,29 @@
+from sqlalchemy import Select, select
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import List
+from typing import Optional
 from uuid import UUID
 
 from app.models.visit_call import VisitCall
-from app.models.appointment import Appointment
 
 class VisitCallCRUD:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_potential_no_shows(self, no_show_threshold: datetime) -> List[VisitCall]:
+    def overdue_call_appointment_ids(self, no_show_threshold: datetime) -> Select:
         """
-        Retrieves VisitCall records for appointments that were called before the no_show_threshold
-        and are still in a 'checked_in' or 'waiting' status.
+        Subquery: appointments with a call still active (not attended) that was made before
+        the no_show_threshold. The caller filters on the appointment's own status.
         """
-        return self.db.query(VisitCall).join(Appointment).filter(
+        return select(VisitCall.appointment_id).where(
             VisitCall.called_at < no_show_threshold,
-            VisitCall.call_status == "active", # Assuming 'active' means it's still in the queue
-            Appointment.status.in_(["checked_in", "waiting"])
-        ).all()
+            VisitCall.call_status == "active",
+            VisitCall.appointment_id.is_not(None),
+        )
 
-    def create_visit_call(self, db: Session, appointment_id: UUID, ticket_sequence: int, ticket_number: str, called_by: UUID, call_type: str, call_status: str) -> VisitCall:
+    def create_visit_call(self, db: Session, appointment_id: UUID, ticket_sequence: int, ticket_number: str, called_by: UUID, call_type: str, call_status: str, called_at: Optional[datetime] = None) -> VisitCall:
         """
-        Creates a new VisitCall record.
+        Creates a new VisitCall record (called_at defaults to the database time).
         """
         db_obj = VisitCall(
             appointment_id=appointment_id,
@@ -33,7 +33,9 @@ class VisitCallCRUD:
             call_type=call_type,
             call_status=call_status
         )
+        if called_at is not None:
+            db_obj.called_at = called_at
         db.add(db_obj)
-        db.commit()
+        db.flush()
         db.refresh(db_obj)
         return db_obj
@@ -1,19 +1,28 @@
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.types import TypeDecorator, CHAR
+from sqlalchemy.dialects import postgresql
 import uuid
 
 class UUIDType(TypeDecorator):
     """Platform-independent UUID type.
 
-    Uses PostgreSQL's UUID type, otherwise uses
+    Uses PostgreSQL's native 16-byte UUID type, otherwise uses
     CHAR(36), storing UUIDs as strings.
     """
     impl = CHAR(36)
     cache_ok = True
 
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(CHAR(36))
+
     def process_bind_param(self, value, dialect):
         if value is None:
             return value
+        if dialect.name == "postgresql":
+            # psycopg2 adapts uuid.UUID natively; coerce strings coming from path/query params
+            return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
         return str(value)
 
     def process_result_value(self, value, dialect):
@@ -0,0 +1,151 @@
+"""
+Monthly range partitioning of the history tables (PostgreSQL only).
+
+appointment, CHECKIN, VISIT_CALL and INFRACTION are partitioned by month on
+their time column (migration f2a6c9d4e8b1). Each month is a partition named
+``<table>_pYYYYMM``; ``<table>_pdefault`` catches rows outside the created
+months. The primary keys include the partition key, which PostgreSQL
+requires, so CHECKIN / VISIT_CALL / INFRACTION no longer carry a database
+foreign key to appointment. Rows are archived per month, so child rows leave
+together with their appointments.
+
+The ORM models keep their single-column primary keys and the queries in the
+services are unchanged. Partition pruning applies when a query filters on the
+partition key. Otherwise the attached partitions are probed through their
+local indexes, and archiving keeps that number bounded by the retention
+window.
+
+Used by the migration and by PartitionArchiveService
+(app/services/partition_archive_service.py).
+"""
+import os
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.clock import local_datetime
+
+# Monthly partitions kept created ahead of the current month (appointments are booked in advance)
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "6"))
+
+
+@dataclass(frozen=True)
+class PartitionedTable:
+    name: str
+    key: str  # partition key column
+    primary_key: str
+    key_is_date: bool = False  # DATE column; the others are timestamptz
+
+
+PARTITIONED_TABLES = (
+    PartitionedTable("appointment", "date", "appointment_id", key_is_date=True),
+    PartitionedTable("CHECKIN", "checkin_time", "checkin_id"),
+    PartitionedTable("VISIT_CALL", "called_at", "call_id"),
+    PartitionedTable("INFRACTION", "occurred_at", "infraction_id"),
+)
+
+_PARTITION_RE = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(first: date, last: date) -> List[date]:
+    """Month starts from the month of `first` through the month of `last`, inclusive."""
+    months, month = [], month_start(first)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(table: PartitionedTable, month: date) -> str:
+    return f"{table.name}_p{month:%Y%m}"
+
+
+def default_partition_name(table: PartitionedTable) -> str:
+    return f"{table.name}_pdefault"
+
+
+def partition_month(name: str):
+    """Month of a ``<table>_pYYYYMM`` partition name, None for other names (e.g. the default partition)."""
+    match = _PARTITION_RE.search(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def expired_partitions(names: Iterable[str], cutoff: date) -> List[str]:
+    """Monthly partitions that end on or before `cutoff` (a month start), oldest first."""
+    dated = [(partition_month(name), name) for name in names]
+    return [name for month, name in sorted(d for d in dated if d[0]) if add_months(month, 1) <= cutoff]
+
+
+def _bound(table: PartitionedTable, month: date) -> str:
+    # Month boundaries are local (APP_TIMEZONE) midnights, matching clock.today()
+    value = month if table.key_is_date else local_datetime(month)
+    return f"'{value.isoformat()}'"
+
+
+def attached_partitions(conn: Connection, table: PartitionedTable) -> List[str]:
+    return list(conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "WHERE parent.relname = :parent AND parent.relnamespace = 'public'::regnamespace"
+    ), {"parent": table.name}).scalars())
+
+
+def month_partitions(conn: Connection, table: PartitionedTable) -> Dict[str, bool]:
+    """Every ``<table>_pYYYYMM`` table in the public schema -> whether it is attached (detached ones are leftovers)."""
+    return dict(conn.execute(text(
+        "SELECT c.relname, i.inhparent IS NOT NULL FROM pg_class c "
+        "LEFT JOIN pg_inherits i ON i.inhrelid = c.oid "
+        "WHERE c.relnamespace = 'public'::regnamespace AND c.relkind = 'r' AND c.relname ~ :pattern"
+    ), {"pattern": f"^{table.name}_p[0-9]{{6}}$"}).all())
+
+
+def create_default_partition(conn: Connection, table: PartitionedTable) -> None:
+    conn.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{default_partition_name(table)}" PARTITION OF "{table.name}" DEFAULT'
+    ))
+
+
+def create_month_partition(conn: Connection, table: PartitionedTable, month: date) -> None:
+    """
+    Creates and attaches the partition of `month`. Rows of that month already sitting in the
+    default partition are moved into it first, otherwise ATTACH would fail.
+    """
+    child, default = partition_name(table, month), default_partition_name(table)
+    low, high = _bound(table, month), _bound(table, add_months(month, 1))
+    # exec_driver_sql: the timestamp literals contain ":00", which text() would read as bind parameters
+    conn.exec_driver_sql(
+        f'CREATE TABLE "{child}" (LIKE "{table.name}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    )
+    conn.exec_driver_sql(
+        f'WITH moved AS (DELETE FROM "{default}" WHERE "{table.key}" >= {low} AND "{table.key}" < {high} RETURNING *) '
+        f'INSERT INTO "{child}" SELECT * FROM moved'
+    )
+    # Creates the child's copies of the parent's indexes and primary key
+    conn.exec_driver_sql(
+        f'ALTER TABLE "{table.name}" ATTACH PARTITION "{child}" FOR VALUES FROM ({low}) TO ({high})'
+    )
+
+
+def ensure_month_partitions(conn: Connection, table: PartitionedTable, first: date, last: date) -> List[str]:
+    """Creates the missing monthly partitions from `first` through `last`; returns the created names."""
+    existing = set(attached_partitions(conn, table))
+    created = []
+    for month in months_between(first, last):
+        if partition_name(table, month) not in existing:
+            create_month_partition(conn, table, month)
+            created.append(partition_name(table, month))
+    return created
@@ -0,0 +1,245 @@
+"""
+Slow-query log.
+
+``install(engine)`` hooks an engine's cursor events and times every
+statement. Statements slower than ``SLOW_QUERY_MS`` are:
+
+* logged (WARNING) with the route that issued them (``GET /api/v1/...``,
+  from ``QueryContextMiddleware``) and the innermost app.services / app.crud
+  function on the call stack. Parameters are redacted to their types, and
+  string literals in the SQL text are masked;
+* aggregated per statement shape in a bounded in-memory table (the
+  ``SLOW_QUERY_TOP_N`` shapes with the highest total time), served by
+  GET /api/v1/admin/diagnostics/slow-queries;
+* with ``SLOW_QUERY_EXPLAIN=true`` on PostgreSQL, re-run once under
+  ``EXPLAIN (ANALYZE, BUFFERS)`` on the same connection, inside a savepoint
+  that is always rolled back, so writes leave no trace. This doubles the cost
+  of that one execution, so each shape is explained at most once per
+  ``SLOW_QUERY_EXPLAIN_INTERVAL`` seconds.
+
+Only the timestamps are taken for fast statements; the call stack is walked
+only for the slow ones.
+"""
+import contextvars
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "true").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_TOP_N = int(os.getenv("SLOW_QUERY_TOP_N", "50"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+MAX_STATEMENT_LENGTH = 2000
+
+# Functions in these packages are reported as the statement's origin (innermost first)
+ORIGIN_MODULES = ("app.services.", "app.crud.", "app.api.routers.")
+_EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+
+_request_scope: contextvars.ContextVar[Optional[Scope]] = contextvars.ContextVar("query_log_scope", default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = r"(?:\?|%\(\w+\)s|%s|:\w+|\$\d+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(statement: str) -> str:
+    """Statement shape: whitespace collapsed, string literals masked, IN (...) lists collapsed."""
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _STRING_LITERAL.sub("'?'", statement)
+    return _PLACEHOLDER_LIST.sub("(...)", statement)[:MAX_STATEMENT_LENGTH]
+
+
+def _shape(value):
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact(parameters):
+    """Parameter values replaced by their type (and length for strings)."""
+    if isinstance(parameters, dict):
+        return {key: _shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} parameter sets>"  # executemany
+        return [_shape(value) for value in parameters]
+    return _shape(parameters)
+
+
+def current_route() -> Optional[str]:
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope.get('method', '')} {getattr(route, 'path', None) or scope.get('path', '')}"
+
+
+def calling_function() -> Optional[str]:
+    """Innermost app.services / app.crud (else router) function on the current stack."""
+    fallback = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith(ORIGIN_MODULES):
+            name = f"{module}.{frame.f_code.co_qualname}"
+            if not module.startswith("app.api.routers."):
+                return name
+            fallback = fallback or name
+        frame = frame.f_back
+    return fallback
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+    last_seen: float = 0.0  # epoch seconds
+    route: Optional[str] = None
+    function: Optional[str] = None
+    parameters: object = None
+    explain: Optional[str] = None
+    explained_at: Optional[float] = None  # monotonic
+
+
+class QueryLog:
+    """Aggregates slow statements per shape, keeping the `capacity` shapes with the highest total time."""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, capacity: int = SLOW_QUERY_TOP_N,
+                 explain: bool = SLOW_QUERY_EXPLAIN, explain_interval: float = SLOW_QUERY_EXPLAIN_INTERVAL):
+        self.threshold_ms = threshold_ms
+        self.capacity = capacity
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self._entries: Dict[str, SlowQuery] = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, parameters, elapsed_ms: float) -> SlowQuery:
+        shape, redacted = normalize(statement), redact(parameters)
+        route, function = current_route(), calling_function()
+        logger.warning(f"慢查詢 {elapsed_ms:.0f} ms [{route or '-'}] {function or '-'}: {shape} 參數={redacted}")
+        with self._lock:
+            entry = self._entries.get(shape)
+            if entry is None:
+                entry = SlowQuery(statement=shape)
+                if len(self._entries) >= self.capacity:
+                    smallest = min(self._entries.values(), key=lambda e: e.total_ms)
+                    if smallest.total_ms < elapsed_ms:
+                        del self._entries[smallest.statement]
+                if len(self._entries) < self.capacity:
+                    self._entries[shape] = entry
+            entry.count += 1
+            entry.total_ms += elapsed_ms
+            entry.max_ms = max(entry.max_ms, elapsed_ms)
+            entry.last_ms = elapsed_ms
+            entry.last_seen = time.time()
+            entry.route, entry.function, entry.parameters = route, function, redacted
+        return entry
+
+    def should_explain(self, entry: SlowQuery) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self._entries.get(entry.statement) is not entry:
+                return False  # not in the top N
+            if entry.explained_at is not None and now - entry.explained_at < self.explain_interval:
+                return False
+            entry.explained_at = now  # claimed, so concurrent requests do not explain it again
+            return True
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e.total_ms, reverse=True)
+            rows = [{**asdict(e), "mean_ms": e.total_ms / e.count} for e in entries]
+        for row in rows:
+            del row["explained_at"]
+        return rows
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+query_log = QueryLog()
+
+
+def _explain(cursor, statement: str, parameters) -> str:
+    """EXPLAIN (ANALYZE, BUFFERS) on the statement's own DBAPI connection, always rolled back."""
+    explain_cursor = cursor.connection.cursor()
+    explain_cursor.execute("SAVEPOINT query_log_explain")
+    try:
+        explain_cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+        return "\n".join(row[0] for row in explain_cursor.fetchall())
+    finally:
+        explain_cursor.execute("ROLLBACK TO SAVEPOINT query_log_explain")
+        explain_cursor.execute("RELEASE SAVEPOINT query_log_explain")
+        explain_cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_log_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_log_started"].pop()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    log = query_log
+    if elapsed_ms < log.threshold_ms:
+        return
+    entry = log.record(statement, parameters, elapsed_ms)
+    if (log.explain and not executemany and conn.dialect.name == "postgresql" and conn.in_transaction()
+            and statement.lstrip().lower().startswith(_EXPLAINABLE) and log.should_explain(entry)):
+        try:
+            entry.explain = _explain(cursor, statement, parameters)
+        except Exception:
+            logger.warning(f"無法取得慢查詢的執行計畫: {entry.statement[:200]}", exc_info=True)
+
+
+def _handle_error(context):
+    # The statement failed: after_cursor_execute is not called for it
+    started = context.connection.info.get("query_log_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def install(engine: Engine) -> None:
+    """Times every statement of `engine` (no-op with SLOW_QUERY_LOG_ENABLED=false or if already installed)."""
+    if not SLOW_QUERY_LOG_ENABLED or event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryContextMiddleware:
+    """Makes the request's route available to the slow-query log (register it innermost)."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # The router stores the matched route in this same scope dict, so it is visible to later lookups
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
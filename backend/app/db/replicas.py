@@ -0,0 +1,239 @@
+"""
+Read-replica routing for read-only endpoints.
+
+``REPLICA_DATABASE_URLS`` (comma separated) lists streaming replicas of the
+primary. Read-heavy GET endpoints depend on ``get_read_db`` instead of
+``get_db``; it hands out a session bound to a replica when one is both healthy
+and caught up, otherwise the primary session:
+
+* lag-aware: each replica's replication lag is probed at most every
+  ``REPLICA_LAG_CHECK_SECONDS``; replicas lagging more than
+  ``REPLICA_MAX_LAG_SECONDS`` (or failing the probe) are skipped.
+* read-your-writes: ``ReadYourWritesMiddleware`` records the time of each
+  user's last successful write, keyed on the authenticated subject (role and
+  user id from the access token), so it works for the cross-origin SPA without
+  cookies. Until a replica's lag is smaller than the time elapsed since that
+  write, the user's reads stay on the primary, so e.g. the appointment list
+  right after booking always shows the new booking. The times live in Redis so
+  every worker sees them; ``READ_YOUR_WRITES_BACKEND=memory`` is for tests.
+
+Without replicas configured ``get_read_db`` is just ``get_db``. The primary
+session is only opened when the read falls back to it.
+"""
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.security import token_principal
+from app.db import query_log
+from app.db.session import get_db
+
+logger = logging.getLogger(__name__)
+
+REPLICA_DATABASE_URLS = [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "2"))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "1"))
+# Reads stick to the primary for at most this long after a write, whatever the replicas report
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "30"))
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def postgres_replay_lag(engine: Engine) -> float:
+    """Seconds the replica is behind the primary (0 when idle or not in recovery)."""
+    with engine.connect() as connection:
+        lag = connection.execute(text(
+            "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+            "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+        )).scalar()
+    return float(lag)
+
+
+def default_lag_probe(engine: Engine) -> float:
+    if engine.dialect.name == "postgresql":
+        return postgres_replay_lag(engine)
+    return 0.0  # no replication to measure (e.g. SQLite copies in local tests)
+
+
+@dataclass
+class Replica:
+    engine: Engine
+    session_factory: sessionmaker
+    lag_seconds: Optional[float] = None  # None: unknown / probe failed
+    checked_at: float = float("-inf")
+
+
+class ReplicaRouter:
+    def __init__(self, engines: List[Engine], max_lag_seconds: float = REPLICA_MAX_LAG_SECONDS,
+                 check_interval: float = REPLICA_LAG_CHECK_SECONDS,
+                 lag_probe: Callable[[Engine], float] = default_lag_probe,
+                 clock: Callable[[], float] = time.monotonic):
+        for engine in engines:
+            query_log.install(engine)
+        self.replicas = [
+            Replica(engine=engine, session_factory=sessionmaker(autocommit=False, autoflush=False, bind=engine))
+            for engine in engines
+        ]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.lag_probe = lag_probe
+        self.clock = clock
+        self._round_robin = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        self._lock = threading.Lock()
+
+    def _refresh(self, replica: Replica) -> None:
+        now = self.clock()
+        if now - replica.checked_at < self.check_interval:
+            return
+        replica.checked_at = now
+        try:
+            replica.lag_seconds = self.lag_probe(replica.engine)
+        except Exception:
+            logger.warning(f"無法取得讀取副本延遲 ({replica.engine.url.host})，暫時改用主資料庫。", exc_info=True)
+            replica.lag_seconds = None
+
+    def choose(self, since_last_write: Optional[float] = None) -> Optional[Replica]:
+        """
+        A replica whose lag is within the limit and, if the client wrote
+        `since_last_write` seconds ago, smaller than that. None means use the primary.
+        """
+        if not self.replicas:
+            return None
+        max_lag = self.max_lag_seconds
+        if since_last_write is not None:
+            max_lag = min(max_lag, since_last_write)
+        with self._lock:
+            start = next(self._round_robin)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            self._refresh(replica)
+            if replica.lag_seconds is not None and replica.lag_seconds < max_lag:
+                return replica
+        return None
+
+    def status(self) -> List[Dict]:
+        return [
+            {"host": replica.engine.url.host or replica.engine.url.database, "lag_seconds": replica.lag_seconds}
+            for replica in self.replicas
+        ]
+
+
+replica_router = ReplicaRouter([create_engine(url, pool_pre_ping=True) for url in REPLICA_DATABASE_URLS])
+
+
+class InMemoryLastWriteStore:
+    """Process-local last-write times for tests. Thread-safe."""
+
+    def __init__(self, ttl_seconds: float = READ_YOUR_WRITES_SECONDS, clock: Callable[[], float] = time.time):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._written_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, principal: str, written_at: float) -> None:
+        with self._lock:
+            for expired in [p for p, at in self._written_at.items() if written_at - at >= self.ttl_seconds]:
+                del self._written_at[expired]
+            self._written_at[principal] = written_at
+
+    def last_write(self, principal: str) -> Optional[float]:
+        with self._lock:
+            return self._written_at.get(principal)
+
+
+class RedisLastWriteStore:
+    """Last-write times shared by all workers (REDIS_URL). The default."""
+
+    def __init__(self, url: str, ttl_seconds: float = READ_YOUR_WRITES_SECONDS, prefix: str = "last_write:"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.redis = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def record(self, principal: str, written_at: float) -> None:
+        self.redis.set(f"{self.prefix}{principal}", f"{written_at:.3f}", ex=max(1, math.ceil(self.ttl_seconds)))
+
+    def last_write(self, principal: str) -> Optional[float]:
+        raw = self.redis.get(f"{self.prefix}{principal}")
+        return float(raw) if raw is not None else None
+
+
+def create_last_write_store():
+    if os.getenv("READ_YOUR_WRITES_BACKEND", "redis").lower() == "memory":
+        return InMemoryLastWriteStore()
+    return RedisLastWriteStore(os.getenv("REDIS_URL", "redis://redis:6379/0"))
+
+
+# Nothing is recorded without replicas, so don't require Redis for it then
+last_writes = create_last_write_store() if REPLICA_DATABASE_URLS else InMemoryLastWriteStore()
+
+
+def seconds_since_last_write(request: Request, now: Optional[float] = None) -> Optional[float]:
+    principal = token_principal(request.headers.get("authorization"))
+    if principal is None:
+        return None
+    written_at = last_writes.last_write(principal)
+    if written_at is None:
+        return None
+    elapsed = (now if now is not None else time.time()) - written_at
+    if elapsed >= READ_YOUR_WRITES_SECONDS:
+        return None
+    return max(0.0, elapsed)
+
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints: a caught-up replica if available, else the primary."""
+    replica = replica_router.choose(seconds_since_last_write(request)) if replica_router.replicas else None
+    if replica is None:
+        # Resolved here rather than as a sub-dependency so replica reads never open a primary session
+        yield from request.app.dependency_overrides.get(get_db, get_db)()
+        return
+    replica_db = replica.session_factory()
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
+
+
+class ReadYourWritesMiddleware:
+    """
+    Records the caller's last successful non-GET request in the last-write store
+    (only when replicas are configured and the caller is authenticated).
+    """
+
+    def __init__(self, app: ASGIApp, router: Optional[ReplicaRouter] = None, store=None):
+        self.app = app
+        self.router = router if router is not None else replica_router
+        self.store = store if store is not None else last_writes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not self.router.replicas:
+            await self.app(scope, receive, send)
+            return
+        principal = token_principal(Headers(scope=scope).get("authorization"))
+        if principal is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def record_send(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                # Recorded before the response goes out, so the client's next read already sees it
+                await run_in_threadpool(self.store.record, principal, time.time())
+            await send(message)
+
+        await self.app(scope, receive, record_send)
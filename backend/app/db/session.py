@@ -1,21 +1,52 @@
 import os
 import logging
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.db import query_log
+
 logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://appuser:password@db:5432/hospital")
+# Per-worker pool; keep workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) under the server's max_connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+engine_options = {"pool_pre_ping": True}
+if not DATABASE_URL.startswith("sqlite"):
+    engine_options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(DATABASE_URL, **engine_options)
+query_log.install(engine)  # 慢查詢記錄 (SLOW_QUERY_MS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-def get_db():
-    logger.info("get_db: start")
-    db = SessionLocal()
+@contextmanager
+def unit_of_work(session_factory=None):
+    """
+    One transaction: commits once when the block succeeds, rolls back if it raises.
+    CRUD and service functions only flush; this (or get_db) is the single commit point.
+    """
+    db = (session_factory or SessionLocal)()
     try:
         yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
     finally:
         db.close()
-        logger.info("get_db: end")
+
+
+def get_db():
+    """
+    Request-scoped unit of work. Declare it as Depends(get_db, scope="function") so the
+    commit runs after the response is serialized but before it is sent: a failed commit
+    becomes a 500 instead of a success response for changes that were never saved.
+    Errors raised by the endpoint (HTTPException included) roll the whole request back.
+    """
+    logger.info("get_db: start")
+    with unit_of_work() as db:
+        yield db
+    logger.info("get_db: end")
@@ -1,11 +1,20 @@
 # backend/app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routers import (
     auth, admin_management, schedules, patient_appointments,
     queue, doctor_clinic_management, user_profile, medical_records,
-    patient_lookup, doctor_schedules
+    patient_lookup, doctor_schedules, waiting_room, admin_scheduler, admin_diagnostics, health, kiosk
 )
+from app.core.compression import CompressionMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app.db.replicas import ReadYourWritesMiddleware
+from app.db.query_log import QueryContextMiddleware
+from app.core.profiler import ProfilingMiddleware
+from app.core.scheduler import SCHEDULER_ENABLED
+from app.core.warmup import start_warmup, stop_warmup
+from app.services.scheduled_jobs import scheduler
 import os
 import logging
 
@@ -13,13 +22,35 @@ import logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 預熱連線池與常用查詢，完成後 /health/ready 才回報就緒
+    await start_warmup(app)
+    # 自動開診、未到診掃描、分區維護等排程（多個 worker 時由 advisory lock 選出唯一執行者）
+    if SCHEDULER_ENABLED:
+        scheduler.start()
+    yield
+    if SCHEDULER_ENABLED:
+        await scheduler.stop()
+    await stop_warmup(app)
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost",
     "http://localhost:5173",  # 您的前端地址
 ]
 
+# 慢查詢記錄需要知道查詢來自哪個路由（最內層，路由比對結果寫在同一個 scope）
+app.add_middleware(QueryContextMiddleware)
+# 預約、報到、叫號的 POST 支援 Idempotency-Key，重送時回放第一次的回應
+# (在 CORS 之前註冊 = 位於 CORS 內層，回放的回應仍會帶上 CORS 標頭)
+app.add_middleware(IdempotencyMiddleware)
+# 寫入成功後標記時間，讓該使用者接下來的讀取留在主資料庫，直到讀取副本追上
+app.add_middleware(ReadYourWritesMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -28,6 +59,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 大型列表回應（班表、病歷等）依 Accept-Encoding 壓縮 (br / gzip)
+app.add_middleware(CompressionMiddleware)
+# 管理員要求剖析接下來的 K 個請求時，標記這些請求進行中（最外層，含所有 middleware 的耗時；未啟用時只檢查一個屬性）
+app.add_middleware(ProfilingMiddleware)
+
+app.include_router(health.router, prefix="/health", tags=["Health"])
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Auth"])
 app.include_router(admin_management.router, prefix="/api/v1", tags=["Admin Management"])
 app.include_router(schedules.router, prefix="/api/v1/schedules", tags=["Schedules"])
@@ -38,6 +75,10 @@ app.include_router(doctor_clinic_management.router, prefix="/api/v1", tags=["Doc
 app.include_router(doctor_schedules.router, prefix="/api/v1/doctor-schedules", tags=["Doctor Schedules"])
 app.include_router(user_profile.router, prefix="/api/v1/profile", tags=["User Profile"])
 app.include_router(medical_records.router, prefix="/api/v1/medical-records", tags=["Medical Records"])
+app.include_router(waiting_room.router, prefix="/api/v1/waiting-room", tags=["Waiting Room"])
+app.include_router(admin_scheduler.router, prefix="/api/v1", tags=["Admin Scheduler"])
+app.include_router(admin_diagnostics.router, prefix="/api/v1", tags=["Admin Diagnostics"])
+app.include_router(kiosk.router, prefix="/api/v1/kiosk", tags=["Kiosk"])
 
 # 僅在開發環境中包含開發工具路由
 if os.getenv("ENV") == "development":
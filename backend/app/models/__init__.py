@@ -7,11 +7,14 @@ from .appointment import Appointment
 from .checkin import Checkin
 from .schedule import Schedule
 from .medical_record import MedicalRecord
+from .medical_record_term import MedicalRecordTerm
 
 from .visit_call import VisitCall
 from .infraction import Infraction
 from .room_day import RoomDay
 from .leave_request import LeaveRequest # Added import
+from .service_time_stat import ServiceTimeStat
+from .queue_event import QueueEvent
 
 __all__ = [
     "Base",
@@ -22,9 +25,12 @@ __all__ = [
     "Checkin",
     "Schedule",
     "MedicalRecord",
+    "MedicalRecordTerm",
     "AuditLog",
     "VisitCall",
     "Infraction",
     "RoomDay",
     "LeaveRequest", # Added to __all__
+    "ServiceTimeStat",
+    "QueueEvent",
 ]
@@ -1,14 +1,13 @@
 import uuid
 from sqlalchemy import Column, String, DateTime, Boolean, func
-from sqlalchemy.dialects.postgresql import UUID
 
-from ..db.base import Base
+from ..db.base import Base, UUIDType
 
 
 class Admin(Base):
     __tablename__ = "ADMIN"
 
-    admin_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    admin_id = Column(UUIDType, primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     email = Column(String, nullable=False)
     account_username = Column(String, nullable=False, unique=True)
@@ -1,13 +1,19 @@
 # backend/app/models/appointment.py
 import uuid
 from datetime import datetime, date
-from sqlalchemy import Column, String, ForeignKey, DateTime, Date
+from sqlalchemy import Column, String, ForeignKey, DateTime, Date, Index, func
 from sqlalchemy.orm import relationship
 
+from app.core.clock import system_clock
 from app.db.base import Base, UUIDType
 
 class Appointment(Base):
     __tablename__ = "appointment"
+    # PostgreSQL 依 date 按月分區 (主鍵為 appointment_id + date，見 app/db/partitioning.py)
+    __table_args__ = (
+        # 病患當日預約查詢（現場機台刷卡報到、今日預約列表）
+        Index("ix_appointment_patient_id_date", "patient_id", "date"),
+    )
 
     appointment_id = Column(UUIDType, primary_key=True, default=uuid.uuid4)
     patient_id = Column(UUIDType, ForeignKey("PATIENT.patient_id"), nullable=False)
@@ -17,6 +23,7 @@ class Appointment(Base):
     time_period = Column(String, nullable=False) # e.g., "morning", "afternoon", "night"
     status = Column(String, nullable=False, default="scheduled") # e.g., "scheduled", "confirmed", "waitlist", "cancelled", "checked_in", "waiting", "called", "in_consult", "completed", "no_show"
     created_at = Column(DateTime(timezone=True), default=datetime.now, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=system_clock.now, onupdate=system_clock.now, server_default=func.now(), nullable=False) # 醫師看診主控台差異同步的版本
 
     patient = relationship("Patient", back_populates="appointments")
     doctor = relationship("Doctor", back_populates="appointments")
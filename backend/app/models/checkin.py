@@ -1,30 +1,45 @@
 import uuid
 import uuid
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Enum, func, Text
+from sqlalchemy import BigInteger, Column, String, DateTime, Integer, ForeignKey, Enum, func, Text
 from sqlalchemy.orm import relationship
+from ..core.clock import system_clock
 from ..db.base import Base, UUIDType
 
 
 checkin_method_enum = ("onsite", "online")
 checkin_status_enum = ("checked_in", "no_show", "seen") # Define new enum for status
 
+# 候診順序的號碼間距：新號碼排在 ticket_sequence * QUEUE_POSITION_GAP，
+# 號碼之間的空位留給補報到插隊 (見 QueueService.re_check_in)
+QUEUE_POSITION_GAP = 1 << 20
+
+
+def initial_queue_position(context):
+    ticket_sequence = context.get_current_parameters().get("ticket_sequence")
+    return None if ticket_sequence is None else ticket_sequence * QUEUE_POSITION_GAP
+
 
 class Checkin(Base):
     __tablename__ = "CHECKIN"
 
     checkin_id = Column(UUIDType, primary_key=True, default=uuid.uuid4)
-    appointment_id = Column(UUIDType, ForeignKey("appointment.appointment_id"), nullable=True)
+    # PostgreSQL 依 checkin_time 按月分區，appointment_id 在資料庫端沒有外鍵 (見 app/db/partitioning.py)
+    appointment_id = Column(UUIDType, nullable=True, index=True)
     patient_id = Column(UUIDType, ForeignKey("PATIENT.patient_id"), nullable=False)
-    checkin_time = Column(DateTime(timezone=True), nullable=True)
+    checkin_time = Column(DateTime(timezone=True), nullable=False, default=system_clock.now)
     checkin_method = Column(Enum(*checkin_method_enum, name="checkin_method"), nullable=True)
     ticket_sequence = Column(Integer, nullable=True)
     ticket_number = Column(String, nullable=True)
+    queue_position = Column(BigInteger, nullable=True, default=initial_queue_position) # 候診順序 (由小到大叫號)，與顯示的號碼分開
     status = Column(Enum(*checkin_status_enum, name="checkin_status"), nullable=False, default="checked_in") # New status column
     cancelled_by = Column(UUIDType, ForeignKey("ADMIN.admin_id"), nullable=True)
     cancel_reason = Column(Text, nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=system_clock.now, onupdate=system_clock.now, server_default=func.now(), nullable=False) # 醫師看診主控台差異同步的版本
 
     # Relationship to Appointment
-    appointment = relationship("Appointment", backref="checkins")
+    appointment = relationship(
+        "Appointment", primaryjoin="foreign(Checkin.appointment_id) == Appointment.appointment_id", backref="checkins"
+    )
 
     def __repr__(self):
         return f"<Checkin {self.checkin_id} patient={self.patient_id} ticket={self.ticket_number}>"
@@ -10,8 +10,9 @@ class Infraction(Base):
     __tablename__ = "INFRACTION"
 
     infraction_id = Column(UUIDType, primary_key=True, default=uuid.uuid4)
-    patient_id = Column(UUIDType, ForeignKey("PATIENT.patient_id"), nullable=False)
-    appointment_id = Column(UUIDType, ForeignKey("appointment.appointment_id"), nullable=True)
+    # PostgreSQL 依 occurred_at 按月分區，appointment_id 在資料庫端沒有外鍵 (見 app/db/partitioning.py)
+    patient_id = Column(UUIDType, ForeignKey("PATIENT.patient_id"), nullable=False, index=True)
+    appointment_id = Column(UUIDType, nullable=True, index=True)
     infraction_type = Column(Enum(*infraction_type_enum, name="infraction_type"), nullable=False)
     occurred_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     penalty_applied = Column(Boolean, nullable=False, default=False)
@@ -1,19 +1,27 @@
 import uuid
-from sqlalchemy import Column, Text, DateTime, ForeignKey, func, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Text, DateTime, ForeignKey, Index, func, String
+from sqlalchemy.orm import deferred, relationship
 from ..db.base import Base, UUIDType
 
 
 class MedicalRecord(Base):
     __tablename__ = "MEDICAL_RECORD"
+    __table_args__ = (
+        # 醫師 / 病患病歷列表與檢索的範圍條件 (依時間新到舊)
+        Index("ix_medical_record_patient_id_created_at", "patient_id", "created_at"),
+        Index("ix_medical_record_doctor_id_created_at", "doctor_id", "created_at"),
+    )
 
     record_id = Column(UUIDType, primary_key=True, default=uuid.uuid4)
     patient_id = Column(UUIDType, ForeignKey("PATIENT.patient_id"), nullable=False)
     doctor_id = Column(UUIDType, ForeignKey("DOCTOR.doctor_id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    summary = Column(Text, nullable=True)
-    prescription = Column(Text, nullable=True)
+    # 長文字欄位延遲載入：列表只取摘要前段，完整內容由單筆查詢 (undefer_group) 取得
+    summary = deferred(Column(Text, nullable=True), group="record_text")
+    prescription = deferred(Column(Text, nullable=True), group="record_text")
     department = Column(String, nullable=True)
+    # PostgreSQL 另有 search_vector (由 summary / prescription 產生的 tsvector 欄位，GIN 索引)，
+    # 由資料庫維護、不對應到 ORM；見 app/crud/medical_record_search.py
 
     patient = relationship("Patient", back_populates="medical_records")
     doctor = relationship("Doctor", back_populates="medical_records")
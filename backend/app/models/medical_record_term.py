@@ -0,0 +1,17 @@
+from sqlalchemy import Column, ForeignKey, Integer, String
+from ..db.base import Base, UUIDType
+
+
+class MedicalRecordTerm(Base):
+    """
+    病歷全文檢索的詞彙表 (僅 PostgreSQL 以外的資料庫使用；PostgreSQL 使用 search_vector + GIN)。
+    檢索一定限定醫師或病患，因此主鍵以 record_id 開頭，由病歷的範圍索引帶出各筆病歷的詞。
+    """
+    __tablename__ = "MEDICAL_RECORD_TERM"
+
+    record_id = Column(UUIDType, ForeignKey("MEDICAL_RECORD.record_id", ondelete="CASCADE"), primary_key=True)
+    term = Column(String, primary_key=True)
+    frequency = Column(Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<MedicalRecordTerm {self.term!r} record={self.record_id}>"
@@ -0,0 +1,35 @@
+import uuid
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Enum, JSON, UniqueConstraint, func
+
+from ..core.clock import system_clock
+from ..db.base import Base, UUIDType
+
+
+queue_event_type_enum = ("checked_in", "called", "seen", "no_show", "re_checked_in", "reordered")
+
+
+class QueueEvent(Base):
+    """
+    Append-only log of queue changes of one session (RoomDay), numbered 1, 2, 3... per
+    schedule. Written in the same transaction as the change (see app/crud/crud_queue_event.py).
+    """
+    __tablename__ = "QUEUE_EVENT"
+    __table_args__ = (
+        # 依 offset 增量讀取 (WHERE schedule_id = ? AND event_offset > ?) 也使用這個索引
+        UniqueConstraint("schedule_id", "event_offset", name="uq_queue_event_schedule_offset"),
+    )
+
+    event_id = Column(UUIDType, primary_key=True, default=uuid.uuid4)
+    schedule_id = Column(UUIDType, ForeignKey("SCHEDULE.schedule_id"), nullable=False)
+    offset = Column("event_offset", Integer, nullable=False)  # OFFSET 是 SQL 保留字
+    event_type = Column(Enum(*queue_event_type_enum, name="queue_event_type"), nullable=False)
+    # CHECKIN / appointment 在 PostgreSQL 依月分區，不建外鍵 (見 app/db/partitioning.py)
+    checkin_id = Column(UUIDType, nullable=True)
+    appointment_id = Column(UUIDType, nullable=True)
+    ticket_sequence = Column(Integer, nullable=True)
+    ticket_number = Column(String, nullable=True)
+    data = Column(JSON, nullable=True)  # 事件的補充資料，例如 reordered 的 previous_sequence
+    occurred_at = Column(DateTime(timezone=True), default=system_clock.now, server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<QueueEvent {self.schedule_id}#{self.offset} {self.event_type} seq={self.ticket_sequence}>"
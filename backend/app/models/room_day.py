@@ -1,7 +1,13 @@
 import uuid
-from sqlalchemy import Column, Date, Integer, ForeignKey
+from sqlalchemy import BigInteger, Column, Date, DateTime, Integer, ForeignKey, func
 from sqlalchemy.orm import relationship
+from ..core.clock import system_clock
 from ..db.base import Base, UUIDType
+from .checkin import QUEUE_POSITION_GAP
+
+
+def initial_called_position(context):
+    return (context.get_current_parameters().get("current_called_sequence") or 0) * QUEUE_POSITION_GAP
 
 
 class RoomDay(Base):
@@ -11,6 +17,10 @@ class RoomDay(Base):
     schedule_id = Column(UUIDType, ForeignKey("SCHEDULE.schedule_id"), nullable=False, unique=True)
     next_sequence = Column(Integer, nullable=False, default=1)
     current_called_sequence = Column(Integer, nullable=True)
+    current_called_position = Column(BigInteger, nullable=False, default=initial_called_position, server_default="0") # 目前叫到的候診順序 (CHECKIN.queue_position)
+    last_called_at = Column(DateTime(timezone=True), nullable=True) # 上一次叫號時間，用於計算看診時間
+    last_event_offset = Column(Integer, nullable=False, default=0, server_default="0") # 最後一筆候診事件 (QUEUE_EVENT) 的 offset
+    updated_at = Column(DateTime(timezone=True), default=system_clock.now, onupdate=system_clock.now, server_default=func.now(), nullable=False) # 醫師看診主控台差異同步的版本
 
     schedule = relationship("Schedule")
 
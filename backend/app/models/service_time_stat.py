@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, DateTime, Float, ForeignKey, Integer, JSON, func
+
+from ..db.base import Base, UUIDType
+
+
+class ServiceTimeStat(Base):
+    """
+    Running per-doctor / per-period consultation time summary, updated on every call
+    (see app/services/wait_time_service.py). One small row per doctor and time period.
+    """
+    __tablename__ = "SERVICE_TIME_STAT"
+
+    doctor_id = Column(UUIDType, ForeignKey("DOCTOR.doctor_id"), primary_key=True)
+    time_period = Column(String, primary_key=True)
+    sample_count = Column(Integer, nullable=False, default=0)
+    ewma_seconds = Column(Float, nullable=True)
+    ewm_variance = Column(Float, nullable=False, default=0)
+    histogram = Column(JSON, nullable=True)  # exponentially decayed counts per SERVICE_TIME_BUCKETS bucket
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<ServiceTimeStat doctor={self.doctor_id} period={self.time_period} ewma={self.ewma_seconds}>"
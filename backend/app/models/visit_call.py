@@ -12,7 +12,8 @@ class VisitCall(Base):
     __tablename__ = "VISIT_CALL"
 
     call_id = Column(UUIDType, primary_key=True, default=uuid.uuid4)
-    appointment_id = Column(UUIDType, ForeignKey("appointment.appointment_id"), nullable=True)
+    # PostgreSQL 依 called_at 按月分區，appointment_id 在資料庫端沒有外鍵 (見 app/db/partitioning.py)
+    appointment_id = Column(UUIDType, nullable=True, index=True)
     ticket_sequence = Column(Integer, nullable=False)
     ticket_number = Column(String, nullable=True)
     called_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,6 +1,7 @@
 import uuid
 from datetime import datetime
-from pydantic import BaseModel, Field
+from typing import List, Literal
+from pydantic import BaseModel, Field, field_validator
 
 class CheckinBase(BaseModel):
     appointment_id: uuid.UUID | None = None
@@ -24,3 +25,48 @@ class CheckinInDBBase(CheckinBase):
 
 class Checkin(CheckinInDBBase):
     pass
+
+class KioskCheckinRequest(BaseModel):
+    card_number: str
+    appointment_id: uuid.UUID | None = None # 當日有多筆預約時由機台選擇
+
+class KioskAppointmentOption(BaseModel):
+    appointment_id: uuid.UUID
+    time_period: str
+    doctor_name: str
+    specialty: str
+
+class KioskCheckinResponse(BaseModel):
+    message: str
+    appointment_id: uuid.UUID
+    ticket_number: str
+    time_period: str
+    doctor_name: str
+
+class KioskBatchItem(BaseModel):
+    client_id: uuid.UUID # 機台端產生，用於對應回傳結果
+    card_number: str
+    appointment_id: uuid.UUID | None = None
+    checked_in_at: datetime # 機台離線時實際刷卡的時間
+
+class KioskBatchRequest(BaseModel):
+    kiosk_id: str
+    items: List[KioskBatchItem]
+
+    @field_validator("items")
+    @classmethod
+    def client_ids_are_unique(cls, items: List[KioskBatchItem]) -> List[KioskBatchItem]:
+        # 結果以 client_id 對應回機台，重複時無法分辨是哪一筆
+        if len({item.client_id for item in items}) != len(items):
+            raise ValueError("同一批次中的 client_id 不可重複")
+        return items
+
+class KioskBatchResult(BaseModel):
+    client_id: uuid.UUID
+    status: Literal["checked_in", "already_checked_in", "not_found", "ambiguous", "invalid_time"]
+    appointment_id: uuid.UUID | None = None
+    ticket_number: str | None = None
+    message: str
+
+class KioskBatchResponse(BaseModel):
+    results: List[KioskBatchResult]
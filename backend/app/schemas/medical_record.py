@@ -28,3 +28,23 @@ class MedicalRecord(MedicalRecordBase):
 
     class Config:
         from_attributes = True
+
+
+class MedicalRecordListItem(BaseModel):
+    """病歷列表的精簡欄位；完整的 summary / prescription 請以 GET /medical-records/{record_id} 取得。"""
+    record_id: uuid.UUID
+    patient_id: uuid.UUID
+    doctor_id: uuid.UUID
+    created_at: datetime.datetime
+    department: Optional[str] = None
+    doctor_name: Optional[str] = None
+    patient_name: Optional[str] = None
+    summary_preview: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class MedicalRecordSearchHit(MedicalRecordListItem):
+    rank: float
+    snippet: Optional[str] = None  # 命中詞以 <b></b> 標示
@@ -1,4 +1,24 @@
-from pydantic import BaseModel, Field
+import uuid
+from datetime import datetime
+from typing import List
+from pydantic import BaseModel, ConfigDict, Field
 
 class CallNextRequest(BaseModel):
     called_ticket_sequence: int = Field(..., description="The ticket sequence number that has just been called.")
+
+class QueueEventPublic(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    offset: int
+    event_type: str # checked_in / called / seen / no_show / re_checked_in / reordered
+    checkin_id: uuid.UUID | None = None
+    appointment_id: uuid.UUID | None = None
+    ticket_sequence: int | None = None
+    ticket_number: str | None = None
+    data: dict | None = None
+    occurred_at: datetime
+
+class QueueEventPage(BaseModel):
+    schedule_id: uuid.UUID
+    events: List[QueueEventPublic]
+    last_offset: int # 下次以 after=last_offset 續讀
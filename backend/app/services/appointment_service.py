@@ -5,11 +5,12 @@ from datetime import date, datetime, time # Import datetime and time
 from typing import List # Import List
 from sqlalchemy import case # Import case
 import os # Import os
-import pytz # Import pytz
 
+from app.core.clock import Clock, system_clock
 from app.crud.crud_appointment import appointment_crud
 from app.crud.crud_user import get_patient
 from app.crud.crud_doctor import get_doctor
+from app.crud.projections import APPOINTMENT_PUBLIC_COLUMNS, to_appointment_public
 from app.schemas.appointment import AppointmentCreate, AppointmentInDB, AppointmentPublic
 from app.models.schedule import Schedule
 from app.models.appointment import Appointment
@@ -18,11 +19,6 @@ from app.models.patient import Patient # Import Patient model
 from app.utils.email_sender import email_sender
 
 class AppointmentService:
-    def _get_taiwan_current_date(self):
-        """Helper to get the current date in Taiwan time zone."""
-        taiwan_tz = pytz.timezone('Asia/Taipei')
-        return datetime.now(taiwan_tz).date()
-
     def create_appointment(
         self, db: Session, *, patient_id: uuid.UUID, appointment_in: AppointmentCreate, background_tasks: BackgroundTasks
     ) -> AppointmentInDB:
@@ -86,9 +82,7 @@ class AppointmentService:
             new_appointment = appointment_crud.create(db, obj_in=appointment_in, patient_id=patient_id, schedule_id=schedule.schedule_id)
             print(f"DEBUG: New appointment created: {new_appointment.appointment_id}")
             
-            db.commit()
             db.refresh(new_appointment)
-            print(f"DEBUG: Appointment committed and refreshed.")
 
             # 6. Send confirmation email in the background
             patient = get_patient(db, patient_id=patient_id)
@@ -120,10 +114,12 @@ class AppointmentService:
         self, db: Session, *, patient_id: uuid.UUID,
         start_date: str = None,
         end_date: str = None,
-        statuses: List[str] = None
+        statuses: List[str] = None,
+        clock: Clock = system_clock
     ) -> List[AppointmentPublic]:
         query = (
-            db.query(Appointment, Doctor, Patient)
+            db.query(*APPOINTMENT_PUBLIC_COLUMNS)
+            .select_from(Appointment)
             .join(Doctor, Appointment.doctor_id == Doctor.doctor_id)
             .join(Patient, Appointment.patient_id == Patient.patient_id)
             .filter(Appointment.patient_id == patient_id)
@@ -131,7 +127,7 @@ class AppointmentService:
 
         # If no date range is provided, filter for today in Taiwan time
         if not start_date and not end_date:
-            taiwan_today = self._get_taiwan_current_date()
+            taiwan_today = clock.today()
             query = query.filter(Appointment.date == taiwan_today)
         else:
             if start_date:
@@ -157,19 +153,7 @@ class AppointmentService:
             .all()
         )
 
-        result = []
-        for appointment, doctor, patient in appointments:
-            result.append(
-                AppointmentPublic(
-                    **AppointmentInDB.model_validate(appointment).model_dump(),
-                    doctor_name=doctor.name,
-                    specialty=doctor.specialty,
-                    patient_name=patient.name
-                )
-            )
-        return result
-
-        return result
+        return to_appointment_public(appointments)
 
     def cancel_appointment(
         self, db: Session, *, appointment_id: uuid.UUID, patient_id: uuid.UUID
@@ -213,8 +197,7 @@ class AppointmentService:
                 schedule.booked_patients -= 1
                 db.add(schedule)
             
-            db.flush() # Flush to ensure all updates are part of the transaction
-            db.commit() # Commit the transaction to save changes permanently
+            db.flush() # Flush to ensure all updates are part of the transaction (get_db commits)
             return appointment
 
 appointment_service = AppointmentService()
@@ -0,0 +1,27 @@
+from sqlalchemy.orm import Session
+from datetime import datetime
+import logging
+
+from app.core.clinic_hours import open_sessions_at
+from app.crud.crud_room_day import room_day as crud_room_day
+
+logger = logging.getLogger(__name__)
+
+
+class ClinicOpenService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def open_due_sessions(self, now: datetime) -> dict:
+        """
+        Opens (creates RoomDay for) every eligible schedule of the sessions whose
+        check-in window contains `now` (Taiwan local time), one bulk upsert per session.
+        Returns {time_period: [opened schedule ids]}.
+        """
+        opened = {}
+        for time_period in open_sessions_at(now.time()):
+            opened[time_period] = crud_room_day.open_for_session(
+                self.db, target_date=now.date(), time_period=time_period
+            )
+            logger.info(f"自動開診: {now.date()} {time_period} 開啟 {len(opened[time_period])} 個診間。")
+        return opened
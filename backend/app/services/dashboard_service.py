@@ -8,9 +8,10 @@ from app.models.checkin import Checkin
 from app.models.schedule import Schedule
 from app.models.doctor import Doctor
 from app.schemas.dashboard import DashboardStats, ClinicLoad
+from app.core.clock import Clock, system_clock
 
-def get_admin_dashboard_stats(db: Session, department: Optional[str] = None) -> DashboardStats:
-    today = date.today()
+def get_admin_dashboard_stats(db: Session, department: Optional[str] = None, clock: Clock = system_clock) -> DashboardStats:
+    today = clock.today()
 
     # Base query for appointments joined with doctors
     appointment_query = db.query(Appointment).join(Doctor, Appointment.doctor_id == Doctor.doctor_id)
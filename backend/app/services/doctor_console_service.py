@@ -0,0 +1,167 @@
+"""
+Aggregate state for the doctor console screen.
+
+One request returns the schedule, room state, counters and the ordered
+patient list, read from a single snapshot in three queries. On PostgreSQL the
+reads run in their own read-only REPEATABLE READ session, so the request's
+unit of work (see app/db/session.py) is left alone; a SQLite read transaction
+is already a snapshot. The queries are:
+schedule + RoomDay (ownership check included), appointments + patients +
+check-ins, and the doctor's service-time statistics for the wait estimate.
+
+Delta mode: every response carries ``version`` (derived from the rows'
+``updated_at``). A client that sends it back as ``since_version`` only gets
+the patient rows changed since then; room state and counters are always
+complete. Rows committed by transactions that were still running when the
+version was taken can carry a slightly older ``updated_at``, so the delta also
+re-sends rows from the last ``CONSOLE_VERSION_OVERLAP_SECONDS``; clients merge
+rows by appointment_id, so repeats are harmless.
+"""
+from contextlib import contextmanager
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from datetime import datetime
+from typing import Optional
+import os
+import uuid
+
+from app.core.clock import APP_TIMEZONE, Clock, system_clock
+from app.models.appointment import Appointment
+from app.models.checkin import Checkin
+from app.models.patient import Patient
+from app.models.room_day import RoomDay
+from app.models.schedule import Schedule
+from app.services.wait_time_service import WaitTimeService
+
+CONSOLE_VERSION_OVERLAP_SECONDS = float(os.getenv("CONSOLE_VERSION_OVERLAP_SECONDS", "2"))
+
+
+def to_version(value: Optional[datetime]) -> int:
+    """updated_at -> integer version (microseconds since the epoch)."""
+    if value is None:
+        return 0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=APP_TIMEZONE)  # SQLite returns naive local datetimes
+    return int(value.timestamp() * 1_000_000)
+
+
+class DoctorConsoleService:
+    def __init__(self, db: Session, clock: Optional[Clock] = None):
+        self.db = db
+        self.clock = clock or system_clock
+
+    @contextmanager
+    def _snapshot_session(self):
+        bind = self.db.get_bind()
+        if bind.dialect.name != "postgresql":
+            yield self.db
+            return
+        # The request's transaction has already run the authentication query,
+        # too late to change its isolation level
+        snapshot_bind = bind.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+        with Session(bind=snapshot_bind) as db:
+            yield db
+
+    def snapshot(self, *, doctor_id: uuid.UUID, schedule_id: uuid.UUID, since_version: Optional[int] = None) -> dict:
+        with self._snapshot_session() as db:
+            return self._read(db, doctor_id, schedule_id, since_version)
+
+    def _read(self, db: Session, doctor_id: uuid.UUID, schedule_id: uuid.UUID, since_version: Optional[int]) -> dict:
+        found = (
+            db.query(Schedule, RoomDay)
+            .outerjoin(RoomDay, RoomDay.schedule_id == Schedule.schedule_id)
+            .filter(Schedule.schedule_id == schedule_id, Schedule.doctor_id == doctor_id)
+            .first()
+        )
+        if not found:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found or does not belong to this doctor.")
+        schedule, room_day = found
+        if schedule.date != self.clock.today():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="只能查詢今日班表的看診資訊。")
+
+        rows = (
+            db.query(
+                Appointment.appointment_id,
+                Appointment.patient_id,
+                Appointment.status.label("appointment_status"),
+                Appointment.updated_at.label("appointment_updated_at"),
+                Patient.name.label("patient_name"),
+                Checkin.checkin_id,
+                Checkin.status.label("checkin_status"),
+                Checkin.ticket_number,
+                Checkin.ticket_sequence,
+                Checkin.queue_position,
+                Checkin.checkin_time,
+                Checkin.updated_at.label("checkin_updated_at"),
+            )
+            .select_from(Appointment)
+            .join(Patient, Appointment.patient_id == Patient.patient_id)
+            .outerjoin(Checkin, Checkin.appointment_id == Appointment.appointment_id)
+            .filter(Appointment.schedule_id == schedule_id)
+            .all()
+        )
+
+        current_called = (room_day.current_called_sequence or 0) if room_day else 0
+        called_position = room_day.current_called_position if room_day else 0
+        patients = []
+        counters = {"waiting_count": 0, "checked_in_count": 0, "seen_count": 0, "no_show_count": 0, "pending_count": 0}
+        version = to_version(room_day.updated_at) if room_day else 0
+        # Checked-in patients in queue order, then the ones not checked in yet
+        rows.sort(key=lambda r: (r.queue_position is None, r.queue_position or 0))
+        for row in rows:
+            row_version = max(to_version(row.appointment_updated_at), to_version(row.checkin_updated_at))
+            version = max(version, row_version)
+            if row.checkin_id is None:
+                counters["pending_count"] += 1
+            elif row.checkin_status == "checked_in":
+                counters["checked_in_count"] += 1
+                if row.queue_position is not None and row.queue_position > called_position:
+                    counters["waiting_count"] += 1
+            elif row.checkin_status == "seen":
+                counters["seen_count"] += 1
+            elif row.checkin_status == "no_show":
+                counters["no_show_count"] += 1
+            patients.append({
+                "patient_id": row.patient_id,
+                "patient_name": row.patient_name,
+                "appointment_id": row.appointment_id,
+                "appointment_status": row.appointment_status,
+                "status": row.checkin_status if row.checkin_id else "pending",
+                "ticket_number": row.ticket_number if row.checkin_id else "N/A",
+                "ticket_sequence": row.ticket_sequence,
+                "checkin_time": row.checkin_time,
+                "checkin_id": row.checkin_id,
+                "version": row_version,
+            })
+        if since_version is not None:
+            cutoff = since_version - int(CONSOLE_VERSION_OVERLAP_SECONDS * 1_000_000)
+            patients = [p for p in patients if p["version"] > cutoff]
+
+        room = {"opened": room_day is not None, "current_number": "N/A", "current_called_sequence": None,
+                "next_sequence": None, "last_called_at": None}
+        if room_day:
+            room.update({
+                "current_number": f"A{current_called:03d}",
+                "current_called_sequence": room_day.current_called_sequence,
+                "next_sequence": room_day.next_sequence,
+                "last_called_at": room_day.last_called_at,
+            })
+            counters.update(WaitTimeService(db).estimate_minutes(
+                schedule, room_day, counters["waiting_count"], self.clock.now()
+            ))
+
+        return {
+            "version": max(version, since_version or 0),
+            "full": since_version is None,
+            "schedule": {
+                "schedule_id": schedule.schedule_id,
+                "date": schedule.date,
+                "time_period": schedule.time_period,
+                "status": schedule.status,
+                "max_patients": schedule.max_patients,
+                "booked_patients": schedule.booked_patients,
+            },
+            "room": room,
+            "counters": counters,
+            "patients": patients,
+        }
@@ -1,9 +1,9 @@
 from sqlalchemy.orm import Session
 from uuid import UUID
 from typing import Optional
-from datetime import date, timedelta, datetime
-import pytz # Import pytz
+from datetime import date, timedelta
 
+from app.core.clock import Clock, system_clock
 from app.crud.infraction_crud import InfractionCRUD
 from app.crud.crud_user import update_patient_suspended_until
 from app.schemas.infraction import InfractionCreate
@@ -13,14 +13,10 @@ class InfractionService:
     PENALTY_DURATION_DAYS = 90 # Changed from 180 to 90
     NO_SHOW_COUNT_WINDOW_DAYS = 90 # New constant for the counting window
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, clock: Optional[Clock] = None):
         self.db = db
-        self.infraction_crud = InfractionCRUD(db)
-
-    def _get_taiwan_current_date(self):
-        """Helper to get the current date in Taiwan time zone."""
-        taiwan_tz = pytz.timezone('Asia/Taipei')
-        return datetime.now(taiwan_tz).date()
+        self.clock = clock or system_clock
+        self.infraction_crud = InfractionCRUD(db, clock=self.clock)
 
     async def create_infraction(self, patient_id: UUID, appointment_id: Optional[UUID], infraction_type: str):
         """
@@ -35,7 +31,7 @@ class InfractionService:
         new_infraction = self.infraction_crud.create(infraction_in)
 
         if infraction_type == "no_show":
-            taiwan_today = self._get_taiwan_current_date()
+            taiwan_today = self.clock.today()
             ninety_days_ago = taiwan_today - timedelta(days=self.NO_SHOW_COUNT_WINDOW_DAYS - 1) # -1 because it's inclusive
 
             no_show_count = self.infraction_crud.count_infractions_in_period(
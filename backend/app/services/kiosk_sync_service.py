@@ -0,0 +1,158 @@
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Optional
+import logging
+import os
+import uuid
+
+from app.core.clock import APP_TIMEZONE, Clock, system_clock
+from app.crud.crud_appointment import appointment_crud
+from app.crud.crud_queue_event import queue_event
+from app.crud.crud_room_day import room_day as crud_room_day
+from app.models.appointment import Appointment
+from app.models.checkin import Checkin
+from app.schemas.checkin import KioskBatchItem, KioskBatchResult
+from app.services.checkin_service import CHECKIN_ALLOWED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# 機台時鐘可比伺服器快的秒數
+KIOSK_CLOCK_SKEW_SECONDS = float(os.getenv("KIOSK_CLOCK_SKEW_SECONDS", "300"))
+
+
+class KioskSyncService:
+    def __init__(self, db: Session, clock: Optional[Clock] = None):
+        self.db = db
+        self.clock = clock or system_clock
+
+    def sync(self, items: List[KioskBatchItem]) -> List[KioskBatchResult]:
+        """
+        Replays check-ins buffered by a kiosk while it was offline, in one transaction:
+        one lookup for all cards, one conditional appointment UPDATE, one ROOM_DAY update
+        per clinic (tickets and checked_in event offsets handed out in original check-in
+        order), one bulk CHECKIN insert and one QUEUE_EVENT insert per clinic. Items that
+        were already checked in (e.g. the kiosk retries a batch whose response it never got)
+        report their existing ticket. Results follow `items` order.
+        """
+        today = self.clock.today()
+        latest_allowed = self.clock.now() + timedelta(seconds=KIOSK_CLOCK_SKEW_SECONDS)
+
+        rows_by_card = defaultdict(list)
+        for row in appointment_crud.get_by_card_numbers_and_date(
+            self.db,
+            card_numbers=list({item.card_number for item in items}),
+            on_date=today,
+            statuses=(*CHECKIN_ALLOWED_STATUSES, "checked_in"),
+        ):
+            rows_by_card[row.card_number].append(row)
+
+        results: Dict[uuid.UUID, KioskBatchResult] = {}
+        accepted = []  # (item, appointment row, localized check-in time), in check-in order
+        claimed = {}  # appointment_id -> client_id that checks it in within this batch
+        existing = []  # (client_id, appointment_id) already checked in
+
+        for item in sorted(items, key=lambda i: self._localize(i.checked_in_at)):
+            checked_in_at = self._localize(item.checked_in_at)
+            if checked_in_at.date() != today or checked_in_at > latest_allowed:
+                results[item.client_id] = KioskBatchResult(
+                    client_id=item.client_id, status="invalid_time", message="報到時間不是今天，請至櫃台辦理。"
+                )
+                continue
+
+            candidates = [
+                row for row in rows_by_card[item.card_number]
+                if item.appointment_id is None or row.appointment_id == item.appointment_id
+            ]
+            open_rows = [
+                row for row in candidates
+                if row.status in CHECKIN_ALLOWED_STATUSES and row.appointment_id not in claimed
+            ]
+            done_rows = [row for row in candidates if row not in open_rows]
+
+            if len(open_rows) == 1:
+                claimed[open_rows[0].appointment_id] = item.client_id
+                accepted.append((item, open_rows[0], checked_in_at))
+            elif len(open_rows) > 1:
+                results[item.client_id] = KioskBatchResult(
+                    client_id=item.client_id, status="ambiguous", message="今日有多筆預約，請至櫃台選擇報到的門診。"
+                )
+            elif len(done_rows) == 1:
+                existing.append((item.client_id, done_rows[0].appointment_id))
+            else:
+                results[item.client_id] = KioskBatchResult(
+                    client_id=item.client_id, status="not_found", message="查無今日可報到的預約。"
+                )
+
+        if accepted:
+            updated = set(self.db.execute(
+                update(Appointment)
+                .where(
+                    Appointment.appointment_id.in_([row.appointment_id for _, row, _ in accepted]),
+                    Appointment.status.in_(CHECKIN_ALLOWED_STATUSES),
+                )
+                .values(status="checked_in")
+                .returning(Appointment.appointment_id)
+                .execution_options(synchronize_session=False)
+            ).scalars())
+            # Checked in elsewhere (online / another kiosk) since the lookup: report the existing ticket
+            existing.extend((item.client_id, row.appointment_id) for item, row, _ in accepted if row.appointment_id not in updated)
+            accepted = [entry for entry in accepted if entry[1].appointment_id in updated]
+
+        by_schedule = defaultdict(list)
+        for entry in accepted:
+            by_schedule[entry[1].schedule_id].append(entry)
+
+        checkin_rows = []
+        events_by_schedule = {}
+        for schedule_id, entries in by_schedule.items():
+            first_sequence, first_offset = crud_room_day.allocate_tickets(self.db, schedule_id=schedule_id, count=len(entries))
+            events = []
+            events_by_schedule[schedule_id] = (first_offset, events)
+            for offset, (item, row, checked_in_at) in enumerate(entries):
+                ticket_sequence = first_sequence + offset
+                ticket_number = f"A{ticket_sequence:03d}"
+                checkin_rows.append(dict(
+                    checkin_id=uuid.uuid4(), appointment_id=row.appointment_id, patient_id=row.patient_id,
+                    checkin_time=checked_in_at, checkin_method="onsite", ticket_sequence=ticket_sequence,
+                    ticket_number=ticket_number, status="checked_in",
+                ))
+                events.append(dict(
+                    event_type="checked_in", checkin_id=checkin_rows[-1]["checkin_id"], appointment_id=row.appointment_id,
+                    ticket_sequence=ticket_sequence, ticket_number=ticket_number, data={"method": "onsite"},
+                    occurred_at=checked_in_at,
+                ))
+                results[item.client_id] = KioskBatchResult(
+                    client_id=item.client_id, status="checked_in", appointment_id=row.appointment_id,
+                    ticket_number=ticket_number, message="報到成功"
+                )
+        if checkin_rows:
+            self.db.execute(insert(Checkin), checkin_rows)
+        for schedule_id, (first_offset, events) in events_by_schedule.items():
+            queue_event.append_many(self.db, schedule_id=schedule_id, events=events, first_offset=first_offset)
+
+        if existing:
+            tickets = dict(
+                self.db.query(Checkin.appointment_id, Checkin.ticket_number)
+                .filter(Checkin.appointment_id.in_({appointment_id for _, appointment_id in existing}))
+                .all()
+            )
+            tickets.update({row["appointment_id"]: row["ticket_number"] for row in checkin_rows})
+            for client_id, appointment_id in existing:
+                results[client_id] = KioskBatchResult(
+                    client_id=client_id, status="already_checked_in", appointment_id=appointment_id,
+                    ticket_number=tickets.get(appointment_id), message="此預約已完成報到。"
+                )
+
+        logger.info(
+            f"機台批次報到: {len(items)} 筆，成功 {len(checkin_rows)} 筆，"
+            f"{len(by_schedule)} 個診間各一次號碼分配。"
+        )
+        return [results[item.client_id] for item in items]
+
+    @staticmethod
+    def _localize(value):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=APP_TIMEZONE)
+        return value.astimezone(APP_TIMEZONE)
@@ -0,0 +1,92 @@
+from sqlalchemy.orm import Session
+from typing import Optional
+import gzip
+import logging
+import os
+
+from app.core.clock import Clock, system_clock
+from app.db.partitioning import (
+    PARTITION_MONTHS_AHEAD, PARTITIONED_TABLES, add_months, ensure_month_partitions, expired_partitions,
+    month_partitions, month_start,
+)
+
+logger = logging.getLogger(__name__)
+
+# 保留在線上 (attached) 的月份數；更早的分區會被封存
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", "24"))
+# schema: 移到封存 schema 並以 VACUUM FULL 壓實；file: 匯出成 gzip CSV 後刪除
+PARTITION_ARCHIVE_MODE = os.getenv("PARTITION_ARCHIVE_MODE", "schema")
+PARTITION_ARCHIVE_SCHEMA = os.getenv("PARTITION_ARCHIVE_SCHEMA", "archive")
+PARTITION_ARCHIVE_DIR = os.getenv("PARTITION_ARCHIVE_DIR", "archive")
+# DETACH 需要短暫的獨佔鎖；等不到就放棄，隔天再試，不讓線上查詢排在後面
+PARTITION_LOCK_TIMEOUT = os.getenv("PARTITION_LOCK_TIMEOUT", "5s")
+
+
+class PartitionArchiveService:
+    """
+    Daily maintenance of the partitioned history tables (see app/db/partitioning.py):
+    creates the monthly partitions for the coming PARTITION_MONTHS_AHEAD months and archives
+    partitions older than PARTITION_RETENTION_MONTHS. No-op on databases other than PostgreSQL.
+    """
+
+    def __init__(self, db: Session, clock: Optional[Clock] = None):
+        self.db = db
+        self.clock = clock or system_clock
+
+    def run(self) -> dict:
+        engine = self.db.get_bind()
+        if engine.dialect.name != "postgresql":
+            return {"skipped": engine.dialect.name}
+
+        this_month = month_start(self.clock.today())
+        cutoff = add_months(this_month, -PARTITION_RETENTION_MONTHS)
+        result = {"created": [], "archived": [], "failed": []}
+        with engine.connect() as conn:
+            for table in PARTITIONED_TABLES:
+                with conn.begin():
+                    self._set_lock_timeout(conn)
+                    result["created"] += ensure_month_partitions(
+                        conn, table, this_month, add_months(this_month, PARTITION_MONTHS_AHEAD)
+                    )
+                    partitions = month_partitions(conn, table)
+                for name in expired_partitions(partitions, cutoff):
+                    try:
+                        if partitions[name]:
+                            with conn.begin():
+                                self._set_lock_timeout(conn)
+                                conn.exec_driver_sql(f'ALTER TABLE "{table.name}" DETACH PARTITION "{name}"')
+                        # Archived in a separate step so the parent's lock is only held for the DETACH
+                        self._archive(conn, name)
+                        result["archived"].append(name)
+                    except Exception as e:
+                        logger.error(f"封存分區 {name} 失敗: {e}", exc_info=True)
+                        result["failed"].append(name)
+
+        logger.info(
+            f"歷史分區維護: 新增 {len(result['created'])} 個、封存 {len(result['archived'])} 個、"
+            f"失敗 {len(result['failed'])} 個 (保留 {PARTITION_RETENTION_MONTHS} 個月，截止 {cutoff})。"
+        )
+        return result
+
+    @staticmethod
+    def _set_lock_timeout(conn) -> None:
+        conn.exec_driver_sql(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'")
+
+    def _archive(self, conn, name: str) -> None:
+        if PARTITION_ARCHIVE_MODE == "file":
+            os.makedirs(PARTITION_ARCHIVE_DIR, exist_ok=True)
+            path = os.path.join(PARTITION_ARCHIVE_DIR, f"{name}.csv.gz")
+            with conn.begin():
+                cursor = conn.connection.dbapi_connection.cursor()
+                with gzip.open(f"{path}.part", "wb") as archive_file:
+                    cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', archive_file)
+                conn.exec_driver_sql(f'DROP TABLE "{name}"')
+                os.replace(f"{path}.part", path)  # before COMMIT: a failed rename keeps the table
+            return
+
+        with conn.begin():
+            conn.exec_driver_sql(f'CREATE SCHEMA IF NOT EXISTS "{PARTITION_ARCHIVE_SCHEMA}"')
+            conn.exec_driver_sql(f'ALTER TABLE "{name}" SET SCHEMA "{PARTITION_ARCHIVE_SCHEMA}"')
+        # The archived table is no longer written; VACUUM FULL (outside a transaction) rewrites it compactly
+        with self.db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as autocommit:
+            autocommit.exec_driver_sql(f'VACUUM (FULL, ANALYZE) "{PARTITION_ARCHIVE_SCHEMA}"."{name}"')
@@ -1,28 +1,44 @@
+import logging
+from app.core.clock import Clock, system_clock
 from app.crud.queue_crud import QueueCRUD
 from app.crud.crud_appointment import appointment_crud
+from app.crud.crud_queue_event import checkin_event, queue_event
+from app.crud.crud_room_day import room_day as crud_room_day
 from app.crud.visit_call_crud import VisitCallCRUD
 from app.services.notification_service import NotificationService
 from app.services.infraction_service import InfractionService
+from app.services.wait_time_service import WaitTimeService
 from app.models.appointment import Appointment
 from app.models.room_day import RoomDay
-from app.models.checkin import Checkin
+from app.models.schedule import Schedule
+from app.models.checkin import QUEUE_POSITION_GAP, Checkin
+from app.models.visit_call import VisitCall
+from collections import defaultdict
 from uuid import UUID
-import pytz # Import pytz
+from typing import Optional
 from datetime import date, datetime, timedelta
 from fastapi import HTTPException, status
+from sqlalchemy import update
 from sqlalchemy.orm import Session, joinedload
 from app.crud.crud_checkin import checkin as crud_checkin_instance # Import the instance
 import app.crud.crud_checkin as crud_checkin
 from app.schemas.checkin import CheckinCreate # Import CheckinCreate schema
 
+logger = logging.getLogger(__name__)
+
+# An unanswered call turns into a no-show after this many minutes
+NO_SHOW_AFTER_MINUTES = 3
+
+
 class QueueService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, clock: Optional[Clock] = None):
         self.db = db
+        self.clock = clock or system_clock
         self.queue_crud = QueueCRUD(db)
         self.appointment_crud = appointment_crud # Corrected initialization
         self.visit_call_crud = VisitCallCRUD(db) # Initialize VisitCallCRUD
         self.notification_service = NotificationService()
-        self.infraction_service = InfractionService(db) # Initialize InfractionService
+        self.infraction_service = InfractionService(db, clock=self.clock) # Initialize InfractionService
 
     async def get_patient_queue_status(self, appointment_id: UUID, patient_id: UUID):
         # 1. Get the Appointment record
@@ -72,17 +88,24 @@ class QueueService:
         my_position = f"A{my_ticket_sequence:03d}"
 
         waiting_count = 0
-        estimated_wait_time = 0
+        estimate = {"estimated_wait_time": 0, "estimated_wait_time_p90": 0}
 
-        if my_ticket_sequence > current_called_sequence:
-            waiting_count = my_ticket_sequence - current_called_sequence - 1
-            estimated_wait_time = waiting_count * 10 # 10 minutes per patient
+        if checkin_record.status == "checked_in" and checkin_record.queue_position > room_day.current_called_position:
+            # 依候診順序計算排在前面的人數 (補報到插隊的病患號碼較小但排在後面)
+            waiting_count = crud_checkin_instance.count_waiting_ahead(
+                self.db, schedule_id=appointment_record.schedule_id,
+                after_position=room_day.current_called_position, before_position=checkin_record.queue_position,
+            )
+            # Per-doctor/period service-time model (falls back to 10 minutes per patient)
+            estimate = WaitTimeService(self.db).estimate_minutes(
+                appointment_record.schedule, room_day, waiting_count, self.clock.now()
+            )
 
         return {
             "current_number": current_number,
             "my_position": my_position,
             "waiting_count": waiting_count,
-            "estimated_wait_time": estimated_wait_time,
+            **estimate,
             "status_message": "候診資訊已更新。"
         }
 
@@ -96,14 +119,17 @@ class QueueService:
         if not room_day:
             return
 
-        # 2. Calculate target ticket for notification
-        target_ticket_sequence = called_ticket_sequence + 2
+        queue_event.append(self.db, schedule_id=schedule_id, occurred_at=self.clock.now(), event_type="called",
+                           ticket_sequence=called_ticket_sequence, ticket_number=f"A{called_ticket_sequence:03d}")
+        schedule = self.db.get(Schedule, schedule_id)
+        if schedule:
+            WaitTimeService(self.db).record_call(room_day, schedule, self.clock.now())
 
-        # 3. Query CHECKIN to find the patient for the target ticket
-        patient_checkin = self.queue_crud.get_checkin_by_ticket_sequence(
-            schedule_id=schedule_id,
-            ticket_sequence=target_ticket_sequence
+        # 2. The patient two places after the called one, in queue order (re-checked-in patients keep their old number)
+        upcoming = crud_checkin_instance.get_waiting(
+            self.db, schedule_id=schedule_id, after_position=room_day.current_called_position, limit=2
         )
+        patient_checkin = upcoming[1] if len(upcoming) > 1 else None
 
         if patient_checkin:
             # 4. Dispatch a notification
@@ -118,37 +144,71 @@ class QueueService:
             )
             print(f"Notification sent to patient {patient_checkin.patient_id}: {notification_message}")
         else:
-            print(f"No patient found for target ticket sequence {target_ticket_sequence} for schedule {schedule_id}.")
+            print(f"No patient two places after ticket sequence {called_ticket_sequence} for schedule {schedule_id}.")
 
-    async def handle_no_shows(self):
+    async def handle_no_shows(self) -> int:
         """
-        Identifies and processes no-show appointments.
-        This method is intended to be run as a periodic background job.
+        Marks as no_show every patient still checked in (or waiting) NO_SHOW_AFTER_MINUTES after
+        an unanswered call: one UPDATE each for APPOINTMENT, CHECKIN and VISIT_CALL, one queue
+        event INSERT per room, then the infractions. Run every minute by the scheduler
+        (scheduled_jobs.run_no_show_sweep). Returns the number of no-shows. Does not commit.
         """
-        # Define the time threshold for no-show (e.g., 3 minutes)
-        no_show_threshold = datetime.now() - timedelta(minutes=3)
-
-        # Query for VisitCall records that were called more than 3 minutes ago
-        # and whose associated appointment is still in 'checked_in' or 'waiting' status.
-        no_show_calls = self.visit_call_crud.get_potential_no_shows(no_show_threshold)
+        no_show_threshold = self.clock.now() - timedelta(minutes=NO_SHOW_AFTER_MINUTES)
+        overdue = self.visit_call_crud.overdue_call_appointment_ids(no_show_threshold)
+
+        appointments = self.db.execute(
+            update(Appointment)
+            .where(Appointment.appointment_id.in_(overdue), Appointment.status.in_(["checked_in", "waiting"]))
+            .values(status="no_show")
+            .returning(Appointment.appointment_id, Appointment.patient_id, Appointment.schedule_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not appointments:
+            return 0
+        appointment_ids = [row.appointment_id for row in appointments]
+
+        checkins = {
+            row.appointment_id: row for row in self.db.execute(
+                update(Checkin)
+                .where(Checkin.appointment_id.in_(appointment_ids), Checkin.status == "checked_in")
+                .values(status="no_show")
+                .returning(Checkin.checkin_id, Checkin.appointment_id, Checkin.ticket_sequence, Checkin.ticket_number)
+                .execution_options(synchronize_session=False)
+            )
+        }
+        # The calls are settled: later sweeps do not pick them up again
+        self.db.execute(
+            update(VisitCall)
+            .where(VisitCall.appointment_id.in_(appointment_ids), VisitCall.call_status == "active")
+            .values(call_status="expired")
+            .execution_options(synchronize_session=False)
+        )
 
-        for call in no_show_calls:
-            appointment = self.appointment_crud.get(self.db, call.appointment_id) # Corrected method call
+        events_by_schedule = defaultdict(list)
+        for appointment in appointments:
+            checkin = checkins.get(appointment.appointment_id)
+            events_by_schedule[appointment.schedule_id].append({
+                "event_type": "no_show",
+                "checkin_id": checkin.checkin_id if checkin else None,
+                "appointment_id": appointment.appointment_id,
+                "ticket_sequence": checkin.ticket_sequence if checkin else None,
+                "ticket_number": checkin.ticket_number if checkin else None,
+                "data": {"automatic": True},
+            })
+        occurred_at = self.clock.now()
+        for schedule_id, events in events_by_schedule.items():
+            queue_event.append_many(self.db, schedule_id=schedule_id, events=events, occurred_at=occurred_at)
+
+        for appointment in appointments:
+            # Create an infraction record (D4)
+            await self.infraction_service.create_infraction(
+                patient_id=appointment.patient_id,
+                appointment_id=appointment.appointment_id,
+                infraction_type="no_show"
+            )
+        logger.info(f"未到掃描：{len(appointments)} 筆預約標記為未到，已建立違規紀錄。")
+        return len(appointments)
 
-            if appointment and appointment.status in ["checked_in", "waiting"]:
-                # Mark appointment as no_show
-                self.appointment_crud.update_status(self.db, # Corrected method call
-                    appointment_id=appointment.appointment_id,
-                    new_status="no_show"
-                )
-                # Create an infraction record (D4)
-                await self.infraction_service.create_infraction(
-                    patient_id=appointment.patient_id,
-                    appointment_id=appointment.appointment_id,
-                    infraction_type="no_show"
-                )
-                print(f"Appointment {appointment.appointment_id} marked as no_show. Infraction created.")
-                
     async def mark_no_show(self, checkin_id: UUID):
         checkin = self.db.query(Checkin).filter(Checkin.checkin_id == checkin_id).first()
         if not checkin:
@@ -157,13 +217,13 @@ class QueueService:
         # Update Checkin status
         checkin.status = "no_show" # Assuming Checkin model has a status field
         self.db.add(checkin)
-        self.db.commit()
-        self.db.refresh(checkin)
 
         # Update Appointment status
         appointment = self.appointment_crud.get(self.db, checkin.appointment_id)
         if appointment:
             self.appointment_crud.update_status(self.db, appointment_id=appointment.appointment_id, new_status="no_show")
+            queue_event.append(self.db, schedule_id=appointment.schedule_id, occurred_at=self.clock.now(),
+                               **checkin_event("no_show", checkin))
             # Create an infraction record
             await self.infraction_service.create_infraction(
                 patient_id=appointment.patient_id,
@@ -184,48 +244,54 @@ class QueueService:
         if checkin.status != "no_show":
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="病患未被標記為未到，無法補報到。")
 
-        room_day = self.db.query(RoomDay).filter(RoomDay.schedule_id == checkin.appointment.schedule_id).first()
+        # 鎖住 ROOM_DAY：同一診間的補報到依序決定插入位置，不會取到同一個空位
+        room_day = self.db.query(RoomDay).filter(
+            RoomDay.schedule_id == checkin.appointment.schedule_id
+        ).with_for_update().first()
         if not room_day:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="診間尚未開放或已關閉。")
 
-        # Update Checkin status back to checked_in
-        checkin.status = "checked_in"
-        self.db.add(checkin)
-        self.db.flush() # Flush to make checkin.ticket_sequence available for re-sequencing
-
-        # Get active waiting patients (excluding the re-checking-in patient's old sequence if it was still active)
-        active_waiting_patients = self.db.query(Checkin).filter(
-            Checkin.appointment.has(Appointment.schedule_id == checkin.appointment.schedule_id),
-            Checkin.status == "checked_in",
-            Checkin.ticket_sequence > room_day.current_called_sequence,
-            Checkin.checkin_id != checkin_id # Exclude the current patient from the list for insertion logic
-        ).order_by(Checkin.ticket_sequence).all()
-
-        new_ticket_sequence = None
-
-        if len(active_waiting_patients) > 3:
-            # Insert after the 3rd waiting patient (index 2)
-            target_sequence = active_waiting_patients[2].ticket_sequence
-            new_ticket_sequence = target_sequence + 1
-
-            # Shift subsequent patients
-            for patient_to_shift in active_waiting_patients:
-                if patient_to_shift.ticket_sequence >= new_ticket_sequence:
-                    patient_to_shift.ticket_sequence += 1
-                    self.db.add(patient_to_shift)
-            self.db.flush() # Flush shifted patients
+        schedule_id = checkin.appointment.schedule_id
+        previous_sequence = checkin.ticket_sequence
 
-        else:
-            # Insert at the end of the queue
-            new_ticket_sequence = room_day.next_sequence
-            room_day.next_sequence += 1
-            self.db.add(room_day)
-            self.db.flush() # Flush room_day update
+        # Only the first four waiting patients are needed to find the slot (the patient is still no_show,
+        # so not among them): the insertion writes this one row and nobody else's ticket number changes.
+        ahead = crud_checkin_instance.get_waiting(
+            self.db, schedule_id=schedule_id, after_position=room_day.current_called_position,
+            limit=4,
+        )
 
-        checkin.ticket_sequence = new_ticket_sequence
+        if len(ahead) > 3:
+            # Insert after the 3rd waiting patient, keeping the patient's ticket number
+            before, after = ahead[2], ahead[3]
+            if after.queue_position - before.queue_position < 2:
+                # 兩號之間已沒有空位：重新分配整個候診順序 (少見，不改變順序)
+                crud_checkin_instance.rebalance_queue_positions(
+                    self.db, schedule_id=schedule_id, lower=room_day.current_called_position,
+                    upper=room_day.next_sequence * QUEUE_POSITION_GAP,
+                )
+            queue_position = (before.queue_position + after.queue_position) // 2
+            event_offset = None
+        else:
+            # Insert at the end of the queue with a new ticket (and the offset of its queue event)
+            before = ahead[-1] if ahead else None
+            new_ticket_sequence, event_offset = crud_room_day.allocate_ticket(self.db, schedule_id=schedule_id)
+            checkin.ticket_sequence = new_ticket_sequence
+            checkin.ticket_number = f"A{new_ticket_sequence:03d}"
+            queue_position = new_ticket_sequence * QUEUE_POSITION_GAP
+
+        # Back to checked_in, written together with the new position in one UPDATE
+        checkin.status = "checked_in"
+        checkin.queue_position = queue_position
         self.db.add(checkin)
-        self.db.commit()
-        self.db.refresh(checkin)
+        self.db.flush()
+        queue_event.append(
+            self.db, schedule_id=schedule_id, occurred_at=self.clock.now(), first_offset=event_offset,
+            **checkin_event("re_checked_in", checkin, {
+                "previous_sequence": previous_sequence,
+                "after_ticket_number": before.ticket_number if before else None,
+            }),
+        )
 
         # Update Appointment status back to checked_in
         appointment = self.appointment_crud.get(self.db, checkin.appointment_id)
@@ -239,7 +305,7 @@ class QueueService:
         if not appointment or appointment.schedule_id != schedule_id:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="預約記錄未找到或不屬於此班表。")
         
-        if appointment.date != datetime.now(pytz.timezone('Asia/Taipei')).date(): # Assuming check-in is only for today's appointments
+        if appointment.date != self.clock.today(): # Assuming check-in is only for today's appointments
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="只能為今日的預約進行報到。")
 
         room_day = self.db.query(RoomDay).filter(RoomDay.schedule_id == schedule_id).first()
@@ -260,15 +326,14 @@ class QueueService:
             # For other statuses, update to checked_in
             existing_checkin.status = "checked_in"
             self.db.add(existing_checkin)
-            self.db.commit()
-            self.db.refresh(existing_checkin)
+            self.db.flush()
+            queue_event.append(self.db, schedule_id=schedule_id, occurred_at=self.clock.now(),
+                               **checkin_event("checked_in", existing_checkin, {"method": existing_checkin.checkin_method}))
             return {"message": "病患已成功報到。", "ticket_number": existing_checkin.ticket_number, "ticket_sequence": existing_checkin.ticket_sequence}
 
-        # Create new checkin record
-        new_ticket_sequence = room_day.next_sequence
-        room_day.next_sequence += 1
-        self.db.add(room_day)
-        self.db.flush() # Flush to get updated room_day.next_sequence
+        # Create new checkin record: the ticket (and the offset of its queue event) comes from one
+        # ROOM_DAY update, so concurrent check-ins never share a ticket_sequence
+        new_ticket_sequence, event_offset = crud_room_day.allocate_ticket(self.db, schedule_id=schedule_id)
 
         # Generate ticket number (e.g., A001, A002)
         ticket_number = f"A{new_ticket_sequence:03d}"
@@ -276,13 +341,15 @@ class QueueService:
         checkin_create_data = {
             "appointment_id": appointment_id,
             "patient_id": appointment.patient_id,
-            "checkin_time": datetime.now(),
+            "checkin_time": self.clock.now(),
             "checkin_method": "onsite", # Indicate manual check-in by doctor
             "ticket_sequence": new_ticket_sequence,
             "ticket_number": ticket_number,
             "status": "checked_in"
         }
         new_checkin = crud_checkin.checkin.create(db=self.db, obj_in=CheckinCreate(**checkin_create_data)) # Assuming create_checkin in QueueCRUD
+        queue_event.append(self.db, schedule_id=schedule_id, occurred_at=new_checkin.checkin_time, first_offset=event_offset,
+                           **checkin_event("checked_in", new_checkin, {"method": "onsite"}))
 
         # Update Appointment status
         self.appointment_crud.update_status(self.db, appointment_id=appointment_id, new_status="checked_in")
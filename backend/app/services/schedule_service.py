@@ -14,110 +14,62 @@ class ScheduleService:
     def request_doctor_leave(
         self, db: Session, *, doctor_id: uuid.UUID, leave_request_in: DoctorLeaveRequestInput
     ) -> SchedulePublic:
-        try:
-            schedule = db.query(Schedule).filter(
-                Schedule.doctor_id == doctor_id,
-                Schedule.date == leave_request_in.date,
-                Schedule.time_period == leave_request_in.time_period,
-            ).with_for_update().first()
+        schedule = db.query(Schedule).filter(
+            Schedule.doctor_id == doctor_id,
+            Schedule.date == leave_request_in.date,
+            Schedule.time_period == leave_request_in.time_period,
+        ).with_for_update().first()
 
-            if schedule:
-                if schedule.booked_patients > 0:
-                    raise HTTPException(
-                        status_code=status.HTTP_409_CONFLICT,
-                        detail="該時段已有病患預約，無法停診。"
-                    )
-                schedule.status = 'leave_pending'
-                schedule.max_patients = 0
-            else:
-                schedule = Schedule(
-                    doctor_id=doctor_id,
-                    date=leave_request_in.date,
-                    time_period=leave_request_in.time_period,
-                    status='leave_pending',
-                    max_patients=0,
-                    booked_patients=0,
+        if schedule:
+            if schedule.booked_patients > 0:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="該時段已有病患預約，無法停診。"
                 )
-            db.add(schedule)
-            db.flush() # Flush to get schedule.schedule_id if it's new
-
-            # Create a LeaveRequest entry and assign it to the schedule relationship
-            new_leave_request = LeaveRequest(
-                schedule_id=schedule.schedule_id,
+            schedule.status = 'leave_pending'
+            schedule.max_patients = 0
+        else:
+            schedule = Schedule(
                 doctor_id=doctor_id,
-                reason=leave_request_in.reason
+                date=leave_request_in.date,
+                time_period=leave_request_in.time_period,
+                status='leave_pending',
+                max_patients=0,
+                booked_patients=0,
             )
-            schedule.leave_request = new_leave_request # Assign to relationship
+        db.add(schedule)
+        db.flush() # Flush to get schedule.schedule_id if it's new
+
+        # Create a LeaveRequest entry and assign it to the schedule relationship
+        new_leave_request = LeaveRequest(
+            schedule_id=schedule.schedule_id,
+            doctor_id=doctor_id,
+            reason=leave_request_in.reason
+        )
+        schedule.leave_request = new_leave_request # Assign to relationship
 
-            db.commit() # Commit both schedule and leave request
-            db.refresh(schedule) # Refresh after commit
+        db.flush() # Schedule and leave request are committed together by get_db
+        db.refresh(schedule)
 
-            return SchedulePublic.model_validate(schedule)
-        except Exception as e:
-            db.rollback()
-            raise e
+        return SchedulePublic.model_validate(schedule)
 
     def request_doctor_leave_range(
         self, db: Session, *, doctor_id: uuid.UUID, leave_request_in: LeaveRequestRangeCreate
     ) -> List[SchedulePublic]:
-        updated_schedules = []
-        leave_requests_to_add = [] # Collect LeaveRequest objects directly
-        try:
-            # First, check for any conflicts in the entire range
-            current_date = leave_request_in.start_date
-            while current_date <= leave_request_in.end_date:
-                for time_period in leave_request_in.time_periods:
-                    existing_schedule = db.query(Schedule).filter(
-                        Schedule.doctor_id == doctor_id,
-                        Schedule.date == current_date,
-                        Schedule.time_period == time_period,
-                        Schedule.booked_patients > 0
-                    ).first()
-                    if existing_schedule:
-                        raise HTTPException(
-                            status_code=status.HTTP_409_CONFLICT,
-                            detail=f"日期 {current_date} 的 {time_period} 時段已有病患預約，無法申請連續停診。"
-                        )
-                current_date += timedelta(days=1)
-
-            # If no conflicts, proceed with creating/updating schedules
-            current_date = leave_request_in.start_date
-            while current_date <= leave_request_in.end_date:
-                for time_period in leave_request_in.time_periods:
-                    schedule = db.query(Schedule).filter(
-                        Schedule.doctor_id == doctor_id,
-                        Schedule.date == current_date,
-                        Schedule.time_period == time_period,
-                    ).with_for_update().first()
-
-                    if schedule:
-                        schedule.status = 'leave_pending'
-                        schedule.max_patients = 0
-                        db.add(schedule) # Add to session
-                        updated_schedules.append(schedule)
-                        
-                        # Prepare LeaveRequest entry and assign to relationship
-                        new_leave_request = LeaveRequest(
-                            schedule_id=schedule.schedule_id,
-                            doctor_id=doctor_id,
-                            reason=leave_request_in.reason
-                        )
-                        schedule.leave_request = new_leave_request # Assign to relationship
-                        leave_requests_to_add.append(new_leave_request) # Keep track if needed, but relationship handles add
-                    # else: If no existing schedule, skip this slot as per user's clarification
-                    # continue
-                current_date += timedelta(days=1)
-            
-            db.flush() # Flush schedules to get IDs if new, before creating leave requests
-
-            # The leave requests are added via the relationship, so no need for separate crud_leave_request.create_leave_request calls here
-            # db.add_all(leave_requests_to_add) # Not needed if assigned via relationship with cascade
-
-            db.commit() # Commit once after all schedules and leave requests are processed
-            for schedule in updated_schedules:
-                db.refresh(schedule) # Refresh after commit
+        # Conflict check, locking and writes are set-based (a constant number of statements for any range)
+        schedule_ids = crud_leave_request.apply_range_leave(
+            db,
+            doctor_id=doctor_id,
+            start_date=leave_request_in.start_date,
+            end_date=leave_request_in.end_date,
+            time_periods=leave_request_in.time_periods,
+            reason=leave_request_in.reason,
+        )
+        if not schedule_ids:
+            return []
 
-            return [SchedulePublic.model_validate(s) for s in updated_schedules]
-        except Exception as e:
-            db.rollback()
-            raise e
+        # populate_existing: the bulk UPDATE above bypassed the session's copies of these rows
+        updated_schedules = db.query(Schedule).filter(
+            Schedule.schedule_id.in_(schedule_ids)
+        ).order_by(Schedule.date, Schedule.time_period).populate_existing().all()
+        return [SchedulePublic.model_validate(s) for s in updated_schedules]
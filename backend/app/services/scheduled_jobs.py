@@ -0,0 +1,58 @@
+"""Periodic jobs run by the in-process scheduler (see app/core/scheduler.py)."""
+import asyncio
+from datetime import time, timedelta
+
+from app.core.clinic_hours import CLINIC_OPEN_TIMES
+from app.core.clock import system_clock
+from app.core.scheduler import Job, LeaderElector, Scheduler
+from app.db.session import SessionLocal, engine, unit_of_work
+from app.services.clinic_open_service import ClinicOpenService
+from app.services.partition_archive_service import PartitionArchiveService
+from app.services.queue_service import QueueService
+
+NO_SHOW_SWEEP_INTERVAL = timedelta(seconds=60)
+PARTITION_MAINTENANCE_AT = time(3, 30)  # outside clinic hours: DETACH briefly locks the history tables
+
+
+def run_clinic_auto_open() -> dict:
+    with unit_of_work() as db:
+        opened = ClinicOpenService(db).open_due_sessions(system_clock.now())
+    return {time_period: len(ids) for time_period, ids in opened.items()}
+
+
+def run_no_show_sweep() -> int:
+    with unit_of_work() as db:
+        # Runs in the scheduler's worker thread, which has no event loop of its own
+        return asyncio.run(QueueService(db).handle_no_shows())
+
+
+def run_partition_maintenance() -> dict:
+    db = SessionLocal()
+    try:
+        return PartitionArchiveService(db).run()
+    finally:
+        db.close()
+
+
+def build_scheduler() -> Scheduler:
+    scheduler = Scheduler(LeaderElector(engine))
+    scheduler.add_job(Job(
+        name="clinic_auto_open",
+        func=run_clinic_auto_open,
+        at_times=[window["start_booking"] for window in CLINIC_OPEN_TIMES.values()],
+        run_on_start=True,  # catch up when the process (re)starts in the middle of a session
+    ))
+    scheduler.add_job(Job(
+        name="no_show_sweep",
+        func=run_no_show_sweep,
+        interval=NO_SHOW_SWEEP_INTERVAL,
+    ))
+    scheduler.add_job(Job(
+        name="partition_maintenance",
+        func=run_partition_maintenance,
+        at_times=[PARTITION_MAINTENANCE_AT],
+    ))
+    return scheduler
+
+
+scheduler = build_scheduler()
@@ -0,0 +1,149 @@
+"""
+Wait-time estimates from a per-doctor / per-period service-time model.
+
+Every call of the next patient closes the previous consultation: the time since
+``RoomDay.last_called_at`` is one service-time sample. Samples are folded into a
+``ServiceTimeStat`` row (EWMA, exponentially weighted variance and a decayed
+histogram for percentiles), so updating and reading an estimate is O(1) and never
+scans call history. Until a doctor has SERVICE_TIME_MIN_SAMPLES samples the old fixed
+10-minutes-per-patient assumption is used.
+"""
+import logging
+import math
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.room_day import RoomDay
+from app.models.schedule import Schedule
+from app.models.service_time_stat import ServiceTimeStat
+
+logger = logging.getLogger(__name__)
+
+SERVICE_TIME_ALPHA = float(os.getenv("SERVICE_TIME_ALPHA", "0.15"))
+SERVICE_TIME_MIN_SAMPLES = int(os.getenv("SERVICE_TIME_MIN_SAMPLES", "5"))
+DEFAULT_SERVICE_SECONDS = 600.0  # 每位病患 10 分鐘（尚無統計時的預設值）
+# Intervals outside this range are skips / breaks, not consultations
+MIN_SAMPLE_SECONDS = 15
+MAX_SAMPLE_SECONDS = 3600
+# Upper bounds (seconds) of the histogram buckets; the last bucket runs up to MAX_SAMPLE_SECONDS
+SERVICE_TIME_BUCKETS: List[int] = [60, 120, 180, 240, 300, 420, 600, 900, 1200, 1800, 2700]
+P90_Z = 1.2816
+
+
+def record_sample(stat: ServiceTimeStat, seconds: float, alpha: float = SERVICE_TIME_ALPHA) -> bool:
+    """Folds one service-time sample into `stat`. Returns False if the sample was discarded."""
+    if not MIN_SAMPLE_SECONDS <= seconds <= MAX_SAMPLE_SECONDS:
+        return False
+    if stat.ewma_seconds is None:
+        stat.ewma_seconds = float(seconds)
+        stat.ewm_variance = 0.0
+    else:
+        # West's incremental EWMA / EW variance
+        diff = seconds - stat.ewma_seconds
+        increment = alpha * diff
+        stat.ewma_seconds = stat.ewma_seconds + increment
+        stat.ewm_variance = (1 - alpha) * ((stat.ewm_variance or 0.0) + diff * increment)
+
+    histogram = list(stat.histogram or [0.0] * (len(SERVICE_TIME_BUCKETS) + 1))
+    histogram = [count * (1 - alpha) for count in histogram]
+    bucket = next((i for i, bound in enumerate(SERVICE_TIME_BUCKETS) if seconds <= bound), len(SERVICE_TIME_BUCKETS))
+    histogram[bucket] += 1.0
+    stat.histogram = histogram  # reassign so the JSON column is marked dirty
+    stat.sample_count = (stat.sample_count or 0) + 1
+    return True
+
+
+def percentile_seconds(stat: ServiceTimeStat, q: float) -> Optional[float]:
+    """Approximate q-th percentile (0-100) of the service time from the decayed histogram."""
+    if not stat.histogram:
+        return None
+    total = sum(stat.histogram)
+    if total <= 0:
+        return None
+    target = total * q / 100
+    cumulative = 0.0
+    lower = 0.0
+    for i, count in enumerate(stat.histogram):
+        upper = SERVICE_TIME_BUCKETS[i] if i < len(SERVICE_TIME_BUCKETS) else float(MAX_SAMPLE_SECONDS)
+        if count > 0 and cumulative + count >= target:
+            return lower + (upper - lower) * (target - cumulative) / count
+        cumulative += count
+        lower = upper
+    return float(MAX_SAMPLE_SECONDS)
+
+
+def estimate_wait_seconds(
+    stat: Optional[ServiceTimeStat], waiting_count: int, elapsed_in_current: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    Expected and p90 wait for a patient with `waiting_count` patients ahead, plus the
+    remainder of the consultation in progress (`elapsed_in_current` seconds into it).
+    """
+    if stat is None or stat.ewma_seconds is None or (stat.sample_count or 0) < SERVICE_TIME_MIN_SAMPLES:
+        mean, spread = DEFAULT_SERVICE_SECONDS, 0.0
+    else:
+        mean = stat.ewma_seconds
+        # Consultation times are right-skewed: take the wider of the EW standard deviation
+        # and the spread implied by the histogram's p90
+        spread = math.sqrt(stat.ewm_variance or 0.0)
+        p90_single = percentile_seconds(stat, 90)
+        if p90_single is not None:
+            spread = max(spread, (p90_single - mean) / P90_Z)
+
+    consultations = waiting_count
+    remaining_current = 0.0
+    if elapsed_in_current is not None:
+        remaining_current = max(0.0, mean - elapsed_in_current)
+        consultations += 1
+    expected = waiting_count * mean + remaining_current
+    p90 = expected + P90_Z * spread * math.sqrt(consultations)
+    return {"expected": expected, "p90": p90}
+
+
+class WaitTimeService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_stat(self, doctor_id: UUID, time_period: str) -> Optional[ServiceTimeStat]:
+        return self.db.get(ServiceTimeStat, (doctor_id, time_period))
+
+    def record_call(self, room_day: RoomDay, schedule: Schedule, called_at: datetime) -> None:
+        """
+        Records a call on `room_day`: the interval since the previous call becomes a
+        service-time sample of the schedule's doctor/period. Only flushes; the caller commits.
+        """
+        previous = room_day.last_called_at
+        room_day.last_called_at = called_at
+        if previous is not None:
+            if previous.tzinfo is None and called_at.tzinfo is not None:
+                previous = previous.replace(tzinfo=called_at.tzinfo)  # SQLite returns naive datetimes
+            stat = self.db.query(ServiceTimeStat).filter(
+                ServiceTimeStat.doctor_id == schedule.doctor_id,
+                ServiceTimeStat.time_period == schedule.time_period,
+            ).with_for_update().first()
+            if stat is None:
+                stat = ServiceTimeStat(doctor_id=schedule.doctor_id, time_period=schedule.time_period, sample_count=0)
+                self.db.add(stat)
+            record_sample(stat, (called_at - previous).total_seconds())
+        self.db.add(room_day)
+        self.db.flush()
+
+    def estimate_minutes(
+        self, schedule: Schedule, room_day: RoomDay, waiting_count: int, now: datetime
+    ) -> Dict[str, int]:
+        """Wait estimate in whole minutes: {"estimated_wait_time", "estimated_wait_time_p90"}."""
+        elapsed = None
+        if room_day.last_called_at is not None:
+            last_called_at = room_day.last_called_at
+            if last_called_at.tzinfo is None and now.tzinfo is not None:
+                last_called_at = last_called_at.replace(tzinfo=now.tzinfo)
+            elapsed = max(0.0, (now - last_called_at).total_seconds())
+        estimate = estimate_wait_seconds(self.get_stat(schedule.doctor_id, schedule.time_period), waiting_count, elapsed)
+        return {
+            "estimated_wait_time": int(math.ceil(estimate["expected"] / 60)),
+            "estimated_wait_time_p90": int(math.ceil(estimate["p90"] / 60)),
+        }
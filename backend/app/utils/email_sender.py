@@ -1,7 +1,4 @@
-import smtplib
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import logging
 
 logger = logging.getLogger(__name__)
@@ -70,6 +67,11 @@ class EmailSender:
         self._send_email(recipient_email, subject, body)
 
     def _send_email(self, recipient_email: str, subject: str, body: str):
+        # smtplib / email.mime (and ssl) are only needed when a mail is actually sent
+        import smtplib
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
         msg = MIMEMultipart("alternative")
         msg["From"] = self.sender_email
         msg["To"] = recipient_email
@@ -0,0 +1,149 @@
+"""
+Backtest of the wait-time estimator (app/services/wait_time_service.py) over
+historical call data.
+
+Calls are read from VISIT_CALL (joined to the appointment's schedule for the
+doctor and time period) and replayed in chronological order through the same
+``record_sample`` update used in production. At every call the estimator
+predicts when the patients 1..--horizon places behind will be called; the
+prediction is compared with the actual call time. The fixed 10 minutes per
+patient rule is reported alongside as the baseline.
+
+Usage (from backend/):
+    python -m benchmarks.backtest_wait_time --db-url postgresql://...   # real history
+    python -m benchmarks.backtest_wait_time --synthetic                  # simulated clinics
+"""
+import argparse
+import random
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.appointment import Appointment
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.schedule import Schedule
+from app.models.service_time_stat import ServiceTimeStat
+from app.models.visit_call import VisitCall
+from app.services.wait_time_service import (
+    DEFAULT_SERVICE_SECONDS, estimate_wait_seconds, record_sample,
+)
+
+PERIOD_START = {"morning": 8, "afternoon": 13, "night": 18}
+
+
+def _seed_synthetic(db, doctors: int, days: int, patients_per_session: int, seed: int):
+    """Clinics whose consultation times differ per doctor and period (log-normal)."""
+    rng = random.Random(seed)
+    patient = Patient(patient_id=uuid.uuid4(), name="病患", password_hash="x", dob=date(1990, 1, 1),
+                      phone="0912345678", email="backtest@example.com", card_number="A123456789")
+    db.add(patient)
+    schedules, appointments, calls = [], [], []
+    for d in range(doctors):
+        doctor_id = uuid.uuid4()
+        db.add(Doctor(doctor_id=doctor_id, doctor_login_id=f"backtest_{d}", password_hash="x",
+                      name=f"醫師{d}", specialty="家醫科", email=f"backtest_{d}@example.com"))
+        for period, hour in PERIOD_START.items():
+            median = rng.uniform(180, 900)
+            for day in range(days):
+                schedule_id = uuid.uuid4()
+                session_date = date(2025, 1, 1) + timedelta(days=day)
+                schedules.append(dict(schedule_id=schedule_id, doctor_id=doctor_id, date=session_date,
+                                      time_period=period, status="closed", max_patients=patients_per_session,
+                                      booked_patients=patients_per_session))
+                called_at = datetime.combine(session_date, datetime.min.time()) + timedelta(hours=hour)
+                for sequence in range(1, patients_per_session + 1):
+                    appointment_id = uuid.uuid4()
+                    appointments.append(dict(appointment_id=appointment_id, patient_id=patient.patient_id,
+                                             doctor_id=doctor_id, schedule_id=schedule_id, date=session_date,
+                                             time_period=period, status="seen"))
+                    calls.append(dict(call_id=uuid.uuid4(), appointment_id=appointment_id, ticket_sequence=sequence,
+                                      ticket_number=f"A{sequence:03d}", called_at=called_at,
+                                      call_type="call", call_status="attended"))
+                    called_at += timedelta(seconds=rng.lognormvariate(0, 0.45) * median)
+    db.flush()
+    db.bulk_insert_mappings(Schedule, schedules)
+    db.bulk_insert_mappings(Appointment, appointments)
+    db.bulk_insert_mappings(VisitCall, calls)
+    db.commit()
+
+
+def _load_sessions(db):
+    rows = (
+        db.query(Schedule.schedule_id, Schedule.doctor_id, Schedule.time_period, VisitCall.called_at)
+        .select_from(VisitCall)
+        .join(Appointment, VisitCall.appointment_id == Appointment.appointment_id)
+        .join(Schedule, Appointment.schedule_id == Schedule.schedule_id)
+        .filter(VisitCall.call_type == "call")
+        .order_by(VisitCall.called_at)
+        .all()
+    )
+    sessions = defaultdict(list)
+    for row in rows:
+        sessions[(row.schedule_id, row.doctor_id, row.time_period)].append(row.called_at)
+    return sessions
+
+
+def backtest(sessions, horizon: int):
+    # Replay every call in global time order so each estimate only uses the past
+    events = sorted(
+        (called_at, key, i) for key, times in sessions.items() for i, called_at in enumerate(times)
+    )
+    stats = {}
+    errors = {"model": defaultdict(list), "fixed 10 min": defaultdict(list)}
+    covered = defaultdict(list)
+    for called_at, key, i in events:
+        _, doctor_id, time_period = key
+        times = sessions[key]
+        stat = stats.setdefault((doctor_id, time_period), ServiceTimeStat(sample_count=0))
+        if i > 0:
+            record_sample(stat, (called_at - times[i - 1]).total_seconds())
+        for k in range(1, horizon + 1):
+            if i + k >= len(times):
+                break
+            actual = (times[i + k] - called_at).total_seconds()
+            estimate = estimate_wait_seconds(stat, k - 1, elapsed_in_current=0)
+            errors["model"][k].append(abs(estimate["expected"] - actual))
+            errors["fixed 10 min"][k].append(abs(k * DEFAULT_SERVICE_SECONDS - actual))
+            covered[k].append(actual <= estimate["p90"])
+    return errors, covered
+
+
+def run(args):
+    engine = create_engine(args.db_url)
+    db = sessionmaker(bind=engine)()
+    if args.synthetic:
+        Base.metadata.create_all(bind=engine)
+        _seed_synthetic(db, args.doctors, args.days, args.patients, args.seed)
+    sessions = _load_sessions(db)
+    db.close()
+    if not sessions:
+        print("no VISIT_CALL history found")
+        return
+
+    errors, covered = backtest(sessions, args.horizon)
+    print(f"sessions={len(sessions)} calls={sum(len(t) for t in sessions.values())}")
+    print(f"{'places ahead':<14}{'model MAE min':>15}{'fixed MAE min':>15}{'p90 coverage':>14}")
+    for k in range(1, args.horizon + 1):
+        if not errors["model"][k]:
+            continue
+        model_mae = sum(errors["model"][k]) / len(errors["model"][k]) / 60
+        fixed_mae = sum(errors["fixed 10 min"][k]) / len(errors["fixed 10 min"][k]) / 60
+        coverage = sum(covered[k]) / len(covered[k])
+        print(f"{k:<14}{model_mae:>15.1f}{fixed_mae:>15.1f}{coverage:>14.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite://")
+    parser.add_argument("--synthetic", action="store_true", help="seed simulated call history into --db-url first")
+    parser.add_argument("--horizon", type=int, default=5)
+    parser.add_argument("--doctors", type=int, default=8)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--patients", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    run(parser.parse_args())
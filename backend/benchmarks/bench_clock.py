@@ -0,0 +1,65 @@
+"""
+Per-request overhead of computing "today" / "now" in Taiwan time.
+
+Simulates a request that needs the current date ``--calls`` times (online
+check-in used to need it four times: the suspension check, the appointment
+date check, its log line and the check-in timestamp) and compares:
+  * pytz per call: the old helpers, ``datetime.now(pytz.timezone('Asia/Taipei'))``
+    on every use (skipped when pytz is not installed),
+  * zoneinfo per call: ``datetime.now(APP_TIMEZONE)`` on every use,
+  * frozen clock: one ``get_clock()`` per request, then ``clock.today()``.
+
+Usage (from backend/):
+    python -m benchmarks.bench_clock [--requests 100000] [--calls 4]
+"""
+import argparse
+import time
+from datetime import datetime
+
+from app.core.clock import APP_TIMEZONE, get_clock
+
+
+def _pytz_request(calls: int):
+    import pytz
+
+    for _ in range(calls):
+        datetime.now(pytz.timezone("Asia/Taipei")).date()
+
+
+def _zoneinfo_request(calls: int):
+    for _ in range(calls):
+        datetime.now(APP_TIMEZONE).date()
+
+
+def _frozen_clock_request(calls: int):
+    clock = get_clock()
+    for _ in range(calls):
+        clock.today()
+
+
+def _measure(request, requests: int, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        request(calls)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def run(args):
+    variants = [("zoneinfo per call", _zoneinfo_request), ("frozen clock", _frozen_clock_request)]
+    try:
+        import pytz  # noqa: F401
+        variants.insert(0, ("pytz per call", _pytz_request))
+    except ImportError:
+        print("pytz not installed, skipping the old helpers")
+
+    print(f"{args.requests} requests x {args.calls} calls")
+    print(f"{'variant':<20}{'us/request':>12}")
+    for name, request in variants:
+        print(f"{name:<20}{_measure(request, args.requests, args.calls):>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--calls", type=int, default=4)
+    run(parser.parse_args())
@@ -0,0 +1,115 @@
+"""
+Range leave request over a long range (default: a 180-day sabbatical, all
+three time periods), before and after the set-based implementation in
+app/crud/crud_leave_request.py.
+
+"before" reproduces the previous per-slot loop: a conflict query per slot,
+then a ``SELECT ... FOR UPDATE`` per slot and one ORM flush per row.
+"after" calls ``apply_range_leave``. Half of the slots already have a
+schedule; the rest get placeholder schedules. Reports wall time and the
+number of SQL statements sent to the database.
+
+Usage (from backend/):
+    python -m benchmarks.bench_leave_range [--days 180] [--db-url sqlite://]
+"""
+import argparse
+import time
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import crud_leave_request
+from app.db.base import Base
+from app.models.doctor import Doctor
+from app.models.leave_request import LeaveRequest
+from app.models.schedule import Schedule
+
+PERIODS = ["morning", "afternoon", "night"]
+START = date(2030, 1, 1)
+
+
+def _seed(db, days: int):
+    doctor = Doctor(doctor_id=uuid.uuid4(), doctor_login_id=f"bench_{uuid.uuid4().hex[:8]}", password_hash="x",
+                    name="醫師", specialty="家醫科", email=f"{uuid.uuid4().hex[:8]}@example.com")
+    db.add(doctor)
+    db.flush()
+    db.bulk_insert_mappings(Schedule, [
+        dict(schedule_id=uuid.uuid4(), doctor_id=doctor.doctor_id, date=START + timedelta(days=i),
+             time_period=period, status="available", max_patients=10, booked_patients=0)
+        for i in range(0, days, 2) for period in PERIODS
+    ])
+    db.commit()
+    return doctor.doctor_id
+
+
+def _legacy_range_leave(db, doctor_id, start_date, end_date, time_periods, reason):
+    current_date = start_date
+    while current_date <= end_date:
+        for time_period in time_periods:
+            db.query(Schedule).filter(
+                Schedule.doctor_id == doctor_id, Schedule.date == current_date,
+                Schedule.time_period == time_period, Schedule.booked_patients > 0,
+            ).first()
+        current_date += timedelta(days=1)
+
+    current_date = start_date
+    while current_date <= end_date:
+        for time_period in time_periods:
+            schedule = db.query(Schedule).filter(
+                Schedule.doctor_id == doctor_id, Schedule.date == current_date,
+                Schedule.time_period == time_period,
+            ).with_for_update().first()
+            if schedule is None:
+                schedule = Schedule(doctor_id=doctor_id, date=current_date, time_period=time_period,
+                                    status="leave_pending", max_patients=0, booked_patients=0)
+                db.add(schedule)
+            schedule.status = "leave_pending"
+            schedule.max_patients = 0
+            db.flush()
+            db.add(LeaveRequest(schedule_id=schedule.schedule_id, doctor_id=doctor_id, reason=reason))
+        current_date += timedelta(days=1)
+    db.commit()
+
+
+def _set_based_range_leave(db, doctor_id, start_date, end_date, time_periods, reason):
+    crud_leave_request.apply_range_leave(
+        db, doctor_id=doctor_id, start_date=start_date, end_date=end_date, time_periods=time_periods, reason=reason
+    )
+    db.commit()
+
+
+def _measure(engine, days, func):
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    doctor_id = _seed(db, days)
+    statements = []
+
+    def count(*args):
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", count)
+    start = time.perf_counter()
+    func(db, doctor_id, START, START + timedelta(days=days - 1), PERIODS, "長期休假")
+    elapsed = time.perf_counter() - start
+    event.remove(engine, "before_cursor_execute", count)
+    db.close()
+    return elapsed, len(statements)
+
+
+def run(args):
+    engine = create_engine(args.db_url)
+    Base.metadata.create_all(bind=engine)
+    print(f"range={args.days} days x {len(PERIODS)} periods, db={engine.dialect.name}")
+    print(f"{'implementation':<16}{'time ms':>10}{'statements':>12}")
+    for name, func in [("per-slot loop", _legacy_range_leave), ("set-based", _set_based_range_leave)]:
+        elapsed, statements = _measure(engine, args.days, func)
+        print(f"{name:<16}{elapsed * 1000:>10.1f}{statements:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--db-url", default="sqlite://", help="use a PostgreSQL URL to include real row locks")
+    run(parser.parse_args())
@@ -0,0 +1,118 @@
+"""
+Latency and memory of the patient medical record list (GET /medical-records/patient/me)
+for one patient with many records, before and after the list projection
+(MEDICAL_RECORD_LIST_COLUMNS in app/crud/projections.py).
+
+"before" reproduces the previous implementation: full MedicalRecord entities
+with the doctor and patient joinedloaded, then one MedicalRecord response model
+per row with the names copied over. "after" calls the current CRUD function,
+which selects only the list columns and a truncated summary. Both run the
+response_model validation FastAPI applies; peak memory is measured with
+tracemalloc.
+
+Usage (from backend/):
+    python -m benchmarks.bench_medical_record_list [--records 2000] [--text-chars 2000]
+"""
+import argparse
+import time
+import tracemalloc
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import joinedload, sessionmaker, undefer_group
+
+from app.crud import medical_record as crud_medical_record
+from app.db.base import Base
+from app.models.doctor import Doctor
+from app.models.medical_record import MedicalRecord
+from app.models.patient import Patient
+from app.schemas.medical_record import MedicalRecord as MedicalRecordSchema, MedicalRecordListItem
+
+
+def _seed(db, records: int, text_chars: int):
+    doctor = Doctor(
+        doctor_id=uuid.uuid4(), doctor_login_id="bench_doc", password_hash="x" * 60,
+        name="醫師", specialty="家醫科", email="bench_doc@example.com",
+    )
+    patient = Patient(
+        patient_id=uuid.uuid4(), name="病患", password_hash="x" * 60, dob=date(1990, 1, 1),
+        phone="0912345678", email="bench_patient@example.com", card_number="A123456789",
+    )
+    db.add_all([doctor, patient])
+    db.flush()
+    start = datetime(2000, 1, 1)
+    db.bulk_insert_mappings(MedicalRecord, [
+        dict(
+            record_id=uuid.uuid4(), patient_id=patient.patient_id, doctor_id=doctor.doctor_id,
+            created_at=start + timedelta(days=i), department="家醫科",
+            summary="主訴" * (text_chars // 2), prescription="處方" * (text_chars // 2),
+        )
+        for i in range(records)
+    ])
+    db.commit()
+    return patient.patient_id
+
+
+def _legacy_patient_records(db, patient_id):
+    records = (
+        db.query(MedicalRecord)
+        .filter(MedicalRecord.patient_id == patient_id)
+        .options(undefer_group("record_text"), joinedload(MedicalRecord.doctor), joinedload(MedicalRecord.patient))
+        .order_by(MedicalRecord.created_at.desc())
+        .all()
+    )
+    response_records = []
+    for record in records:
+        record_data = MedicalRecordSchema.model_validate(record)
+        record_data.doctor_name = record.doctor.name
+        record_data.patient_name = record.patient.name
+        response_records.append(record_data)
+    return response_records
+
+
+def _measure(db, fn, adapter, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        db.expunge_all()
+        start = time.perf_counter()
+        adapter.validate_python(fn())  # what FastAPI does with the response_model
+        best = min(best, time.perf_counter() - start)
+    db.expunge_all()
+    tracemalloc.start()
+    adapter.validate_python(fn())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(args) -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    patient_id = _seed(db, args.records, args.text_chars)
+
+    before = _measure(
+        db, lambda: _legacy_patient_records(db, patient_id),
+        TypeAdapter(List[MedicalRecordSchema]), args.repeat,
+    )
+    after = _measure(
+        db, lambda: crud_medical_record.get_medical_records_by_patient(db, patient_id=patient_id, limit=args.records),
+        TypeAdapter(List[MedicalRecordListItem]), args.repeat,
+    )
+
+    print(f"records={args.records} text_chars={args.text_chars} repeat={args.repeat} (best of)")
+    print(f"{'':<8}{'latency ms':>12}{'peak MiB':>10}")
+    for name, (seconds, peak) in (("before", before), ("after", after)):
+        print(f"{name:<8}{seconds * 1000:>12.1f}{peak / 2 ** 20:>10.1f}")
+    print(f"speedup {before[0] / after[0]:.1f}x, memory {before[1] / after[1]:.1f}x less")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--text-chars", type=int, default=2000, help="characters of summary and of prescription per record")
+    parser.add_argument("--repeat", type=int, default=3)
+    run(parser.parse_args())
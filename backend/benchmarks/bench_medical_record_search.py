@@ -0,0 +1,153 @@
+"""
+Latency of medical record full-text search (GET /medical-records/search) on a
+large table.
+
+Seeds ``--records`` medical records (default 5,000,000, spread over
+``--patients`` patients and ``--doctors`` doctors, built from a small medical
+vocabulary) into the database of DATABASE_URL, or into a temporary SQLite file
+with ``--sqlite``, then runs ``--queries`` patient-scoped and doctor-scoped
+searches through app/crud/medical_record_search.py and reports latency
+percentiles. Exits non-zero when the p95 exceeds ``--p95-ms`` (target: 50 ms).
+
+On PostgreSQL the database must be migrated (search_vector + GIN index); the
+seeded rows are tagged with a run id in ``department`` and are left in place
+unless ``--cleanup`` is given.
+
+Usage (from backend/):
+    python -m benchmarks.bench_medical_record_search [--records 5000000] [--queries 500] [--sqlite]
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+WORDS = [
+    "penicillin", "amoxicillin", "cefalexin", "ibuprofen", "acetaminophen", "metformin", "insulin",
+    "allergy", "rash", "fever", "cough", "hypertension", "diabetes", "asthma", "migraine", "fracture",
+    "follow", "up", "week", "daily", "twice", "mg", "tablet", "review", "lab", "normal", "elevated",
+]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(db, records: int, patients: int, doctors: int, batch: int, run_id: str):
+    from app.crud.medical_record_search import _uses_tsvector, tokenize
+    from app.models.doctor import Doctor
+    from app.models.medical_record import MedicalRecord
+    from app.models.medical_record_term import MedicalRecordTerm
+    from app.models.patient import Patient
+
+    rng = random.Random(42)
+    doctor_ids = [uuid.uuid4() for _ in range(doctors)]
+    patient_ids = [uuid.uuid4() for _ in range(patients)]
+    db.bulk_insert_mappings(Doctor, [
+        dict(doctor_id=doctor_id, doctor_login_id=f"search_{run_id}_{i}", password_hash="x", name=f"醫師{i}",
+             specialty="家醫科", email=f"search_{run_id}_{i}@example.com")
+        for i, doctor_id in enumerate(doctor_ids)
+    ])
+    db.bulk_insert_mappings(Patient, [
+        dict(patient_id=patient_id, card_number=f"S{run_id}{i:07d}", name="病患", password_hash="x",
+             dob=date(1990, 1, 1), phone="0900000000", email=f"search_{run_id}_{i}@example.com")
+        for i, patient_id in enumerate(patient_ids)
+    ])
+    db.commit()
+
+    with_terms = not _uses_tsvector(db)
+    start = datetime(2015, 1, 1)
+    for offset in range(0, records, batch):
+        rows, terms = [], []
+        for i in range(offset, min(records, offset + batch)):
+            row = dict(
+                record_id=uuid.uuid4(), patient_id=patient_ids[i % patients], doctor_id=rng.choice(doctor_ids),
+                created_at=start + timedelta(minutes=i), department=f"bench-{run_id}",
+                summary=_text(rng, 30), prescription=_text(rng, 8),
+            )
+            rows.append(row)
+            if with_terms:
+                counts = tokenize(row["summary"]) + tokenize(row["prescription"])
+                terms.extend(dict(term=t, record_id=row["record_id"], frequency=f) for t, f in counts.items())
+        db.bulk_insert_mappings(MedicalRecord, rows)
+        if terms:
+            db.bulk_insert_mappings(MedicalRecordTerm, terms)
+        db.commit()
+        print(f"  seeded {min(records, offset + batch)}/{records}", end="\r", flush=True)
+    print()
+    return doctor_ids, patient_ids
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(args):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.crud.medical_record_search import search_medical_records
+    from app.db.base import Base
+
+    if args.sqlite:
+        engine = create_engine(f"sqlite:///{tempfile.mkdtemp()}/search.db")
+        Base.metadata.create_all(bind=engine)
+    else:
+        from app.db.session import engine
+    db = sessionmaker(bind=engine)()
+    run_id = uuid.uuid4().hex[:8]
+
+    start = time.perf_counter()
+    doctor_ids, patient_ids = seed(db, args.records, args.patients, args.doctors, args.batch, run_id)
+    print(f"seeded {args.records} records in {time.perf_counter() - start:.0f}s ({engine.dialect.name})")
+
+    rng = random.Random(7)
+    latencies = {"patient": [], "doctor + patient": [], "doctor": []}
+    for i in range(args.queries):
+        q = " ".join(rng.sample(WORDS, rng.choice([1, 2])))
+        patient_id, doctor_id = rng.choice(patient_ids), rng.choice(doctor_ids)
+        scope, kwargs = [
+            ("patient", dict(patient_id=patient_id)),
+            ("doctor + patient", dict(doctor_id=doctor_id, patient_id=patient_id)),
+            ("doctor", dict(doctor_id=doctor_id)),
+        ][i % 3]
+        started = time.perf_counter()
+        search_medical_records(db, q=q, limit=20, **kwargs)
+        latencies[scope].append((time.perf_counter() - started) * 1000)
+        db.rollback()
+
+    worst = 0.0
+    print(f"{'scope':<18}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}")
+    for scope, values in latencies.items():
+        p95 = _percentile(values, 95)
+        worst = max(worst, p95)
+        print(f"{scope:<18}{statistics.median(values):>8.1f}{p95:>8.1f}{_percentile(values, 99):>8.1f}")
+
+    if args.cleanup and not args.sqlite:
+        from app.models.doctor import Doctor
+        from app.models.medical_record import MedicalRecord
+        from app.models.patient import Patient
+        db.query(MedicalRecord).filter(MedicalRecord.department == f"bench-{run_id}").delete(synchronize_session=False)
+        db.query(Patient).filter(Patient.patient_id.in_(patient_ids)).delete(synchronize_session=False)
+        db.query(Doctor).filter(Doctor.doctor_id.in_(doctor_ids)).delete(synchronize_session=False)
+        db.commit()
+    if worst > args.p95_ms:
+        print(f"FAIL: target p95 < {args.p95_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=5_000_000)
+    parser.add_argument("--patients", type=int, default=50_000)
+    parser.add_argument("--doctors", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--p95-ms", type=float, default=50)
+    parser.add_argument("--sqlite", action="store_true", help="use a temporary SQLite file and the fallback index")
+    parser.add_argument("--cleanup", action="store_true", help="delete the seeded rows afterwards (PostgreSQL)")
+    run(parser.parse_args())
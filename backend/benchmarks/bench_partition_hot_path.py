@@ -0,0 +1,172 @@
+"""
+Hot-path latency of the partitioned history tables as history grows
+(PostgreSQL only; app/db/partitioning.py).
+
+Seeds ``--patients`` patients with one appointment today, then grows
+appointment + CHECKIN history in steps (``--steps``, total history rows per
+table, default up to 50,000,000) spread over the past ``--months`` months,
+generated server-side with generate_series. After each step it times the
+unchanged service queries:
+
+    kiosk lookup     appointment_crud.get_by_card_number_and_date (pruned to today's partition)
+    check-in lookup  Checkin by appointment_id (probes every attached partition's index)
+    appointment      Appointment by primary key id
+
+With ``--archive`` it finally runs PartitionArchiveService with
+PARTITION_RETENTION_MONTHS and measures once more. Seeded rows are not
+removed; use a scratch database (DATABASE_URL).
+
+Usage (from backend/):
+    python -m benchmarks.bench_partition_hot_path [--steps 1000000,10000000,50000000] [--months 60] [--archive]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy import text
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def seed_today(db, patients: int, run_id: str, today: date):
+    from app.models.appointment import Appointment
+    from app.models.doctor import Doctor
+    from app.models.patient import Patient
+    from app.models.schedule import Schedule
+
+    doctor_id, schedule_id = uuid.uuid4(), uuid.uuid4()
+    db.bulk_insert_mappings(Doctor, [dict(doctor_id=doctor_id, doctor_login_id=f"part_{run_id}", password_hash="x",
+                                          name="醫師", specialty="家醫科", email=f"part_{run_id}@example.com")])
+    db.bulk_insert_mappings(Schedule, [dict(schedule_id=schedule_id, doctor_id=doctor_id, date=today,
+                                            time_period="morning", status="open", max_patients=patients)])
+    cards, appointments, patient_rows = [], [], []
+    for i in range(patients):
+        patient_id, appointment_id = uuid.uuid4(), uuid.uuid4()
+        cards.append(f"P{run_id}{i:06d}")
+        appointments.append(appointment_id)
+        patient_rows.append(dict(patient_id=patient_id, card_number=cards[-1], name="病患", password_hash="x",
+                                 dob=date(1990, 1, 1), phone="0900000000", email=f"part_{run_id}_{i}@example.com"))
+    db.bulk_insert_mappings(Patient, patient_rows)
+    db.bulk_insert_mappings(Appointment, [
+        dict(appointment_id=appointment_id, patient_id=row["patient_id"], doctor_id=doctor_id, schedule_id=schedule_id,
+             date=today, time_period="morning", status="scheduled")
+        for appointment_id, row in zip(appointments, patient_rows)
+    ])
+    db.commit()
+    return cards, appointments
+
+
+def grow_history(db, start: int, stop: int, months: int, batch: int, run_id: str, today: date) -> None:
+    """Appends appointment rows [start, stop) over the past `months` months, each with a CHECKIN row."""
+    from app.core.clock import APP_TIMEZONE
+
+    for low in range(start, stop, batch):
+        db.execute(text(
+            "WITH p AS ("
+            " SELECT patient_id, (row_number() OVER () - 1) AS n, count(*) OVER () AS total"
+            " FROM \"PATIENT\" WHERE email LIKE :pattern),"
+            " s AS (SELECT schedule_id, doctor_id FROM \"SCHEDULE\" WHERE date = :today AND doctor_id IN"
+            "  (SELECT doctor_id FROM \"DOCTOR\" WHERE doctor_login_id = :login) LIMIT 1),"
+            " a AS ("
+            " INSERT INTO appointment (appointment_id, patient_id, doctor_id, schedule_id, date, time_period, status,"
+            "  created_at, updated_at)"
+            " SELECT gen_random_uuid(), p.patient_id, s.doctor_id, s.schedule_id,"
+            "  CAST(:today AS date) - 1 - (g % (:months * 30)), 'morning', 'completed', now(), now()"
+            " FROM generate_series(:low, :high - 1) g"
+            " JOIN p ON p.n = g % p.total"
+            " CROSS JOIN s"
+            " RETURNING appointment_id, patient_id, date)"
+            " INSERT INTO \"CHECKIN\" (checkin_id, appointment_id, patient_id, checkin_time, checkin_method,"
+            "  ticket_sequence, ticket_number, status, updated_at)"
+            " SELECT gen_random_uuid(), appointment_id, patient_id, (date + time '09:00') AT TIME ZONE :tz,"
+            "  'onsite', 1, 'A001', 'seen', now() FROM a"
+        ), {"pattern": f"part_{run_id}_%", "login": f"part_{run_id}", "today": today, "months": months,
+            "low": low, "high": min(stop, low + batch), "tz": str(APP_TIMEZONE)})
+        db.commit()
+        print(f"  history rows {min(stop, low + batch)}/{stop}", end="\r", flush=True)
+    print()
+    db.execute(text('ANALYZE appointment; ANALYZE "CHECKIN"'))
+    db.commit()
+
+
+def measure(db, cards, appointments, queries: int) -> dict:
+    from app.core.clock import system_clock
+    from app.crud.crud_appointment import appointment_crud
+    from app.models.appointment import Appointment
+    from app.models.checkin import Checkin
+
+    rng = random.Random(1)
+    today = system_clock.today()
+    cases = {
+        "kiosk lookup": lambda: appointment_crud.get_by_card_number_and_date(
+            db, card_number=rng.choice(cards), on_date=today, statuses=("scheduled", "confirmed")),
+        "check-in lookup": lambda: db.query(Checkin).filter(Checkin.appointment_id == rng.choice(appointments)).first(),
+        "appointment": lambda: db.query(Appointment).filter(Appointment.appointment_id == rng.choice(appointments)).first(),
+    }
+    results = {}
+    for name, query in cases.items():
+        latencies = []
+        for _ in range(queries):
+            start = time.perf_counter()
+            query()
+            latencies.append((time.perf_counter() - start) * 1000)
+            db.rollback()
+        results[name] = (statistics.median(latencies), _percentile(latencies, 95))
+    return results
+
+
+def run(args):
+    from app.core.clock import system_clock
+    from app.db.partitioning import PARTITIONED_TABLES, add_months, ensure_month_partitions, month_start
+    from app.db.session import SessionLocal, engine
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("This benchmark needs a migrated PostgreSQL database (DATABASE_URL).")
+
+    db = SessionLocal()
+    run_id = uuid.uuid4().hex[:8]
+    today = system_clock.today()
+    cards, appointments = seed_today(db, args.patients, run_id, today)
+
+    this_month = month_start(today)
+    for table in PARTITIONED_TABLES[:2]:
+        ensure_month_partitions(db.connection(), table, add_months(this_month, -args.months - 1), this_month)
+    db.commit()
+
+    rows = [("0", measure(db, cards, appointments, args.queries))]
+    seeded = 0
+    for step in [int(s) for s in args.steps.split(",")]:
+        started = time.perf_counter()
+        grow_history(db, seeded, step, args.months, args.batch, run_id, today)
+        print(f"grew history to {step} rows per table in {time.perf_counter() - started:.0f}s")
+        seeded = step
+        rows.append((f"{step}", measure(db, cards, appointments, args.queries)))
+
+    if args.archive:
+        from app.services.partition_archive_service import PARTITION_RETENTION_MONTHS, PartitionArchiveService
+        result = PartitionArchiveService(db).run()
+        print(f"archived {len(result['archived'])} partitions (retention {PARTITION_RETENTION_MONTHS} months)")
+        rows.append((f"{seeded} archived", measure(db, cards, appointments, args.queries)))
+
+    names = list(rows[0][1])
+    print(f"{'history rows':<22}" + "".join(f"{name + ' p50/p95 ms':>32}" for name in names))
+    for label, results in rows:
+        print(f"{label:<22}" + "".join(f"{results[n][0]:>22.2f} / {results[n][1]:<7.2f}" for n in names))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", default="1000000,10000000,50000000")
+    parser.add_argument("--months", type=int, default=60, help="history spread over this many past months")
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=1_000_000)
+    parser.add_argument("--archive", action="store_true", help="run the archive job at the end and measure again")
+    run(parser.parse_args())
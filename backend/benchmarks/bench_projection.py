@@ -0,0 +1,147 @@
+"""
+Per-row cost of the schedule/appointment read paths, before and after the
+single-pass projection layer (app/crud/projections.py).
+
+"before" reproduces the previous implementation: full ORM entities, a dict
+(or an intermediate model) per row, then the response_model validating again.
+"after" calls the current CRUD/service functions and runs the same
+response_model validation, which passes the returned instances through.
+
+Usage (from backend/):
+    python -m benchmarks.bench_projection [--rows 10000]
+"""
+import argparse
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import crud_schedule
+from app.db.base import Base
+from app.models.appointment import Appointment
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.schedule import Schedule
+from app.schemas.appointment import AppointmentInDB, AppointmentPublic
+from app.schemas.schedule import ScheduleDoctorPublic
+from app.services.appointment_service import appointment_service
+
+PERIODS = ["morning", "afternoon", "night"]
+
+
+def _seed(db, rows: int):
+    doctor = Doctor(
+        doctor_id=uuid.uuid4(), doctor_login_id="bench_doc", password_hash="x",
+        name="醫師", specialty="家醫科", email="bench_doc@example.com",
+    )
+    patient = Patient(
+        patient_id=uuid.uuid4(), name="病患", password_hash="x", dob=date(1990, 1, 1),
+        phone="0912345678", email="bench_patient@example.com", card_number="A123456789",
+    )
+    db.add_all([doctor, patient])
+    db.flush()
+    start = date(2000, 1, 1)
+    schedules, appointments = [], []
+    for i in range(rows):
+        schedule_id = uuid.uuid4()
+        day = start + timedelta(days=i // 3)
+        schedules.append(dict(
+            schedule_id=schedule_id, doctor_id=doctor.doctor_id, date=day, time_period=PERIODS[i % 3],
+            status="available", max_patients=30, booked_patients=1, created_at=datetime(2000, 1, 1),
+        ))
+        appointments.append(dict(
+            appointment_id=uuid.uuid4(), patient_id=patient.patient_id, doctor_id=doctor.doctor_id,
+            schedule_id=schedule_id, date=day, time_period=PERIODS[i % 3], status="scheduled",
+            created_at=datetime(2000, 1, 1),
+        ))
+    db.bulk_insert_mappings(Schedule, schedules)
+    db.bulk_insert_mappings(Appointment, appointments)
+    db.commit()
+    return doctor.doctor_id, patient.patient_id, start, start + timedelta(days=rows)
+
+
+def _legacy_doctor_schedules(db, doctor_id):
+    rows = db.query(Schedule, Doctor).join(Doctor, Schedule.doctor_id == Doctor.doctor_id).filter(
+        Schedule.doctor_id == doctor_id
+    ).all()
+    return [
+        {
+            "schedule_id": s.schedule_id, "doctor_id": s.doctor_id, "date": s.date,
+            "time_period": s.time_period, "status": s.status, "max_patients": s.max_patients,
+            "booked_patients": s.booked_patients, "recurring_group_id": s.recurring_group_id,
+            "created_at": s.created_at, "doctor_name": d.name, "specialty": d.specialty,
+        }
+        for s, d in rows
+    ]
+
+
+def _legacy_patient_appointments(db, patient_id, start_date, end_date):
+    rows = (
+        db.query(Appointment, Doctor, Patient)
+        .join(Doctor, Appointment.doctor_id == Doctor.doctor_id)
+        .join(Patient, Appointment.patient_id == Patient.patient_id)
+        .filter(Appointment.patient_id == patient_id, Appointment.date >= start_date, Appointment.date <= end_date)
+        .all()
+    )
+    return [
+        AppointmentPublic(
+            **AppointmentInDB.model_validate(a).model_dump(),
+            doctor_name=d.name, specialty=d.specialty, patient_name=p.name,
+        )
+        for a, d, p in rows
+    ]
+
+
+def _timed(db, fn, response_adapter, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        db.expunge_all()
+        start = time.perf_counter()
+        response_adapter.validate_python(fn())  # what FastAPI does with the response_model
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(rows: int, repeat: int) -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    doctor_id, patient_id, start_date, end_date = _seed(db, rows)
+
+    schedules_adapter = TypeAdapter(List[ScheduleDoctorPublic])
+    appointments_adapter = TypeAdapter(List[AppointmentPublic])
+    cases = [
+        (
+            "schedules (get_doctor_schedules)",
+            lambda: _legacy_doctor_schedules(db, doctor_id),
+            lambda: crud_schedule.get_doctor_schedules(db, doctor_id=doctor_id),
+            schedules_adapter,
+        ),
+        (
+            "appointments (with details)",
+            lambda: _legacy_patient_appointments(db, patient_id, start_date, end_date),
+            lambda: appointment_service.get_patient_appointments_with_details(
+                db, patient_id=patient_id, start_date=start_date, end_date=end_date
+            ),
+            appointments_adapter,
+        ),
+    ]
+
+    print(f"rows={rows} repeat={repeat} (best of, includes SQL fetch + response_model validation)")
+    print(f"{'path':<36}{'before us/row':>15}{'after us/row':>14}{'speedup':>9}")
+    for name, before, after, adapter in cases:
+        before_s = _timed(db, before, adapter, repeat)
+        after_s = _timed(db, after, adapter, repeat)
+        print(f"{name:<36}{before_s / rows * 1e6:>15.2f}{after_s / rows * 1e6:>14.2f}{before_s / after_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,149 @@
+"""
+Re-check-ins into a long waiting queue (default: 100 late patients into a
+300-patient queue), before and after gap-based queue ordering
+(CHECKIN.queue_position, see QueueService.re_check_in).
+
+Every run seeds a fresh session: ``--late`` patients were called and marked
+no-show (A001 onwards), and ``--waiting`` patients are still waiting after
+them. Each late patient then re-checks in, one transaction per re-check-in,
+and is inserted after the 3rd waiting patient.
+
+"shift sequences" reproduces the previous implementation. It loads the whole
+waiting queue and shifts ticket_sequence on every row after the insertion
+point. "queue position" calls ``QueueService.re_check_in``. It writes one
+CHECKIN row, plus a rebalance whenever a gap runs out, and also writes the
+queue event. Always inserting at the same slot halves the same gap every time,
+so this is the worst case for rebalancing. Reports wall time, SQL statements
+and CHECKIN rows written.
+
+Usage (from backend/):
+    python -m benchmarks.bench_re_check_in [--waiting 300] [--late 100] [--db-url sqlite://]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.clock import FrozenClock
+from app.db.base import Base
+from app.models.appointment import Appointment
+from app.models.checkin import QUEUE_POSITION_GAP, Checkin
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.room_day import RoomDay
+from app.models.schedule import Schedule
+from app.services.queue_service import QueueService
+
+TODAY = date(2030, 1, 7)
+CLOCK = FrozenClock(datetime(2030, 1, 7, 10, 0))
+
+
+def _seed(db, waiting: int, late: int):
+    run_id = uuid.uuid4().hex[:8]
+    doctor_id, schedule_id = uuid.uuid4(), uuid.uuid4()
+    db.add(Doctor(doctor_id=doctor_id, doctor_login_id=f"bench_{run_id}", password_hash="x", name="醫師",
+                  specialty="家醫科", email=f"{run_id}@example.com"))
+    db.add(Schedule(schedule_id=schedule_id, doctor_id=doctor_id, date=TODAY, time_period="morning",
+                    status="open", max_patients=waiting + late, booked_patients=waiting + late))
+    db.flush()
+    patients, appointments, checkins, late_ids = [], [], [], []
+    for sequence in range(1, waiting + late + 1):
+        status = "no_show" if sequence <= late else "checked_in"
+        patient_id, appointment_id, checkin_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        patients.append(dict(patient_id=patient_id, card_number=f"R{run_id}{sequence:05d}", name="病患",
+                             password_hash="x", dob=date(1990, 1, 1), phone="0900000000",
+                             email=f"{run_id}_{sequence}@example.com"))
+        appointments.append(dict(appointment_id=appointment_id, patient_id=patient_id, doctor_id=doctor_id,
+                                 schedule_id=schedule_id, date=TODAY, time_period="morning", status=status))
+        checkins.append(dict(checkin_id=checkin_id, appointment_id=appointment_id, patient_id=patient_id,
+                             checkin_time=CLOCK.now(), checkin_method="onsite", ticket_sequence=sequence,
+                             ticket_number=f"A{sequence:03d}", status=status))
+        if status == "no_show":
+            late_ids.append(checkin_id)
+    db.bulk_insert_mappings(Patient, patients)
+    db.bulk_insert_mappings(Appointment, appointments)
+    db.bulk_insert_mappings(Checkin, checkins)
+    db.add(RoomDay(schedule_id=schedule_id, next_sequence=waiting + late + 1, current_called_sequence=late,
+                   current_called_position=late * QUEUE_POSITION_GAP))
+    db.commit()
+    return late_ids
+
+
+def _legacy_re_check_in(db, checkin_id):
+    checkin = db.get(Checkin, checkin_id)
+    schedule_id = checkin.appointment.schedule_id
+    room_day = db.query(RoomDay).filter(RoomDay.schedule_id == schedule_id).first()
+    checkin.status = "checked_in"
+    db.flush()
+    active_waiting_patients = db.query(Checkin).filter(
+        Checkin.appointment.has(Appointment.schedule_id == schedule_id),
+        Checkin.status == "checked_in",
+        Checkin.ticket_sequence > room_day.current_called_sequence,
+        Checkin.checkin_id != checkin_id,
+    ).order_by(Checkin.ticket_sequence).all()
+    if len(active_waiting_patients) > 3:
+        new_ticket_sequence = active_waiting_patients[2].ticket_sequence + 1
+        for patient_to_shift in active_waiting_patients:
+            if patient_to_shift.ticket_sequence >= new_ticket_sequence:
+                patient_to_shift.ticket_sequence += 1
+        db.flush()
+    else:
+        new_ticket_sequence = room_day.next_sequence
+        room_day.next_sequence += 1
+    checkin.ticket_sequence = new_ticket_sequence
+    db.query(Appointment).filter(Appointment.appointment_id == checkin.appointment_id).update(
+        {Appointment.status: "checked_in"}, synchronize_session=False
+    )
+    db.commit()
+
+
+def _gap_re_check_in(loop):
+    def re_check_in(db, checkin_id):
+        loop.run_until_complete(QueueService(db, clock=CLOCK).re_check_in(checkin_id))
+        db.commit()
+    return re_check_in
+
+
+def _measure(engine, args, func):
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    late_ids = _seed(db, args.waiting, args.late)
+    statements, checkin_rows = [], []
+
+    def count(conn, cursor, statement, *rest):
+        statements.append(statement)
+        if statement.startswith('UPDATE "CHECKIN"'):
+            checkin_rows.append(cursor.rowcount)
+
+    event.listen(engine, "after_cursor_execute", count)
+    start = time.perf_counter()
+    for checkin_id in late_ids:
+        func(db, checkin_id)
+    elapsed = time.perf_counter() - start
+    event.remove(engine, "after_cursor_execute", count)
+    db.close()
+    return elapsed, len(statements), sum(checkin_rows)
+
+
+def run(args):
+    engine = create_engine(args.db_url)
+    Base.metadata.create_all(bind=engine)
+    print(f"waiting={args.waiting}, re-check-ins={args.late}, db={engine.dialect.name}")
+    print(f"{'implementation':<18}{'time ms':>10}{'ms / op':>10}{'statements':>12}{'CHECKIN rows':>14}")
+    loop = asyncio.new_event_loop()
+    for name, func in [("shift sequences", _legacy_re_check_in), ("queue position", _gap_re_check_in(loop))]:
+        elapsed, statements, rows = _measure(engine, args, func)
+        print(f"{name:<18}{elapsed * 1000:>10.1f}{elapsed * 1000 / args.late:>10.2f}{statements:>12}{rows:>14}")
+    loop.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--waiting", type=int, default=300)
+    parser.add_argument("--late", type=int, default=100, help="patients re-checking in")
+    parser.add_argument("--db-url", default="sqlite://", help="use a PostgreSQL URL to include real row locks")
+    run(parser.parse_args())
@@ -0,0 +1,196 @@
+"""
+Serialization benchmark for the largest list endpoints.
+
+Compares, per endpoint payload:
+  * dump_json : the response model serialized straight to JSON bytes by pydantic-core.
+                This is what FastAPI does for a route with a response_model and the
+                default response class, i.e. what these endpoints actually run.
+  * orjson    : response model dump_python(mode="json") + orjson. This is what the same
+                route costs when it sets response_class=FastJSONResponse.
+  * stdlib    : jsonable_encoder + json.dumps (JSONResponse on a route without a
+                response_model), for reference.
+and reports bytes-on-the-wire for identity / gzip / brotli (if installed).
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [--rows 2000] [--repeat 5]
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core import compression
+from app.core.responses import dumps
+from app.schemas.admin import AdminPublic
+from app.schemas.appointment import AppointmentPublic
+from app.schemas.doctor import DoctorPublic
+from app.schemas.medical_record import MedicalRecord
+from app.schemas.patient import PatientPublic
+from app.schemas.schedule import AdminLeaveRequestPublic, ScheduleDoctorPublic, SchedulePublic
+
+PERIODS = ["morning", "afternoon", "night"]
+
+
+def _schedule(i: int) -> dict:
+    return {
+        "schedule_id": uuid.uuid4(),
+        "doctor_id": uuid.uuid4(),
+        "date": date(2025, 1, 1) + timedelta(days=i % 365),
+        "time_period": PERIODS[i % 3],
+        "status": "available",
+        "max_patients": 30,
+        "booked_patients": i % 30,
+        "recurring_group_id": uuid.uuid4(),
+        "created_at": datetime(2025, 1, 1, 8, 0, 0),
+    }
+
+
+def _schedule_doctor(i: int) -> dict:
+    return {**_schedule(i), "doctor_name": f"醫師{i}", "specialty": "家醫科"}
+
+
+def _patient(i: int) -> dict:
+    return {
+        "patient_id": uuid.uuid4(),
+        "name": f"病患{i}",
+        "dob": date(1980, 1, 1) + timedelta(days=i),
+        "phone": f"09{i:08d}"[:10],
+        "email": f"patient{i}@example.com",
+        "card_number": f"A{i:09d}",
+        "is_verified": True,
+        "created_at": datetime(2025, 1, 1, 8, 0, 0),
+        "suspended_until": None,
+    }
+
+
+def _doctor(i: int) -> dict:
+    return {
+        "doctor_id": uuid.uuid4(),
+        "doctor_login_id": f"doc{i}",
+        "name": f"醫師{i}",
+        "specialty": "家醫科",
+        "email": f"doc{i}@example.com",
+        "created_at": datetime(2025, 1, 1, 8, 0, 0),
+    }
+
+
+def _admin(i: int) -> dict:
+    return {
+        "admin_id": uuid.uuid4(),
+        "account_username": f"admin{i}",
+        "name": f"管理員{i}",
+        "email": f"admin{i}@example.com",
+        "is_system_admin": False,
+        "department": "資訊室",
+        "created_at": datetime(2025, 1, 1, 8, 0, 0),
+    }
+
+
+def _appointment(i: int) -> dict:
+    return {
+        "appointment_id": uuid.uuid4(),
+        "patient_id": uuid.uuid4(),
+        "doctor_id": uuid.uuid4(),
+        "date": date(2025, 1, 1) + timedelta(days=i % 365),
+        "time_period": PERIODS[i % 3],
+        "status": "scheduled",
+        "created_at": datetime(2025, 1, 1, 8, 0, 0),
+        "doctor_name": f"醫師{i}",
+        "specialty": "家醫科",
+        "patient_name": f"病患{i}",
+    }
+
+
+def _medical_record(i: int) -> dict:
+    return {
+        "record_id": uuid.uuid4(),
+        "patient_id": uuid.uuid4(),
+        "doctor_id": uuid.uuid4(),
+        "created_at": datetime(2025, 1, 1, 8, 0, 0),
+        "summary": "上呼吸道感染，囑多休息多喝水。" * 8,
+        "prescription": "Acetaminophen 500mg TID x3d; " * 4,
+        "department": "家醫科",
+        "doctor_name": f"醫師{i}",
+        "patient_name": f"病患{i}",
+    }
+
+
+def _waiting_patient(i: int) -> dict:
+    return {
+        "checkin_id": str(uuid.uuid4()),
+        "patient_name": f"病患{i}",
+        "ticket_number": f"A{i:03d}",
+        "ticket_sequence": i,
+        "status": "checked_in",
+        "is_called": False,
+    }
+
+
+# The 10 largest list endpoints, with the response model they are declared with.
+ENDPOINTS = [
+    ("GET /schedules/", List[SchedulePublic], _schedule),
+    ("GET /patient/schedules", List[ScheduleDoctorPublic], _schedule_doctor),
+    ("GET /doctor-schedules/me/schedules", List[ScheduleDoctorPublic], _schedule_doctor),
+    ("GET /leave-requests (admin)", List[AdminLeaveRequestPublic], _schedule_doctor),
+    ("GET /patients/", List[PatientPublic], _patient),
+    ("GET /doctors/", List[DoctorPublic], _doctor),
+    ("GET /admins/", List[AdminPublic], _admin),
+    ("GET /patient/appointments", List[AppointmentPublic], _appointment),
+    ("GET /medical-records/doctor/medical-records", List[MedicalRecord], _medical_record),
+    ("GET /doctor/schedules/{id}/waiting-patients", List[dict], _waiting_patient),
+]
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(rows: int, repeat: int) -> None:
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    header = f"{'endpoint':<46}{'dump_json ms':>13}{'orjson ms':>10}{'stdlib ms':>10}{'raw KB':>9}"
+    header += "".join(f"{enc + ' KB':>9}" for enc in encodings)
+    print(f"rows={rows} repeat={repeat}")
+    print(header)
+    print("-" * len(header))
+
+    for name, model, factory in ENDPOINTS:
+        adapter = TypeAdapter(model)
+        payload = adapter.validate_python([factory(i) for i in range(rows)])
+
+        def stdlib_path():
+            return json.dumps(
+                jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+            ).encode("utf-8")
+
+        def orjson_path():
+            return dumps(adapter.dump_python(payload, mode="json"))
+
+        def dump_json_path():
+            return adapter.dump_json(payload)
+
+        dump_json_s = _best_of(dump_json_path, repeat)
+        orjson_s = _best_of(orjson_path, repeat)
+        stdlib_s = _best_of(stdlib_path, repeat)
+        body = dump_json_path()
+        line = f"{name:<46}{dump_json_s * 1000:>13.1f}{orjson_s * 1000:>10.1f}{stdlib_s * 1000:>10.1f}{len(body) / 1024:>9.1f}"
+        for enc in encodings:
+            line += f"{len(compression.compress(body, enc)) / 1024:>9.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
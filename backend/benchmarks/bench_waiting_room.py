@@ -0,0 +1,146 @@
+"""
+Surge simulation for the booking waiting room (app/core/admission.py).
+
+Discrete-event simulation of a booking-open surge: N patients arrive within a
+few seconds and every booking serializes on the same Schedule row lock for
+``--service-ms``. Compares:
+
+  * no admission control: every request waits on the lock while holding a
+    worker and a DB connection; requests held longer than ``--timeout`` fail.
+  * waiting room: the real WaitingRoom (fake clock) admits at ``--rate``/s,
+    the rest poll with their token after Retry-After, only admitted requests
+    reach the lock.
+
+Usage (from backend/):
+    python -m benchmarks.bench_waiting_room [--patients 5000] [--rate 45]
+"""
+import argparse
+import heapq
+import random
+import statistics
+
+from app.core.admission import InMemoryWaitingRoomStore, WaitingRoom
+
+
+class SimClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _arrivals(patients, spread, seed):
+    rng = random.Random(seed)
+    return sorted(rng.uniform(0, spread) for _ in range(patients))
+
+
+def simulate_without_admission(arrivals, service, timeout):
+    lock_free_at = 0.0
+    held, failed, finish_times = [], 0, []
+    in_flight = []  # finish times of requests currently holding a connection
+    peak = 0
+    for arrival in arrivals:
+        start = max(arrival, lock_free_at)
+        finish = start + service
+        if finish - arrival > timeout:
+            failed += 1
+            held.append(timeout)
+            heapq.heappush(in_flight, arrival + timeout)
+        else:
+            lock_free_at = finish
+            held.append(finish - arrival)
+            finish_times.append(finish - arrival)
+            heapq.heappush(in_flight, finish)
+        while in_flight and in_flight[0] <= arrival:
+            heapq.heappop(in_flight)
+        peak = max(peak, len(in_flight))
+    return {
+        "booked": len(finish_times), "failed": failed, "shed": 0, "polls": 0,
+        "peak_in_flight": peak, "p50": _percentile(finish_times, 50), "p99": _percentile(finish_times, 99),
+        "held_mean": statistics.mean(held),
+    }
+
+
+def simulate_with_waiting_room(arrivals, service, timeout, rate, burst, max_queue):
+    clock = SimClock()
+    room = WaitingRoom(InMemoryWaitingRoomStore(clock=clock), rate=rate, burst=burst,
+                       max_queue=max_queue, secret="bench", wall_clock=clock)
+    events = [(t, i, None) for i, t in enumerate(arrivals)]
+    heapq.heapify(events)
+    lock_free_at = 0.0
+    booked, failed, shed, polls, peak = 0, 0, 0, 0, 0
+    end_to_end, held = [], []
+    in_flight = []
+
+    while events:
+        now, patient, token = heapq.heappop(events)
+        clock.now = now
+        result = room.admit(token)
+        if result.shed:
+            shed += 1
+            heapq.heappush(events, (now + result.retry_after, patient, None))
+            continue
+        if not result.admitted:
+            polls += 1
+            heapq.heappush(events, (now + result.retry_after, patient, result.token))
+            continue
+
+        start = max(now, lock_free_at)
+        finish = start + service
+        if finish - now > timeout:
+            failed += 1
+            held.append(timeout)
+            heapq.heappush(in_flight, now + timeout)
+        else:
+            lock_free_at = finish
+            booked += 1
+            held.append(finish - now)
+            end_to_end.append(finish - arrivals[patient])
+            heapq.heappush(in_flight, finish)
+        while in_flight and in_flight[0] <= now:
+            heapq.heappop(in_flight)
+        peak = max(peak, len(in_flight))
+
+    return {
+        "booked": booked, "failed": failed, "shed": shed, "polls": polls,
+        "peak_in_flight": peak, "p50": _percentile(end_to_end, 50), "p99": _percentile(end_to_end, 99),
+        "held_mean": statistics.mean(held),
+    }
+
+
+def run(args):
+    arrivals = _arrivals(args.patients, args.spread, args.seed)
+    service = args.service_ms / 1000
+    rows = [
+        ("no admission control", simulate_without_admission(arrivals, service, args.timeout)),
+        (f"waiting room @{args.rate:g}/s", simulate_with_waiting_room(
+            arrivals, service, args.timeout, args.rate, args.burst, args.max_queue)),
+    ]
+    print(f"patients={args.patients} arriving over {args.spread}s, lock service={args.service_ms}ms, "
+          f"request timeout={args.timeout}s")
+    print(f"{'scenario':<26}{'booked':>8}{'failed':>8}{'shed':>7}{'polls':>8}{'peak conn':>11}"
+          f"{'held avg s':>12}{'p50 s':>8}{'p99 s':>8}")
+    for name, r in rows:
+        print(f"{name:<26}{r['booked']:>8}{r['failed']:>8}{r['shed']:>7}{r['polls']:>8}{r['peak_in_flight']:>11}"
+              f"{r['held_mean']:>12.2f}{r['p50']:>8.1f}{r['p99']:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=5000)
+    parser.add_argument("--spread", type=float, default=2.0, help="seconds over which patients arrive")
+    parser.add_argument("--service-ms", type=float, default=20.0, help="time a booking holds the Schedule lock")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--rate", type=float, default=45.0)
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--max-queue", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    run(parser.parse_args())
@@ -0,0 +1,390 @@
+"""
+Synthetic hospital workload: bulk seed + time-compressed replay of one day.
+
+``seed`` bulk-inserts ``--departments`` departments with ``--doctors-per-department``
+doctors each, ``--patients`` patients and one system admin into the database of
+DATABASE_URL. Every doctor works one period (doctor index % 3) every day except
+Sunday for ``--months`` months starting today (today is always included). A
+``--fill`` share of today's slots is already booked. The ids are written to a
+manifest (``--manifest``) for ``replay``.
+
+``replay`` compresses the day from 07:00 to 21:00 into ``--day-seconds`` real
+seconds and sends these requests:
+
+    booking burst    booking of the last seeded week opens at 07:00; the
+                     waiting room's 429 responses are retried with their token
+    open-clinic      at each session start (app/core/clinic_hours.py)
+    check-ins        booked patients check in from 30 min before their session;
+                     ``--no-show-rate`` of them never come
+    call-next        every ``--consult-minutes`` during a session
+    mark-no-show     the doctor reviews the waiting list every 30 min and marks
+                     a checked-in patient who left (``--walkout-rate``)
+    leave requests   ``--leave-rate`` of the doctors ask for leave on a future session
+    polling          doctor console every minute, patient queue status after
+                     check-in, admin dashboard-stats (``--admins`` pollers, every minute)
+
+Requests run with at most ``--concurrency`` in flight. By default they go to
+the in-process ASGI app (app.main:app). Pass ``--base-url`` to load a running
+server that uses the same database. At the end it prints throughput and, per
+endpoint, the status codes and p50/p95/p99 latency. "lag" is how late the
+slowest event started: a large lag means the concurrency or the server was
+the bottleneck, not the schedule. Tokens are minted with the app's SECRET_KEY
+rather than by logging in (bcrypt would dominate the numbers).
+
+Seeded rows are not removed; use a scratch database.
+
+Usage (from backend/):
+    python -m benchmarks.hospital_workload seed [--departments 10] [--doctors-per-department 8] [--patients 20000] [--months 3]
+    python -m benchmarks.hospital_workload replay [--day-seconds 120] [--concurrency 50] [--base-url http://127.0.0.1:8000]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+import httpx
+
+PERIODS = ("morning", "afternoon", "night")
+DAY_START, DAY_END = 7 * 3600, 21 * 3600  # replayed window, seconds after local midnight
+BOOKING_BURST_SECONDS = 5 * 60  # virtual seconds over which the booking-open burst arrives
+SPECIALTIES = ("家醫科", "內科", "外科", "小兒科", "婦產科", "眼科", "耳鼻喉科", "皮膚科", "骨科", "牙科",
+               "神經科", "心臟內科", "腸胃科", "泌尿科", "復健科", "精神科")
+
+
+def _chunks(rows, size=5000):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def seed(args):
+    from app.core.clock import system_clock
+    from app.db.session import SessionLocal
+    from app.models.admin import Admin
+    from app.models.appointment import Appointment
+    from app.models.doctor import Doctor
+    from app.models.patient import Patient
+    from app.models.schedule import Schedule
+
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    today = system_clock.today()
+    last_day = today + timedelta(days=30 * args.months - 1)
+    specialties = [SPECIALTIES[i] if i < len(SPECIALTIES) else f"科別{i}" for i in range(args.departments)]
+
+    doctors = [dict(doctor_id=uuid.uuid4(), doctor_login_id=f"wl_{run_id}_d{i}", password_hash="x",
+                    name=f"醫師{i}", specialty=specialties[i % args.departments], email=f"wl_{run_id}_d{i}@example.com")
+               for i in range(args.departments * args.doctors_per_department)]
+    patients = [dict(patient_id=uuid.uuid4(), card_number=f"W{run_id}{i:07d}", name=f"病患{i}", password_hash="x",
+                     dob=date(1950, 1, 1) + timedelta(days=rng.randrange(25000)), phone="0900000000",
+                     email=f"wl_{run_id}_p{i}@example.com", is_verified=True)
+               for i in range(args.patients)]
+    admin = dict(admin_id=uuid.uuid4(), name="管理員", email=f"wl_{run_id}_admin@example.com",
+                 account_username=f"wl_{run_id}_admin", password_hash="x", is_system_admin=True)
+
+    schedules, today_sessions, bookable = [], [], []
+    booking_opens = last_day - timedelta(days=6)
+    day = today
+    while day <= last_day:
+        for i, doctor in enumerate(doctors):
+            if day.weekday() == 6 and day != today:
+                continue
+            row = dict(schedule_id=uuid.uuid4(), doctor_id=doctor["doctor_id"], date=day,
+                       time_period=PERIODS[i % 3], status="available", max_patients=args.max_patients,
+                       booked_patients=0)
+            schedules.append(row)
+            if day == today:
+                today_sessions.append(row)
+            elif day >= booking_opens:
+                bookable.append(row)
+        day += timedelta(days=1)
+
+    # Today's slots are partly booked already; the same patient is not booked twice today
+    appointments, sessions = [], []
+    pool = iter(rng.sample(patients, len(patients)))
+    for row in today_sessions:
+        booked = []
+        for _ in range(int(row["max_patients"] * args.fill)):
+            patient = next(pool, None)
+            if patient is None:
+                break
+            booked.append(dict(appointment_id=uuid.uuid4(), patient_id=patient["patient_id"],
+                               doctor_id=row["doctor_id"], schedule_id=row["schedule_id"], date=today,
+                               time_period=row["time_period"], status="scheduled"))
+        row["booked_patients"] = len(booked)
+        appointments += booked
+        sessions.append(dict(schedule_id=str(row["schedule_id"]), doctor_id=str(row["doctor_id"]),
+                             time_period=row["time_period"],
+                             appointments=[[str(a["appointment_id"]), str(a["patient_id"])] for a in booked]))
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(Admin, [admin])
+        for model, rows in ((Doctor, doctors), (Patient, patients), (Schedule, schedules), (Appointment, appointments)):
+            for chunk in _chunks(rows):
+                db.bulk_insert_mappings(model, chunk)
+            db.commit()
+            print(f"  {model.__tablename__}: {len(rows)} rows")
+    finally:
+        db.close()
+    print(f"seeded run {run_id} in {time.perf_counter() - started:.1f}s")
+
+    future = defaultdict(list)
+    for row in schedules:
+        if row["date"] > today:
+            future[str(row["doctor_id"])].append([str(row["schedule_id"]), row["date"].isoformat(), row["time_period"]])
+    manifest = dict(
+        run_id=run_id, date=today.isoformat(), admin_id=str(admin["admin_id"]),
+        patients=[str(p["patient_id"]) for p in patients],
+        sessions=sessions,
+        bookable=[[str(r["doctor_id"]), r["date"].isoformat(), r["time_period"]] for r in bookable],
+        # Only the last few future sessions per doctor: candidates for leave requests
+        future={doctor_id: slots[-10:] for doctor_id, slots in future.items()},
+    )
+    with open(args.manifest, "w") as f:
+        json.dump(manifest, f)
+    print(f"manifest written to {args.manifest}")
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    async def request(self, client, label: str, method: str, url: str, token: str, **kwargs):
+        headers = {"Authorization": f"Bearer {token}", **kwargs.pop("headers", {})}
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, headers=headers, **kwargs)
+            code = response.status_code
+        except httpx.HTTPError:
+            response, code = None, 0  # transport error / timeout
+        self.latencies[label].append((time.perf_counter() - start) * 1000)
+        self.statuses[label][code] += 1
+        return response
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _seconds(value) -> int:
+    return value.hour * 3600 + value.minute * 60
+
+
+def build_plan(manifest: dict, args) -> list:
+    """(virtual seconds after midnight, event name, coroutine function taking (client, recorder, tokens))."""
+    from app.core.clinic_hours import CLINIC_OPEN_TIMES
+
+    rng = random.Random(args.seed)
+    plan = []
+    api = "/api/v1"
+
+    def book(patient_id, doctor_id, day, period):
+        async def run(client, rec, tokens):
+            headers = {}
+            for _ in range(args.max_retries):
+                response = await rec.request(client, "POST /patient/appointments", "POST", f"{api}/patient/appointments",
+                                             tokens.patient(patient_id), headers=headers,
+                                             json={"doctor_id": doctor_id, "date": day, "time_period": period})
+                if response is None or response.status_code != 429:
+                    return
+                headers = {"X-Waiting-Room-Token": response.headers["X-Waiting-Room-Token"]}
+                await asyncio.sleep(min(float(response.headers.get("Retry-After", 1)), args.max_retry_wait))
+        return run
+
+    for _ in range(args.bookings):
+        doctor_id, day, period = rng.choice(manifest["bookable"])
+        plan.append((DAY_START + rng.expovariate(3 / BOOKING_BURST_SECONDS),
+                     "book", book(rng.choice(manifest["patients"]), doctor_id, day, period)))
+
+    for session in manifest["sessions"]:
+        schedule_id, doctor_id = session["schedule_id"], session["doctor_id"]
+        window = CLINIC_OPEN_TIMES[session["time_period"]]
+        start, end = _seconds(window["start_booking"]), _seconds(window["end_booking"])
+
+        async def open_clinic(client, rec, tokens, schedule_id=schedule_id, doctor_id=doctor_id):
+            await rec.request(client, "POST /doctor/schedules/{id}/open-clinic", "POST",
+                              f"{api}/doctor/schedules/{schedule_id}/open-clinic", tokens.doctor(doctor_id))
+        plan.append((start - 60, "open-clinic", open_clinic))
+
+        for appointment_id, patient_id in session["appointments"]:
+            if rng.random() < args.no_show_rate:
+                continue
+            at = rng.uniform(start - 1800, end - 1800)
+            method = rng.choice(("online", "onsite"))
+
+            async def check_in(client, rec, tokens, appointment_id=appointment_id, patient_id=patient_id, method=method):
+                await rec.request(client, "POST /patient/appointments/{id}/check-in", "POST",
+                                  f"{api}/patient/appointments/{appointment_id}/check-in", tokens.patient(patient_id),
+                                  json={"checkin_method": method})
+            plan.append((at, "check-in", check_in))
+
+            async def poll_queue(client, rec, tokens, appointment_id=appointment_id, patient_id=patient_id):
+                await rec.request(client, "GET /checkin/queue/{id}", "GET", f"{api}/checkin/queue/{appointment_id}",
+                                  tokens.patient(patient_id))
+            for delay in (300, 900, 1800):
+                plan.append((at + delay, "queue-poll", poll_queue))
+
+        async def call_next(client, rec, tokens, schedule_id=schedule_id, doctor_id=doctor_id):
+            await rec.request(client, "POST /doctor/schedules/{id}/call-next-patient", "POST",
+                              f"{api}/doctor/schedules/{schedule_id}/call-next-patient", tokens.doctor(doctor_id))
+        for at in range(start, end, args.consult_minutes * 60):
+            plan.append((at, "call-next", call_next))
+
+        async def review_waiting(client, rec, tokens, schedule_id=schedule_id, doctor_id=doctor_id):
+            response = await rec.request(client, "GET /doctor/schedules/{id}/waiting-patients", "GET",
+                                         f"{api}/doctor/schedules/{schedule_id}/waiting-patients", tokens.doctor(doctor_id))
+            if response is None or response.status_code != 200:
+                return
+            waiting = [p for p in response.json() if p["checkin_id"] and p["status"] == "checked_in"]
+            if waiting and rng.random() < args.walkout_rate * len(waiting):
+                checkin_id = rng.choice(waiting)["checkin_id"]
+                await rec.request(client, "POST /doctor/schedules/{id}/checkins/{id}/mark-no-show", "POST",
+                                  f"{api}/doctor/schedules/{schedule_id}/checkins/{checkin_id}/mark-no-show",
+                                  tokens.doctor(doctor_id))
+        for at in range(start + 1800, end, 1800):
+            plan.append((at, "waiting-review", review_waiting))
+
+        async def console(client, rec, tokens, schedule_id=schedule_id, doctor_id=doctor_id):
+            await rec.request(client, "GET /doctor/console/{id}", "GET", f"{api}/doctor/console/{schedule_id}",
+                              tokens.doctor(doctor_id))
+        for at in range(start, end, 60):
+            plan.append((at + rng.uniform(0, 60), "console-poll", console))
+
+    doctors = list(manifest["future"])
+    for doctor_id in rng.sample(doctors, int(len(doctors) * args.leave_rate)):
+        schedule_id, day, period = rng.choice(manifest["future"][doctor_id])
+
+        async def leave(client, rec, tokens, doctor_id=doctor_id, schedule_id=schedule_id, day=day, period=period):
+            await rec.request(client, "POST /doctor/me/leave-requests", "POST", f"{api}/doctor/me/leave-requests",
+                              tokens.doctor(doctor_id),
+                              json={"schedule_id": schedule_id, "date": day, "time_period": period, "reason": "研討會"})
+        plan.append((rng.uniform(DAY_START, DAY_END), "leave-request", leave))
+
+    async def dashboard(client, rec, tokens):
+        await rec.request(client, "GET /admin/dashboard-stats", "GET", f"{api}/admin/dashboard-stats", tokens.admin())
+    for _ in range(args.admins):
+        offset = rng.uniform(0, 60)
+        for at in range(DAY_START, DAY_END, 60):
+            plan.append((at + offset, "dashboard-poll", dashboard))
+
+    plan.sort(key=lambda event: event[0])
+    return plan
+
+
+class Tokens:
+    """Access tokens minted like /auth/login does, cached per user."""
+
+    def __init__(self, admin_id: str):
+        from app.core.security import create_access_token
+
+        self._create = create_access_token
+        self._admin_id = admin_id
+        self._cache = {}
+
+    def _token(self, user_id: str, role: str) -> str:
+        if user_id not in self._cache:
+            self._cache[user_id] = self._create({"sub": user_id, "role": role}, expires_delta=timedelta(hours=24))
+        return self._cache[user_id]
+
+    def patient(self, patient_id: str) -> str:
+        return self._token(patient_id, "patient")
+
+    def doctor(self, doctor_id: str) -> str:
+        return self._token(doctor_id, "doctor")
+
+    def admin(self) -> str:
+        return self._token(self._admin_id, "admin")
+
+
+async def replay(args):
+    from app.core.clock import system_clock
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    if manifest["date"] != system_clock.today().isoformat():
+        print(f"warning: manifest was seeded for {manifest['date']}; today's sessions will be rejected")
+
+    plan = build_plan(manifest, args)
+    scale = args.day_seconds / (DAY_END - DAY_START)
+    tokens, recorder = Tokens(manifest["admin_id"]), Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    lag = []
+
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        from app.main import app
+        # Like a server, a failing background task (e.g. the confirmation mail) does not fail the response
+        transport, base_url = httpx.ASGITransport(app=app, raise_app_exceptions=False), "http://workload"
+
+    print(f"replaying {len(plan)} events ({Counter(name for _, name, _ in plan).most_common()}) "
+          f"in ~{args.day_seconds}s with concurrency {args.concurrency}")
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+        started = time.perf_counter()
+
+        async def fire(due, event):
+            async with semaphore:
+                lag.append(time.perf_counter() - due)
+                await event(client, recorder, tokens)
+
+        tasks = []
+        for at, _, event in plan:
+            due = started + max(0, at - DAY_START) * scale
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(fire(due, event)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in recorder.latencies.values())
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed:.0f}/s), max event lag {max(lag):.2f}s")
+    print(f"{'endpoint':<58}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  statuses")
+    for label in sorted(recorder.latencies):
+        values = recorder.latencies[label]
+        codes = " ".join(f"{code}:{n}" for code, n in sorted(recorder.statuses[label].items()))
+        print(f"{label:<58}{len(values):>7}{statistics.median(values):>9.1f}{_percentile(values, 95):>9.1f}"
+              f"{_percentile(values, 99):>9.1f}  {codes}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--manifest", default="workload_manifest.json")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed")
+    seed_parser.add_argument("--departments", type=int, default=10)
+    seed_parser.add_argument("--doctors-per-department", type=int, default=8)
+    seed_parser.add_argument("--patients", type=int, default=20000)
+    seed_parser.add_argument("--months", type=int, default=3)
+    seed_parser.add_argument("--max-patients", type=int, default=40, help="slots per session")
+    seed_parser.add_argument("--fill", type=float, default=0.8, help="share of today's slots already booked")
+
+    replay_parser = commands.add_parser("replay")
+    replay_parser.add_argument("--day-seconds", type=float, default=120, help="real seconds for 07:00-21:00")
+    replay_parser.add_argument("--concurrency", type=int, default=50)
+    replay_parser.add_argument("--base-url", default=None, help="running server (default: in-process ASGI app)")
+    replay_parser.add_argument("--bookings", type=int, default=2000, help="requests in the booking-open burst")
+    replay_parser.add_argument("--no-show-rate", type=float, default=0.1)
+    replay_parser.add_argument("--walkout-rate", type=float, default=0.02)
+    replay_parser.add_argument("--leave-rate", type=float, default=0.05)
+    replay_parser.add_argument("--consult-minutes", type=int, default=5)
+    replay_parser.add_argument("--admins", type=int, default=3)
+    replay_parser.add_argument("--timeout", type=float, default=30)
+    replay_parser.add_argument("--max-retries", type=int, default=20, help="waiting-room retries per booking")
+    replay_parser.add_argument("--max-retry-wait", type=float, default=5, help="cap on Retry-After, seconds")
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        seed(args)
+    else:
+        asyncio.run(replay(args))
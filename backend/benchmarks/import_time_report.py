@@ -0,0 +1,86 @@
+"""
+Import-time report for the API (``python -X importtime``).
+
+Imports ``--module`` (default app.main) in a fresh interpreter with
+``-X importtime`` and prints:
+  * the total import time,
+  * self time grouped by top-level package,
+  * the slowest modules by cumulative time,
+  * which of the dependencies that should load lazily (DEFERRED_MODULES)
+    were imported anyway.
+
+Usage (from backend/):
+    python -m benchmarks.import_time_report [--module app.main] [--top 25]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+# Heavy dependencies that app.main must not import; they load on first use
+DEFERRED_MODULES = ["passlib", "jose", "cryptography", "bcrypt", "smtplib", "email.mime", "pytz"]
+
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def collect(module: str = "app.main", cwd: str = None) -> List[ImportRecord]:
+    cwd = cwd or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True, check=True,
+    )
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us)))
+    return records
+
+
+def total_seconds(records: List[ImportRecord]) -> float:
+    return sum(record.self_us for record in records) / 1e6
+
+
+def imported_deferred(records: List[ImportRecord]) -> List[str]:
+    names = {record.module for record in records}
+    return [
+        deferred for deferred in DEFERRED_MODULES
+        if any(name == deferred or name.startswith(deferred + ".") for name in names)
+    ]
+
+
+def by_package(records: List[ImportRecord]) -> Dict[str, int]:
+    totals = defaultdict(int)
+    for record in records:
+        totals[record.module.split(".")[0]] += record.self_us
+    return dict(totals)
+
+
+def run(args):
+    records = collect(args.module)
+    print(f"import {args.module}: {total_seconds(records) * 1000:.0f} ms, {len(records)} modules")
+
+    print(f"\n{'package':<32}{'self ms':>10}")
+    for package, self_us in sorted(by_package(records).items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<32}{self_us / 1000:>10.1f}")
+
+    print(f"\n{'module':<56}{'cumulative ms':>14}")
+    for record in sorted(records, key=lambda r: -r.cumulative_us)[:args.top]:
+        print(f"{record.module:<56}{record.cumulative_us / 1000:>14.1f}")
+
+    deferred = imported_deferred(records)
+    print("\ndeferred dependencies imported at startup:", ", ".join(deferred) if deferred else "none")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    run(parser.parse_args())
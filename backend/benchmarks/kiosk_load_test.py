@@ -0,0 +1,121 @@
+"""
+Load test for kiosk card check-in (POST /api/v1/kiosk/checkin).
+
+Seeds ``--patients`` patients, each with one appointment today spread over
+``--doctors`` open morning clinics, into the database of DATABASE_URL, then
+has ``--kiosks`` concurrent kiosks check them all in against a running server
+and reports latency percentiles and throughput. Exits non-zero when the p95
+exceeds ``--p95-ms`` (target: 50 ms with 20 kiosks).
+
+The server must run with the same DATABASE_URL and have ``--kiosk-key`` in
+KIOSK_API_KEYS, e.g.:
+    KIOSK_API_KEYS=load-test gunicorn -c gunicorn_conf.py app.main:app
+
+Usage (from backend/):
+    python -m benchmarks.kiosk_load_test [--base-url http://127.0.0.1:8000] [--kiosks 20] [--patients 2000]
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+import uuid
+from datetime import date
+
+import httpx
+
+
+def seed(patients: int, doctors: int, on_date: date) -> list:
+    from app.db.session import SessionLocal
+    from app.models.appointment import Appointment
+    from app.models.doctor import Doctor
+    from app.models.patient import Patient
+    from app.models.room_day import RoomDay
+    from app.models.schedule import Schedule
+
+    run_id = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        schedule_rows, doctor_rows = [], []
+        for i in range(doctors):
+            doctor_id = uuid.uuid4()
+            doctor_rows.append(dict(doctor_id=doctor_id, doctor_login_id=f"kiosk_{run_id}_{i}", password_hash="x",
+                                    name=f"醫師{i}", specialty="家醫科", email=f"kiosk_{run_id}_{i}@example.com"))
+            schedule_rows.append(dict(schedule_id=uuid.uuid4(), doctor_id=doctor_id, date=on_date,
+                                      time_period="morning", status="open", max_patients=patients, booked_patients=0))
+        db.bulk_insert_mappings(Doctor, doctor_rows)
+        db.bulk_insert_mappings(Schedule, schedule_rows)
+        db.bulk_insert_mappings(RoomDay, [
+            dict(room_day_id=uuid.uuid4(), schedule_id=row["schedule_id"], next_sequence=1, current_called_sequence=0)
+            for row in schedule_rows
+        ])
+
+        cards, patient_rows, appointment_rows = [], [], []
+        for i in range(patients):
+            card_number = f"K{run_id}{i:06d}"
+            patient_id = uuid.uuid4()
+            schedule = schedule_rows[i % doctors]
+            cards.append(card_number)
+            patient_rows.append(dict(patient_id=patient_id, card_number=card_number, name="病患", password_hash="x",
+                                     dob=date(1990, 1, 1), phone="0900000000", email=f"{card_number}@example.com"))
+            appointment_rows.append(dict(appointment_id=uuid.uuid4(), patient_id=patient_id,
+                                         doctor_id=schedule["doctor_id"], schedule_id=schedule["schedule_id"],
+                                         date=on_date, time_period="morning", status="scheduled"))
+        db.bulk_insert_mappings(Patient, patient_rows)
+        db.bulk_insert_mappings(Appointment, appointment_rows)
+        db.commit()
+    finally:
+        db.close()
+    return cards
+
+
+def _kiosk(base_url: str, key: str, cards: list, latencies: list, errors: list) -> None:
+    with httpx.Client(base_url=base_url, headers={"X-Kiosk-Key": key}, timeout=10) as client:
+        for card_number in cards:
+            start = time.perf_counter()
+            response = client.post("/api/v1/kiosk/checkin", json={"card_number": card_number})
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(args):
+    from app.core.clock import system_clock
+
+    cards = seed(args.patients, args.doctors, system_clock.today())
+    latencies, errors = [], []
+    kiosks = [
+        threading.Thread(target=_kiosk, args=(args.base_url, args.kiosk_key, cards[i::args.kiosks], latencies, errors))
+        for i in range(args.kiosks)
+    ]
+    start = time.perf_counter()
+    for kiosk in kiosks:
+        kiosk.start()
+    for kiosk in kiosks:
+        kiosk.join()
+    elapsed = time.perf_counter() - start
+
+    p95 = _percentile(latencies, 95)
+    print(f"{len(latencies)} check-ins from {args.kiosks} kiosks in {elapsed:.1f}s "
+          f"({len(latencies) / elapsed:.0f}/s), errors: {len(errors)}")
+    print(f"p50 {statistics.median(latencies):.1f} ms  p95 {p95:.1f} ms  p99 {_percentile(latencies, 99):.1f} ms  "
+          f"max {max(latencies):.1f} ms")
+    if errors or p95 > args.p95_ms:
+        print(f"FAIL: target p95 < {args.p95_ms} ms with no errors")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--kiosk-key", default="load-test")
+    parser.add_argument("--kiosks", type=int, default=20)
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--doctors", type=int, default=10)
+    parser.add_argument("--p95-ms", type=float, default=50)
+    run(parser.parse_args())
@@ -0,0 +1,123 @@
+"""
+Startup-time measurement for the API server.
+
+Starts the server as a subprocess and reports, from process launch:
+  * live:   first 200 from /health/live (process accepts connections)
+  * ready:  first 200 from /health/ready (warm-up finished)
+  * first:  latency of the first GET /api/v1/patient/schedules
+  * steady: median latency of the next --requests requests
+
+Modes:
+  uvicorn   the old single-worker command (no preload, no warm-up)
+  gunicorn  gunicorn -c gunicorn_conf.py (preload + warm-up)
+
+Uses the DATABASE_URL from the environment, or a throwaway SQLite file seeded
+with --schedules rows when none is given.
+
+Usage (from backend/):
+    python -m benchmarks.measure_startup [--mode uvicorn gunicorn] [--port 8765]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date
+
+import httpx
+
+COMMANDS = {
+    "uvicorn": lambda port: [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+    "gunicorn": lambda port: [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py",
+                              "--bind", f"127.0.0.1:{port}", "app.main:app"],
+}
+
+
+def _seed_sqlite(path: str, schedules: int) -> str:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.db.base import Base
+    from app.models.doctor import Doctor
+    from app.models.schedule import Schedule
+
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    doctor_id = uuid.uuid4()
+    db.add(Doctor(doctor_id=doctor_id, doctor_login_id="startup_doc", password_hash="x",
+                  name="醫師", specialty="家醫科", email="startup@example.com"))
+    db.flush()
+    today = date.today()
+    db.bulk_insert_mappings(Schedule, [
+        dict(schedule_id=uuid.uuid4(), doctor_id=doctor_id, date=today.replace(day=1 + i % 28),
+             time_period=["morning", "afternoon", "night"][i % 3], status="available",
+             max_patients=10, booked_patients=0)
+        for i in range(schedules)
+    ])
+    db.commit()
+    return url
+
+
+def _wait_for(client, path: str, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(path)
+
+
+def measure(mode: str, port: int, env: dict, requests: int, timeout: float) -> dict:
+    today = date.today()
+    path = f"/api/v1/patient/schedules?month={today.month}&year={today.year}"
+    started = time.perf_counter()
+    process = subprocess.Popen(COMMANDS[mode](port), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+            deadline = started + timeout
+            live = _wait_for(client, "/health/live", deadline)
+            ready = _wait_for(client, "/health/ready", deadline)
+            first_start = time.perf_counter()
+            client.get(path).raise_for_status()
+            first = time.perf_counter() - first_start
+            steady = []
+            for _ in range(requests):
+                request_start = time.perf_counter()
+                client.get(path)
+                steady.append(time.perf_counter() - request_start)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {
+        "live": live - started, "ready": ready - started,
+        "first_ms": first * 1000, "steady_ms": statistics.median(steady) * 1000 if steady else 0.0,
+    }
+
+
+def run(args):
+    env = dict(os.environ)
+    if "DATABASE_URL" not in env:
+        env["DATABASE_URL"] = _seed_sqlite(os.path.join(tempfile.mkdtemp(), "startup.db"), args.schedules)
+    print(f"database: {env['DATABASE_URL'].split('@')[-1]}")
+    print(f"{'mode':<10}{'live s':>8}{'ready s':>9}{'first ms':>10}{'steady ms':>11}")
+    for mode in args.mode:
+        result = measure(mode, args.port, env, args.requests, args.timeout)
+        print(f"{mode:<10}{result['live']:>8.2f}{result['ready']:>9.2f}"
+              f"{result['first_ms']:>10.1f}{result['steady_ms']:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", nargs="+", choices=sorted(COMMANDS), default=["uvicorn", "gunicorn"])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--schedules", type=int, default=3000)
+    parser.add_argument("--timeout", type=float, default=60)
+    run(parser.parse_args())
@@ -0,0 +1,119 @@
+"""
+Simulated-lag harness for read-replica routing (app/db/replicas.py).
+
+Uses two SQLite files: the primary and a "replica" that a background thread
+refreshes from the primary with the SQLite backup API every ``--lag`` seconds,
+so the replica is always between 0 and ``--lag`` seconds behind (the probe
+reports the age of the last copy). Simulated patients book (write to the
+primary) and immediately list their bookings through the router, then keep
+polling for a while.
+
+Compares three routing policies:
+  * replica always: every read goes to the replica;
+  * lag-aware: ReplicaRouter without read-your-writes;
+  * lag-aware + read-your-writes: ReplicaRouter given the time since the
+    client's own write, as ``get_read_db`` does with the per-user last-write time.
+
+Reports stale reads (own booking missing) and the share of reads offloaded.
+
+Usage (from backend/):
+    python -m benchmarks.replica_lag_harness [--lag 0.5] [--max-lag 2] [--clients 20]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.db.replicas import ReplicaRouter
+
+
+class Replicator(threading.Thread):
+    def __init__(self, primary_path: str, replica_path: str, lag: float):
+        super().__init__(daemon=True)
+        self.primary_path = primary_path
+        self.replica_path = replica_path
+        self.lag = lag
+        self.synced_at = time.monotonic()
+        self.stopped = threading.Event()
+
+    def sync(self) -> None:
+        started = time.monotonic()
+        source = sqlite3.connect(self.primary_path)
+        target = sqlite3.connect(self.replica_path)
+        source.backup(target)
+        source.close()
+        target.close()
+        self.synced_at = started
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.lag):
+            self.sync()
+
+    def lag_seconds(self, engine) -> float:
+        return time.monotonic() - self.synced_at
+
+
+def _simulate(policy, primary, router, clients, reads_per_client, rng):
+    stale = offloaded = total = 0
+    for client in range(clients):
+        booking_id = f"{policy}-{client}"
+        with primary.begin() as connection:
+            connection.execute(text("INSERT INTO booking (booking_id) VALUES (:id)"), {"id": booking_id})
+        written_at = time.monotonic()
+        for _ in range(reads_per_client):
+            time.sleep(rng.uniform(0, 0.05))
+            if policy == "replica always":
+                engine = router.replicas[0].engine
+            else:
+                since_write = time.monotonic() - written_at if policy.endswith("read-your-writes") else None
+                replica = router.choose(since_write)
+                engine = replica.engine if replica else primary
+            with engine.connect() as connection:
+                found = connection.execute(
+                    text("SELECT count(*) FROM booking WHERE booking_id = :id"), {"id": booking_id}
+                ).scalar()
+            total += 1
+            offloaded += engine is not primary
+            stale += not found
+    return stale, offloaded, total
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="replica_harness_")
+    primary_path = os.path.join(workdir, "primary.db")
+    replica_path = os.path.join(workdir, "replica.db")
+    primary = create_engine(f"sqlite:///{primary_path}")
+    with primary.begin() as connection:
+        connection.execute(text("CREATE TABLE booking (booking_id TEXT PRIMARY KEY)"))
+
+    replicator = Replicator(primary_path, replica_path, args.lag)
+    replicator.sync()
+    replicator.start()
+    router = ReplicaRouter(
+        [create_engine(f"sqlite:///{replica_path}")], max_lag_seconds=args.max_lag,
+        check_interval=0, lag_probe=replicator.lag_seconds,
+    )
+
+    print(f"replica refreshed every {args.lag}s, REPLICA_MAX_LAG_SECONDS={args.max_lag}, "
+          f"{args.clients} clients x {args.reads} reads")
+    print(f"{'policy':<32}{'stale reads':>12}{'offloaded':>11}")
+    for policy in ["replica always", "lag-aware", "lag-aware + read-your-writes"]:
+        stale, offloaded, total = _simulate(policy, primary, router, args.clients, args.reads, rng)
+        print(f"{policy:<32}{stale:>12}{offloaded / total:>11.0%}")
+    replicator.stopped.set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lag", type=float, default=0.5, help="seconds between replica refreshes")
+    parser.add_argument("--max-lag", type=float, default=2.0)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=10, help="reads per client after its booking")
+    parser.add_argument("--seed", type=int, default=3)
+    run(parser.parse_args())
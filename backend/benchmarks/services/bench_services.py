@@ -0,0 +1,134 @@
+"""
+Service-layer micro-benchmarks (pytest-benchmark), each at every dataset
+size of BENCH_SIZES (see conftest.py).
+
+Calls that change state get fresh rows from a setup step that is not timed
+(``benchmark.pedantic``, BENCH_ROUNDS rounds); the timed part includes the
+commit, as one request's unit of work. Read-only calls are timed
+with the default calibration.
+
+Usage (from backend/):
+    pytest benchmarks/services                                  # run, print the table
+    pytest benchmarks/services --benchmark-save=sqlite          # store a baseline
+    pytest benchmarks/services --benchmark-json=current.json
+    python -m benchmarks.services.report sqlite current.json    # flag regressions vs the baseline
+    BENCH_DATABASE_URL=postgresql://.../hospital_bench pytest benchmarks/services --benchmark-save=postgresql
+"""
+import uuid
+from datetime import timedelta
+
+from fastapi import BackgroundTasks
+
+from benchmarks.services.conftest import BENCH_ROUNDS
+
+
+def _pedantic(benchmark, db, target, setup):
+    # Services only flush: time the call plus the commit that get_db runs at the end of the request
+    def request(*args, **kwargs):
+        target(*args, **kwargs)
+        db.commit()
+
+    return benchmark.pedantic(request, setup=setup, rounds=BENCH_ROUNDS, warmup_rounds=1, iterations=1)
+
+
+def bench_create_appointment(benchmark, dataset, db):
+    from app.schemas.appointment import AppointmentCreate
+    from app.services.appointment_service import appointment_service
+
+    doctor_id, day, period = dataset.booking
+    appointment_in = AppointmentCreate(doctor_id=doctor_id, date=day, time_period=period)
+
+    def create(patient_id):
+        # The confirmation mail is a background task and is not run here
+        appointment_service.create_appointment(db, patient_id=patient_id, appointment_in=appointment_in,
+                                               background_tasks=BackgroundTasks())
+
+    _pedantic(benchmark, db, create, lambda: ((dataset.new_patient(db),), {}))
+
+
+def bench_create_checkin(benchmark, dataset, db):
+    from app.models.appointment import Appointment
+    from app.models.schedule import Schedule
+    from app.services.checkin_service import CheckinService
+
+    schedule = db.get(Schedule, dataset.hot_schedule_id)
+    service = CheckinService(db, clock=dataset.clock)
+
+    def setup():
+        patient_id = dataset.new_patient(db)
+        appointment = Appointment(appointment_id=uuid.uuid4(), patient_id=patient_id, doctor_id=schedule.doctor_id,
+                                  schedule_id=schedule.schedule_id, date=schedule.date,
+                                  time_period=schedule.time_period, status="scheduled")
+        db.add(appointment)
+        db.commit()
+        return (patient_id, appointment.appointment_id), {}
+
+    def check_in(patient_id, appointment_id):
+        service.create_checkin(db, patient_id=patient_id, appointment_id=appointment_id, checkin_method="online")
+
+    _pedantic(benchmark, db, check_in, setup)
+
+
+def bench_re_check_in(benchmark, dataset, db, run_async):
+    from app.models.appointment import Appointment
+    from app.models.checkin import Checkin
+    from app.services.queue_service import QueueService
+
+    service = QueueService(db, clock=dataset.clock)
+    queue = db.query(Checkin.checkin_id).join(Appointment, Checkin.appointment_id == Appointment.appointment_id).filter(
+        Appointment.schedule_id == dataset.hot_schedule_id
+    ).all()
+    rounds = iter(row.checkin_id for row in queue * (BENCH_ROUNDS // len(queue) + 2))
+
+    def setup():
+        # A patient of the hot session missed the call; the re-check-in moves them back into the queue
+        checkin = db.get(Checkin, next(rounds))
+        checkin.status = "no_show"
+        db.commit()
+        return (checkin.checkin_id,), {}
+
+    _pedantic(benchmark, db, lambda checkin_id: run_async(service.re_check_in(checkin_id)), setup)
+
+
+def bench_call_next(benchmark, dataset, db, run_async):
+    from app.models.room_day import RoomDay
+    from app.services.queue_service import QueueService
+
+    service = QueueService(db, clock=dataset.clock)
+    room_day = db.query(RoomDay).filter(RoomDay.schedule_id == dataset.hot_schedule_id).one()
+    sequences = iter(range((room_day.current_called_sequence or 0) + 1, 10**9))
+
+    _pedantic(benchmark, db, lambda sequence: run_async(service.call_next(dataset.hot_schedule_id, sequence)),
+              lambda: ((next(sequences),), {}))
+
+
+def bench_list_public_schedules(benchmark, dataset, db):
+    from app.crud import crud_schedule
+
+    today = dataset.clock.today()
+    benchmark(crud_schedule.list_public_schedules, db, month=today.month, year=today.year)
+
+
+def bench_get_admin_dashboard_stats(benchmark, dataset, db):
+    from app.services.dashboard_service import get_admin_dashboard_stats
+
+    benchmark(get_admin_dashboard_stats, db, clock=dataset.clock)
+
+
+def bench_create_recurring_schedules(benchmark, dataset, db):
+    from app.crud import crud_schedule
+    from app.models.doctor import Doctor
+    from app.schemas.schedule import ScheduleRecurringCreate
+
+    start = dataset.clock.today() + timedelta(days=7)
+
+    def setup():
+        # A new doctor every round, so the weekly sessions never conflict with an earlier round
+        doctor_id = uuid.uuid4()
+        db.add(Doctor(doctor_id=doctor_id, doctor_login_id=f"bench_{doctor_id.hex}", password_hash="x", name="醫師",
+                      specialty="家醫科", email=f"{doctor_id.hex}@example.com"))
+        db.commit()
+        return (ScheduleRecurringCreate(doctor_id=doctor_id, time_period="morning", start_date=start,
+                                        day_of_week=start.weekday(), months_to_create=3, max_patients=30),), {}
+
+    _pedantic(benchmark, db, lambda schedule_in: crud_schedule.create_recurring_schedules(db, schedule_in), setup)
@@ -0,0 +1,83 @@
+"""
+Compares a service benchmark run with a stored baseline and flags regressions.
+
+Both arguments are pytest-benchmark JSON files (``--benchmark-json`` /
+``--benchmark-save``). Pass a save name instead of a path to use the newest
+baseline of that name in the storage directory (benchmarks/services/.baselines,
+one subdirectory per machine). Compare runs of the same machine and database.
+
+A benchmark regressed when its ``--stat`` (median by default) grew by more
+than ``--threshold`` percent. Exits 1 when any did, so CI can gate on it.
+Benchmarks present on one side only are listed but do not fail the report.
+
+Usage (from backend/):
+    python -m benchmarks.services.report BASELINE CURRENT [--threshold 15] [--stat median]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+
+STORAGE = os.path.join("benchmarks", "services", ".baselines")
+
+
+def resolve(name_or_path: str) -> str:
+    if os.path.exists(name_or_path):
+        return name_or_path
+    # pytest-benchmark names saved runs <machine>/<NNNN>_<name>.json
+    matches = sorted(glob.glob(os.path.join(STORAGE, "*", f"*_{name_or_path}.json")), key=os.path.basename)
+    if not matches:
+        sys.exit(f"No benchmark file or saved baseline named {name_or_path!r} (looked in {STORAGE}).")
+    return matches[-1]
+
+
+def load(path: str, stat: str) -> dict:
+    with open(path) as f:
+        return {bench["fullname"]: bench["stats"][stat] for bench in json.load(f)["benchmarks"]}
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """(name, baseline, current, change %, flag) per benchmark, sorted by name."""
+    rows = []
+    for name in sorted(baseline.keys() | current.keys()):
+        before, after = baseline.get(name), current.get(name)
+        if before is None or after is None:
+            rows.append((name, before, after, None, "new" if before is None else "missing"))
+            continue
+        change = (after - before) / before * 100
+        flag = "REGRESSION" if change > threshold else ("faster" if change < -threshold else "")
+        rows.append((name, before, after, change, flag))
+    return rows
+
+
+def _ms(seconds) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.3f}"
+
+
+def run(args) -> int:
+    baseline_path, current_path = resolve(args.baseline), resolve(args.current)
+    rows = compare(load(baseline_path, args.stat), load(current_path, args.stat), args.threshold)
+
+    print(f"baseline {baseline_path}\ncurrent  {current_path}\n{args.stat}, threshold {args.threshold:.0f}%\n")
+    width = max(len(row[0]) for row in rows)
+    print(f"{'benchmark':<{width}}{'baseline ms':>14}{'current ms':>14}{'change':>10}")
+    for name, before, after, change, flag in rows:
+        change_text = "" if change is None else f"{change:+.1f}%"
+        print(f"{name:<{width}}{_ms(before):>14}{_ms(after):>14}{change_text:>10}  {flag}")
+
+    regressions = [row[0] for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0f}%")
+        return 1
+    print("\nno regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="baseline JSON path or --benchmark-save name")
+    parser.add_argument("current", help="current JSON path or --benchmark-save name")
+    parser.add_argument("--threshold", type=float, default=15, help="allowed slowdown, percent")
+    parser.add_argument("--stat", default="median", choices=("min", "median", "mean", "max"))
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,54 @@
+"""
+Production launcher configuration:
+
+    gunicorn -c gunicorn_conf.py app.main:app
+
+* Uvicorn workers, count derived from the CPU cores (override with WEB_CONCURRENCY).
+* The app is imported once in the master (preload_app) so workers fork with
+  the modules, routes and pydantic schemas already built; each worker then
+  drops the inherited connection pools (post_fork) and runs the lifespan
+  warm-up (app/core/warmup.py) before it accepts traffic.
+"""
+import multiprocessing
+import os
+
+# Enable the lifespan warm-up for workers started by this launcher (before the app is preloaded)
+os.environ.setdefault("WARMUP_ENABLED", "true")
+
+try:
+    import uvicorn_worker  # noqa: F401  maintained home of the uvicorn gunicorn worker
+
+    worker_class = "uvicorn_worker.UvicornWorker"
+except ImportError:
+    worker_class = "uvicorn.workers.UvicornWorker"
+
+cores = multiprocessing.cpu_count()
+# Request handlers are mostly synchronous DB work run in each worker's threadpool, so
+# one worker per core plus one; capped so the total DB connections stay bounded.
+workers = int(os.getenv("WEB_CONCURRENCY", min(cores + 1, int(os.getenv("MAX_WORKERS", "8")))))
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Recycle workers now and then (jittered so they do not restart together)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "500"))
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    # Connections opened by the master must never be shared with a child process
+    from app.db.replicas import replica_router
+    from app.db.session import engine
+
+    engine.dispose(close=False)
+    for replica in replica_router.replicas:
+        replica.engine.dispose(close=False)
+
+
+def when_ready(server):
+    server.log.info(f"gunicorn ready: {workers} x {worker_class} on {bind} ({cores} cores)")
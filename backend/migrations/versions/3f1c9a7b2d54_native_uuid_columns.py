@@ -0,0 +1,280 @@
+"""Store UUID keys as native uuid on PostgreSQL
+
+Revision ID: 3f1c9a7b2d54
+Revises: 8d764d0273ba
+Create Date: 2025-11-20 10:12:31.204117
+
+Databases bootstrapped from the models (Base.metadata.create_all) stored every
+UUIDType column as CHAR(36). This converts those columns to the native 16-byte
+``uuid`` type. Columns that are already ``uuid`` (e.g. databases created by the
+initial migration) are detected and skipped, so the revision is safe to run on
+any existing database.
+
+The conversion runs online, without a table rewrite under an ACCESS EXCLUSIVE lock:
+
+1. every converted column gets a nullable ``<column>__new uuid`` shadow column,
+   kept in sync by a BEFORE INSERT OR UPDATE trigger, plus a NOT VALID
+   ``IS NOT NULL`` check for NOT NULL columns (catalog-only changes);
+2. existing rows are backfilled in primary key order, BACKFILL_BATCH_SIZE rows
+   per committed batch;
+3. the primary key, unique constraint and index of each converted column are
+   rebuilt on the shadow columns CONCURRENTLY, the checks are validated and the
+   foreign keys are added NOT VALID and then validated; none of this blocks
+   reads or writes;
+4. a single short transaction drops the old foreign keys and columns, renames
+   the shadow columns, indexes and foreign keys to the old names and attaches
+   the new indexes as the primary key and unique constraints. It only touches
+   the catalog (SET NOT NULL relies on the validated check instead of a scan).
+
+Every DDL statement waits at most LOCK_TIMEOUT for its lock, so the migration
+fails instead of queueing writes behind a long running transaction. Steps 1-3
+are idempotent: if the migration fails (typically step 4 not getting its
+locks), run it again. The converted columns end up last in their tables, and
+the space of the dropped CHAR(36) columns is only reclaimed as rows are
+rewritten (or by VACUUM FULL / pg_repack); the backfill leaves one dead tuple
+per row for autovacuum.
+
+The downgrade converts the columns back to CHAR(36), the type create_all used,
+the same way. UUIDType reads and writes both types, so the application runs
+throughout and on either side.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7b2d54'
+down_revision: Union[str, Sequence[str], None] = '8d764d0273ba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LOCK_TIMEOUT = "5s"
+BACKFILL_BATCH_SIZE = 5000
+SHADOW_SUFFIX = "__new"
+
+# table -> UUIDType columns (as declared in app/models), referenced (parent) tables first.
+# The last three only exist here on databases bootstrapped with create_all.
+UUID_COLUMNS = {
+    "ADMIN": ["admin_id"],
+    "DOCTOR": ["doctor_id"],
+    "PATIENT": ["patient_id"],
+    "SCHEDULE": ["schedule_id", "doctor_id", "recurring_group_id"],
+    "ROOM_DAY": ["room_day_id", "schedule_id"],
+    "appointment": ["appointment_id", "patient_id", "doctor_id", "schedule_id"],
+    "CHECKIN": ["checkin_id", "appointment_id", "patient_id", "cancelled_by"],
+    "INFRACTION": ["infraction_id", "patient_id", "appointment_id"],
+    "VISIT_CALL": ["call_id", "appointment_id", "called_by"],
+    "LEAVE_REQUEST": ["leave_request_id", "schedule_id", "doctor_id"],
+    "MEDICAL_RECORD": ["record_id", "patient_id", "doctor_id"],
+    "MEDICAL_RECORD_TERM": ["record_id"],
+    "QUEUE_EVENT": ["event_id", "schedule_id", "checkin_id", "appointment_id"],
+    "SERVICE_TIME_STAT": ["doctor_id"],
+}
+
+
+def _q(*names):
+    return ", ".join(f'"{name}"' for name in names)
+
+
+def _shadow(name):
+    return f"{name}{SHADOW_SUFFIX}"
+
+
+def _columns_to_convert(inspector, to_native=True):
+    """UUID_COLUMNS that are not yet native uuid (or, for the downgrade, that are)."""
+    pending = {}
+    existing_tables = set(inspector.get_table_names())
+    for table, columns in UUID_COLUMNS.items():
+        if table not in existing_tables:
+            continue
+        current = {c["name"]: c["type"] for c in inspector.get_columns(table)}
+        todo = [c for c in columns if c in current and isinstance(current[c], sa.Uuid) != to_native]
+        if todo:
+            pending[table] = todo
+    return pending
+
+
+def _affected_foreign_keys(inspector, pending):
+    """Foreign keys whose local or referred columns are being converted."""
+    affected = []
+    for table in inspector.get_table_names():
+        for fk in inspector.get_foreign_keys(table):
+            local = set(fk["constrained_columns"]) & set(pending.get(table, []))
+            remote = set(fk["referred_columns"]) & set(pending.get(fk["referred_table"], []))
+            if (local or remote) and fk.get("name"):
+                affected.append((table, fk))
+    return affected
+
+
+def _table_plan(inspector, table, columns):
+    """What has to be rebuilt on the shadow columns of `table`."""
+    converted = set(columns)
+    pk = inspector.get_pk_constraint(table)
+    constraints = [("PRIMARY KEY", pk["name"], pk["constrained_columns"])]
+    constraints += [("UNIQUE", uc["name"], uc["column_names"]) for uc in inspector.get_unique_constraints(table)]
+    indexes = [
+        (ix["name"], ix["column_names"], ix["unique"])
+        for ix in inspector.get_indexes(table)
+        if not ix.get("duplicates_constraint") and converted & set(ix["column_names"])
+    ]
+    nullable = {c["name"]: c["nullable"] for c in inspector.get_columns(table)}
+    return {
+        "table": table,
+        "columns": columns,
+        "not_null": [c for c in columns if not nullable[c]],
+        "primary_key": pk["constrained_columns"],
+        "constraints": [c for c in constraints if converted & set(c[2])],
+        "indexes": indexes,
+    }
+
+
+def _on_shadow(plan, columns):
+    return [_shadow(c) if c in plan["columns"] else c for c in columns]
+
+
+def _not_null_check(table, column):
+    return f"{table}_{column}_uuid_check"
+
+
+def _sync_trigger(table):
+    return f"{table}_uuid_sync"
+
+
+def _add_shadow_columns(plan, sql_type):
+    table, columns = plan["table"], plan["columns"]
+    for column in columns:
+        op.execute(f'ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS "{_shadow(column)}" {sql_type}')
+    for column in plan["not_null"]:
+        check = _not_null_check(table, column)
+        op.execute(f'ALTER TABLE "{table}" DROP CONSTRAINT IF EXISTS "{check}"')
+        op.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{check}" CHECK ("{_shadow(column)}" IS NOT NULL) NOT VALID')
+    assignments = " ".join(f'NEW."{_shadow(c)}" := NEW."{c}"::{sql_type};' for c in columns)
+    trigger = _sync_trigger(table)
+    op.execute(
+        f'CREATE OR REPLACE FUNCTION "{trigger}"() RETURNS trigger LANGUAGE plpgsql AS '
+        f"$$ BEGIN {assignments} RETURN NEW; END $$"
+    )
+    op.execute(f'DROP TRIGGER IF EXISTS "{trigger}" ON "{table}"')
+    op.execute(
+        f'CREATE TRIGGER "{trigger}" BEFORE INSERT OR UPDATE OF {_q(*columns)} ON "{table}" '
+        f'FOR EACH ROW EXECUTE FUNCTION "{trigger}"()'
+    )
+
+
+def _backfill(bind, plan, sql_type):
+    """Copies the existing rows into the shadow columns, one committed batch at a time (keyset on the primary key)."""
+    table, key = plan["table"], plan["primary_key"]
+    assignments = ", ".join(f'"{_shadow(c)}" = target."{c}"::{sql_type}' for c in plan["columns"])
+    params = ", ".join(f":k{i}" for i in range(len(key)))
+    last_key = ", ".join(f'"{c}"::text AS k{i}' for i, c in enumerate(key))
+    after = None
+    while True:
+        where = f"WHERE ({_q(*key)}) > ({params})" if after else ""
+        statement = sa.text(
+            f'WITH batch AS (SELECT {_q(*key)} FROM "{table}" {where} ORDER BY {_q(*key)} LIMIT :limit), '
+            f'updated AS (UPDATE "{table}" AS target SET {assignments} FROM batch '
+            f'WHERE ({", ".join(f"target.{_q(c)}" for c in key)}) = ({", ".join(f"batch.{_q(c)}" for c in key)})) '
+            f"SELECT {last_key} FROM batch ORDER BY {', '.join(f'{_q(c)} DESC' for c in key)} LIMIT 1"
+        )
+        after = bind.execute(statement, {"limit": BACKFILL_BATCH_SIZE, **(after or {})}).mappings().first()
+        if after is None:
+            return
+
+
+def _build_indexes(plan):
+    table = plan["table"]
+    indexes = [(name, columns, True) for _, name, columns in plan["constraints"]] + plan["indexes"]
+    for name, columns, unique in indexes:
+        op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{_shadow(name)}"')
+        op.execute(
+            f'CREATE {"UNIQUE " if unique else ""}INDEX CONCURRENTLY "{_shadow(name)}" '
+            f'ON "{table}" ({_q(*_on_shadow(plan, columns))})'
+        )
+    for column in plan["not_null"]:
+        op.execute(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{_not_null_check(table, column)}"')
+
+
+def _add_foreign_keys(plans, foreign_keys):
+    empty = {"columns": []}
+    for table, fk in foreign_keys:
+        ondelete = fk.get("options", {}).get("ondelete")
+        op.execute(f'ALTER TABLE "{table}" DROP CONSTRAINT IF EXISTS "{_shadow(fk["name"])}"')
+        op.execute(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{_shadow(fk["name"])}" '
+            f'FOREIGN KEY ({_q(*_on_shadow(plans.get(table, empty), fk["constrained_columns"]))}) '
+            f'REFERENCES "{fk["referred_table"]}" '
+            f'({_q(*_on_shadow(plans.get(fk["referred_table"], empty), fk["referred_columns"]))})'
+            f'{f" ON DELETE {ondelete}" if ondelete else ""} NOT VALID'
+        )
+        op.execute(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{_shadow(fk["name"])}"')
+
+
+def _swap_statements(plans, foreign_keys):
+    statements = [f'ALTER TABLE "{table}" DROP CONSTRAINT "{fk["name"]}"' for table, fk in foreign_keys]
+    for plan in plans.values():
+        table = plan["table"]
+        statements += [
+            f'DROP TRIGGER "{_sync_trigger(table)}" ON "{table}"',
+            f'DROP FUNCTION "{_sync_trigger(table)}"()',
+        ]
+        # dropping the old columns drops their primary key, unique constraints and indexes
+        statements += [f'ALTER TABLE "{table}" DROP COLUMN "{c}"' for c in plan["columns"]]
+        statements += [f'ALTER TABLE "{table}" RENAME COLUMN "{_shadow(c)}" TO "{c}"' for c in plan["columns"]]
+        for column in plan["not_null"]:
+            statements += [
+                f'ALTER TABLE "{table}" ALTER COLUMN "{column}" SET NOT NULL',
+                f'ALTER TABLE "{table}" DROP CONSTRAINT "{_not_null_check(table, column)}"',
+            ]
+        statements += [
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {kind} USING INDEX "{_shadow(name)}"'
+            for kind, name, _ in plan["constraints"]
+        ]
+        statements += [f'ALTER INDEX "{_shadow(name)}" RENAME TO "{name}"' for name, _, _ in plan["indexes"]]
+    statements += [
+        f'ALTER TABLE "{table}" RENAME CONSTRAINT "{_shadow(fk["name"])}" TO "{fk["name"]}"'
+        for table, fk in foreign_keys
+    ]
+    return statements
+
+
+def _convert(to_native):
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # SQLite keeps CHAR(36), nothing to do
+        return
+
+    inspector = sa.inspect(bind)
+    pending = _columns_to_convert(inspector, to_native=to_native)
+    if not pending:
+        return
+    sql_type = "uuid" if to_native else "char(36)"
+    plans = {table: _table_plan(inspector, table, columns) for table, columns in pending.items()}
+    foreign_keys = _affected_foreign_keys(inspector, pending)
+
+    op.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+    for plan in plans.values():
+        _add_shadow_columns(plan, sql_type)
+
+    with op.get_context().autocommit_block():
+        for plan in plans.values():
+            _backfill(bind, plan, sql_type)
+        for plan in plans.values():
+            _build_indexes(plan)
+        _add_foreign_keys(plans, foreign_keys)
+        # One query string: PostgreSQL runs it as a single transaction and commits it at once,
+        # so the locks are not held while later revisions run in the migration transaction.
+        op.execute(";\n".join(_swap_statements(plans, foreign_keys)))
+
+    op.execute("RESET lock_timeout")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _convert(to_native=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _convert(to_native=False)
@@ -0,0 +1,48 @@
+"""Sparse queue position for check-ins
+
+Revision ID: a4c8e2f6b913
+Revises: b9d3e5a1c724
+Create Date: 2025-12-04 10:48:05.371629
+
+The waiting order moves from CHECKIN.ticket_sequence to CHECKIN.queue_position.
+A new ticket is placed at ticket_sequence * 2^20 (QUEUE_POSITION_GAP in
+app/models/checkin.py). A re-check-in takes the midpoint between two
+neighbours, so it writes one row and displayed ticket numbers never change.
+ROOM_DAY.current_called_position is the position of the last called patient.
+
+Existing rows are backfilled from their ticket sequences, so the current
+order is kept. On PostgreSQL the column is added on the partitioned CHECKIN
+parent, and every partition gets it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e2f6b913'
+down_revision: Union[str, Sequence[str], None] = 'b9d3e5a1c724'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+QUEUE_POSITION_GAP = 1 << 20  # frozen copy of app.models.checkin.QUEUE_POSITION_GAP
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('CHECKIN', sa.Column('queue_position', sa.BigInteger(), nullable=True))
+    op.add_column('ROOM_DAY', sa.Column('current_called_position', sa.BigInteger(), server_default='0', nullable=False))
+    op.execute(
+        f'UPDATE "CHECKIN" SET queue_position = ticket_sequence * {QUEUE_POSITION_GAP} '
+        'WHERE ticket_sequence IS NOT NULL'
+    )
+    op.execute(
+        f'UPDATE "ROOM_DAY" SET current_called_position = COALESCE(current_called_sequence, 0) * {QUEUE_POSITION_GAP}'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ROOM_DAY', 'current_called_position')
+    op.drop_column('CHECKIN', 'queue_position')
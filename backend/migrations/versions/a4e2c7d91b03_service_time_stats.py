@@ -0,0 +1,41 @@
+"""Add service time statistics and RoomDay.last_called_at
+
+Revision ID: a4e2c7d91b03
+Revises: 3f1c9a7b2d54
+Create Date: 2025-11-24 09:41:05.118274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.db.base import UUIDType # Import UUIDType
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e2c7d91b03'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a7b2d54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('SERVICE_TIME_STAT',
+    sa.Column('doctor_id', UUIDType(), nullable=False),
+    sa.Column('time_period', sa.String(), nullable=False),
+    sa.Column('sample_count', sa.Integer(), nullable=False),
+    sa.Column('ewma_seconds', sa.Float(), nullable=True),
+    sa.Column('ewm_variance', sa.Float(), nullable=False),
+    sa.Column('histogram', sa.JSON(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['doctor_id'], ['DOCTOR.doctor_id'], ),
+    sa.PrimaryKeyConstraint('doctor_id', 'time_period')
+    )
+    op.add_column('ROOM_DAY', sa.Column('last_called_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ROOM_DAY', 'last_called_at')
+    op.drop_table('SERVICE_TIME_STAT')
@@ -0,0 +1,50 @@
+"""Append-only queue event log per RoomDay
+
+Revision ID: b9d3e5a1c724
+Revises: f2a6c9d4e8b1
+Create Date: 2025-12-03 15:21:37.208914
+
+QUEUE_EVENT holds one row per queue change (checked_in, called, seen, no_show,
+re_checked_in, reordered), numbered per schedule. ROOM_DAY.last_event_offset
+is the counter the offsets are taken from. Existing queues start with no
+history: their counter starts at 0.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.db.base import UUIDType
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d3e5a1c724'
+down_revision: Union[str, Sequence[str], None] = 'f2a6c9d4e8b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ROOM_DAY', sa.Column('last_event_offset', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('QUEUE_EVENT',
+    sa.Column('event_id', UUIDType(), nullable=False),
+    sa.Column('schedule_id', UUIDType(), nullable=False),
+    sa.Column('event_offset', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.Enum('checked_in', 'called', 'seen', 'no_show', 're_checked_in', 'reordered', name='queue_event_type'), nullable=False),
+    sa.Column('checkin_id', UUIDType(), nullable=True),
+    sa.Column('appointment_id', UUIDType(), nullable=True),
+    sa.Column('ticket_sequence', sa.Integer(), nullable=True),
+    sa.Column('ticket_number', sa.String(), nullable=True),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['schedule_id'], ['SCHEDULE.schedule_id'], ),
+    sa.PrimaryKeyConstraint('event_id'),
+    sa.UniqueConstraint('schedule_id', 'event_offset', name='uq_queue_event_schedule_offset')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('QUEUE_EVENT')
+    sa.Enum(name='queue_event_type').drop(op.get_bind(), checkfirst=True)
+    op.drop_column('ROOM_DAY', 'last_event_offset')
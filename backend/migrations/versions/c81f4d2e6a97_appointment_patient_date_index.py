@@ -0,0 +1,34 @@
+"""Index appointment(patient_id, date) for kiosk card check-in
+
+Revision ID: c81f4d2e6a97
+Revises: a4e2c7d91b03
+Create Date: 2025-11-26 14:20:47.530912
+
+On PostgreSQL the index is built CONCURRENTLY (outside the migration
+transaction) so check-in and booking writes are not blocked while it builds.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f4d2e6a97'
+down_revision: Union[str, Sequence[str], None] = 'a4e2c7d91b03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_appointment_patient_id_date', 'appointment', ['patient_id', 'date'],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_appointment_patient_id_date', table_name='appointment', postgresql_concurrently=True)
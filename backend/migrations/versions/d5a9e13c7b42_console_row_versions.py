@@ -0,0 +1,34 @@
+"""Add updated_at row versions for the doctor console delta mode
+
+Revision ID: d5a9e13c7b42
+Revises: c81f4d2e6a97
+Create Date: 2025-11-28 10:05:12.674301
+
+Existing rows get the migration time (``now()`` is evaluated once, so on
+PostgreSQL 11+ adding the column does not rewrite the tables).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a9e13c7b42'
+down_revision: Union[str, Sequence[str], None] = 'c81f4d2e6a97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('appointment', 'CHECKIN', 'ROOM_DAY')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_column(table, 'updated_at')
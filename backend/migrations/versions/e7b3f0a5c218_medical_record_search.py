@@ -0,0 +1,68 @@
+"""Full-text search over medical records
+
+Revision ID: e7b3f0a5c218
+Revises: d5a9e13c7b42
+Create Date: 2025-11-29 16:42:03.118520
+
+PostgreSQL: a generated tsvector column over summary and prescription
+(maintained by the database on every write) with a GIN index, plus
+(patient_id, created_at) and (doctor_id, created_at) indexes for the scoped
+lists and searches. Adding a STORED generated column rewrites MEDICAL_RECORD
+once; the indexes are built CONCURRENTLY. Other databases get the MEDICAL_RECORD_TERM term table
+maintained by app/crud/medical_record_search.py instead.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.base import UUIDType
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3f0a5c218'
+down_revision: Union[str, Sequence[str], None] = 'd5a9e13c7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            'ALTER TABLE "MEDICAL_RECORD" ADD COLUMN search_vector tsvector GENERATED ALWAYS AS '
+            "(to_tsvector('simple', coalesce(summary, '') || ' ' || coalesce(prescription, ''))) STORED"
+        )
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_medical_record_search_vector', 'MEDICAL_RECORD', ['search_vector'],
+                postgresql_using='gin', postgresql_concurrently=True,
+            )
+            for column in ('patient_id', 'doctor_id'):
+                op.create_index(
+                    f'ix_medical_record_{column}_created_at', 'MEDICAL_RECORD', [column, 'created_at'],
+                    postgresql_concurrently=True,
+                )
+    else:
+        for column in ('patient_id', 'doctor_id'):
+            op.create_index(f'ix_medical_record_{column}_created_at', 'MEDICAL_RECORD', [column, 'created_at'])
+        op.create_table(
+            'MEDICAL_RECORD_TERM',
+            sa.Column('record_id', UUIDType, sa.ForeignKey('MEDICAL_RECORD.record_id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('term', sa.String(), primary_key=True),
+            sa.Column('frequency', sa.Integer(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for column in ('patient_id', 'doctor_id'):
+                op.drop_index(f'ix_medical_record_{column}_created_at', table_name='MEDICAL_RECORD', postgresql_concurrently=True)
+            op.drop_index('ix_medical_record_search_vector', table_name='MEDICAL_RECORD', postgresql_concurrently=True)
+        op.drop_column('MEDICAL_RECORD', 'search_vector')
+    else:
+        op.drop_table('MEDICAL_RECORD_TERM')
+        for column in ('patient_id', 'doctor_id'):
+            op.drop_index(f'ix_medical_record_{column}_created_at', table_name='MEDICAL_RECORD')
@@ -0,0 +1,127 @@
+"""Monthly range partitioning of appointment, CHECKIN, VISIT_CALL and INFRACTION
+
+Revision ID: f2a6c9d4e8b1
+Revises: e7b3f0a5c218
+Create Date: 2025-12-01 09:12:44.502117
+
+PostgreSQL only (other databases keep plain tables). Each table is rebuilt as
+a partitioned table: monthly partitions from its oldest row through
+PARTITION_MONTHS_AHEAD months ahead plus a default partition, the rows are
+copied over, and the primary key becomes (id, partition key).
+
+Side effects:
+- The foreign keys from CHECKIN / VISIT_CALL / INFRACTION to appointment are
+  dropped. A foreign key must reference a unique key, and on a partitioned
+  appointment that key has to include date.
+- CHECKIN.checkin_time becomes NOT NULL. Missing values are filled from
+  updated_at.
+- (appointment_id) indexes are added on the child tables, and a
+  (patient_id) index on INFRACTION. Lookups that do not filter on the
+  partition key probe every partition, so they need local indexes.
+
+The copy holds the tables' locks for its duration; run it in a maintenance
+window. See app/db/partitioning.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.clock import APP_TIMEZONE, system_clock
+from app.db.partitioning import (
+    PARTITION_MONTHS_AHEAD, PARTITIONED_TABLES, add_months, create_default_partition, ensure_month_partitions,
+    month_start,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a6c9d4e8b1'
+down_revision: Union[str, Sequence[str], None] = 'e7b3f0a5c218'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NEW_INDEXES = (
+    ('ix_CHECKIN_appointment_id', 'CHECKIN', ['appointment_id']),
+    ('ix_VISIT_CALL_appointment_id', 'VISIT_CALL', ['appointment_id']),
+    ('ix_INFRACTION_appointment_id', 'INFRACTION', ['appointment_id']),
+    ('ix_INFRACTION_patient_id', 'INFRACTION', ['patient_id']),
+)
+APPOINTMENT_FOREIGN_KEYS = ('CHECKIN', 'VISIT_CALL', 'INFRACTION')
+
+
+def _local_date(value):
+    if value is None or not hasattr(value, 'hour'):
+        return value
+    return value.astimezone(APP_TIMEZONE).date() if value.tzinfo else value.date()
+
+
+def _rebuild(bind, table, partitioned: bool) -> None:
+    """Recreates `table` as a partitioned (or plain) table with the same columns, rows, indexes and foreign keys."""
+    inspector = sa.inspect(bind)
+    indexes = inspector.get_indexes(table.name)
+    foreign_keys = [fk for fk in inspector.get_foreign_keys(table.name) if fk['referred_table'] != 'appointment']
+    old = f'{table.name}_old'
+
+    op.rename_table(table.name, old)
+    op.execute(sa.text(
+        f'CREATE TABLE "{table.name}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        + (f' PARTITION BY RANGE ("{table.key}")' if partitioned else '')
+    ))
+    if partitioned:
+        oldest, newest = bind.execute(sa.text(f'SELECT min("{table.key}"), max("{table.key}") FROM "{old}"')).one()
+        this_month = month_start(system_clock.today())
+        create_default_partition(bind, table)
+        ensure_month_partitions(
+            bind, table,
+            min(filter(None, [_local_date(oldest), this_month])),
+            max(filter(None, [_local_date(newest), add_months(this_month, PARTITION_MONTHS_AHEAD)])),
+        )
+    op.execute(sa.text(f'INSERT INTO "{table.name}" SELECT * FROM "{old}"'))
+    op.drop_table(old)
+
+    primary_key = [table.primary_key, table.key] if partitioned else [table.primary_key]
+    op.create_primary_key(f'{table.name}_pkey', table.name, primary_key)
+    for index in indexes:
+        op.create_index(index['name'], table.name, index['column_names'], unique=index['unique'])
+    for fk in foreign_keys:
+        op.create_foreign_key(
+            fk['name'], table.name, fk['referred_table'], fk['constrained_columns'], fk['referred_columns'],
+            ondelete=fk['options'].get('ondelete'),
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        for name, table, columns in NEW_INDEXES:
+            op.create_index(name, table, columns)
+        return
+
+    inspector = sa.inspect(bind)
+    for child in APPOINTMENT_FOREIGN_KEYS:
+        for fk in inspector.get_foreign_keys(child):
+            if fk['referred_table'] == 'appointment':
+                op.drop_constraint(fk['name'], child, type_='foreignkey')
+    op.execute(sa.text('UPDATE "CHECKIN" SET checkin_time = updated_at WHERE checkin_time IS NULL'))
+    op.alter_column('CHECKIN', 'checkin_time', nullable=False)
+
+    for table in PARTITIONED_TABLES:
+        _rebuild(bind, table, partitioned=True)
+    for name, table, columns in NEW_INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema. Partitions already archived by PartitionArchiveService are not restored."""
+    bind = op.get_bind()
+    for name, table, _ in NEW_INDEXES:
+        op.drop_index(name, table_name=table)
+    if bind.dialect.name != 'postgresql':
+        return
+
+    for table in PARTITIONED_TABLES:
+        _rebuild(bind, table, partitioned=False)
+    op.alter_column('CHECKIN', 'checkin_time', nullable=True)
+    for child in APPOINTMENT_FOREIGN_KEYS:
+        op.create_foreign_key(None, child, 'appointment', ['appointment_id'], ['appointment_id'])
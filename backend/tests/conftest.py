@@ -1,3 +1,4 @@
+import os
 import pytest
 from typing import Generator
 import json
@@ -7,9 +8,15 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.compiler import compiles
 
+# Shared stores default to Redis; the test run keeps them in-process
+os.environ.setdefault("IDEMPOTENCY_BACKEND", "memory")
+os.environ.setdefault("WAITING_ROOM_BACKEND", "memory")
+os.environ.setdefault("READ_YOUR_WRITES_BACKEND", "memory")
+os.environ.setdefault("KIOSK_NONCE_BACKEND", "memory")
+
 from app.main import app
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import get_db, unit_of_work
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
@@ -24,11 +31,8 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 
 
 def override_get_db():
-    try:
-        db = TestingSessionLocal()
+    with unit_of_work(TestingSessionLocal) as db:
         yield db
-    finally:
-        db.close()
 
 app.dependency_overrides[get_db] = override_get_db
 
@@ -0,0 +1,102 @@
+"""
+Shared fixtures for the unit tests that run on an in-memory SQLite database.
+
+``make_clinic`` builds today's morning session of 王醫師 with one patient per
+entry of a status list; ``clinic_app`` is a FastAPI app whose requests each
+run in a unit of work on that database, with the clock frozen.
+"""
+import uuid
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.clock import FrozenClock, get_clock
+from app.db.base import Base
+from app.db.session import get_db, unit_of_work
+from app.models.appointment import Appointment
+from app.models.checkin import Checkin
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.room_day import RoomDay
+from app.models.schedule import Schedule
+
+TODAY = date(2025, 3, 3)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def session(engine):
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def make_clinic(session):
+    """
+    make_clinic(statuses, called_up_to=0) -> (doctor, schedule, checkins)
+
+    One patient per status: a checkin status gives ticket A001, A002, ... by
+    position (the appointment gets the same status), None a booked appointment
+    without a checkin. The room is open and has called up to `called_up_to`.
+    `checkins` maps ticket numbers to the Checkin rows.
+    """
+    def build(statuses: List[Optional[str]], called_up_to: int = 0) -> Tuple[Doctor, Schedule, Dict[str, Checkin]]:
+        doctor = Doctor(doctor_id=uuid.uuid4(), doctor_login_id="doc", password_hash="x",
+                        name="王醫師", specialty="家醫科", email="doc@example.com")
+        schedule = Schedule(schedule_id=uuid.uuid4(), doctor_id=doctor.doctor_id, date=TODAY, time_period="morning",
+                            status="open", max_patients=10, booked_patients=len(statuses))
+        session.add_all([doctor, schedule])
+        last_ticket = max((sequence for sequence, status in enumerate(statuses, 1) if status), default=0)
+        session.add(RoomDay(schedule_id=schedule.schedule_id, next_sequence=last_ticket + 1,
+                            current_called_sequence=called_up_to))
+        checkins = {}
+        for sequence, checkin_status in enumerate(statuses, 1):
+            patient = Patient(patient_id=uuid.uuid4(), card_number=f"C{sequence}", name=f"病患{sequence}",
+                              password_hash="x", dob=date(1990, 1, 1), phone="0900000000",
+                              email=f"p{sequence}@example.com")
+            appointment = Appointment(appointment_id=uuid.uuid4(), patient_id=patient.patient_id,
+                                      doctor_id=doctor.doctor_id, schedule_id=schedule.schedule_id, date=TODAY,
+                                      time_period="morning", status=checkin_status or "scheduled")
+            session.add_all([patient, appointment])
+            if checkin_status:
+                ticket_number = f"A{sequence:03d}"
+                checkins[ticket_number] = Checkin(
+                    checkin_id=uuid.uuid4(), appointment_id=appointment.appointment_id, patient_id=patient.patient_id,
+                    checkin_method="onsite", status=checkin_status, ticket_sequence=sequence,
+                    ticket_number=ticket_number,
+                )
+                session.add(checkins[ticket_number])
+        session.commit()
+        return doctor, schedule, checkins
+
+    return build
+
+
+@pytest.fixture
+def clinic_app(engine):
+    """clinic_app(now=09:00 today) -> FastAPI app (include the routers and auth overrides yourself)."""
+    def build(now: datetime = datetime(2025, 3, 3, 9, 0)) -> FastAPI:
+        app = FastAPI()
+        Session = sessionmaker(bind=engine)
+
+        def override_get_db():
+            with unit_of_work(Session) as db:
+                yield db
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_clock] = lambda: FrozenClock(now)
+        return app
+
+    return build
@@ -0,0 +1,80 @@
+from app.core.admission import InMemoryWaitingRoomStore, WaitingRoom
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+PATIENT = "patient:1"
+
+
+def _room(rate=10, burst=2, max_queue=5):
+    clock = FakeClock()
+    room = WaitingRoom(InMemoryWaitingRoomStore(clock=clock), rate=rate, burst=burst,
+                       max_queue=max_queue, secret="test", wall_clock=clock)
+    return room, clock
+
+
+def test_burst_is_admitted_immediately_then_queued_fifo():
+    room, _ = _room()
+    results = [room.admit(None, PATIENT) for _ in range(4)]
+    assert [r.admitted for r in results] == [True, True, False, False]
+    assert [r.position for r in results[2:]] == [1, 2]
+    assert results[3].retry_after == 1
+
+
+def test_queued_ticket_is_admitted_after_rate_interval():
+    room, clock = _room(rate=10, burst=1)
+    room.admit(None, PATIENT)
+    waiting = room.admit(None, PATIENT)
+    assert not waiting.admitted
+    assert not room.admit(waiting.token, PATIENT).admitted
+    clock.now += 0.1
+    retry = room.admit(waiting.token, PATIENT)
+    assert retry.admitted
+    assert retry.token == waiting.token
+
+
+def test_admitted_token_is_single_use():
+    room, _ = _room(rate=10, burst=1)
+    first = room.admit(None, PATIENT)
+    assert first.admitted
+    # Replaying the used token takes a new ticket at the back of the queue
+    replay = room.admit(first.token, PATIENT)
+    assert not replay.admitted
+    assert replay.token != first.token
+    assert replay.token.startswith("2.")
+
+
+def test_token_is_bound_to_the_patient_it_was_issued_to():
+    room, clock = _room(rate=10, burst=1)
+    room.admit(None, PATIENT)
+    waiting = room.admit(None, PATIENT)
+    clock.now += 0.1
+    assert room.status(waiting.token, "patient:2") is None
+    shared = room.admit(waiting.token, "patient:2")
+    assert shared.token != waiting.token
+    assert room.admit(waiting.token, PATIENT).admitted
+
+
+def test_saturated_queue_is_shed():
+    room, _ = _room(rate=1, burst=0, max_queue=3)
+    results = [room.admit(None, PATIENT) for _ in range(4)]
+    assert [r.shed for r in results] == [False, False, False, True]
+    assert results[3].retry_after == 3
+
+
+def test_forged_or_expired_token_is_treated_as_new_arrival():
+    room, clock = _room(rate=1, burst=0, max_queue=100)
+    first = room.admit(None, PATIENT)
+    ticket, issued_at, _ = first.token.split(".")
+    assert room.status(f"{ticket}.{issued_at}.forged", PATIENT) is None
+    clock.now += room.token_ttl + 1
+    assert room.status(first.token, PATIENT) is None
+    again = room.admit(first.token, PATIENT)
+    assert again.token != first.token
+    assert again.token.startswith("2.")
@@ -0,0 +1,51 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.clock import APP_TIMEZONE, Clock, FrozenClock, get_clock, local_datetime
+
+
+def test_frozen_clock_localizes_naive_datetimes():
+    clock = FrozenClock(datetime(2025, 3, 3, 23, 59))
+    assert clock.now().tzinfo is APP_TIMEZONE
+    assert clock.now().utcoffset() == timedelta(hours=8)
+    assert clock.today() == date(2025, 3, 3)
+
+
+def test_frozen_clock_converts_aware_datetimes_and_advances():
+    clock = FrozenClock(datetime(2025, 3, 3, 15, 59, tzinfo=timezone.utc))
+    assert clock.today() == date(2025, 3, 3)
+    clock.advance(timedelta(minutes=1))
+    assert clock.now() == local_datetime(date(2025, 3, 4), time(0, 0))
+    assert clock.today() == date(2025, 3, 4)
+
+
+def test_get_clock_is_frozen_once_per_request():
+    app = FastAPI()
+
+    def first(clock: Clock = Depends(get_clock)):
+        return clock
+
+    def second(clock: Clock = Depends(get_clock)):
+        return clock
+
+    @app.get("/now")
+    def now(a: Clock = Depends(first), b: Clock = Depends(second)):
+        return {"same": a is b, "now": a.now().isoformat()}
+
+    client = TestClient(app)
+    body = client.get("/now").json()
+    assert body["same"] is True
+    assert body["now"] != client.get("/now").json()["now"]
+
+
+def test_get_clock_can_be_overridden():
+    app = FastAPI()
+
+    @app.get("/today")
+    def today(clock: Clock = Depends(get_clock)):
+        return {"today": clock.today().isoformat()}
+
+    app.dependency_overrides[get_clock] = lambda: FrozenClock(datetime(2025, 1, 1, 9, 0))
+    assert TestClient(app).get("/today").json() == {"today": "2025-01-01"}
@@ -0,0 +1,76 @@
+import gzip
+import importlib
+import pkgutil
+import uuid
+from datetime import date, datetime
+
+from fastapi import FastAPI
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from app.api import routers
+from app.core.compression import CompressionMiddleware, choose_encoding
+from app.core.responses import FastJSONResponse
+
+
+def _make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/big", response_class=FastJSONResponse)
+    def big():
+        return [{"id": uuid.uuid4(), "date": date(2025, 1, 1), "name": "病患"} for _ in range(100)]
+
+    @app.get("/small", response_class=FastJSONResponse)
+    def small():
+        return {"ok": True, "at": datetime(2025, 1, 1, 8, 0)}
+
+    return app
+
+
+def test_choose_encoding_respects_q_values():
+    assert choose_encoding("") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("deflate, gzip") == "gzip"
+
+
+def test_large_response_is_gzipped():
+    client = TestClient(_make_app())
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) == 100
+
+
+def test_small_response_is_not_compressed():
+    client = TestClient(_make_app())
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"ok": True, "at": "2025-01-01T08:00:00"}
+
+
+def test_no_accept_encoding_returns_identity():
+    client = TestClient(_make_app())
+    response = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    # Body must be plain JSON, not gzip magic bytes
+    assert not response.content.startswith(gzip.compress(b"")[:2])
+
+
+
+def test_response_model_routes_keep_default_response_class():
+    # An explicit response_class turns off FastAPI's pydantic-core dump_json path for response_model routes
+    from app.main import app
+
+    assert isinstance(app.router.default_response_class, DefaultPlaceholder)
+    offenders = []
+    for module_info in pkgutil.iter_modules(routers.__path__):
+        router = getattr(importlib.import_module(f"{routers.__name__}.{module_info.name}"), "router", None)
+        for route in getattr(router, "routes", []):
+            if isinstance(route, APIRoute) and route.response_model is not None \
+                    and not isinstance(route.response_class, DefaultPlaceholder):
+                offenders.append(f"{sorted(route.methods)} {route.path}")
+    assert offenders == []
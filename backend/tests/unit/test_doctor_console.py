@@ -0,0 +1,74 @@
+import uuid
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.api.dependencies import get_current_active_doctor
+from app.api.routers import doctor_clinic_management
+from app.models.schedule import Schedule
+from app.services import doctor_console_service
+
+TODAY = date(2025, 3, 3)
+
+
+@pytest.fixture
+def clinic(make_clinic):
+    """A001 seen, A002 and A003 waiting, the 4th patient not checked in yet; called up to A001."""
+    return make_clinic(["seen", "checked_in", "checked_in", None], called_up_to=1)
+
+
+@pytest.fixture
+def client(clinic_app, clinic):
+    app = clinic_app()
+    app.include_router(doctor_clinic_management.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_active_doctor] = lambda: clinic[0]
+    return TestClient(app)
+
+
+def test_console_returns_full_snapshot_in_three_queries(client, clinic, engine):
+    _, schedule, _ = clinic
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        body = client.get(f"/api/v1/doctor/console/{schedule.schedule_id}").json()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 3
+    assert body["full"] is True
+    assert body["room"]["current_number"] == "A001"
+    assert body["room"]["next_sequence"] == 4
+    counters = body["counters"]
+    assert (counters["waiting_count"], counters["checked_in_count"], counters["seen_count"], counters["pending_count"]) == (2, 2, 1, 1)
+    assert counters["estimated_wait_time"] == 20  # default 10 minutes per patient without statistics
+    assert [p["ticket_number"] for p in body["patients"]] == ["A001", "A002", "A003", "N/A"]
+
+
+def test_console_delta_returns_only_changed_rows(client, clinic, session, monkeypatch):
+    _, schedule, checkins = clinic
+    monkeypatch.setattr(doctor_console_service, "CONSOLE_VERSION_OVERLAP_SECONDS", 0)
+    url = f"/api/v1/doctor/console/{schedule.schedule_id}"
+    version = client.get(url).json()["version"]
+
+    unchanged = client.get(url, params={"since_version": version}).json()
+    assert unchanged["full"] is False
+    assert unchanged["patients"] == []
+    assert unchanged["version"] == version
+
+    checkins["A002"].status = "no_show"
+    session.commit()
+    delta = client.get(url, params={"since_version": version}).json()
+    assert [p["ticket_number"] for p in delta["patients"]] == ["A002"]
+    assert delta["patients"][0]["status"] == "no_show"
+    assert delta["counters"]["no_show_count"] == 1
+    assert delta["version"] > version
+
+
+def test_console_rejects_other_doctors_schedule(client, session):
+    other = Schedule(schedule_id=uuid.uuid4(), doctor_id=uuid.uuid4(), date=TODAY, time_period="morning", status="open")
+    session.add(other)
+    session.commit()
+    assert client.get(f"/api/v1/doctor/console/{other.schedule_id}").status_code == 404
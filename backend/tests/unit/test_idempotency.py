@@ -0,0 +1,146 @@
+import asyncio
+import re
+from datetime import timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from app.core.idempotency import IdempotencyMiddleware, InMemoryIdempotencyStore
+from app.core.security import create_access_token
+
+
+class Payload(BaseModel):
+    value: int
+
+
+def _make_app(delay: float = 0.0, store=None):
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.delay = delay
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=store if store is not None else InMemoryIdempotencyStore(),
+        routes=[re.compile(r"^/book$"), re.compile(r"^/boom$")],
+        wait_seconds=5,
+    )
+
+    @app.post("/book", status_code=201)
+    async def book(payload: Payload):
+        app.state.calls += 1
+        await asyncio.sleep(app.state.delay)
+        return {"booking": app.state.calls, "value": payload.value}
+
+    @app.post("/boom")
+    async def boom():
+        app.state.calls += 1
+        raise HTTPException(status_code=503, detail="down")
+
+    return app
+
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def _headers(key=None, sub="patient-1", role="patient"):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': sub, 'role': role})}"}
+    if key:
+        headers["Idempotency-Key"] = key
+    return headers
+
+
+@pytest.mark.asyncio
+async def test_retry_replays_stored_response():
+    app = _make_app()
+    async with _client(app) as client:
+        first = await client.post("/book", json={"value": 1}, headers=_headers("k1"))
+        second = await client.post("/book", json={"value": 1}, headers=_headers("k1"))
+    assert first.status_code == second.status_code == 201
+    assert first.json() == second.json() == {"booking": 1, "value": 1}
+    assert second.headers["idempotent-replayed"] == "true"
+    assert app.state.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_simultaneous_duplicates_run_once():
+    app = _make_app(delay=0.2)
+    async with _client(app) as client:
+        responses = await asyncio.gather(*[
+            client.post("/book", json={"value": 7}, headers=_headers("same"))
+            for _ in range(10)
+        ])
+    assert app.state.calls == 1
+    assert {r.status_code for r in responses} == {201}
+    assert all(r.json() == {"booking": 1, "value": 7} for r in responses)
+
+
+@pytest.mark.asyncio
+async def test_key_reuse_with_different_body_is_rejected():
+    app = _make_app()
+    async with _client(app) as client:
+        await client.post("/book", json={"value": 1}, headers=_headers("k2"))
+        mismatch = await client.post("/book", json={"value": 2}, headers=_headers("k2"))
+    assert mismatch.status_code == 422
+    assert app.state.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_keys_are_scoped_per_caller_and_optional():
+    app = _make_app()
+    async with _client(app) as client:
+        await client.post("/book", json={"value": 1}, headers=_headers("k3", sub="patient-a"))
+        await client.post("/book", json={"value": 1}, headers=_headers("k3", sub="patient-b"))
+        await client.post("/book", json={"value": 1}, headers=_headers("k3", sub="patient-a", role="doctor"))
+        await client.post("/book", json={"value": 1}, headers=_headers())
+    assert app.state.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_keys_follow_the_subject_not_the_token():
+    app = _make_app()
+    async with _client(app) as client:
+        first = await client.post("/book", json={"value": 1}, headers=_headers("k5"))
+        # A refreshed token (different exp) for the same patient still replays
+        refreshed = {**_headers("k5"), "Authorization": "Bearer " + create_access_token(
+            {"sub": "patient-1", "role": "patient"}, expires_delta=timedelta(minutes=5))}
+        second = await client.post("/book", json={"value": 1}, headers=refreshed)
+        forged = await client.post("/book", json={"value": 1},
+                                   headers={"Idempotency-Key": "k5", "Authorization": "Bearer forged"})
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in forged.headers
+    assert app.state.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_server_errors_are_not_stored():
+    app = _make_app()
+    async with _client(app) as client:
+        await client.post("/boom", headers=_headers("k4"))
+        retry = await client.post("/boom", headers=_headers("k4"))
+    assert retry.status_code == 503
+    assert "idempotent-replayed" not in retry.headers
+    assert app.state.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_takes_over_when_the_original_never_completes():
+    store = InMemoryIdempotencyStore(lease_seconds=0.2)
+    app = _make_app(delay=60, store=store)
+    async with _client(app) as client:
+        original = asyncio.create_task(client.post("/book", json={"value": 1}, headers=_headers("k6")))
+        while app.state.calls == 0:
+            await asyncio.sleep(0.01)
+        # The worker dies mid-request: neither complete() nor release() runs
+        original.cancel()
+        app.state.delay = 0
+        retry = await client.post("/book", json={"value": 1}, headers=_headers("k6"))
+        replay = await client.post("/book", json={"value": 1}, headers=_headers("k6"))
+    assert retry.status_code == 201 and "idempotent-replayed" not in retry.headers
+    assert replay.json() == retry.json() and replay.headers["idempotent-replayed"] == "true"
+    assert app.state.calls == 2
+    # The stored response keeps the full TTL, not the lease
+    await asyncio.sleep(0.3)
+    assert (await store.get("patient:patient-1:k6"))[1] is not None
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from benchmarks.import_time_report import collect, imported_deferred, total_seconds
+
+# Generous enough for slow CI machines (app.main imports in ~1.3s on a dev laptop);
+# tighten or loosen per environment with IMPORT_TIME_BUDGET_SECONDS.
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "2.5"))
+
+
+@pytest.fixture(scope="module")
+def records():
+    return collect("app.main")
+
+
+def test_app_import_does_not_load_deferred_dependencies(records):
+    assert imported_deferred(records) == []
+
+
+def test_app_import_time_within_budget(records):
+    seconds = total_seconds(records)
+    assert seconds <= IMPORT_TIME_BUDGET_SECONDS, (
+        f"importing app.main took {seconds:.2f}s (budget {IMPORT_TIME_BUDGET_SECONDS}s); "
+        f"run `python -m benchmarks.import_time_report` to see what got slower"
+    )
@@ -0,0 +1,234 @@
+import json
+import time
+import uuid
+from datetime import date, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.api import dependencies
+from app.api.routers import kiosk
+from app.core import kiosk_signing
+from app.core.kiosk_signing import InMemoryNonceStore, sign_kiosk_batch
+from app.models.appointment import Appointment
+from app.models.checkin import Checkin
+from app.models.doctor import Doctor
+from app.models.patient import Patient
+from app.models.queue_event import QueueEvent
+from app.models.room_day import RoomDay
+from app.models.schedule import Schedule
+
+TODAY = date(2025, 3, 3)
+KIOSK_HEADERS = {"X-Kiosk-Key": "kiosk-secret"}
+SIGNING_SECRET = "lobby-1-signing-secret"
+
+
+@pytest.fixture
+def client(clinic_app, monkeypatch):
+    monkeypatch.setattr(dependencies, "KIOSK_API_KEYS", ["kiosk-secret"])
+    monkeypatch.setattr(kiosk_signing, "KIOSK_SIGNING_SECRETS", {"lobby-1": ["old-secret", SIGNING_SECRET]})
+    monkeypatch.setattr(kiosk_signing, "kiosk_nonces", InMemoryNonceStore())
+    app = clinic_app(now=datetime(2025, 3, 3, 8, 30))
+    app.include_router(kiosk.router, prefix="/api/v1/kiosk")
+    return TestClient(app)
+
+
+def _doctor(session, name):
+    doctor = Doctor(doctor_id=uuid.uuid4(), doctor_login_id=name, password_hash="x",
+                    name=name, specialty="家醫科", email=f"{name}@example.com")
+    session.add(doctor)
+    return doctor
+
+
+def _patient(session, card_number):
+    patient = Patient(patient_id=uuid.uuid4(), card_number=card_number, name="病患", password_hash="x",
+                      dob=date(1990, 1, 1), phone="0900000000", email=f"{card_number}@example.com")
+    session.add(patient)
+    return patient
+
+
+def _book(session, patient, doctor, time_period, status="scheduled", on_date=TODAY):
+    schedule = session.query(Schedule).filter_by(
+        doctor_id=doctor.doctor_id, date=on_date, time_period=time_period
+    ).first()
+    if schedule is None:
+        schedule = Schedule(schedule_id=uuid.uuid4(), doctor_id=doctor.doctor_id, date=on_date,
+                            time_period=time_period, status="open")
+        session.add(schedule)
+        session.flush()
+    appointment = Appointment(appointment_id=uuid.uuid4(), patient_id=patient.patient_id, doctor_id=doctor.doctor_id,
+                              schedule_id=schedule.schedule_id, date=on_date, time_period=time_period, status=status)
+    session.add(appointment)
+    session.commit()
+    return appointment
+
+
+def test_kiosk_checks_in_sole_appointment_and_issues_tickets_in_order(client, session):
+    doctor = _doctor(session, "王醫師")
+    first = _book(session, _patient(session, "A001"), doctor, "morning")
+    second = _book(session, _patient(session, "A002"), doctor, "morning")
+
+    response = client.post("/api/v1/kiosk/checkin", json={"card_number": "A001"}, headers=KIOSK_HEADERS)
+    assert response.status_code == 200
+    assert response.json()["ticket_number"] == "A001"
+    assert response.json()["doctor_name"] == "王醫師"
+    assert client.post("/api/v1/kiosk/checkin", json={"card_number": "A002"},
+                       headers=KIOSK_HEADERS).json()["ticket_number"] == "A002"
+
+    session.expire_all()
+    assert session.get(Appointment, first.appointment_id).status == "checked_in"
+    assert session.get(Appointment, second.appointment_id).status == "checked_in"
+    assert session.query(RoomDay).one().next_sequence == 3
+    checkin = session.query(Checkin).filter_by(appointment_id=first.appointment_id).one()
+    assert (checkin.checkin_method, checkin.ticket_sequence) == ("onsite", 1)
+
+    # Already checked in: nothing left to check in today
+    assert client.post("/api/v1/kiosk/checkin", json={"card_number": "A001"},
+                       headers=KIOSK_HEADERS).status_code == 404
+
+
+def test_kiosk_requires_valid_key(client, session):
+    _book(session, _patient(session, "A001"), _doctor(session, "王醫師"), "morning")
+    assert client.post("/api/v1/kiosk/checkin", json={"card_number": "A001"}).status_code == 401
+    assert client.post("/api/v1/kiosk/checkin", json={"card_number": "A001"},
+                       headers={"X-Kiosk-Key": "wrong"}).status_code == 401
+
+
+def test_kiosk_asks_to_choose_between_several_appointments(client, session):
+    patient = _patient(session, "A001")
+    afternoon = _book(session, patient, _doctor(session, "李醫師"), "afternoon")
+    morning = _book(session, patient, _doctor(session, "王醫師"), "morning")
+    _book(session, patient, _doctor(session, "陳醫師"), "night", status="cancelled")
+    _book(session, patient, _doctor(session, "林醫師"), "morning", on_date=date(2025, 3, 4))
+
+    response = client.post("/api/v1/kiosk/checkin", json={"card_number": "A001"}, headers=KIOSK_HEADERS)
+    assert response.status_code == 409
+    options = response.json()["detail"]["appointments"]
+    assert [option["appointment_id"] for option in options] == [str(morning.appointment_id), str(afternoon.appointment_id)]
+
+    response = client.post("/api/v1/kiosk/checkin", headers=KIOSK_HEADERS,
+                           json={"card_number": "A001", "appointment_id": str(afternoon.appointment_id)})
+    assert response.status_code == 200
+    assert response.json()["time_period"] == "afternoon"
+
+
+def test_kiosk_checkin_is_a_handful_of_statements(client, session, engine):
+    appointment = _book(session, _patient(session, "A001"), _doctor(session, "王醫師"), "morning")
+    session.add(RoomDay(schedule_id=appointment.schedule_id, next_sequence=1, current_called_sequence=0))
+    session.commit()
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement.split()[0])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.post("/api/v1/kiosk/checkin", json={"card_number": "A001"}, headers=KIOSK_HEADERS)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    # lookup join, appointment UPDATE, ROOM_DAY UPDATE ... RETURNING, CHECKIN INSERT, QUEUE_EVENT INSERT
+    assert statements == ["SELECT", "UPDATE", "UPDATE", "INSERT", "INSERT"]
+
+
+def _signed_batch(items, secret=SIGNING_SECRET, kiosk_id="lobby-1", timestamp=None, nonce=None, body_kiosk_id=None):
+    body = json.dumps({"kiosk_id": body_kiosk_id or kiosk_id, "items": items}).encode()
+    timestamp = str(int(timestamp if timestamp is not None else time.time()))
+    nonce = nonce or uuid.uuid4().hex
+    headers = {**KIOSK_HEADERS, "X-Kiosk-Id": kiosk_id, "X-Kiosk-Timestamp": timestamp, "X-Kiosk-Nonce": nonce,
+               "X-Kiosk-Signature": sign_kiosk_batch(secret, kiosk_id, timestamp, nonce, body),
+               "Content-Type": "application/json"}
+    return body, headers
+
+
+def _post_batch(client, items, **signing):
+    body, headers = _signed_batch(items, **signing)
+    return client.post("/api/v1/kiosk/checkin/batch", content=body, headers=headers)
+
+
+def _item(card_number, at, **extra):
+    return {"client_id": str(uuid.uuid4()), "card_number": card_number, "checked_in_at": at, **extra}
+
+
+def test_batch_assigns_tickets_in_original_checkin_order(client, session, engine):
+    doctor = _doctor(session, "王醫師")
+    for card in ("A001", "A002", "A003"):
+        _book(session, _patient(session, card), doctor, "morning")
+    _book(session, _patient(session, "B001"), _doctor(session, "李醫師"), "morning")
+    items = [
+        _item("A003", "2025-03-03T08:10:00+08:00"),
+        _item("A001", "2025-03-03T08:01:00+08:00"),
+        _item("B001", "2025-03-03T08:05:00+08:00"),
+        _item("A002", "2025-03-03T08:02:00"),  # naive: kiosk local time
+        _item("A001", "2025-03-03T08:03:00+08:00"),  # scanned twice while offline
+        _item("Z999", "2025-03-03T08:04:00+08:00"),
+        _item("A002", "2025-03-02T08:00:00+08:00"),
+    ]
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = _post_batch(client, items)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["client_id"] for r in results] == [item["client_id"] for item in items]
+    assert [(r["status"], r["ticket_number"]) for r in results] == [
+        ("checked_in", "A003"),
+        ("checked_in", "A001"),
+        ("checked_in", "A001"),
+        ("checked_in", "A002"),
+        ("already_checked_in", "A001"),
+        ("not_found", None),
+        ("invalid_time", None),
+    ]
+    # one ticket allocation per clinic (the RoomDays did not exist yet: update, insert, update)
+    assert len([s for s in statements if s.startswith('UPDATE "ROOM_DAY"')]) == 4
+    checkin = session.query(Checkin).filter_by(appointment_id=uuid.UUID(results[1]["appointment_id"])).one()
+    assert checkin.checkin_time.replace(tzinfo=None) == datetime(2025, 3, 3, 8, 1)
+    # checked_in events reuse the offsets reserved with the tickets
+    schedule_id = session.get(Appointment, checkin.appointment_id).schedule_id
+    events = session.query(QueueEvent).filter_by(schedule_id=schedule_id).order_by(QueueEvent.offset).all()
+    assert [(e.offset, e.ticket_number) for e in events] == [(1, "A001"), (2, "A002"), (3, "A003")]
+
+
+def test_batch_replay_returns_existing_tickets(client, session):
+    _book(session, _patient(session, "A001"), _doctor(session, "王醫師"), "morning")
+    items = [_item("A001", "2025-03-03T08:01:00+08:00")]
+    first = _post_batch(client, items).json()["results"]
+    again = _post_batch(client, items).json()["results"]
+    assert first[0]["status"] == "checked_in"
+    assert again[0] == {**first[0], "status": "already_checked_in", "message": again[0]["message"]}
+    assert session.query(Checkin).count() == 1
+
+
+def test_batch_rejects_bad_signature(client, session):
+    items = [_item("A001", "2025-03-03T08:01:00+08:00")]
+    assert _post_batch(client, items, secret="other").status_code == 401
+    # The X-Kiosk-Key sent in clear is not a signing key
+    assert _post_batch(client, items, secret="kiosk-secret").status_code == 401
+    assert _post_batch(client, items, kiosk_id="lobby-2").status_code == 401
+    assert _post_batch(client, items, body_kiosk_id="lobby-2").status_code == 401
+    # Either secret of a kiosk being rotated is accepted
+    assert _post_batch(client, items, secret="old-secret").status_code == 200
+
+
+def test_batch_rejects_stale_and_replayed_uploads(client, session):
+    _book(session, _patient(session, "A001"), _doctor(session, "王醫師"), "morning")
+    items = [_item("A001", "2025-03-03T08:01:00+08:00")]
+    stale = time.time() - kiosk_signing.KIOSK_SIGNATURE_MAX_AGE_SECONDS - 60
+    assert _post_batch(client, items, timestamp=stale).status_code == 401
+
+    body, headers = _signed_batch(items)
+    assert client.post("/api/v1/kiosk/checkin/batch", content=body, headers=headers).status_code == 200
+    replay = client.post("/api/v1/kiosk/checkin/batch", content=body, headers=headers)
+    assert replay.status_code == 401
+    # A retry signed again with a fresh nonce goes through
+    assert _post_batch(client, items).json()["results"][0]["status"] == "already_checked_in"
+
+
+def test_batch_rejects_duplicate_client_ids(client, session):
+    item = _item("A001", "2025-03-03T08:01:00+08:00")
+    response = _post_batch(client, [item, {**item, "card_number": "A002"}])
+    assert response.status_code == 422
+    assert session.query(Checkin).count() == 0
@@ -0,0 +1,87 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.api.dependencies import get_current_user
+from app.api.routers import medical_records
+from app.crud import medical_record as crud_medical_record
+from app.crud.medical_record_search import search_medical_records
+from app.db.replicas import get_read_db
+from app.models.doctor import Doctor
+from app.models.medical_record_term import MedicalRecordTerm
+from app.models.patient import Patient
+from app.schemas.medical_record import MedicalRecordUpdate
+
+
+@pytest.fixture
+def people(session):
+    doctors = [Doctor(doctor_id=uuid.uuid4(), doctor_login_id=f"doc{i}", password_hash="x",
+                      name=f"醫師{i}", specialty="家醫科", email=f"doc{i}@example.com") for i in range(2)]
+    patients = [Patient(patient_id=uuid.uuid4(), card_number=f"C{i}", name=f"病患{i}", password_hash="x",
+                        dob=date(1990, 1, 1), phone="0900000000", email=f"p{i}@example.com") for i in range(2)]
+    session.add_all(doctors + patients)
+    session.commit()
+    return doctors, patients
+
+
+def _record(session, doctor, patient, summary, prescription=None, created_at=datetime(2025, 3, 3)):
+    return crud_medical_record.create_medical_record(session, medical_record=dict(
+        doctor_id=doctor.doctor_id, patient_id=patient.patient_id, department="家醫科",
+        summary=summary, prescription=prescription, created_at=created_at,
+    ))
+
+
+def test_search_requires_every_word_and_ranks_by_frequency(session, people):
+    (doctor, _), (patient, _) = people
+    once = _record(session, doctor, patient, "Allergic to Penicillin", created_at=datetime(2025, 3, 4))
+    twice = _record(session, doctor, patient, "penicillin allergy noted", "avoid penicillin")
+    _record(session, doctor, patient, "amoxicillin course")
+
+    hits = search_medical_records(session, q="PENICILLIN", patient_id=patient.patient_id)
+    assert [hit.record_id for hit in hits] == [twice.record_id, once.record_id]
+    assert hits[1].snippet == "Allergic to <b>Penicillin</b>"
+    assert search_medical_records(session, q="penicillin allergy", patient_id=patient.patient_id)[0].record_id == twice.record_id
+    assert search_medical_records(session, q="penicillin course", patient_id=patient.patient_id) == []
+
+
+def test_update_and_delete_keep_the_index_in_sync(session, people):
+    (doctor, _), (patient, _) = people
+    record = _record(session, doctor, patient, "penicillin")
+    crud_medical_record.update_medical_record(session, record, MedicalRecordUpdate(summary="cefalexin"))
+    assert search_medical_records(session, q="penicillin") == []
+    assert len(search_medical_records(session, q="cefalexin")) == 1
+
+    crud_medical_record.delete_medical_record(session, record.record_id)
+    assert session.query(MedicalRecordTerm).count() == 0
+
+
+def test_search_endpoint_uses_list_scope(engine, session, people):
+    (doctor, other_doctor), (patient, other_patient) = people
+    _record(session, doctor, patient, "penicillin")
+    _record(session, doctor, other_patient, "penicillin")
+    _record(session, other_doctor, patient, "penicillin")
+    session.commit()  # the endpoint reads through its own session
+
+    app = FastAPI()
+    app.include_router(medical_records.router, prefix="/api/v1/medical-records")
+    Session = sessionmaker(bind=engine)
+    app.dependency_overrides[get_read_db] = lambda: Session()
+    client = TestClient(app)
+
+    def search(user, **params):
+        app.dependency_overrides[get_current_user] = lambda: user
+        return client.get("/api/v1/medical-records/search", params={"q": "penicillin", **params})
+
+    as_patient = search({"role": "patient", "user_obj": patient}, patient_id=str(other_patient.patient_id))
+    assert {hit["patient_id"] for hit in as_patient.json()} == {str(patient.patient_id)}
+    assert len(as_patient.json()) == 2
+
+    as_doctor = search({"role": "doctor", "user_obj": doctor})
+    assert {hit["doctor_id"] for hit in as_doctor.json()} == {str(doctor.doctor_id)}
+    assert len(search({"role": "doctor", "user_obj": doctor}, patient_id=str(patient.patient_id)).json()) == 1
+
+    assert search({"role": "admin", "user_obj": None}).status_code == 403
@@ -0,0 +1,47 @@
+from datetime import date, datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.clock import FrozenClock
+from app.db import partitioning
+from app.db.base import Base
+from app.db.partitioning import PARTITIONED_TABLES, add_months, expired_partitions, months_between, partition_name
+from app.models import Appointment  # noqa: F401  registers every model on Base.metadata
+from app.services.partition_archive_service import PartitionArchiveService
+from app.services.scheduled_jobs import build_scheduler
+
+APPOINTMENT, CHECKIN = PARTITIONED_TABLES[0], PARTITIONED_TABLES[1]
+
+
+def test_month_arithmetic_crosses_years():
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert months_between(date(2025, 11, 20), date(2026, 1, 5)) == [date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1)]
+
+
+def test_expired_partitions_keeps_retention_window_and_default():
+    names = [partition_name(CHECKIN, month) for month in months_between(date(2023, 1, 1), date(2025, 6, 1))]
+    names.append("CHECKIN_pdefault")
+    cutoff = date(2023, 4, 1)
+    assert expired_partitions(reversed(names), cutoff) == ["CHECKIN_p202301", "CHECKIN_p202302", "CHECKIN_p202303"]
+
+
+def test_bounds_are_local_month_starts():
+    assert partitioning._bound(APPOINTMENT, date(2025, 3, 1)) == "'2025-03-01'"
+    assert partitioning._bound(CHECKIN, date(2025, 3, 1)) == "'2025-03-01T00:00:00+08:00'"
+
+
+def test_maintenance_is_a_no_op_without_postgresql():
+    db = sessionmaker(bind=create_engine("sqlite://"))()
+    assert PartitionArchiveService(db, FrozenClock(datetime(2025, 3, 3, 3, 30))).run() == {"skipped": "sqlite"}
+    assert "partition_maintenance" in build_scheduler().jobs
+
+
+def test_models_have_no_foreign_keys_to_partitioned_tables():
+    partitioned = {table.name for table in PARTITIONED_TABLES}
+    referencing = [
+        f"{table.name}.{fk.parent.name}" for table in Base.metadata.tables.values()
+        for fk in table.foreign_keys if fk.column.table.name in partitioned
+    ]
+    assert referencing == []
@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.dependencies import get_current_active_admin
+from app.api.routers import admin_diagnostics
+from app.api.routers.admin_diagnostics import REQUEST_CAPTURE_SCOPE
+from app.core.profiler import ProfilingMiddleware, StackSampler, profiler, to_collapsed, to_speedscope
+from app.models.admin import Admin
+
+
+def busy_work(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(200))
+
+
+def test_sampler_counts_busy_threads_and_skips_idle_ones():
+    idle = threading.Event()
+    waiter = threading.Thread(target=idle.wait)
+    worker = threading.Thread(target=busy_work, args=(0.3,))
+    waiter.start()
+    sampler = StackSampler(interval=0.002)
+    sampler.start()
+    worker.start()
+    worker.join()
+    sampler.stop()
+    idle.set()
+    waiter.join()
+
+    assert sampler.samples > 0
+    busy = [stack for stack in sampler.stacks if ("busy_work", "tests/unit/test_profiler.py") in stack]
+    assert busy and busy[0][0][0] == "Thread._bootstrap"
+    assert not any(stack[-1][0] == "Event.wait" for stack in sampler.stacks)
+
+
+def test_collapsed_and_speedscope_output():
+    stacks = Counter({(("main", "a.py"), ("f", "b.py")): 3, (("main", "a.py"),): 1})
+    assert to_collapsed(stacks) == "main (a.py);f (b.py) 3\nmain (a.py) 1"
+
+    document = to_speedscope(stacks, 0.01, "test")
+    assert document["shared"]["frames"] == [{"name": "main", "file": "a.py"}, {"name": "f", "file": "b.py"}]
+    [profile] = document["profiles"]
+    assert profile["samples"] == [[0, 1], [0]]
+    assert profile["weights"] == pytest.approx([0.03, 0.01])
+    assert profile["endValue"] == pytest.approx(0.04)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(admin_diagnostics.router, prefix="/api/v1")
+
+    @app.get("/work")
+    def work():
+        busy_work(0.05)
+        return "ok"
+
+    admin = Admin(admin_id=uuid.uuid4(), name="管理員", email="a@example.com", account_username="admin",
+                  password_hash="x", is_system_admin=True)
+    app.dependency_overrides[get_current_active_admin] = lambda: admin
+    with TestClient(app) as test_client:
+        yield test_client, admin
+
+
+def test_profiles_the_next_matching_requests(client):
+    client, admin = client
+    results = {}
+    capture = threading.Thread(target=lambda: results.update(response=client.post(
+        "/api/v1/admin/diagnostics/profile/requests", params={"path": "^/work$", "count": 2, "timeout": 10})))
+    capture.start()
+    while profiler.capture is None:
+        time.sleep(0.01)
+    assert client.get("/work").status_code == 200
+    assert client.get("/work").status_code == 200
+    capture.join()
+
+    response = results["response"]
+    assert response.status_code == 200
+    assert response.text.startswith("# 2 request(s) matching ^/work$")
+    assert f"on worker pid {os.getpid()}" in response.text.splitlines()[0]
+    assert response.text.splitlines()[1] == f"# {REQUEST_CAPTURE_SCOPE}"
+    assert "busy_work (tests/unit/test_profiler.py)" in response.text
+    assert profiler.capture is None
+
+    admin.is_system_admin = False
+    assert client.post("/api/v1/admin/diagnostics/profile", params={"seconds": 0.1}).status_code == 403
@@ -0,0 +1,115 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import crud_schedule
+from app.crud import medical_record as crud_medical_record
+from app.crud.projections import MEDICAL_RECORD_PREVIEW_CHARS
+from app.db.base import Base
+from app.models.appointment import Appointment
+from app.models.doctor import Doctor
+from app.models.medical_record import MedicalRecord
+from app.models.patient import Patient
+from app.models.schedule import Schedule
+from app.schemas.appointment import AppointmentPublic
+from app.schemas.medical_record import MedicalRecordListItem
+from app.schemas.schedule import ScheduleDoctorPublic
+from app.services.appointment_service import appointment_service
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def seeded(session):
+    doctor = Doctor(doctor_id=uuid.uuid4(), doctor_login_id="doc", password_hash="x",
+                    name="王醫師", specialty="家醫科", email="doc@example.com")
+    patient = Patient(patient_id=uuid.uuid4(), name="陳病患", password_hash="x", dob=date(1990, 1, 1),
+                      phone="0912345678", email="p@example.com", card_number="A123456789")
+    session.add_all([doctor, patient])
+    session.flush()
+    schedules = []
+    for period in ["night", "morning", "afternoon"]:
+        schedule = Schedule(doctor_id=doctor.doctor_id, date=date(2025, 3, 3), time_period=period,
+                            max_patients=10, booked_patients=1, created_at=datetime(2025, 1, 1))
+        session.add(schedule)
+        session.flush()
+        schedules.append(schedule)
+    session.add(Appointment(patient_id=patient.patient_id, doctor_id=doctor.doctor_id,
+                            schedule_id=schedules[1].schedule_id, date=date(2025, 3, 3),
+                            time_period="morning", status="scheduled"))
+    session.commit()
+    return doctor, patient
+
+
+def test_get_doctor_schedules_returns_models_in_period_order(session, seeded):
+    doctor, _ = seeded
+    result = crud_schedule.get_doctor_schedules(session, doctor_id=doctor.doctor_id)
+    assert all(isinstance(s, ScheduleDoctorPublic) for s in result)
+    assert [s.time_period for s in result] == ["morning", "afternoon", "night"]
+    assert result[0].doctor_name == "王醫師"
+    assert result[0].specialty == "家醫科"
+
+
+def test_list_public_schedules_filters_by_specialty(session, seeded):
+    assert len(crud_schedule.list_public_schedules(session, specialty="家醫科")) == 3
+    assert crud_schedule.list_public_schedules(session, specialty="眼科") == []
+
+
+def test_patient_appointments_with_details_projection(session, seeded):
+    _, patient = seeded
+    result = appointment_service.get_patient_appointments_with_details(
+        session, patient_id=patient.patient_id, start_date="2025-03-01", end_date="2025-03-31"
+    )
+    assert len(result) == 1
+    assert isinstance(result[0], AppointmentPublic)
+    assert result[0].doctor_name == "王醫師"
+    assert result[0].patient_name == "陳病患"
+
+
+def test_medical_record_list_leaves_full_text_in_the_database(session, seeded):
+    doctor, patient = seeded
+    record = MedicalRecord(patient_id=patient.patient_id, doctor_id=doctor.doctor_id, department="家醫科",
+                           summary="咳" * 500, prescription="藥" * 500)
+    session.add(record)
+    session.commit()
+    doctor_id, patient_id = doctor.doctor_id, patient.patient_id
+    session.expunge_all()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(session.get_bind(), "before_cursor_execute", listener)
+    try:
+        by_patient = crud_medical_record.get_medical_records_by_patient(session, patient_id=patient_id)
+        by_doctor = crud_medical_record.get_medical_records_by_doctor(session, doctor_id=doctor_id)
+    finally:
+        event.remove(session.get_bind(), "before_cursor_execute", listener)
+
+    assert len(statements) == 2
+    assert all("prescription" not in sql and "password_hash" not in sql for sql in statements)
+    assert isinstance(by_patient[0], MedicalRecordListItem)
+    assert by_patient[0].summary_preview == "咳" * MEDICAL_RECORD_PREVIEW_CHARS
+    assert (by_doctor[0].doctor_name, by_doctor[0].patient_name) == ("王醫師", "陳病患")
+
+
+def test_get_medical_record_loads_full_text(session, seeded):
+    doctor, patient = seeded
+    record = MedicalRecord(patient_id=patient.patient_id, doctor_id=doctor.doctor_id,
+                           summary="咳" * 500, prescription="藥")
+    session.add(record)
+    session.commit()
+    record_id = record.record_id
+    session.expunge_all()
+
+    loaded = crud_medical_record.get_medical_record(session, record_id=record_id)
+    assert {"summary", "prescription"} <= set(loaded.__dict__)
+    assert loaded.summary == "咳" * 500
@@ -0,0 +1,79 @@
+import uuid
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.dependencies import get_current_active_admin
+from app.api.routers import admin_diagnostics
+from app.crud import crud_schedule
+from app.db import query_log as query_log_module
+from app.db.base import Base
+from app.db.query_log import QueryContextMiddleware, QueryLog, normalize, redact
+from app.models.admin import Admin
+
+
+def test_normalize_masks_literals_and_collapses_in_lists():
+    statement = "SELECT *\n  FROM t WHERE name = 'O''Brien' AND id IN (?, ?, ?) AND x = ?"
+    assert normalize(statement) == "SELECT * FROM t WHERE name = '?' AND id IN (...) AND x = ?"
+    assert normalize("... IN (%(id_1_1)s, %(id_1_2)s)") == "... IN (...)"
+    assert redact({"card": "A123456789", "n": 3, "flag": None}) == {"card": "<str:10>", "n": "<int>", "flag": None}
+    assert redact([{"a": 1}, {"a": 2}]) == "<2 parameter sets>"
+
+
+def test_top_n_keeps_the_shapes_with_the_highest_total_time():
+    log = QueryLog(threshold_ms=0, capacity=2)
+    log.record("SELECT 1", (), 10)
+    log.record("SELECT 2", (), 30)
+    log.record("SELECT 3", (), 5)  # below the current minimum: logged, not kept
+    log.record("SELECT 4", (), 20)  # evicts SELECT 1
+    log.record("SELECT 4", (), 20)
+    rows = log.snapshot()
+    assert [(r["statement"], r["count"], r["total_ms"]) for r in rows] == [("SELECT 4", 2, 40), ("SELECT 2", 1, 30)]
+    assert rows[0]["route"] is None and rows[0]["mean_ms"] == 20
+
+
+@pytest.fixture
+def client(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    query_log_module.install(engine)
+    log = QueryLog(threshold_ms=0)
+    monkeypatch.setattr(query_log_module, "query_log", log)
+    monkeypatch.setattr(admin_diagnostics, "query_log", log)
+    Session = sessionmaker(bind=engine)
+
+    def get_session():
+        with Session() as db:
+            yield db
+
+    app = FastAPI()
+    app.add_middleware(QueryContextMiddleware)
+    app.include_router(admin_diagnostics.router, prefix="/api/v1")
+
+    @app.get("/things/{thing_id}")
+    def read_thing(thing_id: int, db=Depends(get_session)):
+        return len(crud_schedule.list_public_schedules(db, specialty="家醫科"))
+
+    admin = Admin(admin_id=uuid.uuid4(), name="管理員", email="a@example.com", account_username="admin",
+                  password_hash="x", is_system_admin=True)
+    app.dependency_overrides[get_current_active_admin] = lambda: admin
+    return TestClient(app), admin
+
+
+def test_slow_queries_carry_route_and_function_and_need_a_system_admin(client):
+    client, admin = client
+    assert client.get("/things/7").json() == 0
+
+    queries = client.get("/api/v1/admin/diagnostics/slow-queries").json()["queries"]
+    [schedule_query] = [q for q in queries if 'FROM "SCHEDULE"' in q["statement"]]
+    assert schedule_query["route"] == "GET /things/{thing_id}"
+    assert schedule_query["function"] == "app.crud.crud_schedule.list_public_schedules"
+    assert schedule_query["parameters"] == ["<str:3>"]
+
+    assert client.delete("/api/v1/admin/diagnostics/slow-queries").status_code == 204
+    admin.is_system_admin = False
+    assert client.get("/api/v1/admin/diagnostics/slow-queries").status_code == 403
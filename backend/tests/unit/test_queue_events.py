@@ -0,0 +1,117 @@
+import uuid
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.dependencies import get_current_active_doctor, verify_kiosk_key
+from app.api.routers import doctor_clinic_management, queue
+from app.crud.crud_room_day import room_day as crud_room_day
+from app.models.appointment import Appointment
+from app.models.patient import Patient
+from app.models.room_day import RoomDay
+
+TODAY = date(2025, 3, 3)
+
+
+@pytest.fixture
+def clinic(make_clinic):
+    """An open session with A001-A003 checked in and nobody called yet."""
+    return make_clinic(["checked_in"] * 3)
+
+
+@pytest.fixture
+def client(clinic_app, clinic):
+    app = clinic_app()
+    app.include_router(doctor_clinic_management.router, prefix="/api/v1")
+    app.include_router(queue.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_active_doctor] = lambda: clinic[0]
+    app.dependency_overrides[verify_kiosk_key] = lambda: "kiosk"
+    return TestClient(app)
+
+
+def _events(client, schedule_id, after=0, **params):
+    response = client.get(f"/api/v1/queue/{schedule_id}/events", params={"after": after, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_queue_changes_are_logged_in_order(client, clinic):
+    _, schedule, checkins = clinic
+    doctor_base = f"/api/v1/doctor/schedules/{schedule.schedule_id}"
+
+    assert client.post(f"{doctor_base}/call-next-patient").status_code == 200
+    assert client.post(f"{doctor_base}/checkins/{checkins['A003'].checkin_id}/mark-no-show").status_code == 200
+    assert client.post(f"{doctor_base}/checkins/{checkins['A003'].checkin_id}/re-check-in").status_code == 200
+
+    page = _events(client, schedule.schedule_id)
+    offsets = [e["offset"] for e in page["events"]]
+    assert offsets == list(range(1, len(offsets) + 1))
+    assert page["last_offset"] == offsets[-1]
+    assert [(e["event_type"], e["ticket_number"]) for e in page["events"]] == [
+        ("called", "A001"), ("seen", "A001"), ("no_show", "A003"), ("re_checked_in", "A004")]
+    assert page["events"][-1]["ticket_sequence"] == 4
+    assert page["events"][-1]["data"] == {"previous_sequence": 3, "after_ticket_number": "A002"}
+
+
+def test_reading_after_an_offset_returns_only_newer_events(client, clinic):
+    _, schedule, checkins = clinic
+    doctor_base = f"/api/v1/doctor/schedules/{schedule.schedule_id}"
+    client.post(f"{doctor_base}/call-next-patient")
+
+    first = _events(client, schedule.schedule_id)
+    assert _events(client, schedule.schedule_id, after=first["last_offset"]) == {
+        "schedule_id": str(schedule.schedule_id), "events": [], "last_offset": first["last_offset"]}
+
+    client.post(f"{doctor_base}/checkins/{checkins['A003'].checkin_id}/mark-no-show")
+    newer = _events(client, schedule.schedule_id, after=first["last_offset"])
+    assert [e["offset"] for e in newer["events"]] == [first["last_offset"] + 1]
+    assert [e["offset"] for e in _events(client, schedule.schedule_id, limit=1)["events"]] == [1]
+
+
+def test_offsets_continue_after_closing_and_reopening(client, clinic):
+    _, schedule, checkins = clinic
+    doctor_base = f"/api/v1/doctor/schedules/{schedule.schedule_id}"
+    client.post(f"{doctor_base}/call-next-patient")
+    before = _events(client, schedule.schedule_id)["last_offset"]
+
+    assert client.post(f"{doctor_base}/close-clinic").status_code == 200
+    assert client.post(f"{doctor_base}/open-clinic").status_code == 200
+    assert client.post(f"{doctor_base}/call-next-patient").status_code == 200
+
+    offsets = [e["offset"] for e in _events(client, schedule.schedule_id)["events"]]
+    assert offsets == list(range(1, len(offsets) + 1)) and offsets[-1] > before
+
+
+def test_call_next_locks_the_room_before_picking_the_patient(client, clinic, monkeypatch):
+    _, schedule, _ = clinic
+    locked = []
+    get_for_update = crud_room_day.get_room_day_for_update
+    monkeypatch.setattr(crud_room_day, "get_by_schedule_id", None)
+    monkeypatch.setattr(crud_room_day, "get_room_day_for_update",
+                        lambda db, **kw: locked.append(kw["schedule_id"]) or get_for_update(db, **kw))
+
+    assert client.post(f"/api/v1/doctor/schedules/{schedule.schedule_id}/call-next-patient").status_code == 200
+    assert locked == [schedule.schedule_id]
+
+
+def test_manual_check_in_allocates_ticket_and_offset_from_room_day(client, clinic, session):
+    doctor, schedule, _ = clinic
+    patient = Patient(patient_id=uuid.uuid4(), card_number="C9", name="病患9", password_hash="x",
+                      dob=date(1990, 1, 1), phone="0900000000", email="p9@example.com")
+    appointment = Appointment(appointment_id=uuid.uuid4(), patient_id=patient.patient_id, doctor_id=doctor.doctor_id,
+                              schedule_id=schedule.schedule_id, date=TODAY, time_period="morning", status="scheduled")
+    session.add_all([patient, appointment])
+    session.commit()
+    doctor_base = f"/api/v1/doctor/schedules/{schedule.schedule_id}"
+    client.post(f"{doctor_base}/call-next-patient")
+
+    response = client.post(f"{doctor_base}/appointments/{appointment.appointment_id}/check-in")
+
+    assert response.status_code == 200
+    assert response.json()["ticket_number"] == "A004"
+    session.expire_all()
+    room_day = session.query(RoomDay).filter(RoomDay.schedule_id == schedule.schedule_id).one()
+    assert room_day.next_sequence == 5
+    last = _events(client, schedule.schedule_id)["events"][-1]
+    assert (last["offset"], last["event_type"], last["ticket_number"]) == (room_day.last_event_offset, "checked_in", "A004")
@@ -0,0 +1,90 @@
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.api.dependencies import get_current_active_doctor
+from app.api.routers import doctor_clinic_management
+from app.models.appointment import Appointment
+from app.models.checkin import QUEUE_POSITION_GAP, Checkin
+
+
+@pytest.fixture
+def clinic(make_clinic):
+    """A001 missed the call, A002-A007 are waiting, nobody has been called yet."""
+    return make_clinic(["no_show"] + ["checked_in"] * 6)
+
+
+@pytest.fixture
+def client(clinic_app, clinic):
+    app = clinic_app()
+    app.include_router(doctor_clinic_management.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_active_doctor] = lambda: clinic[0]
+    return TestClient(app)
+
+
+def _queue(session, schedule_id):
+    session.expire_all()
+    return [c.ticket_number for c in session.query(Checkin).join(Appointment, Checkin.appointment_id == Appointment.appointment_id).filter(
+        Appointment.schedule_id == schedule_id, Checkin.status == "checked_in",
+    ).order_by(Checkin.queue_position)]
+
+
+def test_new_tickets_are_spaced_out(clinic):
+    _, _, checkins = clinic
+    assert [c.queue_position for c in checkins.values()] == [s * QUEUE_POSITION_GAP for s in range(1, 8)]
+
+
+def test_re_check_in_writes_one_checkin_row_and_keeps_ticket_numbers(client, clinic, session, engine):
+    _, schedule, checkins = clinic
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.post(
+            f"/api/v1/doctor/schedules/{schedule.schedule_id}/checkins/{checkins['A001'].checkin_id}/re-check-in"
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 200
+    assert response.json()["new_ticket_number"] == "A001"
+    assert len([s for s in statements if s.startswith('UPDATE "CHECKIN"')]) == 1
+    assert _queue(session, schedule.schedule_id) == ["A002", "A003", "A004", "A001", "A005", "A006", "A007"]
+
+    # Calling follows the queue order, not the ticket numbers
+    called = [client.post(f"/api/v1/doctor/schedules/{schedule.schedule_id}/call-next-patient").json()["message"]
+              for _ in range(5)]
+    assert called == [f"已叫號至 {n}。" for n in ("A002", "A003", "A004", "A001", "A005")]
+
+
+def test_full_gap_is_rebalanced_keeping_the_order(client, clinic, session):
+    _, schedule, checkins = clinic
+    # No room left between the 3rd and 4th waiting patients
+    checkins["A005"].queue_position = checkins["A004"].queue_position + 1
+    session.commit()
+
+    response = client.post(
+        f"/api/v1/doctor/schedules/{schedule.schedule_id}/checkins/{checkins['A001'].checkin_id}/re-check-in"
+    )
+
+    assert response.status_code == 200
+    assert _queue(session, schedule.schedule_id) == ["A002", "A003", "A004", "A001", "A005", "A006", "A007"]
+    positions = [c.queue_position for c in sorted(checkins.values(), key=lambda c: c.queue_position)]
+    assert len(set(positions)) == len(positions)
+    # Still below the position the next new ticket will get
+    assert max(positions) < 8 * QUEUE_POSITION_GAP
+
+
+def test_short_queue_re_check_in_takes_a_new_ticket_at_the_end(client, clinic, session):
+    _, schedule, checkins = clinic
+    for number in ("A005", "A006", "A007"):
+        checkins[number].status = "seen"
+    session.commit()
+
+    response = client.post(
+        f"/api/v1/doctor/schedules/{schedule.schedule_id}/checkins/{checkins['A001'].checkin_id}/re-check-in"
+    )
+
+    assert response.json()["new_ticket_number"] == "A008"
+    assert _queue(session, schedule.schedule_id) == ["A002", "A003", "A004", "A008"]
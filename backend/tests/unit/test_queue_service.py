@@ -1,155 +1,64 @@
+from datetime import datetime, timedelta
+
 import pytest
-from unittest.mock import AsyncMock, MagicMock
-from datetime import datetime, timedelta, date
-from uuid import uuid4
 
-from app.services.queue_service import QueueService
-from app.crud.visit_call_crud import VisitCallCRUD
-from app.crud.crud_appointment import AppointmentCRUD # Renamed to AppointmentCRUD
-from app.services.infraction_service import InfractionService
+from app.core.clock import FrozenClock
+from app.models.infraction import Infraction
+from app.models.queue_event import QueueEvent
 from app.models.visit_call import VisitCall
-from app.models.appointment import Appointment
-from app.models.patient import Patient
+from app.services.queue_service import QueueService
+from app.services.scheduled_jobs import build_scheduler
 
-@pytest.fixture
-def mock_db_session():
-    return MagicMock()
+NOW = datetime(2025, 3, 3, 9, 10)
 
-@pytest.fixture
-def mock_visit_call_crud():
-    crud = MagicMock()
-    crud.get_potential_no_shows = MagicMock()
-    return crud
 
 @pytest.fixture
-def mock_appointment_crud():
-    crud = MagicMock()
-    crud.get = MagicMock()
-    crud.update_status = MagicMock() # Corrected method name
-    return crud
+def clinic(make_clinic, session):
+    """
+    A001 was called 5 minutes ago and never came, A002 was called a minute ago,
+    A003 was called 5 minutes ago and attended.
+    """
+    clock = FrozenClock(NOW)
+    _, schedule, checkins = make_clinic(["checked_in"] * 3)
+    for (called_minutes_ago, call_status), checkin in zip([(5, "active"), (1, "active"), (5, "attended")],
+                                                          checkins.values()):
+        session.add(VisitCall(appointment_id=checkin.appointment_id, ticket_sequence=checkin.ticket_sequence,
+                              ticket_number=checkin.ticket_number, call_type="call", call_status=call_status,
+                              called_at=clock.now() - timedelta(minutes=called_minutes_ago)))
+    session.commit()
+    return clock, schedule, checkins
 
-@pytest.fixture
-def mock_infraction_service(mock_db_session):
-    service = InfractionService(mock_db_session)
-    service.create_infraction = AsyncMock()
-    return service
-
-@pytest.fixture
-def queue_service(mock_db_session, mock_visit_call_crud, mock_appointment_crud, mock_infraction_service):
-    service = QueueService(mock_db_session)
-    service.visit_call_crud = mock_visit_call_crud
-    service.appointment_crud = mock_appointment_crud
-    service.infraction_service = mock_infraction_service
-    return service
 
 @pytest.mark.asyncio
-async def test_handle_no_shows_marks_appointment_and_creates_infraction(queue_service, mock_visit_call_crud, mock_appointment_crud, mock_infraction_service):
-    # Setup test data
-    patient_id = uuid4()
-    appointment_id = uuid4()
-    doctor_id = uuid4()
-    room_id = uuid4()
-
-    # Create a mock patient
-    mock_patient = Patient(
-        patient_id=patient_id,
-        card_number="1234567890",
-        name="Test Patient",
-        password_hash="hashed_password",
-        dob=date(1990, 1, 1),
-        phone="123-456-7890",
-        email="test@example.com"
-    )
+async def test_handle_no_shows_marks_overdue_calls_in_bulk(session, clinic):
+    clock, schedule, checkins = clinic
 
-    # Create a mock appointment
-    mock_appointment = Appointment(
-        appointment_id=appointment_id,
-        patient_id=patient_id,
-        doctor_id=doctor_id,
-        date=date.today(),
-        time_period="morning",
-        status="checked_in"
-    )
+    assert await QueueService(session, clock=clock).handle_no_shows() == 1
+    session.commit()
 
-    # Create a mock visit call that is older than 3 minutes
-    mock_visit_call = VisitCall(
-        call_id=uuid4(),
-        appointment_id=appointment_id,
-        ticket_sequence=1,
-        ticket_number="A1",
-        called_at=datetime.now() - timedelta(minutes=5),
-        called_by=uuid4(),
-        call_type="call",
-        call_status="active"
-    )
+    session.expire_all()
+    statuses = {number: (c.status, c.appointment.status) for number, c in checkins.items()}
+    assert statuses == {"A001": ("no_show", "no_show"), "A002": ("checked_in", "checked_in"),
+                        "A003": ("checked_in", "checked_in")}
+    assert {(c.ticket_number, c.call_status) for c in session.query(VisitCall)} == {
+        ("A001", "expired"), ("A002", "active"), ("A003", "attended")}
+    infraction = session.query(Infraction).one()
+    assert (infraction.appointment_id, infraction.infraction_type) == (checkins["A001"].appointment_id, "no_show")
+    event = session.query(QueueEvent).one()
+    assert (event.schedule_id, event.event_type, event.checkin_id, event.ticket_number, event.data) == (
+        schedule.schedule_id, "no_show", checkins["A001"].checkin_id, "A001", {"automatic": True})
 
-    # Configure mocks
-    mock_visit_call_crud.get_potential_no_shows.return_value = [mock_visit_call]
-    mock_appointment_crud.get.return_value = mock_appointment # Corrected method name
-    mock_appointment_crud.update_status.return_value = None # No need to return anything specific # Corrected method name
-    mock_infraction_service.create_infraction.return_value = None # No need to return anything specific
-
-    # Call the method under test
-    await queue_service.handle_no_shows()
-
-    # Assertions
-    mock_visit_call_crud.get_potential_no_shows.assert_called_once()
-    mock_appointment_crud.get.assert_called_once_with(queue_service.db, appointment_id) # Corrected method name and added db
-    mock_appointment_crud.update_status.assert_called_once_with(
-        queue_service.db, # Pass db as positional argument
-        appointment_id=appointment_id,
-        new_status="no_show"
-    )
-    mock_infraction_service.create_infraction.assert_called_once_with(
-        patient_id=patient_id,
-        appointment_id=appointment_id,
-        infraction_type="no_show"
-    )
-
-@pytest.mark.asyncio
-async def test_handle_no_shows_does_nothing_if_no_potential_no_shows(queue_service, mock_visit_call_crud, mock_appointment_crud, mock_infraction_service):
-    mock_visit_call_crud.get_potential_no_shows.return_value = []
-
-    await queue_service.handle_no_shows()
-
-    mock_visit_call_crud.get_potential_no_shows.assert_called_once()
-    mock_appointment_crud.get.assert_not_called() # Corrected method name
-    mock_appointment_crud.update_status.assert_not_called() # Corrected method name
-    mock_infraction_service.create_infraction.assert_not_called()
 
 @pytest.mark.asyncio
-async def test_handle_no_shows_does_nothing_if_appointment_status_not_checked_in_or_waiting(queue_service, mock_visit_call_crud, mock_appointment_crud, mock_infraction_service):
-    patient_id = uuid4()
-    appointment_id = uuid4()
-    doctor_id = uuid4()
-    room_id = uuid4()
-
-    mock_appointment = Appointment(
-        appointment_id=appointment_id,
-        patient_id=patient_id,
-        doctor_id=doctor_id,
-        date=date.today(),
-        time_period="morning",
-        status="completed" # Already completed
-    )
-
-    mock_visit_call = VisitCall(
-        call_id=uuid4(),
-        appointment_id=appointment_id,
-        ticket_sequence=1,
-        ticket_number="A1",
-        called_at=datetime.now() - timedelta(minutes=5),
-        called_by=uuid4(),
-        call_type="call",
-        call_status="active"
-    )
+async def test_handle_no_shows_does_nothing_the_second_time(session, clinic):
+    clock, _, _ = clinic
+    service = QueueService(session, clock=clock)
+    await service.handle_no_shows()
+    session.commit()
 
-    mock_visit_call_crud.get_potential_no_shows.return_value = [mock_visit_call]
-    mock_appointment_crud.get.return_value = mock_appointment # Corrected method name
+    assert await service.handle_no_shows() == 0
+    assert session.query(Infraction).count() == 1
 
-    await queue_service.handle_no_shows()
 
-    mock_visit_call_crud.get_potential_no_shows.assert_called_once()
-    mock_appointment_crud.get.assert_called_once_with(queue_service.db, appointment_id) # Corrected method name and added db
-    mock_appointment_crud.update_status.assert_not_called() # Corrected method name
-    mock_infraction_service.create_infraction.assert_not_called()
\ No newline at end of file
+def test_no_show_sweep_is_scheduled():
+    assert "no_show_sweep" in build_scheduler().jobs
@@ -0,0 +1,97 @@
+import uuid
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import crud_leave_request
+from app.db.base import Base
+from app.models.doctor import Doctor
+from app.models.leave_request import LeaveRequest
+from app.models.schedule import Schedule
+from app.schemas.schedule import LeaveRequestRangeCreate
+from app.services.schedule_service import ScheduleService
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def session(engine):
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def doctor(session):
+    doctor = Doctor(doctor_id=uuid.uuid4(), doctor_login_id="doc", password_hash="x",
+                    name="王醫師", specialty="家醫科", email="doc@example.com")
+    session.add(doctor)
+    session.commit()
+    return doctor
+
+
+def _schedule(doctor, day, period, booked=0):
+    return Schedule(doctor_id=doctor.doctor_id, date=day, time_period=period,
+                    status="available", max_patients=10, booked_patients=booked)
+
+
+def test_range_leave_updates_existing_and_creates_placeholders(session, doctor):
+    existing = _schedule(doctor, date(2025, 3, 3), "morning")
+    session.add(existing)
+    session.add(LeaveRequest(schedule=existing, doctor_id=doctor.doctor_id, reason="舊原因"))
+    session.commit()
+
+    result = ScheduleService().request_doctor_leave_range(
+        session, doctor_id=doctor.doctor_id,
+        leave_request_in=LeaveRequestRangeCreate(
+            start_date=date(2025, 3, 3), end_date=date(2025, 3, 5),
+            time_periods=["morning", "afternoon"], reason="出國開會",
+        ),
+    )
+
+    assert len(result) == 6
+    assert {(s.status, s.max_patients) for s in result} == {("leave_pending", 0)}
+    assert session.query(Schedule).count() == 6
+    reasons = [r.reason for r in session.query(LeaveRequest).all()]
+    assert len(reasons) == 6 and set(reasons) == {"出國開會"}
+
+
+def test_range_leave_rejects_booked_slots_without_writing(session, doctor):
+    session.add_all([
+        _schedule(doctor, date(2025, 3, 3), "morning"),
+        _schedule(doctor, date(2025, 3, 4), "night", booked=2),
+    ])
+    session.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        crud_leave_request.request_range_leave(
+            session, doctor_id=doctor.doctor_id, start_date=date(2025, 3, 1), end_date=date(2025, 3, 10),
+            time_periods=["morning", "night"], reason="出國開會",
+        )
+    session.rollback()
+
+    assert exc.value.status_code == 409
+    assert "2025-03-04" in exc.value.detail
+    assert session.query(LeaveRequest).count() == 0
+    assert session.query(Schedule).count() == 2
+
+
+def test_range_leave_statement_count_is_independent_of_range(engine, session, doctor):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    crud_leave_request.apply_range_leave(
+        session, doctor_id=doctor.doctor_id, start_date=date(2025, 1, 1), end_date=date(2025, 6, 29),
+        time_periods=["morning", "afternoon", "night"], reason="長期休假",
+    )
+
+    assert session.query(Schedule).count() == 180 * 3
+    assert len(statements) <= 6
@@ -0,0 +1,115 @@
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db import replicas
+from app.core.security import create_access_token
+from app.db.replicas import InMemoryLastWriteStore, ReadYourWritesMiddleware, ReplicaRouter, get_read_db
+from app.db.session import get_db, unit_of_work
+
+
+class FakeLag:
+    def __init__(self, lags):
+        self.lags = lags
+        self.calls = 0
+
+    def __call__(self, engine):
+        self.calls += 1
+        lag = self.lags[str(engine.url)]
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+
+
+@pytest.fixture
+def engines(tmp_path):
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine, name in [(primary, "primary"), (replica, "replica")]:
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE origin (name TEXT)"))
+            connection.execute(text("INSERT INTO origin VALUES (:name)"), {"name": name})
+    return primary, replica
+
+
+def test_router_skips_lagging_or_unreachable_replicas(engines):
+    _, replica = engines
+    lag = FakeLag({str(replica.url): 0.2})
+    router = ReplicaRouter([replica], max_lag_seconds=1, check_interval=0, lag_probe=lag)
+    assert router.choose() is router.replicas[0]
+
+    lag.lags[str(replica.url)] = 5
+    assert router.choose() is None
+
+    lag.lags[str(replica.url)] = ConnectionError("down")
+    assert router.choose() is None
+
+
+def test_read_your_writes_waits_for_replica_to_catch_up(engines):
+    _, replica = engines
+    router = ReplicaRouter([replica], max_lag_seconds=2, check_interval=0,
+                           lag_probe=FakeLag({str(replica.url): 0.5}))
+    assert router.choose(since_last_write=0.1) is None
+    assert router.choose(since_last_write=0.6) is router.replicas[0]
+
+
+def test_lag_probe_is_cached(engines):
+    _, replica = engines
+    now = [0.0]
+    lag = FakeLag({str(replica.url): 0.1})
+    router = ReplicaRouter([replica], check_interval=1, lag_probe=lag, clock=lambda: now[0])
+    router.choose()
+    router.choose()
+    assert lag.calls == 1
+    now[0] = 1.5
+    router.choose()
+    assert lag.calls == 2
+
+
+def _bearer(sub):
+    return {"Authorization": f"Bearer {create_access_token({'sub': sub, 'role': 'patient'})}"}
+
+
+@pytest.mark.asyncio
+async def test_get_read_db_routes_and_write_pins_the_writer_to_primary(engines, monkeypatch):
+    primary, replica = engines
+    router = ReplicaRouter([replica], max_lag_seconds=2, check_interval=0,
+                           lag_probe=FakeLag({str(replica.url): 0.5}))
+    store = InMemoryLastWriteStore()
+    monkeypatch.setattr(replicas, "replica_router", router)
+    monkeypatch.setattr(replicas, "last_writes", store)
+
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, router=router, store=store)
+    PrimarySession = sessionmaker(bind=primary)
+    primary_sessions = []
+
+    def override_get_db():
+        with unit_of_work(PrimarySession) as db:
+            primary_sessions.append(db)
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    @app.get("/origin")
+    def origin(db: Session = Depends(get_read_db, scope="function")):
+        return {"origin": db.execute(text("SELECT name FROM origin")).scalar()}
+
+    @app.post("/book")
+    def book():
+        return {"ok": True}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.get("/origin", headers=_bearer("writer"))).json() == {"origin": "replica"}
+        assert primary_sessions == []
+
+        # Same flow as the SPA: bearer token only, no cookies carried between requests
+        response = await client.post("/book", headers=_bearer("writer"))
+        assert not response.cookies
+        assert (await client.get("/origin", headers=_bearer("writer"))).json() == {"origin": "primary"}
+        assert len(primary_sessions) == 1
+        # Other users keep reading from the replica
+        assert (await client.get("/origin", headers=_bearer("someone-else"))).json() == {"origin": "replica"}
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.scheduler import SCHEDULER_TIMEZONE, Job, LeaderElector, Scheduler
+from app.db.base import Base
+from app.models.doctor import Doctor
+from app.models.room_day import RoomDay
+from app.models.schedule import Schedule
+from app.services.clinic_open_service import ClinicOpenService
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def session(engine):
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def schedules(session):
+    doctor = Doctor(doctor_id=uuid.uuid4(), doctor_login_id="doc", password_hash="x",
+                    name="王醫師", specialty="家醫科", email="doc@example.com")
+    session.add(doctor)
+    session.flush()
+    rows = [
+        Schedule(doctor_id=doctor.doctor_id, date=date(2025, 3, 3), time_period="morning", status="available"),
+        Schedule(doctor_id=doctor.doctor_id, date=date(2025, 3, 3), time_period="morning", status="leave"),
+        Schedule(doctor_id=doctor.doctor_id, date=date(2025, 3, 3), time_period="afternoon", status="available"),
+    ]
+    session.add_all(rows)
+    session.commit()
+    return rows
+
+
+def test_open_due_sessions_opens_only_current_available_schedules(session, schedules):
+    now = datetime(2025, 3, 3, 8, 5, tzinfo=SCHEDULER_TIMEZONE)
+    opened = ClinicOpenService(session).open_due_sessions(now)
+
+    assert opened == {"morning": [schedules[0].schedule_id]}
+    session.expire_all()
+    assert session.query(RoomDay).count() == 1
+    assert [s.status for s in schedules] == ["open", "leave", "available"]
+
+
+def test_open_due_sessions_is_idempotent(session, schedules):
+    now = datetime(2025, 3, 3, 8, 5, tzinfo=SCHEDULER_TIMEZONE)
+    ClinicOpenService(session).open_due_sessions(now)
+    again = ClinicOpenService(session).open_due_sessions(now)
+
+    assert again == {"morning": []}
+    assert session.query(RoomDay).count() == 1
+
+
+def test_open_due_sessions_outside_window_does_nothing(session, schedules):
+    now = datetime(2025, 3, 3, 12, 0, tzinfo=SCHEDULER_TIMEZONE)
+    assert ClinicOpenService(session).open_due_sessions(now) == {}
+
+
+class FakeClock:
+    def __init__(self, start):
+        self.current = start
+
+    def __call__(self):
+        return self.current
+
+
+async def _tick(scheduler):
+    """One scheduler tick, waiting for the jobs it started."""
+    tasks = await scheduler.tick()
+    await asyncio.gather(*tasks)
+    return tasks
+
+
+def test_scheduler_runs_due_jobs_and_records_metrics(engine):
+    clock = FakeClock(datetime(2025, 3, 3, 7, 59, tzinfo=SCHEDULER_TIMEZONE))
+    scheduler = Scheduler(LeaderElector(engine), now=clock)
+    calls = []
+    scheduler.add_job(Job(name="daily", func=lambda: calls.append("daily"), at_times=[time(8, 0)]))
+    scheduler.add_job(Job(name="boom", func=lambda: 1 / 0, interval=timedelta(seconds=60), run_on_start=True))
+
+    asyncio.run(_tick(scheduler))
+    assert calls == []
+    assert scheduler.jobs["boom"].metrics.failures == 1
+
+    clock.current += timedelta(minutes=1, seconds=5)
+    asyncio.run(_tick(scheduler))
+    daily = scheduler.jobs["daily"]
+    assert calls == ["daily"]
+    assert daily.metrics.runs == 1
+    assert daily.metrics.last_lag_ms == pytest.approx(5000)
+    assert daily.next_run == datetime(2025, 3, 4, 8, 0, tzinfo=SCHEDULER_TIMEZONE)
+
+    snapshot = scheduler.snapshot()
+    assert snapshot["is_leader"] is True
+    assert snapshot["jobs"]["boom"]["runs"] == 2
+    assert "ZeroDivisionError" in snapshot["jobs"]["boom"]["last_error"]
+
+
+def test_slow_job_does_not_hold_up_other_jobs(engine):
+    clock = FakeClock(datetime(2025, 3, 3, 3, 30, tzinfo=SCHEDULER_TIMEZONE))
+    scheduler = Scheduler(LeaderElector(engine), now=clock)
+    release = threading.Event()
+    calls = []
+    scheduler.add_job(Job(name="slow", func=release.wait, interval=timedelta(seconds=60), run_on_start=True))
+    scheduler.add_job(Job(name="fast", func=lambda: calls.append("fast"),
+                          interval=timedelta(seconds=60), run_on_start=True))
+
+    async def scenario():
+        slow, fast = await scheduler.tick()
+        await fast
+        assert calls == ["fast"]
+        assert not slow.done()
+
+        clock.current += timedelta(seconds=60)
+        assert len(await _tick(scheduler)) == 1
+        assert calls == ["fast", "fast"]
+        assert scheduler.jobs["slow"].metrics.skipped == 1
+
+        release.set()
+        await slow
+
+    asyncio.run(scenario())
+    assert scheduler.jobs["slow"].metrics.runs == 1
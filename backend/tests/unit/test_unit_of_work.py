@@ -0,0 +1,80 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.api.dependencies import get_current_active_doctor
+from app.api.routers import doctor_clinic_management
+from app.models.appointment import Appointment
+from app.models.checkin import Checkin
+from app.models.infraction import Infraction
+from app.models.visit_call import VisitCall
+from app.services.infraction_service import InfractionService
+
+
+@pytest.fixture
+def clinic(make_clinic):
+    """A session in progress: A001 seen, A002 and A003 waiting, called up to A001."""
+    return make_clinic(["seen", "checked_in", "checked_in"], called_up_to=1)
+
+
+@pytest.fixture
+def client(clinic_app, clinic):
+    app = clinic_app()
+    app.include_router(doctor_clinic_management.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_active_doctor] = lambda: clinic[0]
+    return TestClient(app)
+
+
+@pytest.fixture
+def commits(engine):
+    counter = []
+    event.listen(engine, "commit", lambda conn: counter.append(conn))
+    return counter
+
+
+def _status(session, model, **key):
+    session.expire_all()
+    return session.query(model).filter_by(**key).one().status
+
+
+def test_call_next_patient_commits_once(client, clinic, session, commits):
+    _, schedule, checkins = clinic
+    response = client.post(f"/api/v1/doctor/schedules/{schedule.schedule_id}/call-next-patient")
+
+    assert response.status_code == 200 and len(commits) == 1
+    assert _status(session, Checkin, checkin_id=checkins['A002'].checkin_id) == "seen"
+    assert _status(session, Appointment, appointment_id=checkins['A002'].appointment_id) == "seen"
+    assert session.query(VisitCall).filter_by(appointment_id=checkins['A002'].appointment_id).count() == 1
+
+
+def test_mark_no_show_and_re_check_in_commit_once_each(client, clinic, session, commits):
+    _, schedule, checkins = clinic
+    base = f"/api/v1/doctor/schedules/{schedule.schedule_id}/checkins/{checkins['A003'].checkin_id}"
+
+    assert client.post(f"{base}/mark-no-show").status_code == 200
+    assert len(commits) == 1
+    assert _status(session, Appointment, appointment_id=checkins['A003'].appointment_id) == "no_show"
+    assert session.query(Infraction).filter_by(appointment_id=checkins['A003'].appointment_id).count() == 1
+
+    response = client.post(f"{base}/re-check-in")
+    assert response.status_code == 200 and len(commits) == 2
+    assert response.json()["new_ticket_sequence"] == 4
+    assert _status(session, Checkin, checkin_id=checkins['A003'].checkin_id) == "checked_in"
+    assert _status(session, Appointment, appointment_id=checkins['A003'].appointment_id) == "checked_in"
+
+
+def test_a_failing_step_rolls_back_the_whole_request(client, clinic, session, commits, monkeypatch):
+    _, schedule, checkins = clinic
+
+    async def failing_infraction(self, **kwargs):
+        raise RuntimeError("infraction store unavailable")
+
+    monkeypatch.setattr(InfractionService, "create_infraction", failing_infraction)
+    response = client.post(
+        f"/api/v1/doctor/schedules/{schedule.schedule_id}/checkins/{checkins['A003'].checkin_id}/mark-no-show"
+    )
+
+    assert response.status_code == 500 and commits == []
+    # The checkin and appointment updates that ran before the failure were not saved either
+    assert _status(session, Checkin, checkin_id=checkins['A003'].checkin_id) == "checked_in"
+    assert _status(session, Appointment, appointment_id=checkins['A003'].appointment_id) == "checked_in"
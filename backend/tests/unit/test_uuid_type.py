@@ -0,0 +1,28 @@
+import uuid
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+
+from app.db.base import UUIDType
+from app.models.admin import Admin
+from app.models.appointment import Appointment
+
+
+def test_postgresql_uses_native_uuid_columns():
+    ddl = str(CreateTable(Appointment.__table__).compile(dialect=postgresql.dialect()))
+    assert "appointment_id UUID NOT NULL" in ddl
+    assert "CHAR(36)" not in ddl
+
+
+def test_sqlite_keeps_char36_columns():
+    ddl = str(CreateTable(Admin.__table__).compile(dialect=sqlite.dialect()))
+    assert "admin_id CHAR(36) NOT NULL" in ddl
+
+
+def test_bind_param_per_dialect():
+    value = uuid.uuid4()
+    uuid_type = UUIDType()
+    assert uuid_type.process_bind_param(value, postgresql.dialect()) == value
+    assert uuid_type.process_bind_param(str(value), postgresql.dialect()) == value
+    assert uuid_type.process_bind_param(value, sqlite.dialect()) == str(value)
+    assert uuid_type.process_result_value(str(value), sqlite.dialect()) == value
@@ -0,0 +1,95 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.dependencies import get_current_active_doctor
+from app.api.routers import doctor_clinic_management
+from app.core.clock import APP_TIMEZONE
+from app.models.doctor import Doctor
+from app.models.room_day import RoomDay
+from app.models.schedule import Schedule
+from app.models.service_time_stat import ServiceTimeStat
+from app.models.visit_call import VisitCall
+from app.services.wait_time_service import (
+    WaitTimeService, estimate_wait_seconds, percentile_seconds, record_sample,
+)
+
+
+def _stat(samples):
+    stat = ServiceTimeStat(sample_count=0)
+    for seconds in samples:
+        record_sample(stat, seconds)
+    return stat
+
+
+def test_record_sample_tracks_mean_and_discards_outliers():
+    stat = _stat([300] * 20)
+    assert stat.ewma_seconds == pytest.approx(300)
+    assert stat.ewm_variance == pytest.approx(0)
+    assert record_sample(stat, 5) is False  # skipped ticket
+    assert record_sample(stat, 4 * 3600) is False  # lunch break
+    assert stat.sample_count == 20
+
+
+def test_percentiles_from_histogram():
+    stat = _stat([150, 1000] * 50)
+    assert 120 <= percentile_seconds(stat, 25) <= 180
+    assert 900 <= percentile_seconds(stat, 90) <= 1200
+
+
+def test_estimate_falls_back_to_ten_minutes_without_samples():
+    assert estimate_wait_seconds(None, 3)["expected"] == 1800
+    assert estimate_wait_seconds(_stat([300, 300]), 3)["expected"] == 1800
+
+
+def test_estimate_uses_model_and_current_consultation():
+    stat = _stat([240, 360] * 10)
+    estimate = estimate_wait_seconds(stat, 2, elapsed_in_current=100)
+    mean = stat.ewma_seconds
+    assert estimate["expected"] == pytest.approx(2 * mean + (mean - 100))
+    assert estimate["p90"] > estimate["expected"]
+
+
+def test_record_call_updates_summary_row(session):
+    doctor = Doctor(doctor_id=uuid.uuid4(), doctor_login_id="doc", password_hash="x",
+                    name="王醫師", specialty="家醫科", email="doc@example.com")
+    schedule = Schedule(doctor_id=doctor.doctor_id, date=date(2025, 3, 3), time_period="morning")
+    session.add_all([doctor, schedule])
+    session.flush()
+    room_day = RoomDay(schedule_id=schedule.schedule_id, next_sequence=10, current_called_sequence=0)
+    session.add(room_day)
+    session.commit()
+
+    service = WaitTimeService(session)
+    start = datetime(2025, 3, 3, 8, 0, tzinfo=APP_TIMEZONE)
+    for i in range(7):
+        service.record_call(room_day, schedule, start + timedelta(minutes=4 * i))
+    session.commit()
+
+    stat = service.get_stat(doctor.doctor_id, "morning")
+    assert stat.sample_count == 6
+    assert stat.ewma_seconds == pytest.approx(240)
+
+    now = start + timedelta(minutes=24, seconds=60)
+    estimate = service.estimate_minutes(schedule, room_day, waiting_count=3, now=now)
+    assert estimate["estimated_wait_time"] == 15  # 3 x 4 min + 3 min left of the current patient
+
+
+def test_call_next_patient_records_the_call_for_wait_time_history(make_clinic, clinic_app, session):
+    doctor, schedule, checkins = make_clinic(["checked_in"] * 3)
+    app = clinic_app(now=datetime(2025, 3, 3, 9, 0))
+    app.include_router(doctor_clinic_management.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_active_doctor] = lambda: doctor
+    client = TestClient(app)
+    for _ in range(2):
+        client.post(f"/api/v1/doctor/schedules/{schedule.schedule_id}/call-next-patient")
+
+    calls = session.query(VisitCall).order_by(VisitCall.ticket_sequence).all()
+    assert [(c.ticket_number, c.appointment_id) for c in calls] == [
+        ("A001", checkins["A001"].appointment_id), ("A002", checkins["A002"].appointment_id),
+    ]
+    assert {(c.call_type, c.call_status) for c in calls} == {("call", "attended")}
+    # Same time source as the service-time samples, not the database clock
+    assert {c.called_at.replace(tzinfo=None) for c in calls} == {datetime(2025, 3, 3, 9, 0)}
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.api.routers import health
+from app.core import warmup
+
+
+def _app():
+    app = FastAPI()
+    app.include_router(health.router, prefix="/health")
+    return app
+
+
+def test_warm_pool_opens_connections_concurrently(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'warm.db'}", pool_size=3)
+    assert warmup.warm_pool(engine, 3) == 3
+    assert engine.pool.checkedin() == 3
+
+
+def test_ready_immediately_when_warmup_disabled(monkeypatch):
+    monkeypatch.setenv("WARMUP_ENABLED", "false")
+    app = _app()
+    asyncio.run(warmup.start_warmup(app))
+    response = TestClient(app).get("/health/ready")
+    assert response.status_code == 200
+
+
+def test_not_ready_until_warmup_succeeds(monkeypatch):
+    monkeypatch.setenv("WARMUP_ENABLED", "true")
+    monkeypatch.setattr(warmup, "WARMUP_RETRY_SECONDS", 0.01)
+    attempts = []
+
+    def flaky_warmup(app):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("database starting")
+        return {"pool_ms": 1.0}
+
+    monkeypatch.setattr(warmup, "run_warmup", flaky_warmup)
+    app = _app()
+    client = TestClient(app)
+
+    async def scenario():
+        await warmup.start_warmup(app)
+        assert client.get("/health/ready").status_code == 503
+        await asyncio.wait_for(app.state.warmup_task, timeout=2)
+
+    asyncio.run(scenario())
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["warmup"] == {"pool_ms": 1.0}
+    assert len(attempts) == 3
@@ -16,6 +16,7 @@ def get_admin_token(client: TestClient, db: Session) -> str:
             email="test@example.com",
         )
         crud_admin.create_admin(db, admin_in)
+        db.commit()  # CRUD only flushes; API requests read through their own session
     
     login_data = {
         "username": settings.FIRST_SUPERUSER,
@@ -21,4 +21,6 @@ def create_random_schedule(db: Session, doctor_id: uuid.UUID) -> crud_schedule.S
         date=random_date(),
         time_period="morning" # Use time_period instead of start and end
     )
-    return crud_schedule.create_schedule(db=db, schedule_in=schedule_in)
+    schedule = crud_schedule.create_schedule(db=db, schedule_in=schedule_in)
+    db.commit()  # CRUD only flushes; API requests read through their own session
+    return schedule
@@ -22,7 +22,9 @@ def create_random_doctor(db: Session) -> Doctor:
         specialty="Cardiology",
         email=random_email() # Add email field
     )
-    return crud_doctor.create_doctor(db=db, doctor_in=doctor_in)
+    doctor = crud_doctor.create_doctor(db=db, doctor_in=doctor_in)
+    db.commit()  # CRUD only flushes; API requests read through their own session
+    return doctor
 
 def create_random_admin(db: Session) -> Admin:
     admin_in = AdminCreate(
@@ -31,4 +33,6 @@ def create_random_admin(db: Session) -> Admin:
         name=random_lower_string(),
         email=random_email()
     )
-    return crud_admin.create_admin(db=db, admin_in=admin_in)
+    admin = crud_admin.create_admin(db=db, admin_in=admin_in)
+    db.commit()  # CRUD only flushes; API requests read through their own session
+    return admin
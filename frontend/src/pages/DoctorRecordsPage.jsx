@@ -178,14 +178,22 @@ const DoctorRecordsPage = () => {
     }
   };
 
-  const handleEdit = (record) => {
-    setEditingRecord(record);
-    setFormData({
-      summary: record.summary || '',
-      prescription: record.prescription || '',
-    });
-    setShowForm(true);
-    setPatientToCreateRecordFor(null); // Clear patient selected in form
+  const handleEdit = async (record) => {
+    // The list only carries a summary preview; load the full record before editing
+    setPageMessage('');
+    try {
+      const response = await api.get(`/api/v1/medical-records/${record.record_id}`);
+      setEditingRecord(record);
+      setFormData({
+        summary: response.data.summary || '',
+        prescription: response.data.prescription || '',
+      });
+      setShowForm(true);
+      setPatientToCreateRecordFor(null); // Clear patient selected in form
+    } catch (error) {
+      console.error('載入病歷內容失敗:', error);
+      setPageMessage('載入病歷內容失敗，請稍後再試。');
+    }
   };
 
   const handleDelete = async (recordId) => {
@@ -411,11 +419,7 @@ const DoctorRecordsPage = () => {
               <div className="record-content">
                 <div className="record-section">
                   <h4>主訴/診斷</h4>
-                  <p>{record.summary || '無'}</p>
-                </div>
-                <div className="record-section">
-                  <h4>處方籤</h4>
-                  <p>{record.prescription || '無'}</p>
+                  <p>{record.summary_preview || '無'}</p>
                 </div>
               </div>
             </div>
@@ -6,6 +6,7 @@ const MedicalRecordsPage = () => {
   const [records, setRecords] = useState([]); // Keep original records for processing
   const [groupedRecords, setGroupedRecords] = useState({}); // New state for grouped records
   const [expandedGroups, setExpandedGroups] = useState({}); // New state to manage expanded/collapsed groups
+  const [recordDetails, setRecordDetails] = useState({}); // Full summary/prescription, loaded per record on demand
   const [loading, setLoading] = useState(true);
   const [errorMessage, setErrorMessage] = useState('');
 
@@ -46,6 +47,17 @@ const MedicalRecordsPage = () => {
     }
   };
 
+  // The list only carries a summary preview; the full record is fetched when opened
+  const loadRecordDetail = async (recordId) => {
+    try {
+      const response = await api.get(`/api/v1/medical-records/${recordId}`);
+      setRecordDetails(prev => ({ ...prev, [recordId]: response.data }));
+    } catch (error) {
+      console.error('載入病歷內容失敗:', error);
+      setErrorMessage('載入病歷內容失敗，請稍後再試。');
+    }
+  };
+
   const toggleGroupExpansion = (groupKey) => {
     setExpandedGroups(prev => ({
       ...prev,
@@ -105,14 +117,19 @@ const MedicalRecordsPage = () => {
                       <div className="record-content">
                         <div className="record-section">
                           <h4>診療摘要</h4>
-                          <p>{record.summary || '無摘要'}</p>
+                          <p>{recordDetails[record.record_id]?.summary ?? (record.summary_preview || '無摘要')}</p>
                         </div>
-                        {record.prescription && (
+                        {recordDetails[record.record_id]?.prescription && (
                           <div className="record-section">
                             <h4>處方籤</h4>
-                            <p>{record.prescription}</p>
+                            <p>{recordDetails[record.record_id].prescription}</p>
                           </div>
                         )}
+                        {!recordDetails[record.record_id] && (
+                          <button className="btn btn-secondary" onClick={() => loadRecordDetail(record.record_id)}>
+                            查看完整病歷
+                          </button>
+                        )}
                       </div>
                     </div>
                   ))}